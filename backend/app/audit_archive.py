@@ -0,0 +1,508 @@
+"""
+Arhiva audit loga (cold storage)
+Zapisi audit_log stariji od zadanog praga sele se u komprimirane
+segmente na lokalnom disku i brisu iz tablice.
+
+Segment se zapisuje jednom i vise se ne mijenja (append-only arhiva):
+- <ime>.seg - niz zlib blokova, svaki blok je NDJSON s do N redaka
+- <ime>.idx - sidecar indeks: tablica blokova + zapis fiksne duljine po
+  retku (vrijeme, id, entitet, entity_id, changed_by, akcija, blok, pozicija),
+  poredan po (changed_at, audit_log_id)
+- <ime>.entity.idx - (entitet, entity_id, changed_at, id) -> redak .idx
+- <ime>.changed_by.idx - (changed_by, changed_at, id) -> redak .idx
+- manifest.json - popis segmenata s rasponom vremena i ID-eva
+
+Citanje koristi mmap nad indeksima: binarno pretrazivanje po vremenu, a
+uz entity_id ili changed_by po sekundarnom indeksu, pa se citaju samo
+retci tog entiteta/korisnika. Ostali filtri se provjeravaju nad indeksom,
+a dekomprimiraju se samo blokovi s pogotcima. Otvoreni segmenti se drze u
+LRU cacheu (AUDIT_ARCHIVE_OPEN_SEGMENTS).
+
+Arhivirani zapisi su uvijek stariji od svih zapisa u tablici, pa se
+keyset paginacija nastavlja iz tablice u arhivu.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import get_settings
+from .database import get_connection
+from . import metrics
+
+
+settings = get_settings()
+
+MANIFEST_NAME = "manifest.json"
+ACTIONS = ("INSERT", "UPDATE", "DELETE")
+
+_INDEX_MAGIC = b"ALIX"
+_INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<4sHII")     # magic, verzija, broj blokova, broj redaka
+_BLOCK_ENTRY = struct.Struct("<QI")         # offset u .seg, duljina bloka
+_ROW_ENTRY = struct.Struct("<qqiiHHII")     # changed_at (us), audit_log_id, entity_id,
+                                            # changed_by (-1 = NULL), entitet, akcija, blok, pozicija
+_SIDECAR_HEADER = struct.Struct("<4sHI")   # magic, verzija, broj zapisa
+_ENTITY_ENTRY = struct.Struct("<HiqqI")     # entitet, entity_id, changed_at (us), audit_log_id, redak
+_USER_ENTRY = struct.Struct("<iqqI")        # changed_by, changed_at (us), audit_log_id, redak
+_SIDECARS = {
+    "entity": (b"ALXE", _ENTITY_ENTRY),
+    "changed_by": (b"ALXU", _USER_ENTRY),
+}
+_NO_USER = -1
+_EPOCH = datetime(1970, 1, 1)
+
+_lock = threading.Lock()
+_manifest_cache: Dict[str, object] = {"mtime": None, "manifest": None}
+_segments: "OrderedDict[str, _Segment]" = OrderedDict()
+
+
+def _micros(value: datetime) -> int:
+    # Tablica i arhiva drze vrijeme bez zone (zona sesije baze)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _archive_dir() -> str:
+    return settings.audit_archive_dir
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+# ============== MANIFEST ==============
+
+def _empty_manifest() -> dict:
+    return {"version": _INDEX_VERSION, "segments": []}
+
+
+def load_manifest() -> dict:
+    """Ucitava manifest (s cacheom po mtime datoteke)"""
+    path = os.path.join(_archive_dir(), MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return _empty_manifest()
+    with _lock:
+        hit = _manifest_cache["mtime"] == mtime
+        metrics.record_cache("audit_archive_manifest", hit)
+        if not hit:
+            with open(path, "r", encoding="utf-8") as f:
+                _manifest_cache["manifest"] = json.load(f)
+            _manifest_cache["mtime"] = mtime
+        return _manifest_cache["manifest"]
+
+
+def _write_manifest(manifest: dict) -> None:
+    """Atomicno zamjenjuje manifest (tmp + fsync + rename)"""
+    path = os.path.join(_archive_dir(), MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    with _lock:
+        _manifest_cache["manifest"] = manifest
+        _manifest_cache["mtime"] = os.stat(path).st_mtime_ns
+
+
+def high_water(manifest: Optional[dict] = None) -> Optional[Tuple[datetime, int]]:
+    """Kljuc (changed_at, audit_log_id) najnovijeg arhiviranog zapisa"""
+    segments = (manifest or load_manifest())["segments"]
+    if not segments:
+        return None
+    last = segments[-1]
+    return datetime.fromisoformat(last["max_changed_at"]), last["max_audit_log_id"]
+
+
+# ============== SEGMENTI ==============
+
+class _SortedIndex:
+    """Sekundarni indeks segmenta: sortirani zapisi (kljuc..., redak) nad mmapom"""
+
+    def __init__(self, path: str, magic: bytes, entry: struct.Struct):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        found, version, self.count = _SIDECAR_HEADER.unpack_from(self.data, 0)
+        if found != magic or version != _INDEX_VERSION:
+            raise ValueError(f"Neispravan indeks {os.path.basename(path)}")
+        self.entry = entry
+
+    def entry_at(self, i: int) -> tuple:
+        return self.entry.unpack_from(self.data, _SIDECAR_HEADER.size + i * self.entry.size)
+
+    def bisect(self, key: tuple) -> int:
+        """Broj zapisa s kljucem manjim od key"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entry_at(mid)[:-1] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+def _write_sidecars(base: str, index_rows: List[tuple]) -> None:
+    """Zapisuje sekundarne indekse segmenta iz redaka glavnog .idx indeksa"""
+    entries = {
+        "entity": sorted(
+            (row[4], row[2], row[0], row[1], i) for i, row in enumerate(index_rows)
+        ),
+        "changed_by": sorted(
+            (row[3], row[0], row[1], i) for i, row in enumerate(index_rows)
+        ),
+    }
+    for kind, (magic, entry) in _SIDECARS.items():
+        path = f"{base}.{kind}.idx"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_SIDECAR_HEADER.pack(magic, _INDEX_VERSION, len(entries[kind])))
+            f.write(b"".join(entry.pack(*values) for values in entries[kind]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+class _Segment:
+    """Otvoreni segment: mmap nad sidecar indeksima, blokovi se citaju na zahtjev"""
+
+    def __init__(self, meta: dict):
+        self.meta = meta
+        base = os.path.join(_archive_dir(), meta["name"])
+        self.seg_path = base + ".seg"
+        with open(base + ".idx", "rb") as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.block_count, self.row_count = _INDEX_HEADER.unpack_from(self.index, 0)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            raise ValueError(f"Neispravan indeks segmenta {meta['name']}")
+        self.rows_offset = _INDEX_HEADER.size + self.block_count * _BLOCK_ENTRY.size
+        self.entity_codes = {name: code for code, name in enumerate(meta["entities"])}
+
+        for kind in _SIDECARS:
+            if not os.path.exists(f"{base}.{kind}.idx"):
+                raise ValueError(f"Nedostaje indeks {meta['name']}.{kind}.idx")
+        self.by_entity, self.by_user = (
+            _SortedIndex(f"{base}.{kind}.idx", magic, entry)
+            for kind, (magic, entry) in _SIDECARS.items()
+        )
+
+    def row(self, i: int) -> tuple:
+        return _ROW_ENTRY.unpack_from(self.index, self.rows_offset + i * _ROW_ENTRY.size)
+
+    def bisect(self, key: Tuple[int, int]) -> int:
+        """Broj redaka s kljucem (vrijeme, id) manjim od key"""
+        lo, hi = 0, self.row_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.row(mid)[:2] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read_block(self, block: int) -> List[dict]:
+        offset, length = _BLOCK_ENTRY.unpack_from(
+            self.index, _INDEX_HEADER.size + block * _BLOCK_ENTRY.size
+        )
+        with open(self.seg_path, "rb") as f:
+            f.seek(offset)
+            data = zlib.decompress(f.read(length))
+        rows = []
+        for line in data.decode("utf-8").splitlines():
+            row = json.loads(line)
+            row["changed_at"] = datetime.fromisoformat(row["changed_at"])
+            rows.append(row)
+        return rows
+
+
+def _segment(meta: dict) -> _Segment:
+    """
+    Otvoreni segment iz LRU cachea. Izbaceni segment se ne zatvara
+    eksplicitno - mmapovi se oslobadaju kad ga prestane koristiti i
+    citanje koje ga je vec dobilo.
+    """
+    with _lock:
+        segment = _segments.get(meta["name"])
+        metrics.record_cache("audit_archive_segment", segment is not None)
+        if segment is None:
+            segment = _segments[meta["name"]] = _Segment(meta)
+            while len(_segments) > max(1, settings.audit_archive_open_segments):
+                _segments.popitem(last=False)
+        else:
+            _segments.move_to_end(meta["name"])
+        return segment
+
+
+def _write_segment(name: str, rows: List[dict], block_rows: int) -> dict:
+    """Zapisuje .seg i .idx datoteke segmenta i vraca njegov zapis za manifest"""
+    base = os.path.join(_archive_dir(), name)
+    entities = sorted({row["entity_name"] for row in rows})
+    entity_codes = {entity: code for code, entity in enumerate(entities)}
+
+    blocks = []
+    entries = []
+    with open(base + ".seg", "wb") as seg:
+        for block_no, start in enumerate(range(0, len(rows), block_rows)):
+            chunk = rows[start:start + block_rows]
+            payload = "\n".join(
+                json.dumps(row, default=_json_default, ensure_ascii=False) for row in chunk
+            ).encode("utf-8")
+            data = zlib.compress(payload, 6)
+            blocks.append((seg.tell(), len(data)))
+            seg.write(data)
+            for position, row in enumerate(chunk):
+                entries.append((
+                    _micros(row["changed_at"]), row["audit_log_id"], row["entity_id"],
+                    _NO_USER if row["changed_by"] is None else row["changed_by"],
+                    entity_codes[row["entity_name"]], ACTIONS.index(row["action"]),
+                    block_no, position
+                ))
+        seg.flush()
+        os.fsync(seg.fileno())
+
+    with open(base + ".idx", "wb") as idx:
+        idx.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, len(blocks), len(rows)))
+        for offset, length in blocks:
+            idx.write(_BLOCK_ENTRY.pack(offset, length))
+        idx.write(b"".join(_ROW_ENTRY.pack(*entry) for entry in entries))
+        idx.flush()
+        os.fsync(idx.fileno())
+    _write_sidecars(base, entries)
+
+    return {
+        "name": name,
+        "rows": len(rows),
+        "blocks": len(blocks),
+        "entities": entities,
+        "min_changed_at": rows[0]["changed_at"].isoformat(),
+        "max_changed_at": rows[-1]["changed_at"].isoformat(),
+        "min_audit_log_id": min(row["audit_log_id"] for row in rows),
+        "max_audit_log_id": max(row["audit_log_id"] for row in rows),
+        "bytes": os.path.getsize(base + ".seg"),
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+# ============== ARHIVIRANJE ==============
+
+def archive_old_logs(days_to_keep: Optional[int] = None) -> List[dict]:
+    """
+    Seli zapise starije od days_to_keep dana u nove segmente.
+    Svaki segment: zapis datoteka -> manifest -> DELETE i COMMIT.
+    Ako proces padne nakon manifesta, zapisi zadnjeg segmenta brisu
+    se iz tablice pri sljedecem pokretanju.
+    Vraca zapise manifesta novih segmenata.
+    """
+    days_to_keep = days_to_keep or settings.audit_archive_after_days
+    if days_to_keep <= 0:
+        return []
+    os.makedirs(_archive_dir(), exist_ok=True)
+
+    created = []
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET search_path TO employee_management")
+            cur.execute("SELECT pg_try_advisory_lock(hashtext('audit_archive')) AS locked")
+            if not cur.fetchone()["locked"]:
+                conn.rollback()
+                return []
+            conn.commit()
+
+            try:
+                manifest = load_manifest()
+                if manifest["segments"]:
+                    _delete_archived(cur, _segment(manifest["segments"][-1]))
+                    conn.commit()
+
+                cutoff = datetime.now() - timedelta(days=days_to_keep)
+                while True:
+                    mark = high_water(manifest) or (datetime.min, 0)
+                    cur.execute("""
+                        SELECT audit_log_id, entity_name, entity_id, action, old_value,
+                               new_value, changed_by, changed_at, ip_address, payload_format
+                        FROM audit_log
+                        WHERE changed_at < %s AND (changed_at, audit_log_id) > (%s, %s)
+                        ORDER BY changed_at, audit_log_id
+                        LIMIT %s
+                    """, (cutoff, mark[0], mark[1], settings.audit_archive_segment_rows))
+                    rows = cur.fetchall()
+                    if not rows:
+                        conn.rollback()
+                        break
+
+                    name = f"segment_{len(manifest['segments']) + 1:06d}"
+                    meta = _write_segment(name, rows, settings.audit_archive_block_rows)
+                    manifest = {**manifest, "segments": manifest["segments"] + [meta]}
+                    _write_manifest(manifest)
+
+                    cur.execute(
+                        "DELETE FROM audit_log WHERE audit_log_id = ANY(%s)",
+                        ([row["audit_log_id"] for row in rows],)
+                    )
+                    conn.commit()
+                    created.append(meta)
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(hashtext('audit_archive'))")
+                conn.commit()
+    finally:
+        conn.close()
+    return created
+
+
+def _delete_archived(cur, segment: _Segment) -> None:
+    """Brise iz tablice zapise koji su vec u segmentu (oporavak nakon pada)"""
+    ids = [segment.row(i)[1] for i in range(segment.row_count)]
+    cur.execute("DELETE FROM audit_log WHERE audit_log_id = ANY(%s)", (ids,))
+
+
+# ============== CITANJE ==============
+
+def _candidate_rows(segment: _Segment, entity_code: Optional[int], entity_id: Optional[int],
+                    changed_by: Optional[int], lower: Tuple[int, int],
+                    upper: Tuple[int, int], newest_first: bool) -> Iterator[int]:
+    """
+    Retci segmenta s kljucem (vrijeme, id) u [lower, upper), po kljucu.
+    Uz entitet + entity_id ili changed_by cita raspon sekundarnog indeksa,
+    inace raspon glavnog indeksa po vremenu.
+    """
+    if entity_code is not None and entity_id is not None:
+        index, prefix = segment.by_entity, (entity_code, entity_id)
+    elif changed_by is not None:
+        index, prefix = segment.by_user, (changed_by,)
+    else:
+        lo, hi = segment.bisect(lower), segment.bisect(upper)
+        return iter(range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi))
+    lo, hi = index.bisect(prefix + lower), index.bisect(prefix + upper)
+    positions = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+    return (index.entry_at(i)[-1] for i in positions)
+
+
+def _iter_archived(entity_name: Optional[str], entity_id: Optional[int],
+                   action: Optional[str], changed_by: Optional[int],
+                   lower: Tuple[int, int], upper: Tuple[int, int],
+                   newest_first: bool) -> Iterator[dict]:
+    """Arhivirani zapisi s kljucem u [lower, upper) koji prolaze filtre, po kljucu"""
+    action_code = ACTIONS.index(action) if action in ACTIONS else None
+    if action is not None and action_code is None:
+        return
+
+    segments = load_manifest()["segments"]
+    for meta in (reversed(segments) if newest_first else segments):
+        if _micros(datetime.fromisoformat(meta["max_changed_at"])) < lower[0]:
+            if newest_first:
+                break
+            continue
+        if _micros(datetime.fromisoformat(meta["min_changed_at"])) > upper[0]:
+            if newest_first:
+                continue
+            break
+        if entity_name is not None and entity_name not in meta["entities"]:
+            continue
+
+        segment = _segment(meta)
+        entity_code = segment.entity_codes.get(entity_name)
+        blocks: Dict[int, List[dict]] = {}
+        for i in _candidate_rows(segment, entity_code, entity_id, changed_by,
+                                 lower, upper, newest_first):
+            _, _, row_entity_id, row_changed_by, row_entity, row_action, block, position = segment.row(i)
+            if entity_name is not None and row_entity != entity_code:
+                continue
+            if entity_id is not None and row_entity_id != entity_id:
+                continue
+            if action_code is not None and row_action != action_code:
+                continue
+            if changed_by is not None and row_changed_by != changed_by:
+                continue
+            if block not in blocks:
+                # Drzi samo nekoliko dekomprimiranih blokova (izvoz cijelih segmenata)
+                if len(blocks) >= 8:
+                    blocks.clear()
+                blocks[block] = segment.read_block(block)
+            yield blocks[block][position]
+
+
+def read_archived_logs(entity_name: Optional[str] = None, entity_id: Optional[int] = None,
+                       action: Optional[str] = None, changed_by: Optional[int] = None,
+                       from_time: Optional[datetime] = None, to_time: Optional[datetime] = None,
+                       before: Optional[Tuple[datetime, int]] = None,
+                       limit: int = 100,
+                       predicate: Optional[Callable[[dict], bool]] = None) -> List[dict]:
+    """
+    Vraca arhivirane zapise od najnovijeg prema starijima, s istim
+    filtrima kao /logs: vrijeme u [from_time, to_time], kljuc manji od before.
+    predicate se provjerava nad dekomprimiranim retkom (filtri nad payloadom).
+    """
+    upper = (2 ** 63 - 1, 0)
+    if before:
+        upper = (_micros(before[0]), before[1])
+    if to_time:
+        upper = min(upper, (_micros(to_time) + 1, -1))
+    lower = (_micros(from_time), -1) if from_time else (-2 ** 63, -1)
+
+    results = []
+    if limit <= 0:
+        return results
+    for row in _iter_archived(entity_name, entity_id, action, changed_by, lower, upper, True):
+        if predicate is not None and not predicate(row):
+            continue
+        results.append(row)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def iter_archived_logs(from_time: datetime, to_time: datetime,
+                       entity_name: Optional[str] = None, entity_id: Optional[int] = None,
+                       action: Optional[str] = None,
+                       changed_by: Optional[int] = None) -> Iterator[dict]:
+    """Arhivirani zapisi s changed_at u [from_time, to_time), kronoloski (izvoz)"""
+    yield from _iter_archived(entity_name, entity_id, action, changed_by,
+                              (_micros(from_time), -1), (_micros(to_time), -1), False)
+
+
+def archive_status() -> dict:
+    """Sazetak arhive za status endpoint"""
+    segments = load_manifest()["segments"]
+    return {
+        "directory": os.path.abspath(_archive_dir()),
+        "segments": len(segments),
+        "rows": sum(meta["rows"] for meta in segments),
+        "bytes": sum(meta["bytes"] for meta in segments),
+        "oldest": segments[0]["min_changed_at"] if segments else None,
+        "newest": segments[-1]["max_changed_at"] if segments else None,
+        "archive_after_days": settings.audit_archive_after_days,
+    }
+
+
+def archived_full_state_prefix(entity_name: str, entity_id: int,
+                               before: Tuple[datetime, int], limit: int = 1000) -> List[dict]:
+    """
+    Arhivirana povijest entiteta prije kljuca before, kronoloski, od zadnjeg
+    zapisa s cijelim stanjem (INSERT, DELETE ili 'full' UPDATE) - osnova za
+    rekonstrukciju diff zapisa. Cita najvise limit zapisa; ako sidro nije
+    nadjeno, prvi vraceni zapis je diff.
+    """
+    prefix = []
+    while len(prefix) < limit:
+        size = min(1000, limit - len(prefix))
+        page = read_archived_logs(entity_name=entity_name, entity_id=entity_id,
+                                  before=before, limit=size)
+        for row in page:
+            prefix.append(row)
+            if row["action"] != "UPDATE" or row.get("payload_format", "full") == "full":
+                return list(reversed(prefix))
+        if len(page) < size:
+            break
+        before = (page[-1]["changed_at"], page[-1]["audit_log_id"])
+    return list(reversed(prefix))
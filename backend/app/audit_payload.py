@@ -0,0 +1,70 @@
+"""
+Diff audit payloadi
+Kad je employee_management.audit_format = 'diff', UPDATE zapisi za users i
+tasks spremaju samo promijenjene kljuceve + kljuc entiteta (payload_format
+= 'diff'). Ovdje se iz povijesti entiteta ponovno slazu cijeli
+before/after pogledi kakve bi spremio 'full' format.
+
+Pomocne funkcije json_text/json_contains oponasaju ->> i @> nad
+payloadima koji se filtriraju izvan baze (arhiva audit loga).
+"""
+
+import json
+from typing import List, Optional
+
+
+# Kljuc entiteta koji trigger dodaje u diff payload
+ENTITY_KEYS = {
+    "users": "user_id",
+    "tasks": "task_id",
+}
+
+
+def _without_key(value: dict, key: Optional[str]) -> dict:
+    return {k: v for k, v in value.items() if k != key}
+
+
+def rebuild_full_views(entity_name: str, history: List[dict]) -> None:
+    """
+    Prolazi povijest jednog entiteta kronoloski (najstariji prvi) i diff
+    zapisima zamjenjuje old_value/new_value cijelim stanjem prije/poslije.
+    Povijest mora pocinjati zapisom s cijelim stanjem (INSERT ili 'full'
+    UPDATE) da bi rekonstrukcija bila potpuna. Mijenja retke na mjestu.
+    """
+    key = ENTITY_KEYS.get(entity_name)
+    state: Optional[dict] = None
+
+    for row in history:
+        if row['action'] == 'INSERT':
+            state = row['new_value']
+        elif row['action'] == 'DELETE':
+            state = None
+        elif row.get('payload_format') == 'diff':
+            before = {**(state or {}), **_without_key(row['old_value'] or {}, key)}
+            after = {**before, **_without_key(row['new_value'] or {}, key)}
+            row['old_value'], row['new_value'] = before, after
+            state = after
+        else:
+            state = row['new_value']
+
+
+def json_text(value) -> Optional[str]:
+    """Tekstualna vrijednost JSON polja kao sto je vraca PostgreSQL operator ->>"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def json_contains(value, pattern) -> bool:
+    """Python ekvivalent jsonb operatora @> (value sadrzi pattern)"""
+    if isinstance(pattern, dict):
+        return isinstance(value, dict) and all(
+            key in value and json_contains(value[key], item) for key, item in pattern.items()
+        )
+    if isinstance(pattern, list):
+        return isinstance(value, list) and all(
+            any(json_contains(element, item) for element in value) for item in pattern
+        )
+    if isinstance(value, bool) or isinstance(pattern, bool):
+        return value is pattern
+    return value == pattern
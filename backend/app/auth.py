@@ -11,6 +11,7 @@ from jose import JWTError, jwt
 import bcrypt
 from .config import get_settings
 from .database import get_db_dependency
+from . import metrics, tracing
 from .schemas import TokenData
 
 
@@ -24,14 +25,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verificira lozinku protiv hash-a"""
     password_bytes = plain_password.encode('utf-8')
     hash_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hash_bytes)
+    with metrics.track_bcrypt("verify"), tracing.span("bcrypt.verify"):
+        return bcrypt.checkpw(password_bytes, hash_bytes)
 
 
 def get_password_hash(password: str) -> str:
     """Generira bcrypt hash lozinke"""
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+    with metrics.track_bcrypt("hash"), tracing.span("bcrypt.hash"):
+        salt = bcrypt.gensalt()
+        return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -120,18 +123,19 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = decode_token(token)
-    if token_data is None:
-        raise credentials_exception
-    
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT user_id, username, email, first_name, last_name, 
-                   is_active, manager_id, created_at, updated_at
-            FROM users 
-            WHERE username = %s AND is_active = TRUE
-        """, (token_data.username,))
-        user = cur.fetchone()
+    with tracing.span("get_current_user"):
+        token_data = decode_token(token)
+        if token_data is None:
+            raise credentials_exception
+        
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT user_id, username, email, first_name, last_name, 
+                       is_active, manager_id, created_at, updated_at
+                FROM users 
+                WHERE username = %s AND is_active = TRUE
+            """, (token_data.username,))
+            user = cur.fetchone()
     
     if user is None:
         raise credentials_exception
@@ -202,7 +206,9 @@ def require_permission(permission_code: str):
         current_user: dict = Depends(get_current_active_user),
         conn = Depends(get_db_dependency)
     ) -> dict:
-        if not check_permission(conn, current_user['user_id'], permission_code):
+        with tracing.span("require_permission", permission=permission_code):
+            allowed = check_permission(conn, current_user['user_id'], permission_code)
+        if not allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Nemate dozvolu za ovu akciju (potrebno: {permission_code})"
@@ -278,3 +284,14 @@ def is_manager_of_user(conn, manager_id: int, employee_id: int) -> bool:
         )
         result = cur.fetchone()
         return result['is_manager'] if result else False
+
+
+def is_in_org_of_user(conn, manager_id: int, employee_id: int) -> bool:
+    """Provjerava da li je drugi korisnik u organizaciji prvog, na bilo kojoj razini"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT is_in_org(%s, %s) as in_org",
+            (manager_id, employee_id)
+        )
+        result = cur.fetchone()
+        return result['in_org'] if result else False
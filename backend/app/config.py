@@ -25,6 +25,67 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Audit export 
+    export_parallel_slices: int = 4      # broj dnevnih odsjecaka koji se citaju paralelno
+    export_batch_size: int = 2000        # broj redaka po fetch-u server-side kursora
+    export_queue_batches: int = 4        # max batch-eva u memoriji po odsjecku
+    
+    # Audit statistika 
+    rollup_refresh_interval_seconds: int = 300   # 0 = iskljuceno osvjezavanje rollupa
+    snapshot_every_changes: int = 50     # audit snapshot entiteta svakih N diff promjena od sidra
+    
+    # Retention (brisanje starih audit/login zapisa)
+    retention_batch_size: int = 5000     # broj zapisa po batch-u (jedan COMMIT)
+    retention_sleep_ms: int = 100        # pauza izmedju batch-eva
+    
+    # Zastita od brute-force prijava (klizni prozor neuspjelih prijava)
+    login_throttle_window_seconds: int = 300     # duljina kliznog prozora
+    login_throttle_ip_threshold: int = 20        # neuspjeha po IP adresi, 0 = iskljuceno
+    login_throttle_username_threshold: int = 10  # neuspjeha po korisnickom imenu, 0 = iskljuceno
+    login_throttle_flush_seconds: int = 30       # upis zbirnih zapisa u login_events
+    login_throttle_max_keys: int = 100000        # max pracenih IP adresa / korisnickih imena
+    
+    # Arhiva audit loga (cold storage)
+    audit_archive_dir: str = "audit_archive"      # direktorij segmenata i manifesta
+    audit_archive_after_days: int = 0    # arhiviraj zapise starije od N dana, 0 = iskljuceno
+    audit_archive_interval_seconds: int = 300   # razmak izmedju prolaza arhiviranja
+    audit_archive_segment_rows: int = 50000   # max redaka po segmentu
+    audit_archive_block_rows: int = 1000      # redaka po komprimiranom bloku
+    audit_archive_open_segments: int = 32     # max otvorenih segmenata (3 mmapa po segmentu)
+    
+    # Instrumentacija SQL upita
+    sql_slow_query_ms: int = 200         # ispis naredbi sporijih od ovoga, 0 = iskljuceno
+    sql_repeat_threshold: int = 10       # N+1 upozorenje kad se ista naredba ponovi vise puta, 0 = iskljuceno
+    sql_debug_headers: bool = False      # X-DB-* sazetak upita u headerima odgovora
+    
+    # Profiliranje zahtjeva (X-Profile header ili uzorkovanje)
+    profiling_token: str = ""            # vrijednost X-Profile headera, "" = iskljuceno
+    profiling_sample_rate: float = 0.0   # udio nasumicno profiliranih zahtjeva (0.0 - 1.0)
+    profiling_mode: str = "cprofile"     # cprofile (.pstats) ili sample (.collapsed za flamegraph)
+    profiling_sample_interval_ms: int = 5    # interval uzorkovanja stoga (sample nacin)
+    profiling_dir: str = "profiles"      # direktorij prstena profila
+    profiling_max_files: int = 50        # max spremljenih profila (najstariji se brisu)
+    
+    # Pracenje memorije po zahtjevu (tracemalloc usporava proces)
+    memory_tracking_enabled: bool = False
+    memory_tracking_frames: int = 25     # dubina stoga po alokaciji
+    memory_tracking_snapshot_rate: float = 0.1   # udio mjerenih zahtjeva sa snapshotom mjesta alokacije
+    memory_tracking_top_sites: int = 10  # mjesta alokacije po ruti
+    
+    # Tracing zahtjeva (OTLP/JSON spanovi)
+    tracing_sample_rate: float = 0.0     # udio uzorkovanih zahtjeva, 0 = samo uz dolazni traceparent
+    tracing_endpoint: str = ""           # OTLP/HTTP JSON kolektor, npr. http://localhost:4318/v1/traces
+    tracing_file: str = ""               # lokalna datoteka (jedan OTLP JSON batch po liniji)
+    tracing_service_name: str = "employee-management-api"
+    tracing_batch_size: int = 512        # spanova po batchu
+    tracing_flush_seconds: int = 5       # interval slanja batcheva
+    tracing_max_queue: int = 20000       # max spanova u memoriji (najstariji se odbacuju)
+    
+    # Prometheus metrike (/metrics)
+    metrics_multiprocess_dir: str = ""   # zajednicki direktorij snapshota workera, "" = jedan proces
+    metrics_snapshot_seconds: int = 10   # koliko cesto worker zapisuje svoj snapshot
+    metrics_stale_seconds: int = 120     # snapshoti stariji od ovoga se ignoriraju (ugaseni workeri)
+    
     @property
     def database_url(self) -> str:
         """Generira PostgreSQL connection string"""
@@ -3,16 +3,84 @@ Database Connection Module
 Povezivanje s PostgreSQL bazom podataka
 """
 
+import time
 import psycopg2
+from psycopg2.extensions import connection as _PgConnection
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 from typing import Generator
 from .config import get_settings
+from . import metrics, query_log, memory_tracking, tracing
 
 
 settings = get_settings()
 
 
+class MeteredCursor(RealDictCursor):
+    """
+    RealDictCursor koji mjeri SQL naredbe: trajanje i broj redaka po
+    normaliziranom tekstu naredbe za tekuci zahtjev (vidi query_log)
+    """
+
+    def _record(self, query, start: float, start_ns: int) -> None:
+        duration = time.perf_counter() - start
+        rows = max(self.rowcount, 0)
+        metrics.record_query(duration)
+        query_log.record_statement(self, query, duration, rows)
+        if tracing.current() is not None:
+            tracing.record_span(
+                "db.query", start_ns, tracing.SPAN_KIND_CLIENT,
+                **{"db.system": "postgresql",
+                   "db.statement": query_log.normalize_sql(query_log.query_text(query, self)),
+                   "db.rows": rows}
+            )
+
+    def execute(self, query, vars=None):
+        start, start_ns = time.perf_counter(), time.time_ns()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, start, start_ns)
+
+    def executemany(self, query, vars_list):
+        start, start_ns = time.perf_counter(), time.time_ns()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(query, start, start_ns)
+
+    def callproc(self, procname, vars=None):
+        start, start_ns = time.perf_counter(), time.time_ns()
+        try:
+            return super().callproc(procname, vars)
+        finally:
+            self._record(f"CALL {procname}", start, start_ns)
+
+    def fetchall(self):
+        rows = super().fetchall()
+        memory_tracking.checkpoint()
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        memory_tracking.checkpoint()
+        return rows
+
+
+class MeteredConnection(_PgConnection):
+    """Konekcija koja odrzava gauge otvorenih konekcija"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        metrics.inc("db_connections_opened_total")
+        metrics.inc("db_connections_open", 1)
+
+    def close(self):
+        if not self.closed:
+            metrics.inc("db_connections_open", -1)
+        super().close()
+
+
 def get_connection():
     """Kreira novu konekciju na bazu podataka"""
     return psycopg2.connect(
@@ -21,7 +89,8 @@ def get_connection():
         database=settings.database_name,
         user=settings.database_user,
         password=settings.database_password,
-        cursor_factory=RealDictCursor
+        connection_factory=MeteredConnection,
+        cursor_factory=MeteredCursor
     )
 
 
@@ -50,7 +119,8 @@ def get_db_dependency():
     FastAPI Dependency za database konekciju
     Koristi se u route-ovima
     """
-    conn = get_connection()
+    with tracing.span("db.connect"):
+        conn = get_connection()
     try:
         with conn.cursor() as cur:
             cur.execute("SET search_path TO employee_management")
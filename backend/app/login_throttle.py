@@ -0,0 +1,243 @@
+"""
+Zastita od brute-force prijava
+Klizni prozor neuspjelih prijava po IP adresi i po korisnickom imenu.
+
+Kad broj neuspjeha u prozoru prijedje prag, /auth/login odbija pokusaj
+(429) bez bcrypt provjere i bez upisa u login_events. Prag korisnickog
+imena vrijedi samo za adrese koje i same imaju neuspjehe - adresa bez
+njih ide na bcrypt provjeru, pa tudji pokusaji ne zakljucavaju vlasnika
+racuna. Brojace povecavaju samo stvarni bcrypt neuspjesi, ne odbijeni
+pokusaji, pa prozor istekne i dok napad traje. Odbijeni pokusaji
+se zbrajaju u memoriji i periodicki zapisuju kao jedan zbirni redak po
+IP adresi - funkcija log_failed_login_batch(). Ako je s adrese pokusano
+vise korisnickih imena (username spraying), korisnicko ime zapisa je '*';
+preko max_keys adresa nove adrese zbrajaju se pod 0.0.0.0.
+
+Brojaci su po procesu (svaki worker ima svoje), sto je dovoljno za
+gusenje napada: prag se efektivno mnozi brojem workera.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import get_settings
+from .database import get_db
+
+
+settings = get_settings()
+
+SPRAY_USERNAME = "*"        # zbirni zapis s vise korisnickih imena
+OVERFLOW_IP = "0.0.0.0"     # zbirni zapis adresa preko max_keys
+
+
+class _WindowCounter:
+    """
+    Brojac kliznog prozora s dva odsjecka (prethodni + trenutni):
+    procjena = prethodni * udio koji je jos u prozoru + trenutni.
+    Konstantna memorija po kljucu, neovisno o broju pokusaja.
+    """
+    __slots__ = ("window_start", "current", "previous", "first_seen", "last_seen")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.current = 0
+        self.previous = 0
+        self.first_seen = datetime.now()
+        self.last_seen = self.first_seen
+
+    def _rotate(self, now: float, window: float) -> None:
+        elapsed = now - self.window_start
+        if elapsed < window:
+            return
+        self.previous = self.current if elapsed < 2 * window else 0
+        self.current = 0
+        self.window_start = now - (elapsed % window)
+
+    def add(self, now: float, window: float) -> None:
+        self._rotate(now, window)
+        self.current += 1
+        self.last_seen = datetime.now()
+
+    def estimate(self, now: float, window: float) -> float:
+        self._rotate(now, window)
+        overlap = max(0.0, window - (now - self.window_start)) / window
+        return self.previous * overlap + self.current
+
+
+class LoginThrottle:
+    """Brojaci neuspjelih prijava i zbirni zapisi odbijenih pokusaja"""
+
+    def __init__(self, window_seconds: int, ip_threshold: int,
+                 username_threshold: int, max_keys: int):
+        self.window = float(window_seconds)
+        self.ip_threshold = ip_threshold
+        self.username_threshold = username_threshold
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._ips: Dict[str, _WindowCounter] = {}
+        self._usernames: Dict[str, _WindowCounter] = {}
+        self._pending: Dict[str, dict] = {}
+
+    @staticmethod
+    def _username_key(username: str) -> str:
+        return username.strip().lower()
+
+    def _over(self, counters: Dict[str, _WindowCounter], key: str,
+              threshold: int, now: float) -> bool:
+        counter = counters.get(key)
+        return threshold > 0 and counter is not None and counter.estimate(now, self.window) >= threshold
+
+    def _add(self, counters: Dict[str, _WindowCounter], key: str, now: float) -> None:
+        counter = counters.get(key)
+        if counter is None:
+            if len(counters) >= self.max_keys:
+                self._evict(counters, now)
+            counter = counters[key] = _WindowCounter(now)
+        counter.add(now, self.window)
+
+    def _evict(self, counters: Dict[str, _WindowCounter], now: float) -> None:
+        """Brise istekle kljuceve; ako ih je i dalje previse, najstariju polovicu"""
+        for key in [k for k, c in counters.items() if c.estimate(now, self.window) == 0]:
+            del counters[key]
+        if len(counters) >= self.max_keys:
+            oldest = sorted(counters, key=lambda k: counters[k].last_seen)
+            for key in oldest[:len(oldest) // 2]:
+                del counters[key]
+
+    def is_throttled(self, ip_address: str, username: str) -> bool:
+        """
+        Je li IP preko praga, ili korisnicko ime preko praga a IP ima
+        vlastite neuspjehe u prozoru
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._over(self._ips, ip_address, self.ip_threshold, now):
+                return True
+            if not self._over(self._usernames, self._username_key(username),
+                              self.username_threshold, now):
+                return False
+            counter = self._ips.get(ip_address)
+            return counter is not None and counter.estimate(now, self.window) > 0
+
+    def record_failure(self, ip_address: str, username: str) -> None:
+        """Biljezi neuspjelu prijavu (nakon bcrypt provjere)"""
+        now = time.monotonic()
+        with self._lock:
+            self._add(self._ips, ip_address, now)
+            self._add(self._usernames, self._username_key(username), now)
+
+    def record_throttled(self, ip_address: str, username: str, user_agent: str) -> None:
+        """Biljezi odbijeni pokusaj u zbirni zapis za login_events (brojaci ostaju)"""
+        seen = datetime.now()
+        with self._lock:
+            self._merge_pending({
+                "ip_address": ip_address, "username": username.strip(),
+                "user_agent": user_agent, "attempt_count": 1,
+                "first_attempt_at": seen, "last_attempt_at": seen,
+            })
+
+    def _merge_pending(self, item: dict) -> None:
+        """
+        Dodaje odbijene pokusaje zbirnom zapisu IP adrese. Broj zapisa je
+        ogranicen s max_keys; nove adrese preko granice idu pod OVERFLOW_IP.
+        """
+        key = item["ip_address"]
+        if key not in self._pending and len(self._pending) >= self.max_keys:
+            key = OVERFLOW_IP
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = {**item, "ip_address": key}
+            return
+        if self._username_key(pending["username"]) != self._username_key(item["username"]):
+            pending["username"] = SPRAY_USERNAME
+        pending["attempt_count"] += item["attempt_count"]
+        pending["first_attempt_at"] = min(pending["first_attempt_at"], item["first_attempt_at"])
+        if item["last_attempt_at"] >= pending["last_attempt_at"]:
+            pending["last_attempt_at"] = item["last_attempt_at"]
+            pending["user_agent"] = item["user_agent"]
+
+    def reset_username(self, username: str) -> None:
+        """Uspjesna prijava ponistava brojac korisnickog imena"""
+        with self._lock:
+            self._usernames.pop(self._username_key(username), None)
+
+    def drain_pending(self) -> List[dict]:
+        """Vraca i prazni zbirne zapise koji cekaju upis"""
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        return pending
+
+    def restore_pending(self, items: List[dict]) -> None:
+        """Vraca neupisane zbirne zapise (npr. baza nedostupna) za sljedeci pokusaj"""
+        with self._lock:
+            for item in items:
+                self._merge_pending(item)
+
+    def prune(self) -> None:
+        """Brise kljuceve bez neuspjeha u prozoru"""
+        now = time.monotonic()
+        with self._lock:
+            for counters in (self._ips, self._usernames):
+                for key in [k for k, c in counters.items() if c.estimate(now, self.window) == 0]:
+                    del counters[key]
+
+    def _top(self, counters: Dict[str, _WindowCounter], threshold: int,
+             now: float, top: int) -> List[dict]:
+        rows = []
+        for key, counter in counters.items():
+            failures = counter.estimate(now, self.window)
+            if failures > 0:
+                rows.append({
+                    "key": key,
+                    "failures": round(failures, 1),
+                    "throttled": threshold > 0 and failures >= threshold,
+                    "first_seen": counter.first_seen,
+                    "last_seen": counter.last_seen,
+                })
+        rows.sort(key=lambda row: row["failures"], reverse=True)
+        return rows[:top]
+
+    def snapshot(self, top: int = 20) -> dict:
+        """Trenutni brojaci za /audit/logins/failed/live"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "window_seconds": int(self.window),
+                "ip_threshold": self.ip_threshold,
+                "username_threshold": self.username_threshold,
+                "pending_aggregates": len(self._pending),
+                "pending_attempts": sum(p["attempt_count"] for p in self._pending.values()),
+                "ips": self._top(self._ips, self.ip_threshold, now, top),
+                "usernames": self._top(self._usernames, self.username_threshold, now, top),
+            }
+
+
+login_throttle = LoginThrottle(
+    settings.login_throttle_window_seconds,
+    settings.login_throttle_ip_threshold,
+    settings.login_throttle_username_threshold,
+    settings.login_throttle_max_keys,
+)
+
+
+def flush_pending(throttle: Optional[LoginThrottle] = None) -> int:
+    """Zapisuje zbirne zapise odbijenih pokusaja u login_events; vraca broj redaka"""
+    throttle = throttle or login_throttle
+    pending = throttle.drain_pending()
+    if pending:
+        try:
+            with get_db() as conn:
+                with conn.cursor() as cur:
+                    for item in pending:
+                        cur.execute(
+                            "SELECT log_failed_login_batch(%s, %s::INET, %s, %s, %s, %s)",
+                            (item["username"], item["ip_address"], item["user_agent"],
+                             item["attempt_count"], item["first_attempt_at"], item["last_attempt_at"])
+                        )
+        except Exception:
+            throttle.restore_pending(pending)
+            raise
+    throttle.prune()
+    return len(pending)
@@ -5,11 +5,22 @@ Interni sustav za upravljanje zaposlenicima i zadacima - Backend API
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
 import time
 
 # Import routera
-from .routers import auth, users, tasks, roles, audit
+from .routers import auth, users, tasks, roles, audit, diagnostics
+from .maintenance import start_background_jobs, stop_background_jobs
+from . import metrics, query_log, profiling, memory_tracking, tracing
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse sa spanom za serijalizaciju tijela odgovora"""
+
+    def render(self, content) -> bytes:
+        with tracing.span("serialize.json"):
+            return super().render(content)
 
 
 # Kreiranje FastAPI aplikacije
@@ -41,7 +52,8 @@ Ovaj API demonstrira korištenje naprednih mogućnosti PostgreSQL baze podataka:
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=TracedJSONResponse
 )
 
 
@@ -52,6 +64,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor", "X-Full-View-Partial", "X-Process-Time", "X-Profile-Id", "X-Trace-Id",
+        "X-DB-Queries", "X-DB-Statements", "X-DB-Time", "X-DB-Rows", "X-DB-Repeated", "X-DB-Slowest",
+    ],
 )
 
 
@@ -65,6 +81,103 @@ async def add_process_time_header(request: Request, call_next):
     return response
 
 
+# Middleware za profiliranje zahtjeva (X-Profile header ili uzorkovanje)
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    mode = profiling.requested_mode(request.headers)
+    if mode is None:
+        return await call_next(request)
+    profiler = profiling.RequestProfiler(mode)
+    if not profiler.start():
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        profiler.detach()
+        profiler.stop()
+        raise
+    profiler.detach()
+    route = _route_template(request)
+    
+    if "content-length" in response.headers:
+        # Tijelo je vec generirano (JSON i sl.) - profil je gotov
+        duration = profiler.stop()
+        name = profiler.name(request.method, route, response.status_code, duration)
+        await asyncio.to_thread(profiler.save, name)
+        response.headers[profiling.PROFILE_ID_HEADER] = name
+        return response
+    
+    # Streaming odgovor: profil obuhvaca i generiranje tijela
+    name = profiler.name(request.method, route, response.status_code, None)
+    response.headers[profiling.PROFILE_ID_HEADER] = name
+    body = response.body_iterator
+    
+    async def profiled_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            profiler.stop()
+            profiler.save(name)
+    
+    response.body_iterator = profiled_body()
+    return response
+
+
+# Middleware za pracenje vrsne alokacije memorije (MEMORY_TRACKING_ENABLED)
+@app.middleware("http")
+async def track_memory(request: Request, call_next):
+    token = memory_tracking.begin()
+    if token is None:
+        return await call_next(request)
+    try:
+        return await call_next(request)
+    finally:
+        memory_tracking.finish(token, _route_template(request))
+
+
+_route_templates = {}
+
+
+def _route_template(request: Request) -> str:
+    """Predlozak rute (/api/users/{user_id}) umjesto stvarne putanje - ogranicen broj labela"""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not _route_templates:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is not None:
+                _route_templates.setdefault(route.endpoint, route.path)
+    return _route_templates.get(endpoint, "unmatched")
+
+
+# Middleware za Prometheus metrike, sazetak SQL upita i tracing zahtjeva
+@app.middleware("http")
+async def collect_metrics(request: Request, call_next):
+    stats = metrics.RequestMetrics(path=request.url.path)
+    token = metrics.current_request.set(stats)
+    trace = tracing.start_request(request.method, request.url.path,
+                                  request.headers.get(tracing.TRACEPARENT_HEADER))
+    metrics.request_started()
+    start_time = time.perf_counter()
+    response = None
+    try:
+        response = await call_next(request)
+        return response
+    finally:
+        metrics.request_finished()
+        route = _route_template(request)
+        status_code = response.status_code if response is not None else 500
+        metrics.record_request(request.method, route, status_code,
+                               time.perf_counter() - start_time, stats)
+        query_log.finish_request(stats, route, response)
+        if trace is not None:
+            tracing.finish_request(trace, route, status_code)
+            if response is not None:
+                response.headers["X-Trace-Id"] = trace[0].trace_id
+        metrics.current_request.reset(token)
+
+
 # Exception handler za generičke greške
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
@@ -83,6 +196,7 @@ app.include_router(users.router, prefix="/api")
 app.include_router(tasks.router, prefix="/api")
 app.include_router(roles.router, prefix="/api")
 app.include_router(audit.router, prefix="/api")
+app.include_router(diagnostics.router, prefix="/api")
 
 
 # Root endpoint
@@ -101,7 +215,8 @@ async def root():
             "users": "/api/users",
             "tasks": "/api/tasks",
             "roles": "/api/roles",
-            "audit": "/api/audit"
+            "audit": "/api/audit",
+            "diagnostics": "/api/diagnostics"
         }
     }
 
@@ -129,6 +244,16 @@ async def health_check():
     }
 
 
+# Prometheus metrike
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Metrike u Prometheus text formatu (svi workeri ako je
+    postavljen METRICS_MULTIPROCESS_DIR)
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # Informacije o bazi podataka
 @app.get("/api/database-info", tags=["Database"])
 async def database_info():
@@ -156,29 +281,41 @@ async def database_info():
         "tables": [
             "users", "roles", "permissions", "tasks",
             "user_roles", "role_permissions", 
-            "login_events", "audit_log"
+            "login_events", "audit_log",
+            "audit_log_hourly", "login_events_hourly", "login_users_hourly",
+            "login_subnets_hourly",
+            "rollup_watermarks", "retention_jobs", "audit_snapshots",
+            "user_hierarchy"
         ],
         "functions": [
             "validate_email()", "generate_slug()", "check_password_strength()",
             "user_has_permission()", "get_user_permissions()", "get_user_roles()",
-            "is_manager_of()", "get_team_members()",
+            "is_manager_of()", "is_in_org()", "get_team_members()",
             "get_user_tasks()", "get_task_statistics()",
-            "log_login_attempt()"
+            "log_login_attempt()", "log_failed_login_batch()",
+            "get_audit_counts()", "get_login_counts()",
+            "login_subnet()", "get_login_subnet_counts()",
+            "create_retention_job()",
+            "audit_apply_change()", "get_entity_state_as_of()", "build_audit_snapshot_batch()"
         ],
         "procedures": [
             "create_user()", "update_user()", "deactivate_user()",
             "create_task()", "update_task_status()", "assign_task()",
             "assign_role()", "revoke_role()",
-            "cleanup_old_audit_logs()", "cleanup_old_login_events()"
+            "cleanup_old_audit_logs()", "cleanup_old_login_events()",
+            "refresh_audit_rollups()", "prune_audit_rollups()",
+            "run_retention_job()", "build_audit_snapshots()",
+            "rebuild_user_hierarchy()"
         ],
         "triggers": [
-            "trg_audit_users - audit log za korisnike",
-            "trg_audit_tasks - audit log za zadatke",
-            "trg_audit_user_roles - audit log za dodjelu uloga",
+            "trg_audit_users_insert/update/delete - audit log za korisnike (statement-level)",
+            "trg_audit_tasks_insert/update/delete - audit log za zadatke (statement-level)",
+            "trg_audit_user_roles_insert/delete - audit log za dodjelu uloga (statement-level)",
             "trg_users_updated_at - auto-update timestamp",
             "trg_roles_updated_at - auto-update timestamp",
             "trg_tasks_updated_at - auto-update timestamp",
-            "trg_validate_manager_hierarchy - validacija hijerarhije"
+            "trg_validate_manager_hierarchy - validacija hijerarhije",
+            "trg_user_hierarchy_insert/update - odrzavanje closure tablice user_hierarchy"
         ],
         "views": [
             "v_users_with_roles - korisnici s ulogama",
@@ -203,6 +340,8 @@ async def startup_event():
     print("  Dokumentacija: http://localhost:8000/docs")
     print("  ReDoc: http://localhost:8000/redoc")
     print("=" * 60)
+    memory_tracking.start_tracing()
+    start_background_jobs()
 
 
 # Shutdown event
@@ -211,4 +350,5 @@ async def shutdown_event():
     """
     Izvršava se pri zaustavljanju aplikacije
     """
+    await stop_background_jobs()
     print("Backend API zaustavljen.")
@@ -0,0 +1,154 @@
+"""
+Periodicki poslovi odrzavanja baze
+Pokrecu se u pozadini pri startu aplikacije.
+"""
+
+import asyncio
+from typing import Optional
+
+from .config import get_settings
+from .database import get_connection, get_db
+from .retention import resume_jobs
+from .audit_archive import archive_old_logs
+from .login_throttle import flush_pending
+from . import metrics, tracing
+
+
+settings = get_settings()
+
+_rollup_task: Optional[asyncio.Task] = None
+_archive_task: Optional[asyncio.Task] = None
+_throttle_task: Optional[asyncio.Task] = None
+_metrics_task: Optional[asyncio.Task] = None
+_tracing_task: Optional[asyncio.Task] = None
+
+
+def refresh_audit_rollups() -> None:
+    """Puni satne rollup tablice za audit statistiku (zatvoreni sati)"""
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            cur.execute("CALL refresh_audit_rollups()")
+
+
+def build_audit_snapshots() -> None:
+    """
+    Gradi snapshote stanja entiteta za as-of rekonstrukciju.
+    Procedura radi COMMIT izmedju batch-eva, pa treba autocommit konekciju.
+    """
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET search_path TO employee_management")
+            cur.execute("CALL build_audit_snapshots(%s)", (settings.snapshot_every_changes,))
+    finally:
+        conn.close()
+
+
+async def _rollup_loop(interval: int) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(refresh_audit_rollups)
+        except Exception as e:
+            print(f"Osvjezavanje audit rollupa nije uspjelo: {e}")
+        try:
+            await asyncio.to_thread(build_audit_snapshots)
+        except Exception as e:
+            print(f"Izgradnja audit snapshota nije uspjela: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _archive_loop(interval: int) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(archive_old_logs)
+        except Exception as e:
+            print(f"Arhiviranje audit loga nije uspjelo: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _throttle_flush_loop(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(flush_pending)
+        except Exception as e:
+            print(f"Upis zbirnih neuspjelih prijava nije uspio: {e}")
+
+
+async def _metrics_snapshot_loop(interval: int) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(metrics.write_snapshot)
+        except Exception as e:
+            print(f"Zapis snapshota metrika nije uspio: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _tracing_flush_loop(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(tracing.flush)
+        except Exception as e:
+            print(f"Slanje tracing spanova nije uspjelo: {e}")
+
+
+def start_background_jobs() -> None:
+    """Pokrece pozadinske poslove (poziva se iz startup eventa)"""
+    global _rollup_task, _archive_task, _throttle_task, _metrics_task, _tracing_task
+    try:
+        resumed = resume_jobs()
+        if resumed:
+            print(f"Nastavljeni retention poslovi: {resumed}")
+    except Exception as e:
+        print(f"Nastavljanje retention poslova nije uspjelo: {e}")
+    
+    interval = settings.rollup_refresh_interval_seconds
+    if interval > 0 and _rollup_task is None:
+        _rollup_task = asyncio.get_running_loop().create_task(_rollup_loop(interval))
+    
+    # Arhiviranje ne ovisi o rollupima - radi i kad je njihovo osvjezavanje iskljuceno
+    if settings.audit_archive_after_days > 0 and _archive_task is None:
+        _archive_task = asyncio.get_running_loop().create_task(
+            _archive_loop(max(1, settings.audit_archive_interval_seconds)))
+    
+    flush_interval = settings.login_throttle_flush_seconds
+    if flush_interval > 0 and _throttle_task is None:
+        _throttle_task = asyncio.get_running_loop().create_task(_throttle_flush_loop(flush_interval))
+    
+    if settings.metrics_multiprocess_dir and _metrics_task is None:
+        _metrics_task = asyncio.get_running_loop().create_task(
+            _metrics_snapshot_loop(max(1, settings.metrics_snapshot_seconds)))
+    
+    if (settings.tracing_endpoint or settings.tracing_file) and _tracing_task is None:
+        _tracing_task = asyncio.get_running_loop().create_task(
+            _tracing_flush_loop(max(1, settings.tracing_flush_seconds)))
+
+
+async def _cancel(task: Optional[asyncio.Task]) -> None:
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+async def stop_background_jobs() -> None:
+    """Zaustavlja pozadinske poslove (poziva se iz shutdown eventa)"""
+    global _rollup_task, _archive_task, _throttle_task, _metrics_task, _tracing_task
+    await _cancel(_rollup_task)
+    await _cancel(_archive_task)
+    await _cancel(_throttle_task)
+    await _cancel(_metrics_task)
+    await _cancel(_tracing_task)
+    _rollup_task = _archive_task = _throttle_task = _metrics_task = _tracing_task = None
+    try:
+        await asyncio.to_thread(flush_pending)
+    except Exception as e:
+        print(f"Upis zbirnih neuspjelih prijava nije uspio: {e}")
+    try:
+        await asyncio.to_thread(tracing.flush)
+    except Exception as e:
+        print(f"Slanje tracing spanova nije uspjelo: {e}")
@@ -0,0 +1,178 @@
+"""
+Pracenje memorije po zahtjevu (tracemalloc)
+Ukljucuje se s MEMORY_TRACKING_ENABLED - tracemalloc usporava cijeli
+proces, pa je iskljuceno po defaultu.
+
+- vrsna alokacija zahtjeva: peak tracemalloca od pocetka zahtjeva
+  umanjen za memoriju zauzetu prije zahtjeva. Mjeri se jedan zahtjev
+  po procesu istovremeno (reset_peak je globalan), ostali se preskacu.
+  Peak je zajednicki cijelom procesu, a ostali zahtjevi i dalje rade na
+  istom event loopu - mjerenje s kojim se preklopio drugi zahtjev ne ulazi
+  u histogram ni statistiku rute, nego se broji zasebno
+  (concurrent_requests, http_request_memory_overlapped_total).
+- mjesta alokacije: za dio mjerenih zahtjeva (memory_tracking_snapshot_rate)
+  uzima se snapshot na pocetku i nakon dohvata redaka s najvise zauzete
+  memorije (kursor poziva checkpoint()); razlika daje mjesta alokacije.
+"""
+
+import random
+import threading
+import tracemalloc
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .config import get_settings
+from . import metrics
+
+
+settings = get_settings()
+
+_measuring = threading.Lock()    # samo jedan mjereni zahtjev istovremeno
+
+# okviri instrumentacije se preskacu pri odredjivanju mjesta alokacije
+_SKIPPED_FRAMES = ("database.py", "memory_tracking.py", "metrics.py", "query_log.py")
+_SNAPSHOT_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+
+@dataclass
+class _Measurement:
+    baseline: int
+    overlap: metrics.RequestOverlap
+    start_snapshot: Optional[tracemalloc.Snapshot] = None
+    peak_snapshot: Optional[tracemalloc.Snapshot] = None
+    peak_checkpoint: int = 0
+
+
+_current: ContextVar[Optional[_Measurement]] = ContextVar("memory_measurement", default=None)
+
+# ruta -> zbirna statistika
+_routes: Dict[str, dict] = {}
+_routes_lock = threading.Lock()
+
+
+def start_tracing() -> None:
+    """Pokrece tracemalloc ako je pracenje ukljuceno (startup)"""
+    if settings.memory_tracking_enabled and not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, settings.memory_tracking_frames))
+
+
+def begin():
+    """Pocetak mjerenja zahtjeva; vraca token za finish() ili None"""
+    if not tracemalloc.is_tracing() or not _measuring.acquire(blocking=False):
+        return None
+    start_snapshot = None
+    if random.random() < settings.memory_tracking_snapshot_rate:
+        start_snapshot = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    measurement = _Measurement(tracemalloc.get_traced_memory()[0], metrics.RequestOverlap(),
+                               start_snapshot)
+    return _current.set(measurement)
+
+
+def checkpoint() -> None:
+    """Poziva kursor nakon dohvata redaka - pamti snapshot s najvise memorije"""
+    measurement = _current.get()
+    if measurement is None or measurement.start_snapshot is None:
+        return
+    current = tracemalloc.get_traced_memory()[0]
+    if current > measurement.peak_checkpoint:
+        measurement.peak_checkpoint = current
+        measurement.peak_snapshot = tracemalloc.take_snapshot()
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    """Najdublji okvir iz aplikacije (+ stvarno mjesto alokacije ako je u biblioteci)"""
+    innermost = traceback[-1]
+    for frame in reversed(traceback):
+        filename = frame.filename.replace("\\", "/")
+        if "/app/" in filename and not filename.endswith(_SKIPPED_FRAMES):
+            app_frame = f"{filename.rsplit('/app/', 1)[1]}:{frame.lineno}"
+            if frame is innermost:
+                return app_frame
+            library_file = innermost.filename.replace("\\", "/").rsplit("/", 1)[-1]
+            return f"{app_frame} ({library_file}:{innermost.lineno})"
+    return f"{innermost.filename}:{innermost.lineno}"
+
+
+def _top_sites(measurement: _Measurement) -> List[dict]:
+    peak = (measurement.peak_snapshot or tracemalloc.take_snapshot()).filter_traces(_SNAPSHOT_FILTERS)
+    start = measurement.start_snapshot.filter_traces(_SNAPSHOT_FILTERS)
+    sites: Dict[str, list] = {}
+    for stat in peak.compare_to(start, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        site = _site(stat.traceback)
+        entry = sites.setdefault(site, [0, 0])
+        entry[0] += stat.size_diff
+        entry[1] += max(stat.count_diff, 0)
+    return [{"site": site, "size_bytes": size, "count": count}
+            for site, (size, count) in sites.items()]
+
+
+def finish(token, route: str) -> None:
+    """Kraj mjerenja: vrsna alokacija i mjesta alokacije po ruti"""
+    measurement = _current.get()
+    _current.reset(token)
+    try:
+        peak = max(0, tracemalloc.get_traced_memory()[1] - measurement.baseline)
+        overlapped = measurement.overlap.others()
+        sites = []
+        if overlapped:
+            metrics.inc("http_request_memory_overlapped_total", route=route)
+        else:
+            metrics.observe("http_request_peak_memory_bytes", peak, route=route)
+            if measurement.start_snapshot is not None:
+                sites = _top_sites(measurement)
+    finally:
+        _measuring.release()
+    
+    with _routes_lock:
+        stats = _routes.setdefault(route, {
+            "route": route, "requests": 0, "peak_bytes_max": 0,
+            "peak_bytes_total": 0, "peak_bytes_last": 0, "sites": {},
+            "concurrent_requests": 0, "concurrent_overlap_max": 0,
+        })
+        if overlapped:
+            # peak moze sadrzavati alokacije drugih zahtjeva
+            stats["concurrent_requests"] += 1
+            stats["concurrent_overlap_max"] = max(stats["concurrent_overlap_max"], overlapped)
+            return
+        stats["requests"] += 1
+        stats["peak_bytes_max"] = max(stats["peak_bytes_max"], peak)
+        stats["peak_bytes_total"] += peak
+        stats["peak_bytes_last"] = peak
+        if sites:
+            # po mjestu se pamti najveca izmjerena alokacija
+            for site in sites:
+                known = stats["sites"].get(site["site"])
+                if known is None or site["size_bytes"] > known["size_bytes"]:
+                    stats["sites"][site["site"]] = site
+            top = sorted(stats["sites"].values(), key=lambda s: s["size_bytes"], reverse=True)
+            stats["sites"] = {s["site"]: s for s in top[:settings.memory_tracking_top_sites]}
+
+
+def report() -> dict:
+    """Stanje pracenja i statistika po rutama (najveci peak prvi)"""
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    with _routes_lock:
+        routes = []
+        for stats in _routes.values():
+            routes.append({
+                "route": stats["route"],
+                "requests": stats["requests"],
+                "peak_bytes_max": stats["peak_bytes_max"],
+                "peak_bytes_avg": stats["peak_bytes_total"] // max(1, stats["requests"]),
+                "peak_bytes_last": stats["peak_bytes_last"],
+                "concurrent_requests": stats["concurrent_requests"],
+                "concurrent_overlap_max": stats["concurrent_overlap_max"],
+                "top_sites": sorted(stats["sites"].values(), key=lambda s: s["size_bytes"], reverse=True),
+            })
+    routes.sort(key=lambda r: r["peak_bytes_max"], reverse=True)
+    return {
+        "enabled": tracing,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "routes": routes,
+    }
@@ -0,0 +1,315 @@
+"""
+Prometheus metrike
+Latencija zahtjeva po ruti i statusu, zahtjevi u tijeku, SQL upiti po
+zahtjevu, konekcije na bazu, bcrypt operacije i omjer pogodaka cacheva.
+
+Prikupljanje je bez lockova na vrucem putu: svaka dretva pise u vlastiti
+shard (threading.local), a shardovi se zbrajaju tek pri citanju /metrics.
+Vise workera: svaki worker periodicki zapisuje svoj zbroj u snapshot
+datoteku u metrics_multiprocess_dir, a /metrics zbraja sve svjeze
+snapshote (vlastiti worker cita se uzivo).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import get_settings
+
+
+settings = get_settings()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+MEMORY_BUCKETS = tuple(2 ** exp for exp in range(16, 29, 2))     # 64 KB - 256 MB
+
+# naziv -> (tip, opis, granice histograma)
+METRICS = {
+    "http_requests_total": ("counter", "Broj HTTP zahtjeva", None),
+    "http_request_duration_seconds": ("histogram", "Trajanje HTTP zahtjeva", LATENCY_BUCKETS),
+    "http_requests_in_flight": ("gauge", "HTTP zahtjevi u obradi", None),
+    "db_queries_total": ("counter", "Broj SQL naredbi", None),
+    "db_query_duration_seconds_total": ("counter", "Ukupno vrijeme SQL naredbi", None),
+    "db_queries_per_request": ("histogram", "Broj SQL naredbi po zahtjevu", QUERY_COUNT_BUCKETS),
+    "db_query_seconds_per_request": ("histogram", "Vrijeme SQL naredbi po zahtjevu", LATENCY_BUCKETS),
+    "db_connections_opened_total": ("counter", "Broj otvorenih konekcija na bazu", None),
+    "db_connections_open": ("gauge", "Trenutno otvorene konekcije na bazu", None),
+    "bcrypt_operations_in_progress": ("gauge", "Bcrypt operacije koje se upravo izvode", None),
+    "bcrypt_duration_seconds": ("histogram", "Trajanje bcrypt operacija", BCRYPT_BUCKETS),
+    "cache_requests_total": ("counter", "Pristupi cacheu po rezultatu (hit/miss)", None),
+    "http_request_peak_memory_bytes": ("histogram", "Vrsna alokacija zahtjeva (tracemalloc)", MEMORY_BUCKETS),
+    "http_request_memory_overlapped_total": ("counter", "Mjerenja memorije preskocena zbog preklopljenih zahtjeva", None),
+    "db_repeated_statement_requests_total": ("counter", "Zahtjevi s ponovljenom SQL naredbom (N+1)", None),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+
+class _Shard:
+    """Metrike jedne dretve - pise ih samo ta dretva"""
+    __slots__ = ("values", "histograms")
+
+    def __init__(self):
+        self.values: Dict[Key, float] = {}
+        self.histograms: Dict[Key, list] = {}    # [brojaci po granicama..., +Inf, suma]
+
+
+_local = threading.local()
+_shards: List[_Shard] = []
+_shards_lock = threading.Lock()    # samo pri prvom pisanju nove dretve
+
+
+def _shard() -> _Shard:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+        _local.shard = shard
+    return shard
+
+
+def _key(name: str, labels: dict) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    """Povecava brojac (ili gauge, uz negativnu vrijednost za smanjenje)"""
+    values = _shard().values
+    key = _key(name, labels)
+    values[key] = values.get(key, 0.0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Biljezi vrijednost u histogram"""
+    buckets = METRICS[name][2]
+    histograms = _shard().histograms
+    key = _key(name, labels)
+    data = histograms.get(key)
+    if data is None:
+        data = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            data[i] += 1
+            break
+    else:
+        data[len(buckets)] += 1
+    data[-1] += value
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def track_bcrypt(operation: str) -> Iterator[None]:
+    """
+    Mjeri bcrypt operaciju i broji operacije u tijeku.
+    bcrypt se izvodi sinkrono na event loopu, pa je vrijednost najvise 1
+    po workeru - cekanje na bcrypt (dubina reda) se ne mjeri.
+    """
+    inc("bcrypt_operations_in_progress", 1)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("bcrypt_duration_seconds", time.perf_counter() - start, operation=operation)
+        inc("bcrypt_operations_in_progress", -1)
+
+
+# ============== ZAHTJEVI U OBRADI ==============
+
+# Mijenja ih samo middleware na dretvi event loopa (bez locka)
+_in_flight = 0
+_started = 0
+
+
+def request_started() -> None:
+    global _in_flight, _started
+    _in_flight += 1
+    _started += 1
+    inc("http_requests_in_flight", 1)
+
+
+def request_finished() -> None:
+    global _in_flight
+    _in_flight -= 1
+    inc("http_requests_in_flight", -1)
+
+
+def requests_in_flight() -> int:
+    return _in_flight
+
+
+class RequestOverlap:
+    """
+    Broji druge zahtjeve koji su se preklopili s mjerenjem unutar zahtjeva
+    (profil, vrsna memorija): oni vec u obradi na pocetku + svi zapoceti
+    nakon njega. Stvara se unutar middlewarea koji je vec brojao zahtjev.
+    """
+
+    def __init__(self):
+        self._already = max(0, _in_flight - 1)
+        self._started = _started
+
+    def others(self) -> int:
+        return self._already + (_started - self._started)
+
+
+# ============== PO ZAHTJEVU ==============
+
+@dataclass
+class RequestMetrics:
+    """SQL statistika jednog HTTP zahtjeva"""
+    path: str = ""
+    queries: int = 0
+    query_seconds: float = 0.0
+    # normalizirana naredba -> [broj izvrsavanja, ukupno sekundi, redaka]
+    statements: Dict[str, list] = field(default_factory=dict)
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+def record_query(duration: float) -> None:
+    """Poziva se iz kursora nakon svake SQL naredbe"""
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += duration
+
+
+def record_request(method: str, route: str, status_code: int, duration: float,
+                   stats: RequestMetrics) -> None:
+    """Biljezi zavrseni zahtjev (poziva middleware)"""
+    status_label = str(status_code)
+    inc("http_requests_total", method=method, route=route, status=status_label)
+    observe("http_request_duration_seconds", duration, method=method, route=route, status=status_label)
+    inc("db_queries_total", stats.queries, route=route)
+    inc("db_query_duration_seconds_total", stats.query_seconds, route=route)
+    observe("db_queries_per_request", stats.queries, route=route)
+    observe("db_query_seconds_per_request", stats.query_seconds, route=route)
+
+
+# ============== ZBRAJANJE I SNAPSHOTI ==============
+
+def _local_totals() -> Tuple[Dict[Key, float], Dict[Key, list]]:
+    values: Dict[Key, float] = {}
+    histograms: Dict[Key, list] = {}
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for key, value in list(shard.values.items()):
+            values[key] = values.get(key, 0.0) + value
+        for key, data in list(shard.histograms.items()):
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(data)
+            else:
+                for i, value in enumerate(data):
+                    total[i] += value
+    return values, histograms
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(settings.metrics_multiprocess_dir, f"metrics_{pid}.json")
+
+
+def write_snapshot() -> None:
+    """Zapisuje zbroj metrika ovog workera (tmp + rename)"""
+    if not settings.metrics_multiprocess_dir:
+        return
+    os.makedirs(settings.metrics_multiprocess_dir, exist_ok=True)
+    values, histograms = _local_totals()
+    payload = {
+        "pid": os.getpid(),
+        "values": [[name, list(labels), value] for (name, labels), value in values.items()],
+        "histograms": [[name, list(labels), data] for (name, labels), data in histograms.items()],
+    }
+    path = _snapshot_path(os.getpid())
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _merge_snapshots(values: Dict[Key, float], histograms: Dict[Key, list]) -> None:
+    directory = settings.metrics_multiprocess_dir
+    if not directory or not os.path.isdir(directory):
+        return
+    own = os.path.basename(_snapshot_path(os.getpid()))
+    now = time.time()
+    for name in os.listdir(directory):
+        if not name.endswith(".json") or name == own:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) > settings.metrics_stale_seconds:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric, labels, value in payload["values"]:
+            key = (metric, tuple(tuple(pair) for pair in labels))
+            values[key] = values.get(key, 0.0) + value
+        for metric, labels, data in payload["histograms"]:
+            key = (metric, tuple(tuple(pair) for pair in labels))
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(data)
+            else:
+                for i, value in enumerate(data):
+                    total[i] += value
+
+
+# ============== PROMETHEUS FORMAT ==============
+
+def _labels_text(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """Sve metrike (ovaj worker uzivo + snapshoti ostalih) u Prometheus text formatu"""
+    values, histograms = _local_totals()
+    _merge_snapshots(values, histograms)
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (metric, labels), data in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, data):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels_text(labels, (('le', _number(bound)),))} {cumulative}")
+                cumulative += data[len(buckets)]
+                lines.append(f"{name}_bucket{_labels_text(labels, (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels_text(labels)} {_number(data[-1])}")
+                lines.append(f"{name}_count{_labels_text(labels)} {cumulative}")
+        else:
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels_text(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
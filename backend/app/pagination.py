@@ -0,0 +1,79 @@
+"""
+Keyset (cursor) paginacija
+Kursor pamti kljuc zadnjeg vracenog retka, pa svaka stranica
+koristi isti indeks i kosta jednako kao prva.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+from fastapi import HTTPException, Response, status
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Union[datetime, int], row_id: int, source: Optional[str] = None) -> str:
+    """
+    Kodira (vrijeme, id) zadnjeg retka u neprozirni URL-safe kursor.
+    Feedovi koji spajaju vise tablica dodaju i izvor retka (source),
+    a hijerarhija sortira po dubini umjesto po vremenu.
+    """
+    sort = sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value
+    values = [sort, row_id]
+    if source is not None:
+        values.append(source)
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str, size: int, parse_sort=datetime.fromisoformat) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return [parse_sort(values[0]), int(values[1])] + values[2:]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Neispravan kursor za paginaciju"
+        )
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Dekodira kursor u (vrijeme, id); vraca None ako kursor nije zadan"""
+    if not cursor:
+        return None
+    sort_value, row_id = _decode(cursor, 2)
+    return sort_value, row_id
+
+
+def decode_source_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int, str]]:
+    """Dekodira kursor feeda u (vrijeme, id, izvor); vraca None ako kursor nije zadan"""
+    if not cursor:
+        return None
+    sort_value, row_id, source = _decode(cursor, 3)
+    return sort_value, row_id, str(source)
+
+
+def decode_depth_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Dekodira kursor hijerarhije u (dubina, id); vraca None ako kursor nije zadan"""
+    if not cursor:
+        return None
+    depth, row_id = _decode(cursor, 2, int)
+    return depth, row_id
+
+
+def set_next_cursor(response: Response, rows: list, limit: int,
+                    time_key: str, id_key: str, source_key: Optional[str] = None) -> None:
+    """
+    Postavlja X-Next-Cursor header ako je stranica puna.
+    Prazan header znaci da nema vise zapisa.
+    """
+    if len(rows) == limit and rows:
+        last = rows[-1]
+        source = last[source_key] if source_key else None
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last[time_key], last[id_key], source)
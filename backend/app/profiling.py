@@ -0,0 +1,242 @@
+"""
+Profiliranje pojedinacnih zahtjeva na zahtjev
+Zahtjev se profilira ako nosi X-Profile header s ispravnim tokenom
+(profiling_token) ili ga odabere uzorkovanje (profiling_sample_rate).
+
+Nacini (profiling_mode ili X-Profile-Format header):
+- cprofile: deterministicki cProfile, sprema se .pstats (pstats / snakeviz)
+- sample:   uzorkovanje stoga dretve event loopa, sprema se .collapsed
+            (collapsed-stack format za flamegraph.pl / speedscope)
+
+Svi endpointi su async i dijele dretvu event loopa s drugim zahtjevima:
+- sample broji stog samo dok event loop izvrsava task profiliranog
+  zahtjeva (task middlewarea i svi taskovi nastali iz njega), pa profil
+  sadrzi samo taj zahtjev
+- cprofile biljezi sve na dretvi, pa se pokrece samo kad je zahtjev
+  jedini u obradi; ako drugi zahtjevi stignu tijekom profiliranja, naziv
+  profila (i X-Profile-Id) dobiva _c<N> s brojem preklopljenih zahtjeva
+
+Streaming odgovori (npr. /audit/logs/export) profiliraju se do kraja
+tijela. Naziv (X-Profile-Id) se tada odredjuje uz headere, pa umjesto
+trajanja sadrzi "stream", a _c<N> broji zahtjeve preklopljene do headera.
+
+Profili se spremaju u ograniceni prsten datoteka u profiling_dir -
+najstarije datoteke se brisu kad ih ima vise od profiling_max_files.
+Istovremeno se profilira najvise jedan zahtjev po procesu.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+from .config import get_settings
+from . import metrics
+
+
+settings = get_settings()
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_FORMAT_HEADER = "X-Profile-Format"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+FORMATS = {"cprofile": ".pstats", "sample": ".collapsed"}
+PROFILE_NAME = re.compile(r"^[\w.\-]+\.(pstats|collapsed)$")
+
+_active = threading.Lock()     # samo jedan profiler istovremeno (cProfile je po procesu)
+
+# Skup taskova profiliranog zahtjeva - task factory u njega dodaje taskove
+# nastale u kontekstu zahtjeva (call_next, streaming tijela)
+_request_tasks: ContextVar[Optional[weakref.WeakSet]] = ContextVar("profiled_request_tasks", default=None)
+
+
+def requested_mode(headers) -> Optional[str]:
+    """Nacin profiliranja za zahtjev ili None ako se zahtjev ne profilira"""
+    token = headers.get(PROFILE_HEADER)
+    if token is not None:
+        if not settings.profiling_token or not hmac.compare_digest(token, settings.profiling_token):
+            return None
+    elif settings.profiling_sample_rate <= 0 or random.random() >= settings.profiling_sample_rate:
+        return None
+    mode = headers.get(PROFILE_FORMAT_HEADER, settings.profiling_mode)
+    return mode if mode in FORMATS else settings.profiling_mode
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop) -> None:
+    """Task factory koja taskove nastale u profiliranom zahtjevu dodaje u njegov skup"""
+    previous = loop.get_task_factory()
+    if getattr(previous, "request_profiler", False):
+        return
+
+    def factory(loop, coro, **kwargs):
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        tasks = context.get(_request_tasks) if context is not None else _request_tasks.get()
+        if tasks is not None:
+            tasks.add(task)
+        return task
+
+    factory.request_profiler = True
+    loop.set_task_factory(factory)
+
+
+class _StackSampler(threading.Thread):
+    """Periodicki uzima stog dretve event loopa dok se izvrsava task zahtjeva"""
+
+    def __init__(self, thread_id: int, interval: float,
+                 loop: asyncio.AbstractEventLoop, tasks: weakref.WeakSet):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.loop = loop
+        self.tasks = tasks
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            task = asyncio.current_task(self.loop)
+            if task is None or task not in self.tasks:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            # stog se broji samo ako se task nije promijenio dok je uziman
+            if stack and asyncio.current_task(self.loop) is task:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Profiler jednog zahtjeva (start -> detach -> stop -> name -> save)"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        self._overlap: Optional[metrics.RequestOverlap] = None
+        self._token = None
+        self._start = 0.0
+
+    def start(self) -> bool:
+        """
+        Pokrece profiler (poziva se iz taska middlewarea); False ako se vec
+        profilira drugi zahtjev ili je za cprofile u obradi jos zahtjeva
+        """
+        if self.mode == "cprofile" and metrics.requests_in_flight() > 1:
+            return False
+        if not _active.acquire(blocking=False):
+            return False
+        self._start = time.perf_counter()
+        self._overlap = metrics.RequestOverlap()
+        if self.mode == "sample":
+            loop = asyncio.get_running_loop()
+            _install_task_factory(loop)
+            tasks = weakref.WeakSet([asyncio.current_task()])
+            self._token = _request_tasks.set(tasks)
+            interval = max(1, settings.profiling_sample_interval_ms) / 1000
+            self._sampler = _StackSampler(threading.get_ident(), interval, loop, tasks)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return True
+
+    def detach(self) -> None:
+        """Novi taskovi vise ne pripadaju zahtjevu (u istom kontekstu kao start)"""
+        if self._token is not None:
+            _request_tasks.reset(self._token)
+            self._token = None
+
+    def stop(self) -> float:
+        """Zaustavlja profiler i vraca trajanje u sekundama"""
+        try:
+            if self._profile is not None:
+                self._profile.disable()
+            if self._sampler is not None:
+                self._sampler.stop()
+        finally:
+            _active.release()
+        return time.perf_counter() - self._start
+
+    def name(self, method: str, route: str, status_code: int, duration: Optional[float]) -> str:
+        """Naziv profila; duration None = streaming odgovor (tijelo jos nije poslano)"""
+        label = re.sub(r"[^\w]+", "_", route).strip("_") or "root"
+        elapsed = "stream" if duration is None else f"{int(duration * 1000)}ms"
+        others = self._overlap.others() if self._profile is not None else 0
+        concurrent = f"_c{others}" if others else ""
+        return (f"{datetime.now():%Y%m%dT%H%M%S%f}_{method}_{label}_{status_code}"
+                f"_{elapsed}{concurrent}{FORMATS[self.mode]}")
+
+    def save(self, name: str) -> str:
+        """Sprema profil pod nazivom iz name() u prsten datoteka"""
+        os.makedirs(settings.profiling_dir, exist_ok=True)
+        path = os.path.join(settings.profiling_dir, name)
+        tmp = path + ".tmp"
+        if self._profile is not None:
+            self._profile.dump_stats(tmp)
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for stack, count in self._sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        _trim_ring()
+        return name
+
+
+def _profile_files() -> List[os.DirEntry]:
+    if not os.path.isdir(settings.profiling_dir):
+        return []
+    entries = [entry for entry in os.scandir(settings.profiling_dir)
+               if entry.is_file() and PROFILE_NAME.match(entry.name)]
+    entries.sort(key=lambda entry: entry.name, reverse=True)     # naziv pocinje vremenom
+    return entries
+
+
+def _trim_ring() -> None:
+    for entry in _profile_files()[max(1, settings.profiling_max_files):]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles() -> List[dict]:
+    """Spremljeni profili, najnoviji prvi"""
+    profiles = []
+    for entry in _profile_files():
+        stat = entry.stat()
+        profiles.append({
+            "name": entry.name,
+            "format": "pstats" if entry.name.endswith(".pstats") else "collapsed",
+            "size_bytes": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime),
+        })
+    return profiles
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Putanja profila po nazivu (samo nazivi iz prstena, bez direktorija)"""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(settings.profiling_dir, name)
+    return path if os.path.isfile(path) else None
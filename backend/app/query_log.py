@@ -0,0 +1,110 @@
+"""
+Instrumentacija SQL upita
+Svaka naredba se biljezi po normaliziranom tekstu (literali i parametri
+zamijenjeni s ?) uz trajanje i broj redaka, za tekuci HTTP zahtjev.
+
+- spore naredbe (preko sql_slow_query_ms) se ispisuju odmah
+- zahtjevi u kojima se ista normalizirana naredba izvrsi vise od
+  sql_repeat_threshold puta (N+1 obrazac) se ispisuju na kraju zahtjeva
+- uz sql_debug_headers sazetak ide u X-DB-* headere odgovora
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Response
+
+from .config import get_settings
+from . import metrics
+
+
+settings = get_settings()
+
+DEBUG_HEADER_STATEMENT_CHARS = 120
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(query: str) -> str:
+    """Normalizirani tekst naredbe - isti za sve vrijednosti parametara"""
+    text = _COMMENT.sub(" ", query)
+    text = _STRING.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _VALUE_LIST.sub("(...)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def query_text(query, cursor) -> str:
+    if isinstance(query, str):
+        return query
+    if isinstance(query, bytes):
+        return query.decode("utf-8", "replace")
+    return query.as_string(cursor)     # psycopg2.sql.Composed
+
+
+def record_statement(cursor, query, duration: float, rows: int) -> None:
+    """Poziva se iz kursora nakon svake SQL naredbe"""
+    stats = metrics.current_request.get()
+    slow = settings.sql_slow_query_ms > 0 and duration * 1000 >= settings.sql_slow_query_ms
+    if stats is None and not slow:
+        return
+    statement = normalize_sql(query_text(query, cursor))
+    if stats is not None:
+        entry = stats.statements.get(statement)
+        if entry is None:
+            stats.statements[statement] = [1, duration, rows]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] += rows
+    if slow:
+        where = f" [{stats.path}]" if stats is not None else ""
+        print(f"Spori SQL upit{where} {duration * 1000:.1f} ms, {rows} redaka: {statement}")
+
+
+def _repeated(stats: metrics.RequestMetrics) -> list:
+    threshold = settings.sql_repeat_threshold
+    if threshold <= 0:
+        return []
+    repeated = [(entry[0], statement) for statement, entry in stats.statements.items()
+                if entry[0] > threshold]
+    repeated.sort(reverse=True)
+    return repeated
+
+
+def _header_value(text: str) -> str:
+    text = text[:DEBUG_HEADER_STATEMENT_CHARS]
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def finish_request(stats: metrics.RequestMetrics, route: str,
+                   response: Optional[Response]) -> None:
+    """Sazetak zahtjeva: upozorenje za ponovljene naredbe i debug headeri"""
+    repeated = _repeated(stats)
+    if repeated:
+        metrics.inc("db_repeated_statement_requests_total", route=route)
+        for count, statement in repeated:
+            print(f"Ponovljeni SQL upit (N+1) [{stats.path}] {count}x: {statement}")
+
+    if response is None or not settings.sql_debug_headers:
+        return
+    rows = sum(entry[2] for entry in stats.statements.values())
+    response.headers["X-DB-Queries"] = str(stats.queries)
+    response.headers["X-DB-Statements"] = str(len(stats.statements))
+    response.headers["X-DB-Time"] = f"{stats.query_seconds:.6f}"
+    response.headers["X-DB-Rows"] = str(rows)
+    if repeated:
+        count, statement = repeated[0]
+        response.headers["X-DB-Repeated"] = _header_value(f"{count}x {statement}")
+    if stats.statements:
+        slowest, entry = max(stats.statements.items(), key=lambda item: item[1][1])
+        response.headers["X-DB-Slowest"] = _header_value(
+            f"{entry[1] * 1000:.2f}ms/{entry[0]}x {slowest}")
@@ -0,0 +1,83 @@
+"""
+Retention poslovi
+Brisanje starih audit_log/login_events zapisa u pozadini.
+
+HTTP zahtjev samo kreira posao (retention_jobs) i vraca njegov ID.
+Posao izvodi procedura run_retention_job() u autocommit konekciji:
+brise u batch-evima s COMMIT-om i pauzom izmedju njih i nakon svakog
+batch-a zapisuje napredak. Nedovrseni poslovi nastavljaju se pri
+sljedecem pokretanju aplikacije.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from .config import get_settings
+from .database import get_connection, get_db
+
+
+settings = get_settings()
+
+# Jedan posao u isto vrijeme - brisanje je ionako ograniceno I/O-om
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retention")
+
+
+def _run_job(job_id: int) -> None:
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET search_path TO employee_management")
+            cur.execute("CALL run_retention_job(%s)", (job_id,))
+    except Exception as e:
+        print(f"Retention posao {job_id} nije uspio: {e}")
+        with get_db() as db:
+            with db.cursor() as cur:
+                cur.execute("""
+                    UPDATE retention_jobs
+                    SET status = 'FAILED', error_message = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE job_id = %s AND status <> 'COMPLETED'
+                """, (str(e), job_id))
+    finally:
+        conn.close()
+
+
+def start_job(target: str, days_to_keep: int, requested_by: Optional[int]) -> int:
+    """Kreira posao i predaje ga pozadinskom izvrsitelju; vraca job_id"""
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT create_retention_job(%s, %s, %s, %s, %s) AS job_id",
+                (target, days_to_keep, settings.retention_batch_size,
+                 settings.retention_sleep_ms, requested_by)
+            )
+            job_id = cur.fetchone()['job_id']
+    _executor.submit(_run_job, job_id)
+    return job_id
+
+
+def resume_jobs() -> List[int]:
+    """Ponovno pokrece nedovrsene poslove (poziva se pri startu aplikacije)"""
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT job_id FROM retention_jobs
+                WHERE status IN ('PENDING', 'RUNNING')
+                ORDER BY job_id
+            """)
+            job_ids = [row['job_id'] for row in cur.fetchall()]
+    for job_id in job_ids:
+        _executor.submit(_run_job, job_id)
+    return job_ids
+
+
+def job_response(job: dict) -> dict:
+    """Dodaje postotak napretka retku retention_jobs tablice"""
+    progress = None
+    if job['status'] == 'COMPLETED':
+        progress = 100.0
+    elif job['rows_estimated']:
+        progress = round(min(100.0, job['rows_deleted'] * 100.0 / job['rows_estimated']), 1)
+    elif job['rows_estimated'] == 0:
+        progress = 100.0
+    return {**job, 'progress_percent': progress}
@@ -3,28 +3,353 @@ Audit Router - Pregled audit logova i login evenata
 Omogucuje administratorima praćenje svih promjena u sustavu
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
-from datetime import datetime, date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Callable, List, Optional, Tuple
+from datetime import datetime, date, time, timedelta
+import ipaddress
+import json
 
 from ..database import get_db_dependency
-from ..auth import require_permission
-from ..schemas import AuditLogResponse, LoginEventResponse, MessageResponse
+from ..auth import require_permission, get_current_user, check_permission
+from ..pagination import decode_cursor, decode_source_cursor, set_next_cursor
+from ..audit_export import (
+    AUDIT_LOG_EXPORT, LOGIN_EVENTS_EXPORT, stream_export, export_filename
+)
+from ..audit_payload import rebuild_full_views, json_contains, json_text
+from ..retention import start_job, job_response
+from ..login_throttle import login_throttle
+from ..audit_archive import (
+    high_water, read_archived_logs, archived_full_state_prefix, archive_status
+)
+from ..schemas import (
+    AuditLogResponse, LoginEventResponse, RetentionJobResponse, ActivityItem,
+    EntityStateResponse, LoginThrottleResponse, SubnetLoginStats
+)
 
 
 router = APIRouter(prefix="/audit", tags=["Audit i Logging"])
 
 
+def _audit_log_response(log: dict) -> AuditLogResponse:
+    """Pretvara redak audit_log tablice u response model"""
+    return AuditLogResponse(
+        audit_log_id=log['audit_log_id'],
+        entity_name=log['entity_name'],
+        entity_id=log['entity_id'],
+        action=log['action'],
+        changed_by=log['changed_by'],
+        changed_at=log['changed_at'],
+        old_value=log['old_value'],
+        new_value=log['new_value'],
+        ip_address=str(log['ip_address']) if log['ip_address'] else None,
+        payload_format=log.get('payload_format', 'full')
+    )
+
+
+def _with_archive(logs: list, limit: int, after, from_date: Optional[date] = None,
+                  to_date: Optional[date] = None, **filters) -> list:
+    """
+    Dopunjuje nepunu stranicu zapisima iz arhive (cold storage) kad raspon
+    upita seze ispod najstarijeg zapisa u tablici.
+    """
+    if len(logs) >= limit:
+        return logs
+    mark = high_water()
+    from_time = datetime.combine(from_date, time.min) if from_date else None
+    if not mark or (from_time and from_time > mark[0]):
+        return logs
+    before = (logs[-1]['changed_at'], logs[-1]['audit_log_id']) if logs else after
+    archived = read_archived_logs(
+        from_time=from_time,
+        to_time=datetime.combine(to_date, time.min) if to_date else None,
+        before=before, limit=limit - len(logs), **filters
+    )
+    return list(logs) + archived
+
+
+# Najvise redaka povijesti ispred stranice koje full_view ucitava
+FULL_VIEW_MAX_PREFIX = 1000
+FULL_VIEW_PARTIAL_HEADER = "X-Full-View-Partial"
+
+
+def _is_full_state(row: dict) -> bool:
+    """Zapis nosi cijelo stanje entiteta (INSERT, DELETE ili 'full' UPDATE)"""
+    return row['action'] != 'UPDATE' or row.get('payload_format', 'full') == 'full'
+
+
+def _full_view_prefix(cur, entity_name: str, entity_id: int,
+                      before: Tuple[datetime, int]) -> list:
+    """
+    Povijest entiteta ispred kljuca before, kronoloski, od najblizeg sidra:
+    zapisa s cijelim stanjem ili snapshota iz audit_snapshots (zapisi nakon
+    snapshota su najvise snapshot_every_changes - 1), a bez njih iz arhive.
+    Cita najvise FULL_VIEW_MAX_PREFIX redaka; ako sidro nije nadjeno,
+    prvi vraceni redak je diff zapis.
+    """
+    cur.execute("""
+        SELECT snapshot_at, audit_log_id, state FROM audit_snapshots
+        WHERE entity_name = %s AND entity_id = %s
+        AND (snapshot_at, audit_log_id) < (%s, %s)
+        ORDER BY snapshot_at DESC, audit_log_id DESC
+        LIMIT 1
+    """, (entity_name, entity_id, *before))
+    snap = cur.fetchone()
+    
+    query = """
+        SELECT * FROM audit_log
+        WHERE entity_name = %s AND entity_id = %s
+        AND (changed_at, audit_log_id) < (%s, %s)
+    """
+    params = [entity_name, entity_id, *before]
+    if snap:
+        query += " AND (changed_at, audit_log_id) > (%s, %s)"
+        params.extend([snap['snapshot_at'], snap['audit_log_id']])
+    query += " ORDER BY changed_at DESC, audit_log_id DESC LIMIT %s"
+    params.append(FULL_VIEW_MAX_PREFIX)
+    cur.execute(query, params)
+    
+    prefix = []
+    for row in cur.fetchall():
+        prefix.append(row)
+        if _is_full_state(row):
+            return prefix[::-1]
+    
+    if len(prefix) < FULL_VIEW_MAX_PREFIX:
+        if snap:
+            prefix.append({
+                'audit_log_id': snap['audit_log_id'], 'changed_at': snap['snapshot_at'],
+                'action': 'INSERT' if snap['state'] is not None else 'DELETE',
+                'old_value': None, 'new_value': snap['state'], 'payload_format': 'full'
+            })
+        else:
+            start = (prefix[-1]['changed_at'], prefix[-1]['audit_log_id']) if prefix else before
+            prefix.extend(reversed(archived_full_state_prefix(
+                entity_name, entity_id, start, FULL_VIEW_MAX_PREFIX - len(prefix)
+            )))
+    return prefix[::-1]
+
+
+# Kljucevi payloada s izraznim indeksom (idx_audit_log_new_<kljuc>)
+INDEXED_PAYLOAD_KEYS = ("status", "assigned_to", "is_active")
+
+
+def _parse_json_object(value: Optional[str], name: str) -> Optional[dict]:
+    if value is None:
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        parsed = None
+    if not isinstance(parsed, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name} mora biti JSON objekt"
+        )
+    return parsed
+
+
+def _json_scalar(value: str):
+    """Vrijednost polja iz query parametra: JSON skalar (42, true) ili tekst"""
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return value
+    return value if isinstance(parsed, (dict, list)) or parsed is None else parsed
+
+
+def _payload_filters(new_contains: Optional[str], old_contains: Optional[str],
+                     field: Optional[str], field_new: Optional[str],
+                     field_old: Optional[str]) -> Tuple[str, list, Optional[Callable[[dict], bool]]]:
+    """
+    Filtri nad old_value/new_value za /logs: SQL uvjet, parametri i isti
+    uvjet kao Python predikat (za zapise iz arhive).
+    
+    - new_contains/old_contains: JSON containment (@>), GIN indeksi
+    - field + field_new: zapisi koji su polje postavili na vrijednost
+    - field + field_old: zapisi koji su polje promijenili s vrijednosti
+    - samo field: zapisi u kojima se polje promijenilo
+    """
+    new_pattern = _parse_json_object(new_contains, "new_contains")
+    old_pattern = _parse_json_object(old_contains, "old_contains")
+    if (field_new is not None or field_old is not None) and not field:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="field_new i field_old zahtijevaju parametar field"
+        )
+    
+    sql, params, checks = "", [], []
+    
+    if new_pattern is not None:
+        sql += " AND new_value @> %s::jsonb"
+        params.append(json.dumps(new_pattern))
+        checks.append(lambda row: json_contains(row['new_value'], new_pattern))
+    
+    if old_pattern is not None:
+        sql += " AND old_value @> %s::jsonb"
+        params.append(json.dumps(old_pattern))
+        checks.append(lambda row: json_contains(row['old_value'], old_pattern))
+    
+    def text(row, column):
+        return json_text((row[column] or {}).get(field))
+    
+    if field_new is not None:
+        new_text = json_text(_json_scalar(field_new))
+        if field in INDEXED_PAYLOAD_KEYS:
+            sql += f" AND new_value->>'{field}' = %s"
+            params.append(new_text)
+        else:
+            sql += " AND new_value @> %s::jsonb"
+            params.append(json.dumps({field: _json_scalar(field_new)}))
+        sql += " AND (old_value->>%s) IS DISTINCT FROM %s"
+        params.extend([field, new_text])
+        checks.append(lambda row: text(row, 'new_value') == new_text
+                      and text(row, 'old_value') != new_text)
+    
+    if field_old is not None:
+        old_text = json_text(_json_scalar(field_old))
+        sql += " AND old_value @> %s::jsonb AND (new_value->>%s) IS DISTINCT FROM %s"
+        params.extend([json.dumps({field: _json_scalar(field_old)}), field, old_text])
+        checks.append(lambda row: text(row, 'old_value') == old_text
+                      and text(row, 'new_value') != old_text)
+    
+    if field and field_new is None and field_old is None:
+        sql += " AND (new_value ? %s OR old_value ? %s) AND (old_value->%s) IS DISTINCT FROM (new_value->%s)"
+        params.extend([field] * 4)
+        checks.append(lambda row: (field in (row['new_value'] or {}) or field in (row['old_value'] or {}))
+                      and (row['old_value'] or {}).get(field) != (row['new_value'] or {}).get(field))
+    
+    predicate = (lambda row: all(check(row) for check in checks)) if checks else None
+    return sql, params, predicate
+
+
+def _parse_cidr(value: Optional[str]) -> Optional[str]:
+    """Validira CIDR (10.0.0.0/8, 2001:db8::/32); adresa bez maske je /32 (/128)"""
+    if value is None:
+        return None
+    try:
+        return str(ipaddress.ip_network(value.strip(), strict=False))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Neispravna CIDR adresa podmreze"
+        )
+
+
+def _activity_item(row: dict) -> ActivityItem:
+    """Pretvara redak activity feeda u response model"""
+    return ActivityItem(**{
+        **row,
+        'ip_address': str(row['ip_address']) if row.get('ip_address') else None
+    })
+
+
+def _feed_after(time_column: str, id_column: str, source: str, after) -> tuple:
+    """
+    Keyset uvjet jedne grane feeda poredanog po (vrijeme, izvor, id) DESC.
+    Ovisno o izvoru grane, uvjet nad (vrijeme, id) ostaje citljiv iz indeksa.
+    """
+    if not after:
+        return "", []
+    after_time, after_id, after_source = after
+    if source < after_source:
+        return f" AND {time_column} <= %s", [after_time]
+    if source > after_source:
+        return f" AND {time_column} < %s", [after_time]
+    return f" AND ({time_column}, {id_column}) < (%s, %s)", [after_time, after_id]
+
+
+def _archived_activity(row: dict, relation: Optional[str] = None) -> dict:
+    """Arhivirani audit zapis kao redak activity feeda"""
+    return {
+        'source': 'audit', 'activity_id': row['audit_log_id'], 'occurred_at': row['changed_at'],
+        'user_id': row['changed_by'], 'username': None,
+        'entity_name': row['entity_name'], 'entity_id': row['entity_id'], 'action': row['action'],
+        'success': None, 'ip_address': None, 'failure_reason': None, 'relation': relation
+    }
+
+
+def _feed_with_archive(rows: list, limit: int, after) -> list:
+    """
+    Dopunjuje stranicu /recent-activity arhiviranim audit zapisima kad
+    stranica seze do arhive (nepuna ili zadnji redak stariji od arhive).
+    """
+    mark = high_water()
+    if not mark or (len(rows) >= limit and rows[-1]['occurred_at'] > mark[0]):
+        return rows
+    before = None
+    if after:
+        after_time, after_id, after_source = after
+        if 'audit' < after_source:
+            before = (after_time + timedelta(microseconds=1), 0)
+        elif 'audit' > after_source:
+            before = (after_time, 0)
+        else:
+            before = (after_time, after_id)
+    archived = [_archived_activity(row) for row in read_archived_logs(before=before, limit=limit)]
+    merged = sorted(list(rows) + archived, reverse=True,
+                    key=lambda row: (row['occurred_at'], row['source'], row['activity_id']))
+    return merged[:limit]
+
+
+def _export_response(spec, filters, from_date: date, to_date: Optional[date],
+                     export_format: str, compress: bool) -> StreamingResponse:
+    """Zajednicki dio export endpointa - validacija raspona i streaming response"""
+    to_date = to_date or date.today()
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date mora biti prije ili jednak to_date"
+        )
+    
+    if compress:
+        media_type = "application/gzip"
+    elif export_format == "csv":
+        media_type = "text/csv; charset=utf-8"
+    else:
+        media_type = "application/x-ndjson"
+    
+    filename = export_filename(spec, from_date, to_date, export_format, compress)
+    return StreamingResponse(
+        stream_export(spec, filters, from_date, to_date, export_format, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _login_event_response(event: dict) -> LoginEventResponse:
+    """Pretvara redak login_events tablice u response model"""
+    return LoginEventResponse(
+        login_event_id=event['login_event_id'],
+        user_id=event['user_id'],
+        username_attempted=event['username_attempted'],
+        login_time=event['login_time'],
+        ip_address=str(event['ip_address']) if event['ip_address'] else "0.0.0.0",
+        user_agent=event['user_agent'],
+        success=event['success'],
+        failure_reason=event['failure_reason'],
+        attempt_count=event.get('attempt_count', 1),
+        first_attempt_at=event.get('first_attempt_at')
+    )
+
+
 @router.get("/logs", response_model=List[AuditLogResponse],
             summary="Dohvati audit logove")
 async def get_audit_logs(
+    response: Response,
     entity_name: Optional[str] = Query(None, description="Filter po entitetu (users, tasks, roles...)"),
     entity_id: Optional[int] = Query(None, description="Filter po ID entiteta"),
     action: Optional[str] = Query(None, description="Filter po akciji (INSERT, UPDATE, DELETE)"),
     changed_by: Optional[int] = Query(None, description="Filter po korisniku koji je napravio promjenu"),
     from_date: Optional[date] = Query(None, description="Od datuma"),
     to_date: Optional[date] = Query(None, description="Do datuma"),
+    new_contains: Optional[str] = Query(None, description='new_value sadrzi JSON objekt, npr. {"status": "CANCELLED"}'),
+    old_contains: Optional[str] = Query(None, description="old_value sadrzi JSON objekt"),
+    field: Optional[str] = Query(None, description="Kljuc payloada (npr. status, assigned_to)"),
+    field_new: Optional[str] = Query(None, description="Polje field postavljeno na ovu vrijednost"),
+    field_old: Optional[str] = Query(None, description="Polje field promijenjeno s ove vrijednosti"),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
     current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
     conn = Depends(get_db_dependency)
 ):
@@ -36,13 +361,28 @@ async def get_audit_logs(
     
     Potrebna permisija: AUDIT_READ_ALL
     
-    Audit log automatski bilježi sve promjene putem trigger-a:
-    - trg_audit_users
-    - trg_audit_tasks
-    - trg_audit_user_roles
+    Audit log automatski bilježi sve promjene putem statement-level trigger-a:
+    - trg_audit_users_insert/update/delete
+    - trg_audit_tasks_insert/update/delete
+    - trg_audit_user_roles_insert/delete
+    
+    Keyset paginacija po (changed_at, audit_log_id): ako je stranica puna,
+    X-Next-Cursor header sadrzi kursor za sljedecu stranicu.
+    
+    Filtri nad payloadom koriste GIN indekse (jsonb_path_ops) nad
+    new_value/old_value i izrazne indekse za status, assigned_to, is_active:
+    - new_contains={"status": "CANCELLED"} - containment nad new_value
+    - field=assigned_to&field_new=42 - kada je assigned_to postao 42
+    - field=status&field_old=NEW - kada je status promijenjen s NEW
+    
+    Zapisi stariji od najstarijeg u tablici citaju se iz arhive (cold storage).
     """
-    query = "SELECT * FROM audit_log WHERE 1=1"
-    params = []
+    after = decode_cursor(cursor)
+    payload_sql, payload_params, predicate = _payload_filters(
+        new_contains, old_contains, field, field_new, field_old
+    )
+    query = "SELECT * FROM audit_log WHERE 1=1" + payload_sql
+    params = list(payload_params)
     
     if entity_name:
         query += " AND entity_name = %s"
@@ -68,28 +408,55 @@ async def get_audit_logs(
         query += " AND changed_at <= %s"
         params.append(to_date)
     
-    query += " ORDER BY changed_at DESC LIMIT %s"
+    if after:
+        query += " AND (changed_at, audit_log_id) < (%s, %s)"
+        params.extend(after)
+    
+    query += " ORDER BY changed_at DESC, audit_log_id DESC LIMIT %s"
     params.append(limit)
     
     with conn.cursor() as cur:
         cur.execute(query, params)
         logs = cur.fetchall()
     
-    result = []
-    for log in logs:
-        result.append(AuditLogResponse(
-            audit_log_id=log['audit_log_id'],
-            entity_name=log['entity_name'],
-            entity_id=log['entity_id'],
-            action=log['action'],
-            changed_by=log['changed_by'],
-            changed_at=log['changed_at'],
-            old_value=log['old_value'],
-            new_value=log['new_value'],
-            ip_address=str(log['ip_address']) if log['ip_address'] else None
-        ))
+    logs = _with_archive(logs, limit, after, from_date, to_date,
+                         entity_name=entity_name or None, entity_id=entity_id or None,
+                         action=action or None, changed_by=changed_by or None,
+                         predicate=predicate)
+    
+    set_next_cursor(response, logs, limit, 'changed_at', 'audit_log_id')
+    return [_audit_log_response(log) for log in logs]
+
+
+@router.get("/logs/export", summary="Izvoz audit logova (NDJSON/CSV stream)")
+async def export_audit_logs(
+    from_date: date = Query(..., description="Od datuma (ukljucivo)"),
+    to_date: Optional[date] = Query(None, description="Do datuma (ukljucivo), zadano danas"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Komprimiraj izvoz gzip formatom"),
+    entity_name: Optional[str] = Query(None, description="Filter po entitetu"),
+    entity_id: Optional[int] = Query(None, description="Filter po ID entiteta"),
+    action: Optional[str] = Query(None, description="Filter po akciji (INSERT, UPDATE, DELETE)"),
+    changed_by: Optional[int] = Query(None, description="Filter po korisniku koji je napravio promjenu"),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL"))
+):
+    """
+    Streaming izvoz audit logova za zadani raspon datuma, kronoloski.
+    Arhivirani zapisi iz raspona izvoze se prije zapisa iz tablice.
+    
+    Raspon se cita u dnevnim odsjecima (server-side kursori, vise odsjecaka
+    paralelno), pa memorija ostaje ogranicena i za mjesece povijesti.
     
-    return result
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    filters = [
+        (column, value) for column, value in (
+            ("entity_name", entity_name), ("entity_id", entity_id),
+            ("action", action), ("changed_by", changed_by)
+        ) if value is not None
+    ]
+    return _export_response(AUDIT_LOG_EXPORT, filters, from_date, to_date,
+                            export_format, gzip)
 
 
 @router.get("/logs/entity/{entity_name}/{entity_id}",
@@ -98,51 +465,315 @@ async def get_audit_logs(
 async def get_entity_history(
     entity_name: str,
     entity_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
+    full_view: bool = Query(True, description="Diff zapise vrati kao cijele before/after poglede"),
     current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
     conn = Depends(get_db_dependency)
 ):
     """
-    Dohvaca kompletnu povijest promjena za odredjeni entitet.
+    Dohvaca povijest promjena za odredjeni entitet, od najnovije prema starijima.
     
     Koristi PostgreSQL tablicu:
-    - audit_log
+    - audit_log (indeks idx_audit_log_entity)
     
     Potrebna permisija: AUDIT_READ_ALL
+    
+    UPDATE zapisi spremljeni u diff formatu (payload_format = 'diff')
+    vracaju se kao cijeli before/after pogledi ako je full_view = true.
+    Osnova je najblize sidro ispred stranice (snapshot ili zapis s cijelim
+    stanjem); ako ga nema (npr. obrisano retencijom), pogledi su djelomicni
+    i odgovor ima header X-Full-View-Partial: true.
     """
+    after = decode_cursor(cursor)
+    query = """
+        SELECT * FROM audit_log 
+        WHERE entity_name = %s AND entity_id = %s
+    """
+    params = [entity_name, entity_id]
+    
+    if after:
+        query += " AND (changed_at, audit_log_id) < (%s, %s)"
+        params.extend(after)
+    
+    query += " ORDER BY changed_at DESC, audit_log_id DESC LIMIT %s"
+    params.append(limit)
+    
     with conn.cursor() as cur:
-        cur.execute("""
-            SELECT * FROM audit_log 
-            WHERE entity_name = %s AND entity_id = %s
-            ORDER BY changed_at DESC
-        """, (entity_name, entity_id))
-        logs = cur.fetchall()
+        cur.execute(query, params)
+        logs = _with_archive(cur.fetchall(), limit, after,
+                             entity_name=entity_name, entity_id=entity_id)
+        
+        if full_view and any(log['payload_format'] == 'diff' for log in logs):
+            history = list(reversed(logs))
+            if not _is_full_state(history[0]):
+                oldest = history[0]
+                history = _full_view_prefix(
+                    cur, entity_name, entity_id, (oldest['changed_at'], oldest['audit_log_id'])
+                ) + history
+            if not _is_full_state(history[0]):
+                response.headers[FULL_VIEW_PARTIAL_HEADER] = "true"
+            rebuild_full_views(entity_name, history)
+    
+    set_next_cursor(response, logs, limit, 'changed_at', 'audit_log_id')
+    return [_audit_log_response(log) for log in logs]
+
+
+def _state_as_of_with_archive(cur, entity_name: str, entity_id: int,
+                              ts: datetime) -> Optional[dict]:
+    """
+    Stanje u trenutku ts kad tablica nema sidro (snapshot ni zapis s cijelim
+    stanjem) do ts - sidro i starija povijest citaju se iz arhive.
+    Vraca None ako je rezultat get_entity_state_as_of potpun.
+    """
+    cur.execute("""
+        SELECT 1 FROM audit_log
+        WHERE entity_name = %s AND entity_id = %s AND changed_at <= %s
+        AND (action <> 'UPDATE' OR payload_format = 'full')
+        LIMIT 1
+    """, (entity_name, entity_id, ts))
+    if cur.fetchone():
+        return None
+    
+    cur.execute("""
+        SELECT * FROM audit_log
+        WHERE entity_name = %s AND entity_id = %s AND changed_at <= %s
+        ORDER BY changed_at, audit_log_id
+    """, (entity_name, entity_id, ts))
+    tail = cur.fetchall()
+    before = (tail[0]['changed_at'], tail[0]['audit_log_id']) if tail \
+        else (ts + timedelta(microseconds=1), 0)
+    history = archived_full_state_prefix(entity_name, entity_id, before) + tail
+    if not history:
+        return None
+    
+    rebuild_full_views(entity_name, history)
+    last = history[-1]
+    return {
+        'state': None if last['action'] == 'DELETE' else last['new_value'],
+        'last_audit_log_id': last['audit_log_id'],
+        'last_changed_at': last['changed_at'],
+        'snapshot_audit_log_id': None,
+        'replayed_changes': len(history) - 1 if _is_full_state(history[0]) else len(history)
+    }
+
+
+@router.get("/entity/{entity_name}/{entity_id}/as-of",
+            response_model=EntityStateResponse,
+            summary="Stanje entiteta u zadanom trenutku")
+async def get_entity_state_as_of(
+    entity_name: str,
+    entity_id: int,
+    ts: datetime = Query(..., description="Trenutak za koji se rekonstruira stanje"),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Rekonstruira stanje entiteta iz audit povijesti u trenutku ts.
+    
+    Koristi PostgreSQL funkciju:
+    - get_entity_state_as_of (zadnji snapshot iz audit_snapshots + rep promjena)
+    
+    Ako je sidro povijesti preseljeno u arhivu, stanje se slaze iz
+    arhiviranog dijela i zapisa u tablici.
+    
+    Potrebna permisija: AUDIT_READ_ALL
     
-    result = []
-    for log in logs:
-        result.append(AuditLogResponse(
-            audit_log_id=log['audit_log_id'],
-            entity_name=log['entity_name'],
-            entity_id=log['entity_id'],
-            action=log['action'],
-            changed_by=log['changed_by'],
-            changed_at=log['changed_at'],
-            old_value=log['old_value'],
-            new_value=log['new_value'],
-            ip_address=str(log['ip_address']) if log['ip_address'] else None
-        ))
+    exists = false znaci da je entitet u tom trenutku bio obrisan.
+    """
+    with conn.cursor() as cur:
+        # ts s vremenskom zonom (npr. ...Z ili +02:00) pretvara baza u
+        # zoni sesije, kao changed_at u tablici i arhivi
+        if ts.tzinfo is not None:
+            cur.execute("SELECT %s::timestamptz::timestamp AS ts", (ts,))
+            ts = cur.fetchone()['ts']
+        
+        cur.execute(
+            "SELECT * FROM get_entity_state_as_of(%s, %s, %s)",
+            (entity_name, entity_id, ts)
+        )
+        result = cur.fetchone()
+        if high_water() and result['snapshot_audit_log_id'] is None:
+            result = _state_as_of_with_archive(cur, entity_name, entity_id, ts) or result
     
-    return result
+    if not result or result['last_audit_log_id'] is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nema audit povijesti za entitet do zadanog trenutka"
+        )
+    
+    return EntityStateResponse(
+        entity_name=entity_name,
+        entity_id=entity_id,
+        as_of=ts,
+        exists=result['state'] is not None,
+        state=result['state'],
+        last_audit_log_id=result['last_audit_log_id'],
+        last_changed_at=result['last_changed_at'],
+        snapshot_audit_log_id=result['snapshot_audit_log_id'],
+        replayed_changes=result['replayed_changes']
+    )
+
+
+@router.get("/recent-activity", response_model=List[ActivityItem],
+            summary="Nedavna aktivnost u sustavu")
+async def get_recent_activity(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    include_logins: bool = Query(True, description="Ukljuci i pokusaje prijave"),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Zajednicki feed audit promjena i prijava, od najnovijeg.
+    
+    Svaka grana cita najvise `limit` redaka iz pokrivajuceg indeksa
+    (idx_audit_log_time, idx_login_events_time - index-only scan), a
+    rezultat se spaja po (vrijeme, izvor, id). Cijena stranice ne ovisi
+    o velicini tablica ni o dubini paginacije.
+    Kad stranica seze ispod najstarijeg zapisa u tablici, audit grana
+    se dopunjuje iz arhive.
+    
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    after = decode_source_cursor(cursor)
+    
+    audit_where, params = _feed_after("changed_at", "audit_log_id", "audit", after)
+    query = f"""
+        (SELECT 'audit' AS source, audit_log_id AS activity_id, changed_at AS occurred_at,
+                changed_by AS user_id, NULL::VARCHAR AS username,
+                entity_name, entity_id, action::TEXT AS action,
+                NULL::BOOLEAN AS success, NULL::INET AS ip_address, NULL::VARCHAR AS failure_reason
+         FROM audit_log
+         WHERE TRUE{audit_where}
+         ORDER BY changed_at DESC, audit_log_id DESC
+         LIMIT %s)
+    """
+    params.append(limit)
+    
+    if include_logins:
+        login_where, login_params = _feed_after("login_time", "login_event_id", "login", after)
+        query += f"""
+            UNION ALL
+            (SELECT 'login', login_event_id, login_time,
+                    user_id, username_attempted,
+                    NULL, NULL, NULL,
+                    success, ip_address, failure_reason
+             FROM login_events
+             WHERE TRUE{login_where}
+             ORDER BY login_time DESC, login_event_id DESC
+             LIMIT %s)
+        """
+        params.extend(login_params + [limit])
+    
+    query = f"SELECT * FROM ({query}) feed ORDER BY occurred_at DESC, source DESC, activity_id DESC LIMIT %s"
+    params.append(limit)
+    
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        rows = _feed_with_archive(cur.fetchall(), limit, after)
+    
+    set_next_cursor(response, rows, limit, 'occurred_at', 'activity_id', 'source')
+    return [_activity_item(row) for row in rows]
+
+
+@router.get("/user-activity/{user_id}", response_model=List[ActivityItem],
+            summary="Aktivnost korisnika")
+async def get_user_activity(
+    user_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
+    current_user: dict = Depends(get_current_user),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Promjene koje je korisnik napravio (changed_by) i promjene nad samim
+    korisnikom (entity_name = 'users'), od najnovije.
+    
+    Obje grane citaju pokrivajuce indekse (idx_audit_log_changed_by,
+    idx_audit_log_entity); zapis koji pripada objema vraca se jednom
+    s relation = 'both'.
+    Nepuna stranica dopunjuje se zapisima iz arhive.
+    
+    Potrebna permisija: AUDIT_READ_ALL (ili vlastita aktivnost)
+    """
+    if user_id != current_user['user_id'] and \
+       not check_permission(conn, current_user['user_id'], 'AUDIT_READ_ALL'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Nemate pristup aktivnosti ovog korisnika"
+        )
+    
+    after = decode_cursor(cursor)
+    keyset = " AND (changed_at, audit_log_id) < (%s, %s)" if after else ""
+    keyset_params = list(after) if after else []
+    
+    query = f"""
+        SELECT 'audit' AS source, audit_log_id AS activity_id, changed_at AS occurred_at,
+               changed_by AS user_id, entity_name, entity_id, action::TEXT AS action,
+               CASE 
+                   WHEN changed_by = %s AND entity_name = 'users' AND entity_id = %s THEN 'both'
+                   WHEN changed_by = %s THEN 'by_user'
+                   ELSE 'on_user'
+               END AS relation
+        FROM (
+            (SELECT audit_log_id, changed_at, changed_by, entity_name, entity_id, action
+             FROM audit_log
+             WHERE changed_by = %s{keyset}
+             ORDER BY changed_at DESC, audit_log_id DESC
+             LIMIT %s)
+            UNION
+            (SELECT audit_log_id, changed_at, changed_by, entity_name, entity_id, action
+             FROM audit_log
+             WHERE entity_name = 'users' AND entity_id = %s{keyset}
+             ORDER BY changed_at DESC, audit_log_id DESC
+             LIMIT %s)
+        ) activity
+        ORDER BY changed_at DESC, audit_log_id DESC
+        LIMIT %s
+    """
+    params = [user_id, user_id, user_id,
+              user_id, *keyset_params, limit,
+              user_id, *keyset_params, limit,
+              limit]
+    
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    
+    if len(rows) < limit and high_water():
+        # Starije promjene iz arhive (sve su starije od zapisa u tablici)
+        before = (rows[-1]['occurred_at'], rows[-1]['activity_id']) if rows else after
+        archived = {}
+        for row in read_archived_logs(changed_by=user_id, before=before, limit=limit - len(rows)):
+            archived[row['audit_log_id']] = _archived_activity(row, 'by_user')
+        for row in read_archived_logs(entity_name='users', entity_id=user_id,
+                                      before=before, limit=limit - len(rows)):
+            relation = 'both' if row['audit_log_id'] in archived else 'on_user'
+            archived[row['audit_log_id']] = _archived_activity(row, relation)
+        rows = list(rows) + sorted(
+            archived.values(), key=lambda row: (row['occurred_at'], row['activity_id']), reverse=True
+        )[:limit - len(rows)]
+    
+    set_next_cursor(response, rows, limit, 'occurred_at', 'activity_id')
+    return [_activity_item(row) for row in rows]
 
 
 @router.get("/logins", response_model=List[LoginEventResponse],
             summary="Dohvati login evente")
 async def get_login_events(
+    response: Response,
     user_id: Optional[int] = Query(None, description="Filter po korisniku"),
     username: Optional[str] = Query(None, description="Filter po korisnickom imenu"),
     success: Optional[bool] = Query(None, description="Filter po uspjehu prijave"),
+    subnet: Optional[str] = Query(None, description="Filter po podmrezi (CIDR, npr. 10.0.0.0/8) ili tocnoj IP adresi"),
     from_date: Optional[date] = Query(None, description="Od datuma"),
     to_date: Optional[date] = Query(None, description="Do datuma"),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
     current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
     conn = Depends(get_db_dependency)
 ):
@@ -156,10 +787,21 @@ async def get_login_events(
     
     Login eventi se bilježe putem funkcije:
     - log_login_attempt()
+    
+    Keyset paginacija po (login_time, login_event_id) - vidi X-Next-Cursor header.
+    
+    Filter po podmrezi (ip_address <<= subnet) koristi GiST indeks
+    idx_login_events_ip.
     """
+    after = decode_cursor(cursor)
+    subnet = _parse_cidr(subnet)
     query = "SELECT * FROM login_events WHERE 1=1"
     params = []
     
+    if subnet:
+        query += " AND ip_address <<= %s::cidr"
+        params.append(subnet)
+    
     if user_id:
         query += " AND user_id = %s"
         params.append(user_id)
@@ -180,33 +822,108 @@ async def get_login_events(
         query += " AND login_time <= %s"
         params.append(to_date)
     
-    query += " ORDER BY login_time DESC LIMIT %s"
+    if after:
+        query += " AND (login_time, login_event_id) < (%s, %s)"
+        params.extend(after)
+    
+    query += " ORDER BY login_time DESC, login_event_id DESC LIMIT %s"
     params.append(limit)
     
     with conn.cursor() as cur:
         cur.execute(query, params)
         events = cur.fetchall()
     
-    result = []
-    for event in events:
-        result.append(LoginEventResponse(
-            login_event_id=event['login_event_id'],
-            user_id=event['user_id'],
-            username_attempted=event['username_attempted'],
-            login_time=event['login_time'],
-            ip_address=str(event['ip_address']) if event['ip_address'] else "0.0.0.0",
-            user_agent=event['user_agent'],
-            success=event['success'],
-            failure_reason=event['failure_reason']
-        ))
+    set_next_cursor(response, events, limit, 'login_time', 'login_event_id')
+    return [_login_event_response(event) for event in events]
+
+
+# Sortiranje top-N podmreza
+_SUBNET_SORT = {
+    "failed": "failed_logins DESC",
+    "total": "total_attempts DESC",
+    "failure_ratio": "failure_ratio DESC, total_attempts DESC",
+}
+
+
+@router.get("/logins/subnets", response_model=List[SubnetLoginStats],
+            summary="Top izvorne podmreze prijava")
+async def get_login_subnets(
+    prefix: int = Query(24, description="Velicina podmreze: 24 ili 16 (IPv6: /64 ili /48)"),
+    hours: int = Query(24, ge=1, le=24 * 366, description="Vremenski prozor do sada, u satima"),
+    within: Optional[str] = Query(None, description="Samo podmreze unutar ovog CIDR-a"),
+    sort: str = Query("failed", pattern="^(failed|total|failure_ratio)$"),
+    min_attempts: int = Query(1, ge=1, description="Minimalni broj pokusaja po podmrezi"),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Top-N izvornih podmreza (/24 ili /16) po broju neuspjelih prijava,
+    ukupnom broju pokusaja ili udjelu neuspjelih, u zadnjih N sati.
+    
+    Koristi PostgreSQL funkciju:
+    - get_login_subnet_counts() (rollup login_subnets_hourly + live rep,
+      filter within preko GiST indeksa idx_login_events_ip)
+    
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    if prefix not in (16, 24):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="prefix mora biti 16 ili 24"
+        )
+    within = _parse_cidr(within)
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT 
+                subnet::TEXT AS subnet,
+                successful_logins + failed_logins AS total_attempts,
+                successful_logins,
+                failed_logins,
+                ROUND(failed_logins::NUMERIC / NULLIF(successful_logins + failed_logins, 0), 4)::FLOAT AS failure_ratio
+            FROM get_login_subnet_counts(
+                %s, (CURRENT_TIMESTAMP - make_interval(hours => %s))::TIMESTAMP, 'infinity', %s::cidr
+            )
+            WHERE successful_logins + failed_logins >= %s
+            ORDER BY {_SUBNET_SORT[sort]}, subnet
+            LIMIT %s
+        """, (prefix, hours, within, min_attempts, limit))
+        rows = cur.fetchall()
     
-    return result
+    return [SubnetLoginStats(**row) for row in rows]
+
+
+@router.get("/logins/export", summary="Izvoz login evenata (NDJSON/CSV stream)")
+async def export_login_events(
+    from_date: date = Query(..., description="Od datuma (ukljucivo)"),
+    to_date: Optional[date] = Query(None, description="Do datuma (ukljucivo), zadano danas"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Komprimiraj izvoz gzip formatom"),
+    user_id: Optional[int] = Query(None, description="Filter po korisniku"),
+    success: Optional[bool] = Query(None, description="Filter po uspjehu prijave"),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL"))
+):
+    """
+    Streaming izvoz login evenata za zadani raspon datuma, kronoloski.
+    
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    filters = [
+        (column, value) for column, value in (
+            ("user_id", user_id), ("success", success)
+        ) if value is not None
+    ]
+    return _export_response(LOGIN_EVENTS_EXPORT, filters, from_date, to_date,
+                            export_format, gzip)
 
 
 @router.get("/logins/failed", response_model=List[LoginEventResponse],
             summary="Neuspjeli pokusaji prijave")
 async def get_failed_logins(
+    response: Response,
     limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
     current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
     conn = Depends(get_db_dependency)
 ):
@@ -214,84 +931,118 @@ async def get_failed_logins(
     Dohvaca neuspjele pokusaje prijave.
     Korisno za sigurnosni monitoring.
     
+    Pokusaji odbijeni tijekom throttlinga zapisuju se zbirno
+    (attempt_count > 1, first_attempt_at - login_time); trenutni
+    brojaci su na /audit/logins/failed/live.
+    
     Potrebna permisija: AUDIT_READ_ALL
     """
+    after = decode_cursor(cursor)
+    query = "SELECT * FROM login_events WHERE success = FALSE"
+    params = []
+    
+    if after:
+        query += " AND (login_time, login_event_id) < (%s, %s)"
+        params.extend(after)
+    
+    query += " ORDER BY login_time DESC, login_event_id DESC LIMIT %s"
+    params.append(limit)
+    
     with conn.cursor() as cur:
-        cur.execute("""
-            SELECT * FROM login_events 
-            WHERE success = FALSE
-            ORDER BY login_time DESC
-            LIMIT %s
-        """, (limit,))
+        cur.execute(query, params)
         events = cur.fetchall()
     
-    result = []
-    for event in events:
-        result.append(LoginEventResponse(
-            login_event_id=event['login_event_id'],
-            user_id=event['user_id'],
-            username_attempted=event['username_attempted'],
-            login_time=event['login_time'],
-            ip_address=str(event['ip_address']) if event['ip_address'] else "0.0.0.0",
-            user_agent=event['user_agent'],
-            success=event['success'],
-            failure_reason=event['failure_reason']
-        ))
+    set_next_cursor(response, events, limit, 'login_time', 'login_event_id')
+    return [_login_event_response(event) for event in events]
+
+
+@router.get("/logins/failed/live", response_model=LoginThrottleResponse,
+            summary="Brojaci neuspjelih prijava (brute-force zastita)")
+async def get_failed_login_counters(
+    top: int = Query(20, ge=1, le=200, description="Broj IP adresa / korisnickih imena s najvise neuspjeha"),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL"))
+):
+    """
+    Trenutni brojaci kliznog prozora neuspjelih prijava po IP adresi i
+    korisnickom imenu, te zbirni zapisi koji jos nisu upisani u login_events.
     
-    return result
+    Brojaci su u memoriji procesa koji obradjuje zahtjev.
+    
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    return login_throttle.snapshot(top)
 
 
 @router.get("/statistics", summary="Statistike audita")
 async def get_audit_statistics(
+    from_date: Optional[date] = Query(None, description="Pocetni datum (ukljucivo)"),
+    to_date: Optional[date] = Query(None, description="Zavrsni datum (ukljucivo)"),
     current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
     conn = Depends(get_db_dependency)
 ):
     """
     Dohvaca statistike audit logova i login evenata.
     
+    Brojevi dolaze iz satnih rollup tablica (audit_log_hourly,
+    login_events_hourly), a samo rubovi raspona i zapisi nakon
+    zadnjeg osvjezavanja citaju se izravno iz audit_log/login_events.
+    
+    Koristi PostgreSQL funkcije:
+    - get_audit_counts()
+    - get_login_counts()
+    
     Potrebna permisija: AUDIT_READ_ALL
     """
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date mora biti prije ili jednak to_date"
+        )
+    
+    range_from = datetime.combine(from_date, time.min) if from_date else "-infinity"
+    range_to = datetime.combine(to_date + timedelta(days=1), time.min) if to_date else "infinity"
+    
     with conn.cursor() as cur:
         # Broj audit zapisa po entitetu
-        cur.execute("""
-            SELECT entity_name, action, COUNT(*) as count
-            FROM audit_log
-            GROUP BY entity_name, action
-            ORDER BY entity_name, action
-        """)
+        cur.execute("SELECT * FROM get_audit_counts(%s, %s)", (range_from, range_to))
         audit_by_entity = cur.fetchall()
         
         # Login statistike
-        cur.execute("""
-            SELECT 
-                COUNT(*) FILTER (WHERE success = TRUE) as successful_logins,
-                COUNT(*) FILTER (WHERE success = FALSE) as failed_logins,
-                COUNT(DISTINCT user_id) FILTER (WHERE success = TRUE) as unique_users,
-                MAX(login_time) as last_login
-            FROM login_events
-        """)
+        cur.execute("SELECT * FROM get_login_counts(%s, %s)", (range_from, range_to))
         login_stats = cur.fetchone()
         
         # Zadnjih 24 sata
         cur.execute("""
             SELECT 
-                COUNT(*) as total_changes,
-                COUNT(*) FILTER (WHERE action = 'INSERT') as inserts,
-                COUNT(*) FILTER (WHERE action = 'UPDATE') as updates,
-                COUNT(*) FILTER (WHERE action = 'DELETE') as deletes
-            FROM audit_log
-            WHERE changed_at >= NOW() - INTERVAL '24 hours'
+                COALESCE(SUM(count), 0) as total_changes,
+                COALESCE(SUM(count) FILTER (WHERE action = 'INSERT'), 0) as inserts,
+                COALESCE(SUM(count) FILTER (WHERE action = 'UPDATE'), 0) as updates,
+                COALESCE(SUM(count) FILTER (WHERE action = 'DELETE'), 0) as deletes
+            FROM get_audit_counts((NOW() - INTERVAL '24 hours')::TIMESTAMP, 'infinity')
         """)
         last_24h = cur.fetchone()
     
     return {
         "audit_by_entity": [dict(row) for row in audit_by_entity],
         "login_statistics": dict(login_stats) if login_stats else {},
-        "last_24_hours": dict(last_24h) if last_24h else {}
+        "last_24_hours": {key: int(value) for key, value in last_24h.items()} if last_24h else {}
     }
 
 
-@router.post("/cleanup/logs", response_model=MessageResponse,
+def _get_retention_job(conn, job_id: int) -> dict:
+    with conn.cursor() as cur:
+        cur.execute("SELECT * FROM retention_jobs WHERE job_id = %s", (job_id,))
+        job = cur.fetchone()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Retention posao nije pronadjen"
+        )
+    return job
+
+
+@router.post("/cleanup/logs", response_model=RetentionJobResponse,
+             status_code=status.HTTP_202_ACCEPTED,
              summary="Ocisti stare audit logove")
 async def cleanup_audit_logs(
     days_to_keep: int = Query(365, ge=30, le=3650, description="Broj dana za zadrzati"),
@@ -299,29 +1050,23 @@ async def cleanup_audit_logs(
     conn = Depends(get_db_dependency)
 ):
     """
-    Brise audit zapise starije od zadanog broja dana.
+    Pokrece pozadinski posao brisanja audit zapisa starijih od zadanog broja dana.
     
-    Koristi PostgreSQL proceduru:
-    - cleanup_old_audit_logs()
+    Brisanje se izvodi u batch-evima s COMMIT-om i pauzom izmedju njih.
+    Napredak se prati na GET /audit/cleanup/jobs/{job_id}.
+    
+    Koristi PostgreSQL funkciju/proceduru:
+    - create_retention_job()
+    - run_retention_job()
     
     Potrebna permisija: AUDIT_DELETE
     """
-    try:
-        with conn.cursor() as cur:
-            cur.execute("CALL cleanup_old_audit_logs(%s)", (days_to_keep,))
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
-    
-    return MessageResponse(
-        message=f"Audit logovi stariji od {days_to_keep} dana uspjesno obrisani",
-        success=True
-    )
+    job_id = start_job('audit_log', days_to_keep, current_user['user_id'])
+    return RetentionJobResponse(**job_response(_get_retention_job(conn, job_id)))
 
 
-@router.post("/cleanup/logins", response_model=MessageResponse,
+@router.post("/cleanup/logins", response_model=RetentionJobResponse,
+             status_code=status.HTTP_202_ACCEPTED,
              summary="Ocisti stare login evente")
 async def cleanup_login_events(
     days_to_keep: int = Query(90, ge=7, le=365, description="Broj dana za zadrzati"),
@@ -329,23 +1074,62 @@ async def cleanup_login_events(
     conn = Depends(get_db_dependency)
 ):
     """
-    Brise login evente starije od zadanog broja dana.
+    Pokrece pozadinski posao brisanja login evenata starijih od zadanog broja dana.
+    
+    Napredak se prati na GET /audit/cleanup/jobs/{job_id}.
     
-    Koristi PostgreSQL proceduru:
-    - cleanup_old_login_events()
+    Koristi PostgreSQL funkciju/proceduru:
+    - create_retention_job()
+    - run_retention_job()
     
     Potrebna permisija: AUDIT_DELETE
     """
-    try:
-        with conn.cursor() as cur:
-            cur.execute("CALL cleanup_old_login_events(%s)", (days_to_keep,))
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    job_id = start_job('login_events', days_to_keep, current_user['user_id'])
+    return RetentionJobResponse(**job_response(_get_retention_job(conn, job_id)))
+
+
+@router.get("/cleanup/jobs", response_model=List[RetentionJobResponse],
+            summary="Popis retention poslova")
+async def get_retention_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Dohvaca zadnje retention poslove, od najnovijeg.
     
-    return MessageResponse(
-        message=f"Login eventi stariji od {days_to_keep} dana uspjesno obrisani",
-        success=True
-    )
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT * FROM retention_jobs ORDER BY job_id DESC LIMIT %s", (limit,))
+        jobs = cur.fetchall()
+    
+    return [RetentionJobResponse(**job_response(job)) for job in jobs]
+
+
+@router.get("/cleanup/jobs/{job_id}", response_model=RetentionJobResponse,
+            summary="Napredak retention posla")
+async def get_retention_job(
+    job_id: int,
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL")),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Dohvaca status i napredak retention posla.
+    
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    return RetentionJobResponse(**job_response(_get_retention_job(conn, job_id)))
+
+
+@router.get("/archive", summary="Status arhive audit loga")
+async def get_archive_status(
+    current_user: dict = Depends(require_permission("AUDIT_READ_ALL"))
+):
+    """
+    Sazetak arhive audit loga (cold storage): broj segmenata, zapisa
+    i raspon vremena arhiviranih zapisa.
+    
+    Potrebna permisija: AUDIT_READ_ALL
+    """
+    return archive_status()
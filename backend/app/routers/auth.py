@@ -19,6 +19,7 @@ from ..schemas import (
     UserPermission, MessageResponse, ChangePassword
 )
 from ..config import get_settings
+from ..login_throttle import login_throttle
 
 
 router = APIRouter(prefix="/auth", tags=["Autentikacija"])
@@ -36,6 +37,7 @@ async def login(
     
     Koristi PostgreSQL funkcije:
     - log_login_attempt() za evidenciju prijava
+    - log_failed_login_batch() za zbirne zapise odbijenih pokusaja (429)
     
     Returns:
         JWT access token za autentikaciju
@@ -48,21 +50,37 @@ async def login(
     print(f"🔍 LOGIN ATTEMPT: username={form_data.username}, has_password={bool(form_data.password)}")
     print(f"🔍 Headers: Authorization={request.headers.get('authorization', 'NONE')}")
     
+    # Brute-force zastita: preko praga se odbija bez bcrypt provjere,
+    # a pokusaj ide u zbirni zapis umjesto zasebnog retka u login_events.
+    # Odbijeni pokusaji ne povecavaju brojace - prozor istekne i tijekom napada
+    if login_throttle.is_throttled(client_ip, form_data.username):
+        login_throttle.record_throttled(client_ip, form_data.username, user_agent)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Previse neuspjelih pokusaja prijave. Pokusajte ponovno kasnije.",
+            headers={"Retry-After": str(settings.login_throttle_window_seconds)},
+        )
+    
     # Pokusaj autentikacije
     user = authenticate_user(conn, form_data.username, form_data.password)
     
     if not user:
+        login_throttle.record_failure(client_ip, form_data.username)
         # Logiraj neuspjeli pokusaj
         log_login_attempt(
             conn, form_data.username, client_ip, user_agent,
             success=False, failure_reason="INVALID_CREDENTIALS"
         )
+        # HTTPException ponistava transakciju dependency-ja - zapis commitaj prije
+        conn.commit()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Neispravno korisnicko ime ili lozinka",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    login_throttle.reset_username(form_data.username)
+    
     # Logiraj uspjesnu prijavu
     log_login_attempt(
         conn, form_data.username, client_ip, user_agent,
@@ -0,0 +1,78 @@
+"""
+Diagnostics Router - Dijagnostika performansi
+Profili pojedinacnih zahtjeva i pracenje memorije (samo za administratore)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import List
+
+from ..database import get_db_dependency
+from ..auth import get_current_active_user, is_admin
+from ..schemas import ProfileInfo, MemoryTrackingResponse
+from .. import profiling, memory_tracking
+
+
+router = APIRouter(prefix="/diagnostics", tags=["Dijagnostika"])
+
+
+async def require_admin(
+    current_user: dict = Depends(get_current_active_user),
+    conn = Depends(get_db_dependency)
+) -> dict:
+    """Dijagnostika je dostupna samo administratorima"""
+    if not is_admin(conn, current_user['user_id']):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Dijagnostika je dostupna samo administratorima"
+        )
+    return current_user
+
+
+@router.get("/profiles", response_model=List[ProfileInfo],
+            summary="Spremljeni profili zahtjeva")
+async def get_profiles(
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Popis spremljenih profila, najnoviji prvi.
+    
+    Zahtjev se profilira s headerom X-Profile: <PROFILING_TOKEN>
+    (opcionalno X-Profile-Format: cprofile | sample) ili uzorkovanjem
+    (PROFILING_SAMPLE_RATE). Naziv profila vraca se u X-Profile-Id headeru.
+    """
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{name}", summary="Preuzmi profil zahtjeva")
+async def download_profile(
+    name: str,
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Preuzimanje profila: .pstats (python -m pstats, snakeviz) ili
+    .collapsed (flamegraph.pl, speedscope).
+    """
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profil nije pronađen"
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+
+@router.get("/memory", response_model=MemoryTrackingResponse,
+            summary="Vrsna alokacija memorije po ruti")
+async def get_memory_stats(
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Vrsna alokacija po zahtjevu i najveca mjesta alokacije po ruti.
+    
+    Pracenje se ukljucuje s MEMORY_TRACKING_ENABLED=true (tracemalloc).
+    Mjesta alokacije skupljaju se za dio zahtjeva
+    (MEMORY_TRACKING_SNAPSHOT_RATE), u trenutku nakon dohvata redaka
+    iz baze s najvise zauzete memorije.
+    """
+    return memory_tracking.report()
@@ -3,8 +3,9 @@ Tasks Router - Upravljanje zadacima
 CRUD operacije, dodjela, promjena statusa
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
+from datetime import date
 
 from ..database import get_db_dependency
 from ..auth import (
@@ -16,11 +17,39 @@ from ..schemas import (
     TaskStatusUpdate, TaskAssignment, TaskStatistics,
     MessageResponse, TaskStatus, TaskPriority
 )
+from ..pagination import decode_cursor, set_next_cursor
 
 
 router = APIRouter(prefix="/tasks", tags=["Zadaci"])
 
 
+def _task_details(task: dict) -> TaskDetails:
+    """Redak iz v_tasks_details u TaskDetails"""
+    return TaskDetails(
+        task_id=task['task_id'],
+        title=task['title'],
+        description=task['description'],
+        status=task['status'],
+        priority=task['priority'],
+        due_date=task['due_date'],
+        created_by=task['creator_id'],
+        assigned_to=task['assignee_id'],
+        created_at=task['created_at'],
+        updated_at=task['updated_at'],
+        completed_at=task['completed_at'],
+        creator_id=task['creator_id'],
+        creator_username=task['creator_username'],
+        creator_name=task['creator_name'],
+        assignee_id=task['assignee_id'],
+        assignee_username=task['assignee_username'],
+        assignee_name=task['assignee_name'],
+        assignee_ids=task.get('assignee_ids'),
+        assignee_names=task.get('assignee_names'),
+        due_status=task['due_status'],
+        is_overdue=task['due_status'] == 'OVERDUE' if task['due_status'] else False
+    )
+
+
 @router.get("", response_model=List[TaskDetails], summary="Dohvati sve zadatke")
 async def get_all_tasks(
     status_filter: Optional[TaskStatus] = Query(None, alias="status"),
@@ -63,39 +92,15 @@ async def get_all_tasks(
         cur.execute(query, params)
         tasks = cur.fetchall()
     
-    result = []
-    for task in tasks:
-        result.append(TaskDetails(
-            task_id=task['task_id'],
-            title=task['title'],
-            description=task['description'],
-            status=task['status'],
-            priority=task['priority'],
-            due_date=task['due_date'],
-            created_by=task['creator_id'],
-            assigned_to=task['assignee_id'],
-            created_at=task['created_at'],
-            updated_at=task['updated_at'],
-            completed_at=task['completed_at'],
-            creator_id=task['creator_id'],
-            creator_username=task['creator_username'],
-            creator_name=task['creator_name'],
-            assignee_id=task['assignee_id'],
-            assignee_username=task['assignee_username'],
-            assignee_name=task['assignee_name'],
-            assignee_ids=task.get('assignee_ids'),
-            assignee_names=task.get('assignee_names'),
-            due_status=task['due_status'],
-            is_overdue=task['due_status'] == 'OVERDUE' if task['due_status'] else False
-        ))
-    
-    return result
+    return [_task_details(task) for task in tasks]
 
 
 @router.get("/my", response_model=List[TaskDetails], summary="Moji zadaci")
 async def get_my_tasks(
     status_filter: Optional[TaskStatus] = Query(None, alias="status"),
     include_created: bool = Query(False, description="Ukljuci i zadatke koje sam kreirao"),
+    overdue: bool = Query(False, description="Samo zadaci kojima je prosao rok"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
     current_user: dict = Depends(get_current_active_user),
     conn = Depends(get_db_dependency)
 ):
@@ -103,16 +108,24 @@ async def get_my_tasks(
     Dohvaca zadatke trenutnog korisnika.
     
     Koristi PostgreSQL funkciju:
-    - get_user_tasks()
+    - get_user_tasks() (SQL funkcija, planer u nju gura dodatni WHERE i LIMIT)
     """
+    query = "SELECT * FROM get_user_tasks(%s, %s, %s)"
+    params = [
+        current_user['user_id'],
+        status_filter.value if status_filter else None,
+        include_created
+    ]
+    
+    if overdue:
+        query += " WHERE is_overdue"
+    
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    
     with conn.cursor() as cur:
-        cur.execute("""
-            SELECT * FROM get_user_tasks(%s, %s, %s)
-        """, (
-            current_user['user_id'],
-            status_filter.value if status_filter else None,
-            include_created
-        ))
+        cur.execute(query, params)
         tasks = cur.fetchall()
     
     result = []
@@ -177,6 +190,103 @@ async def get_my_task_statistics(
     return TaskStatistics(**stats)
 
 
+@router.get("/team", response_model=List[TaskDetails], summary="Zadaci moje organizacije")
+async def get_team_tasks(
+    response: Response,
+    status_filter: Optional[TaskStatus] = Query(None, alias="status"),
+    priority: Optional[TaskPriority] = Query(None),
+    overdue: bool = Query(False, description="Samo zadaci kojima je prosao rok"),
+    due_from: Optional[date] = Query(None, description="Rok od datuma"),
+    due_to: Optional[date] = Query(None, description="Rok do datuma"),
+    max_depth: Optional[int] = Query(None, ge=1, description="Najvise razina ispod mene (1 = samo direktni podredjeni)"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
+    current_user: dict = Depends(require_permission("TASK_READ_TEAM")),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Dohvaca zadatke svih korisnika u organizaciji trenutnog korisnika
+    (podredjeni na svim razinama), preko assigned_to ili task_assignees.
+    Zahtijeva permisiju: TASK_READ_TEAM
+    
+    Koristi PostgreSQL tablicu i view:
+    - user_hierarchy (podstablo managera)
+    - v_tasks_details
+    
+    Jedan upit umjesto zasebnog zahtjeva po clanu tima. Keyset paginacija
+    po (created_at, task_id): ako je stranica puna, X-Next-Cursor header
+    sadrzi kursor za sljedecu stranicu.
+    
+    Svaka grana (assigned_to, task_assignees) je poredana po
+    idx_tasks_created i ogranicena na limit, pa planer za veliko podstablo
+    cita zadatke redom i provjerava clanstvo u user_hierarchy, a za mali
+    tim krece od podstabla - stranica ne sortira sve zadatke organizacije.
+    """
+    after = decode_cursor(cursor)
+    
+    scope = "h.ancestor_id = %s AND h.depth > 0"
+    scope_params = [current_user['user_id']]
+    if max_depth:
+        scope += " AND h.depth <= %s"
+        scope_params.append(max_depth)
+    
+    filters = ""
+    filter_params = []
+    
+    if status_filter:
+        filters += " AND t.status = %s"
+        filter_params.append(status_filter.value)
+    
+    if priority:
+        filters += " AND t.priority = %s"
+        filter_params.append(priority.value)
+    
+    if overdue:
+        # isto kao due_status = 'OVERDUE' u v_tasks_details
+        filters += " AND t.status NOT IN ('COMPLETED', 'CANCELLED') AND t.due_date < CURRENT_DATE"
+    
+    if due_from:
+        filters += " AND t.due_date >= %s"
+        filter_params.append(due_from)
+    
+    if due_to:
+        filters += " AND t.due_date <= %s"
+        filter_params.append(due_to)
+    
+    if after:
+        filters += " AND (t.created_at, t.task_id) < (%s, %s)"
+        filter_params.extend(after)
+    
+    # Grana po task_assignees koristi EXISTS - vise izvrsitelja iz tima ne
+    # smije dati duplikate koji bi skratili LIMIT grane
+    query = f"""
+        SELECT * FROM v_tasks_details
+        WHERE task_id IN (
+            (SELECT t.task_id FROM tasks t
+             JOIN user_hierarchy h ON h.descendant_id = t.assigned_to
+             WHERE {scope}{filters}
+             ORDER BY t.created_at DESC, t.task_id DESC LIMIT %s)
+            UNION
+            (SELECT t.task_id FROM tasks t
+             WHERE EXISTS (
+                 SELECT 1 FROM task_assignees ta
+                 JOIN user_hierarchy h ON h.descendant_id = ta.user_id
+                 WHERE ta.task_id = t.task_id AND {scope}){filters}
+             ORDER BY t.created_at DESC, t.task_id DESC LIMIT %s)
+        )
+        ORDER BY created_at DESC, task_id DESC LIMIT %s
+    """
+    params = (scope_params + filter_params + [limit]
+              + scope_params + filter_params + [limit] + [limit])
+    
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        tasks = cur.fetchall()
+    
+    set_next_cursor(response, tasks, limit, 'created_at', 'task_id')
+    return [_task_details(task) for task in tasks]
+
+
 @router.get("/{task_id}", response_model=TaskDetails, summary="Dohvati zadatak")
 async def get_task(
     task_id: int,
@@ -3,17 +3,20 @@ Users Router - Upravljanje korisnicima
 CRUD operacije, statistike, timovi
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
+from datetime import date, timedelta
 
 from ..database import get_db_dependency
 from ..auth import (
     get_current_active_user, require_permission, get_password_hash,
-    check_permission, is_manager_of_user, is_admin
+    check_permission, is_in_org_of_user, is_admin
 )
+from ..pagination import decode_depth_cursor, set_next_cursor
 from ..schemas import (
     UserCreate, UserUpdate, UserResponse, UserWithRoles,
-    UserStatistics, TeamMember, MessageResponse, TaskStatistics
+    UserStatistics, TeamMember, OrgMember, MessageResponse, TaskStatistics,
+    TeamMemberStatistics, TeamStatistics
 )
 
 
@@ -103,13 +106,13 @@ async def get_user(
     
     Korisnik moze vidjeti:
     - Vlastite podatke
-    - Podatke clanova svog tima (ako je manager)
+    - Podatke korisnika u svojoj organizaciji (ako je manager, na bilo kojoj razini)
     - Sve korisnike (ako ima USER_READ_ALL permisiju)
     """
     # Provjera pristupa
     can_view = (
         user_id == current_user['user_id'] or  
-        is_manager_of_user(conn, current_user['user_id'], user_id) or  
+        is_in_org_of_user(conn, current_user['user_id'], user_id) or  
         check_permission(conn, current_user['user_id'], 'USER_READ_ALL')  
     )
     
@@ -164,7 +167,7 @@ async def get_user_task_statistics(
     # Provjera pristupa
     can_view = (
         user_id == current_user['user_id'] or
-        is_manager_of_user(conn, current_user['user_id'], user_id) or
+        is_in_org_of_user(conn, current_user['user_id'], user_id) or
         check_permission(conn, current_user['user_id'], 'USER_READ_ALL')
     )
     
@@ -214,6 +217,191 @@ async def get_team_members(
     return [TeamMember(**member) for member in members]
 
 
+@router.get("/{user_id}/org", response_model=List[OrgMember],
+            summary="Organizacija managera")
+async def get_org(
+    user_id: int,
+    response: Response,
+    max_depth: Optional[int] = Query(None, ge=1, description="Najvise razina ispod korisnika (1 = samo direktni podredjeni)"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Kursor iz X-Next-Cursor headera prethodne stranice"),
+    current_user: dict = Depends(get_current_active_user),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Dohvaca sve podredjene korisnika na svim razinama (podstablo hijerarhije).
+    
+    Koristi PostgreSQL tablicu:
+    - user_hierarchy (closure tablica, odrzavaju je triggeri nad users.manager_id)
+    
+    Korisnik moze vidjeti vlastitu organizaciju, organizaciju svakog
+    korisnika u svojoj organizaciji, ili sve (USER_READ_ALL).
+    
+    Sortirano po razini pa po ID-u; keyset paginacija po (depth, user_id):
+    ako je stranica puna, X-Next-Cursor header sadrzi kursor za sljedecu stranicu.
+    """
+    can_view = (
+        user_id == current_user['user_id'] or
+        is_in_org_of_user(conn, current_user['user_id'], user_id) or
+        check_permission(conn, current_user['user_id'], 'USER_READ_ALL')
+    )
+    
+    if not can_view:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Nemate pristup organizaciji ovog korisnika"
+        )
+    
+    after = decode_depth_cursor(cursor)
+    
+    with conn.cursor() as cur:
+        cur.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
+        if not cur.fetchone():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Korisnik nije pronadjen"
+            )
+        
+        query = """
+            SELECT u.user_id, u.username, u.first_name || ' ' || u.last_name AS full_name,
+                   u.email, u.is_active, u.manager_id, h.depth
+            FROM user_hierarchy h
+            JOIN users u ON u.user_id = h.descendant_id
+            WHERE h.ancestor_id = %s AND h.depth > 0
+        """
+        params = [user_id]
+        
+        if max_depth:
+            query += " AND h.depth <= %s"
+            params.append(max_depth)
+        
+        if after:
+            query += " AND (h.depth, h.descendant_id) > (%s, %s)"
+            params.extend(after)
+        
+        query += " ORDER BY h.depth, h.descendant_id LIMIT %s"
+        params.append(limit)
+        
+        cur.execute(query, params)
+        members = cur.fetchall()
+    
+    set_next_cursor(response, members, limit, 'depth', 'user_id')
+    return [OrgMember(**member) for member in members]
+
+
+@router.get("/{user_id}/team/statistics", response_model=TeamStatistics,
+            summary="Statistika zadataka organizacije")
+async def get_team_statistics(
+    user_id: int,
+    max_depth: Optional[int] = Query(None, ge=1, description="Najvise razina ispod korisnika (1 = samo direktni podredjeni)"),
+    from_date: Optional[date] = Query(None, description="Zadaci kreirani od datuma (ukljucivo)"),
+    to_date: Optional[date] = Query(None, description="Zadaci kreirani do datuma (ukljucivo)"),
+    current_user: dict = Depends(get_current_active_user),
+    conn = Depends(get_db_dependency)
+):
+    """
+    Dohvaca statistiku zadataka za sve podredjene korisnika (po clanu i
+    ukupno) jednim upitom umjesto zasebnog /statistics poziva po clanu.
+    
+    Koristi PostgreSQL tablicu:
+    - user_hierarchy (podstablo korisnika)
+    
+    Zadatak se broji clanu ako mu je dodijeljen preko assigned_to ili
+    task_assignees. U ukupnom retku (GROUPING SETS) zadatak s vise
+    dodijeljenih clanova broji se jednom.
+    """
+    can_view = (
+        user_id == current_user['user_id'] or
+        is_in_org_of_user(conn, current_user['user_id'], user_id) or
+        check_permission(conn, current_user['user_id'], 'USER_READ_ALL')
+    )
+    
+    if not can_view:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Nemate pristup statistikama ovog tima"
+        )
+    
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date mora biti prije ili jednak to_date"
+        )
+    
+    team_params = [user_id]
+    depth_filter = ""
+    if max_depth:
+        depth_filter = " AND depth <= %s"
+        team_params.append(max_depth)
+    
+    window = ""
+    window_params = []
+    if from_date:
+        window += " AND t.created_at >= %s"
+        window_params.append(from_date)
+    if to_date:
+        window += " AND t.created_at < %s"
+        window_params.append(to_date + timedelta(days=1))
+    
+    query = f"""
+        WITH team AS (
+            SELECT descendant_id AS user_id, depth
+            FROM user_hierarchy
+            WHERE ancestor_id = %s AND depth > 0{depth_filter}
+        ),
+        member_tasks AS (
+            SELECT t.assigned_to AS user_id, t.task_id, t.status, t.due_date
+            FROM tasks t
+            WHERE t.assigned_to IN (SELECT user_id FROM team){window}
+            UNION
+            SELECT ta.user_id, t.task_id, t.status, t.due_date
+            FROM task_assignees ta
+            JOIN tasks t ON t.task_id = ta.task_id
+            WHERE ta.user_id IN (SELECT user_id FROM team){window}
+        ),
+        stats AS (
+            SELECT
+                m.user_id,
+                m.depth,
+                GROUPING(m.user_id) = 1 AS is_total,
+                COUNT(DISTINCT mt.task_id) AS total_tasks,
+                COUNT(DISTINCT mt.task_id) FILTER (WHERE mt.status = 'COMPLETED') AS completed_tasks,
+                COUNT(DISTINCT mt.task_id) FILTER (WHERE mt.status = 'IN_PROGRESS') AS in_progress_tasks,
+                COUNT(DISTINCT mt.task_id) FILTER (
+                    WHERE mt.due_date < CURRENT_DATE AND mt.status NOT IN ('COMPLETED', 'CANCELLED')
+                ) AS overdue_tasks
+            FROM team m
+            LEFT JOIN member_tasks mt ON mt.user_id = m.user_id
+            GROUP BY GROUPING SETS ((m.user_id, m.depth), ())
+        )
+        SELECT s.*, u.username, u.first_name || ' ' || u.last_name AS full_name,
+               CASE WHEN s.total_tasks > 0
+                    THEN ROUND(s.completed_tasks::NUMERIC / s.total_tasks * 100, 2)
+                    ELSE 0
+               END AS completion_rate
+        FROM stats s
+        LEFT JOIN users u ON u.user_id = s.user_id
+        ORDER BY s.is_total, s.depth, full_name
+    """
+    
+    with conn.cursor() as cur:
+        cur.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
+        if not cur.fetchone():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Korisnik nije pronadjen"
+            )
+        
+        cur.execute(query, team_params + window_params + window_params)
+        rows = cur.fetchall()
+    
+    total = next(row for row in rows if row['is_total'])
+    return TeamStatistics(
+        members=[TeamMemberStatistics(**row) for row in rows if not row['is_total']],
+        total=TaskStatistics(**total)
+    )
+
+
 @router.post("/{user_id}/team/add", response_model=MessageResponse,
              summary="Dodaj korisnika u tim")
 async def add_to_team(
@@ -332,6 +332,31 @@ class TeamMember(BaseModel):
     manager_full_name: Optional[str] = None
 
 
+class OrgMember(BaseModel):
+    """Clan organizacije managera (podstablo hijerarhije)"""
+    user_id: int
+    username: str
+    full_name: str
+    email: str
+    is_active: bool
+    manager_id: Optional[int] = None
+    depth: int
+
+
+class TeamMemberStatistics(TaskStatistics):
+    """Statistika zadataka jednog clana organizacije"""
+    user_id: int
+    username: str
+    full_name: str
+    depth: int
+
+
+class TeamStatistics(BaseModel):
+    """Statistika zadataka organizacije - po clanu i ukupno"""
+    members: List[TeamMemberStatistics]
+    total: TaskStatistics
+
+
 # ============== AUDIT MODELS ==============
 
 class AuditLogResponse(BaseModel):
@@ -345,6 +370,7 @@ class AuditLogResponse(BaseModel):
     old_value: Optional[dict] = None
     new_value: Optional[dict] = None
     ip_address: Optional[str] = None
+    payload_format: str = "full"
     
     class Config:
         from_attributes = True
@@ -360,11 +386,129 @@ class LoginEventResponse(BaseModel):
     user_agent: Optional[str] = None
     success: bool
     failure_reason: Optional[str] = None
+    attempt_count: int = 1                       # >1 za zbirne zapise tijekom throttlinga
+    first_attempt_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ThrottleCounter(BaseModel):
+    """Brojac neuspjelih prijava jedne IP adrese ili korisnickog imena"""
+    key: str
+    failures: float
+    throttled: bool
+    first_seen: datetime
+    last_seen: datetime
+
+
+class LoginThrottleResponse(BaseModel):
+    """Trenutno stanje brute-force zastite (klizni prozor)"""
+    window_seconds: int
+    ip_threshold: int
+    username_threshold: int
+    pending_aggregates: int
+    pending_attempts: int
+    ips: List[ThrottleCounter]
+    usernames: List[ThrottleCounter]
+
+
+class SubnetLoginStats(BaseModel):
+    """Prijave iz jedne izvorne podmreze u vremenskom prozoru"""
+    subnet: str
+    total_attempts: int
+    successful_logins: int
+    failed_logins: int
+    failure_ratio: float
+
+
+class ActivityItem(BaseModel):
+    """Stavka activity feeda - audit promjena ili pokusaj prijave"""
+    source: str                       # 'audit' ili 'login'
+    activity_id: int                  # audit_log_id ili login_event_id
+    occurred_at: datetime
+    user_id: Optional[int] = None     # changed_by ili korisnik koji se prijavio
+    username: Optional[str] = None
+    entity_name: Optional[str] = None
+    entity_id: Optional[int] = None
+    action: Optional[str] = None
+    success: Optional[bool] = None
+    ip_address: Optional[str] = None
+    failure_reason: Optional[str] = None
+    relation: Optional[str] = None    # user-activity: 'by_user', 'on_user' ili 'both'
+
+
+class EntityStateResponse(BaseModel):
+    """Stanje entiteta rekonstruirano iz audit_log u zadanom trenutku"""
+    entity_name: str
+    entity_id: int
+    as_of: datetime
+    exists: bool
+    state: Optional[dict] = None
+    last_audit_log_id: int
+    last_changed_at: datetime
+    snapshot_audit_log_id: Optional[int] = None
+    replayed_changes: int
+
+
+class RetentionJobResponse(BaseModel):
+    """Response model posla brisanja starih audit/login zapisa"""
+    job_id: int
+    target: str
+    cutoff: datetime
+    status: str
+    rows_estimated: Optional[int] = None
+    rows_deleted: int = 0
+    batches_done: int = 0
+    progress_percent: Optional[float] = None
+    requested_by: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    error_message: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 
+# ============== DIAGNOSTICS MODELS ==============
+
+class ProfileInfo(BaseModel):
+    """Spremljeni profil zahtjeva"""
+    name: str
+    format: str
+    size_bytes: int
+    created_at: datetime
+
+
+class AllocationSite(BaseModel):
+    """Mjesto alokacije (okvir aplikacije i mjesto u biblioteci)"""
+    site: str
+    size_bytes: int
+    count: int
+
+
+class RouteMemoryStats(BaseModel):
+    """Vrsna alokacija zahtjeva jedne rute"""
+    route: str
+    requests: int
+    peak_bytes_max: int
+    peak_bytes_avg: int
+    peak_bytes_last: int
+    concurrent_requests: int        # mjerenja preklopljena s drugim zahtjevima (nisu u peak_*)
+    concurrent_overlap_max: int     # najvise drugih zahtjeva preklopljenih s jednim mjerenjem
+    top_sites: List[AllocationSite]
+
+
+class MemoryTrackingResponse(BaseModel):
+    """Stanje tracemalloc pracenja i statistika po rutama"""
+    enabled: bool
+    traced_current_bytes: int
+    traced_peak_bytes: int
+    routes: List[RouteMemoryStats]
+
+
 # ============== GENERIC MODELS ==============
 
 class MessageResponse(BaseModel):
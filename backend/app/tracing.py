@@ -0,0 +1,254 @@
+"""
+Tracing zahtjeva (spanovi u OTLP/JSON formatu)
+Svaki uzorkovani zahtjev dobiva korijenski span i podspanove za
+razrjesavanje ovisnosti (get_current_user, require_permission), otvaranje
+konekcije, svaku SQL naredbu, bcrypt i serijalizaciju odgovora.
+
+Uzorkovanje: tracing_sample_rate ili dolazni W3C traceparent header sa
+sampled zastavicom. Neuzorkovani zahtjev kosta jedan ContextVar.get() po
+mjestu instrumentacije.
+
+Zavrseni spanovi idu u ograniceni red (deque - append bez locka) koji
+pozadinski posao periodicki salje u batchevima: HTTP POST na
+tracing_endpoint (OTLP/HTTP JSON, npr. http://localhost:4318/v1/traces)
+i/ili kao jedna linija JSON-a po batchu u tracing_file.
+"""
+
+import json
+import os
+import random
+import time
+import urllib.request
+from collections import deque
+from contextvars import ContextVar
+from typing import List, Optional
+
+from .config import get_settings
+
+
+settings = get_settings()
+
+TRACEPARENT_HEADER = "traceparent"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+
+class Span:
+    """Jedan span; zavrseni spanovi se pretvaraju u OTLP JSON tek pri slanju"""
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str,
+                 kind: int = SPAN_KIND_INTERNAL, start_ns: Optional[int] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns = 0
+        self.attributes: dict = {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_finished: deque = deque(maxlen=max(1, settings.tracing_max_queue))
+_dropped = 0
+
+
+def current() -> Optional[Span]:
+    return _current.get()
+
+
+def _finish(span: Span) -> None:
+    global _dropped
+    span.end_ns = time.time_ns()
+    if len(_finished) == _finished.maxlen:
+        _dropped += 1    # deque odbacuje najstariji span
+    _finished.append(span)
+
+
+# ============== KORIJENSKI SPAN ZAHTJEVA ==============
+
+def _parse_traceparent(value: Optional[str]):
+    """W3C traceparent: 00-<trace_id>-<parent_id>-<flags>"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = int(parts[3], 16) & 1
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(sampled)
+
+
+def start_request(method: str, path: str, traceparent: Optional[str]):
+    """Pocinje korijenski span ako je zahtjev uzorkovan; vraca (span, token) ili None"""
+    parent = _parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        if settings.tracing_sample_rate <= 0 or random.random() >= settings.tracing_sample_rate:
+            return None
+        trace_id, parent_id, sampled = os.urandom(16).hex(), None, True
+    if not sampled or not (settings.tracing_endpoint or settings.tracing_file):
+        return None
+    span = Span(trace_id, parent_id, f"{method} {path}", SPAN_KIND_SERVER)
+    span.set("http.request.method", method)
+    span.set("url.path", path)
+    return span, _current.set(span)
+
+
+def finish_request(started, route: str, status_code: int) -> None:
+    span, token = started
+    _current.reset(token)
+    span.name = f"{span.attributes['http.request.method']} {route}"
+    span.set("http.route", route)
+    span.set("http.response.status_code", status_code)
+    if status_code >= 500:
+        span.error = f"HTTP {status_code}"
+    _finish(span)
+
+
+# ============== PODSPANOVI ==============
+
+class _SpanScope:
+    """Context manager podspana (klasa umjesto generatora - manji trosak)"""
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _current.reset(self.token)
+        _finish(self.span)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP = _NoopScope()
+
+
+def span(name: str, **attributes):
+    """Podspan tekuceg spana; bez aktivnog tracea ne radi nista"""
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    child = Span(parent.trace_id, parent.span_id, name)
+    if attributes:
+        child.attributes.update(attributes)
+    return _SpanScope(child)
+
+
+def record_span(name: str, start_ns: int, kind: int = SPAN_KIND_INTERNAL, **attributes) -> None:
+    """Zavrseni podspan od start_ns do sada (za mjesta koja vec mjere vrijeme)"""
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(parent.trace_id, parent.span_id, name, kind, start_ns)
+    child.attributes.update(attributes)
+    _finish(child)
+
+
+# ============== IZVOZ ==============
+
+def _drain(limit: int) -> List[Span]:
+    spans = []
+    while _finished and len(spans) < limit:
+        spans.append(_finished.popleft())
+    return spans
+
+
+def _payload(spans: List[Span]) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", settings.tracing_service_name),
+                                        _attribute("process.pid", os.getpid())]},
+            "scopeSpans": [{
+                "scope": {"name": "app.tracing"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+def _export(body: bytes) -> None:
+    if settings.tracing_file:
+        with open(settings.tracing_file, "ab") as f:
+            f.write(body + b"\n")
+    if settings.tracing_endpoint:
+        request = urllib.request.Request(
+            settings.tracing_endpoint, data=body, method="POST",
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+
+def flush() -> int:
+    """Salje sve zavrsene spanove u batchevima; vraca broj poslanih spanova"""
+    global _dropped
+    if _dropped:
+        print(f"Tracing: odbaceno {_dropped} spanova (pun red)")
+        _dropped = 0
+    sent = 0
+    while True:
+        spans = _drain(max(1, settings.tracing_batch_size))
+        if not spans:
+            return sent
+        try:
+            _export(json.dumps(_payload(spans), separators=(",", ":")).encode("utf-8"))
+        except Exception as e:
+            print(f"Tracing: izvoz {len(spans)} spanova nije uspio: {e}")
+            return sent
+        sent += len(spans)
@@ -0,0 +1,525 @@
+"""
+GENERATOR: Sinteticki skup podataka za testiranje opterecenja
+
+Puni employee_management shemu s N korisnika (hijerarhija admin ->
+direktori -> manageri -> zaposlenici), ulogama i direktnim permisijama,
+M zadataka s vise izvrsitelja, audit poviješcu (INSERT + prijelazi
+statusa, ista struktura kao audit triggeri) i povijescu prijava
+(uspjesne, neuspjele, zbirne THROTTLED, brute-force IP rasponi).
+
+- punjenje iskljucivo kroz COPY, u paralelnim workerima (--jobs)
+- deterministicno: isti --seed, --until i velicine daju iste podatke
+  (neovisno o --jobs - svaki odsjecak ima vlastiti generator), ukljucivo
+  users.password_hash - bcrypt salt se izvodi iz --seed
+- audit triggeri su iskljuceni za vrijeme punjenja (audit se generira);
+  superuser dodatno preskace FK provjere (session_replication_role)
+- FK provjere ostaju ukljucene za ostale korisnike baze, pa se odsjecci s
+  adminom, direktorima i managerima (na njih pokazuju manager_id i
+  assigned_by) ucitavaju redom, a tek onda ostali paralelno
+- --drop-indexes brise sekundarne indekse prije i gradi ih nakon punjenja
+- na kraju: setval sekvenci, rebuild_user_hierarchy() (triggeri su bili
+  iskljuceni), ANALYZE, refresh_audit_rollups(), build_audit_snapshots()
+
+Lozinke: admin = --admin-password (Admin123!), ostali = --password (Bench123!).
+Korisnicka imena: admin, director_<id>, manager_<id>, user_<id>.
+
+Pokretanje (iz backend/ direktorija, koristi .env):
+    python ../benchmarks/generate_dataset.py --reset --users 1000 --tasks 20000
+    python ../benchmarks/generate_dataset.py --reset --users 100000 --tasks 10000000 \\
+        --drop-indexes --jobs 8 --until 2026-01-01
+"""
+
+import argparse
+import base64
+import io
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+import psycopg2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+
+
+LOADED_TABLES = [
+    "users", "user_roles", "user_permissions", "tasks", "task_assignees",
+    "audit_log", "login_events",
+]
+RESET_TABLES = LOADED_TABLES + [
+    "audit_log_hourly", "login_events_hourly", "login_users_hourly",
+    "login_subnets_hourly", "rollup_watermarks", "audit_snapshots", "retention_jobs",
+]
+
+TASK_EVENTS_MAX = 5          # INSERT + najvise 4 promjene statusa po zadatku
+ASSIGNEES_MAX = 3
+DIRECT_PERMISSIONS_MAX = 2
+
+STATUS_WEIGHTS = [("NEW", 20), ("IN_PROGRESS", 30), ("ON_HOLD", 5), ("COMPLETED", 40), ("CANCELLED", 5)]
+STATUS_PATHS = {
+    "NEW": [],
+    "IN_PROGRESS": ["IN_PROGRESS"],
+    "ON_HOLD": ["IN_PROGRESS", "ON_HOLD"],
+    "COMPLETED": ["IN_PROGRESS", "COMPLETED"],
+    "CANCELLED": ["CANCELLED"],
+}
+PRIORITY_WEIGHTS = [("LOW", 20), ("MEDIUM", 45), ("HIGH", 25), ("URGENT", 10)]
+
+FIRST_NAMES = ["Ivan", "Marko", "Ana", "Petra", "Luka", "Maja", "Josip", "Iva", "Tomislav",
+               "Katarina", "Nikola", "Lucija", "Filip", "Sara", "Matej", "Ema", "Karlo", "Lana"]
+LAST_NAMES = ["Horvat", "Kovacevic", "Babic", "Maric", "Juric", "Novak", "Kovacic", "Knezevic",
+              "Vukovic", "Markovic", "Petrovic", "Matic", "Tomic", "Pavlovic", "Bozic", "Blazevic"]
+TITLE_VERBS = ["Pripremiti", "Azurirati", "Provjeriti", "Implementirati", "Dokumentirati",
+               "Testirati", "Analizirati", "Optimizirati", "Migrirati", "Pregledati"]
+TITLE_OBJECTS = ["izvjestaj", "modul prijave", "bazu klijenata", "API dokumentaciju",
+                 "mjesecni budzet", "plan projekta", "sigurnosne postavke", "CI pipeline",
+                 "korisnicke upute", "integraciju placanja", "nadzornu plocu", "backup"]
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) Firefox/121.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2) Mobile/15E148",
+    "python-requests/2.31",
+]
+KNOWN_USER_FAILURES = ["Invalid password", "Account inactive"]
+AUDIT_COLUMNS = ("audit_log_id, entity_name, entity_id, action, changed_by, changed_at, "
+                 "old_value, new_value, payload_format")
+
+
+_BCRYPT_ALPHABET = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789",
+)
+
+
+def _seeded_salt(rng: random.Random, rounds: int = 10) -> bytes:
+    """bcrypt salt iz generatora (umjesto bcrypt.gensalt) - isti seed, isti hash"""
+    encoded = base64.b64encode(rng.randbytes(16)).translate(_BCRYPT_ALPHABET)[:22]
+    return b"$2b$%02d$" % rounds + encoded
+
+
+# ============== PLAN (deterministicki, dijele ga svi workeri) ==============
+
+class Plan:
+    """Hijerarhija, uloge i timovi - izracunati jednom u glavnom procesu"""
+
+    def __init__(self, args, role_ids: dict, permission_ids: list):
+        self.args = args
+        self.seed = args.seed
+        self.users = args.users
+        self.tasks = args.tasks
+        self.logins = args.users * args.logins_per_user
+        self.until = datetime.fromisoformat(args.until)
+        self.start = self.until - timedelta(days=args.days)
+        self.span_seconds = args.days * 86400
+        self.role_ids = role_ids
+        self.permission_ids = permission_ids
+        salt_rng = random.Random(f"{self.seed}:passwords")
+        self.admin_hash = bcrypt.hashpw(args.admin_password.encode(), _seeded_salt(salt_rng)).decode()
+        self.user_hash = bcrypt.hashpw(args.password.encode(), _seeded_salt(salt_rng)).decode()
+
+        rng = random.Random(f"{self.seed}:plan")
+        managers = max(1, (self.users - 1) // 8)
+        directors = max(1, managers // 10)
+        self.director_ids = range(2, 2 + directors)
+        self.manager_ids = list(range(2, 2 + managers))     # direktori su i manageri
+        self.manager_of = [None] * (self.users + 1)
+        self.teams = {manager_id: [] for manager_id in [1] + self.manager_ids}
+        for user_id in range(2, self.users + 1):
+            if user_id < 2 + directors:
+                manager_id = 1
+            elif user_id < 2 + managers:
+                manager_id = rng.choice(self.director_ids)
+            else:
+                manager_id = rng.choice(self.manager_ids)
+            self.manager_of[user_id] = manager_id
+            self.teams[manager_id].append(user_id)
+        self.creators = self.manager_ids or [1]
+
+    def kind(self, user_id: int) -> str:
+        if user_id == 1:
+            return "admin"
+        if user_id in self.director_ids:
+            return "director"
+        if user_id < 2 + len(self.manager_ids):
+            return "manager"
+        return "user"
+
+    def username(self, user_id: int) -> str:
+        kind = self.kind(user_id)
+        return "admin" if kind == "admin" else f"{kind}_{user_id}"
+
+    def timestamp(self, offset_seconds: float) -> datetime:
+        return self.start + timedelta(seconds=offset_seconds)
+
+
+_plan: Plan = None
+
+
+def _init_worker(plan: Plan) -> None:
+    global _plan
+    _plan = plan
+
+
+# ============== COPY POMOCNE FUNKCIJE ==============
+
+def _ts(value: datetime) -> str:
+    return str(value)     # ISO format s razmakom - PostgreSQL ga cita izravno
+
+
+def _row(*values) -> str:
+    """Redak u COPY text formatu (vrijednosti ne sadrze tab, newline ni backslash)"""
+    return "\t".join("\\N" if v is None else str(v) for v in values) + "\n"
+
+
+def _copy(cur, table: str, columns: str, buffer: io.StringIO) -> None:
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+def _copy_all(copies) -> None:
+    """Jedna transakcija po odsjecku: COPY svih tablica odsjecka pa COMMIT"""
+    conn = psycopg2.connect(_plan.args.dsn)
+    try:
+        with conn.cursor() as cur:
+            try:
+                cur.execute("SET session_replication_role TO replica")
+            except psycopg2.Error:
+                conn.rollback()   # nije superuser - FK provjere ostaju ukljucene
+            cur.execute("SET search_path TO employee_management")
+            cur.execute("SET synchronous_commit TO off")
+            for table, columns, buffer in copies:
+                _copy(cur, table, columns, buffer)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _weighted(rng: random.Random, choices):
+    values = [value for value, _ in choices]
+    weights = [weight for _, weight in choices]
+    return lambda: rng.choices(values, weights)[0]
+
+
+# ============== ODSJECCI ==============
+
+def _load_users(first: int, last: int) -> int:
+    plan = _plan
+    rng = random.Random(f"{plan.seed}:users:{first}")
+    users, roles, permissions, audit = io.StringIO(), io.StringIO(), io.StringIO(), io.StringIO()
+    users_audit_base = 0
+    roles_audit_base = plan.users
+    for user_id in range(first, last):
+        kind = plan.kind(user_id)
+        username = plan.username(user_id)
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f"{username}@bench.example.com"
+        created_at = plan.timestamp(rng.random() * plan.span_seconds * 0.3 if user_id > 1 else 0)
+        is_active = "t" if kind != "user" or rng.random() > 0.03 else "f"
+        users.write(_row(
+            user_id, username, email, plan.admin_hash if kind == "admin" else plan.user_hash,
+            first_name, last_name, plan.manager_of[user_id], is_active, _ts(created_at), _ts(created_at)
+        ))
+        audit.write(_row(
+            users_audit_base + user_id, "users", user_id, "INSERT", None, _ts(created_at), None,
+            f'{{"username": "{username}", "email": "{email}", "first_name": "{first_name}", '
+            f'"last_name": "{last_name}", "is_active": {"true" if is_active == "t" else "false"}}}',
+            "full"
+        ))
+
+        role = {"admin": "ADMIN", "director": "MANAGER", "manager": "MANAGER", "user": "EMPLOYEE"}[kind]
+        assigned_by = 1 if user_id > 1 else None
+        roles.write(_row(user_id, user_id, plan.role_ids[role], _ts(created_at), assigned_by))
+        audit.write(_row(
+            roles_audit_base + user_id, "user_roles", user_id, "INSERT", None, _ts(created_at), None,
+            f'{{"user_id": {user_id}, "username": "{username}", "role_id": {plan.role_ids[role]}, '
+            f'"role_name": "{role}", "assigned_by": {assigned_by or "null"}}}',
+            "full"
+        ))
+
+        if kind == "user" and rng.random() < 0.05:
+            for j, permission_id in enumerate(rng.sample(plan.permission_ids, rng.randint(1, DIRECT_PERMISSIONS_MAX))):
+                granted = "t" if rng.random() < 0.7 else "f"
+                permissions.write(_row(
+                    user_id * DIRECT_PERMISSIONS_MAX + j, user_id, permission_id, granted,
+                    _ts(created_at), 1, "generirano"
+                ))
+
+    _copy_all([
+        ("users", "user_id, username, email, password_hash, first_name, last_name, "
+                  "manager_id, is_active, created_at, updated_at", users),
+        ("user_roles", "user_role_id, user_id, role_id, assigned_at, assigned_by", roles),
+        ("user_permissions", "user_permission_id, user_id, permission_id, granted, "
+                             "assigned_at, assigned_by, notes", permissions),
+        ("audit_log", AUDIT_COLUMNS, audit),
+    ])
+    return last - first
+
+
+def _task_json(title: str, status: str, priority: str, assigned_to: int) -> str:
+    return f'{{"title": "{title}", "status": "{status}", "priority": "{priority}", "assigned_to": {assigned_to}}}'
+
+
+def _load_tasks(first: int, last: int) -> int:
+    plan = _plan
+    rng = random.Random(f"{plan.seed}:tasks:{first}")
+    pick_status = _weighted(rng, STATUS_WEIGHTS)
+    pick_priority = _weighted(rng, PRIORITY_WEIGHTS)
+    tasks, assignees, audit = io.StringIO(), io.StringIO(), io.StringIO()
+    audit_base = 2 * plan.users
+    # zadaci nastaju nakon sto korisnici postoje (prvih 30 % raspona)
+    task_start, task_span = plan.span_seconds * 0.3, plan.span_seconds * 0.7
+    for task_id in range(first, last):
+        creator = rng.choice(plan.creators)
+        team = plan.teams.get(creator) or [creator]
+        members = rng.sample(team, min(len(team), rng.randint(1, ASSIGNEES_MAX)))
+        title = f"{rng.choice(TITLE_VERBS)} {rng.choice(TITLE_OBJECTS)} #{task_id}"
+        status, priority = pick_status(), pick_priority()
+        created = task_start + rng.random() * task_span
+        created_at = plan.timestamp(created)
+        due_date = (created_at + timedelta(days=rng.randint(1, 60))).date() if rng.random() < 0.8 else None
+
+        audit_id = audit_base + (task_id - 1) * TASK_EVENTS_MAX + 1
+        audit.write(_row(audit_id, "tasks", task_id, "INSERT", creator, _ts(created_at), None,
+                         _task_json(title, "NEW", priority, members[0]), "full"))
+        changed, previous, completed_at = created, "NEW", None
+        for next_status in STATUS_PATHS[status]:
+            changed = min(changed + rng.random() * 7 * 86400, plan.span_seconds)
+            audit_id += 1
+            audit.write(_row(
+                audit_id, "tasks", task_id, "UPDATE", creator, _ts(plan.timestamp(changed)),
+                _task_json(title, previous, priority, members[0]),
+                _task_json(title, next_status, priority, members[0]), "full"
+            ))
+            previous = next_status
+        updated_at = plan.timestamp(changed)
+        if status == "COMPLETED":
+            completed_at = _ts(updated_at)
+
+        tasks.write(_row(
+            task_id, title, f"Generirani zadatak {task_id}", status, priority, due_date,
+            creator, members[0], _ts(created_at), _ts(updated_at), completed_at
+        ))
+        for j, member in enumerate(members):
+            assignees.write(_row((task_id - 1) * ASSIGNEES_MAX + j + 1, task_id, member,
+                                 _ts(created_at), creator))
+
+    _copy_all([
+        ("tasks", "task_id, title, description, status, priority, due_date, "
+                  "created_by, assigned_to, created_at, updated_at, completed_at", tasks),
+        ("task_assignees", "task_assignee_id, task_id, user_id, assigned_at, assigned_by", assignees),
+        ("audit_log", AUDIT_COLUMNS, audit),
+    ])
+    return last - first
+
+
+def _ip(rng: random.Random, user_id: int) -> str:
+    """Korisnik uglavnom s 'svoje' uredske/kucne adrese, ponekad IPv6"""
+    if rng.random() < 0.1:
+        return f"2001:db8:{user_id % 65536:x}::{rng.randint(1, 65535):x}"
+    if rng.random() < 0.7:
+        return f"10.{(user_id >> 8) % 256}.{user_id % 256}.{rng.randint(1, 254)}"
+    return f"{rng.choice([31, 46, 78, 93, 161, 188, 213])}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def _load_logins(first: int, last: int) -> int:
+    plan = _plan
+    rng = random.Random(f"{plan.seed}:logins:{first}")
+    events = io.StringIO()
+    for index in range(first, last):
+        event_id = index + 1
+        user_id = rng.randint(1, plan.users)
+        login_time = plan.timestamp(plan.span_seconds * 0.3 + rng.random() * plan.span_seconds * 0.7)
+        user_agent = rng.choice(USER_AGENTS)
+        roll = rng.random()
+        if roll < 0.85:
+            events.write(_row(event_id, user_id, plan.username(user_id), _ts(login_time),
+                              _ip(rng, user_id), user_agent, "t", None, 1, None))
+        elif roll < 0.97:
+            unknown = rng.random() < 0.3
+            events.write(_row(
+                event_id, None if unknown else user_id,
+                f"nepoznat_{rng.randint(1, 5000)}" if unknown else plan.username(user_id),
+                _ts(login_time), _ip(rng, user_id), user_agent, "f",
+                "User not found" if unknown else rng.choice(KNOWN_USER_FAILURES), 1, None
+            ))
+        else:
+            # brute-force: zbirni THROTTLED zapis iz malog broja napadackih mreza
+            attempts = rng.randint(2, 500)
+            attacker = f"185.{rng.randint(100, 103)}.{rng.randint(0, 3)}.{rng.randint(1, 254)}"
+            events.write(_row(
+                event_id, None, plan.username(user_id), _ts(login_time), attacker,
+                "python-requests/2.31", "f", "THROTTLED", attempts,
+                _ts(login_time - timedelta(seconds=rng.randint(30, 900)))
+            ))
+
+    _copy_all([
+        ("login_events", "login_event_id, user_id, username_attempted, login_time, ip_address, "
+                         "user_agent, success, failure_reason, attempt_count, first_attempt_at", events),
+    ])
+    return last - first
+
+
+# ============== GLAVNI TOK ==============
+
+def _chunks(first: int, last: int, size: int):
+    return [(start, min(start + size, last)) for start in range(first, last, size)]
+
+
+def _run_phase(pool, label: str, function, chunks, serial: bool = False) -> None:
+    """serial: odsjecci redom, svaki commitan prije sljedeceg (FK na ranije odsjecke)"""
+    if not chunks:
+        return
+    started, done = time.perf_counter(), 0
+    total = sum(end - start for start, end in chunks)
+    if serial:
+        results = (pool.apply(_star(function), (bounds,)) for bounds in chunks)
+    else:
+        results = pool.imap_unordered(_star(function), chunks)
+    for rows in results:
+        done += rows
+        print(f"\r  {label}: {done:,}/{total:,}", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"\r  {label}: {total:,} u {elapsed:.1f} s ({total / max(elapsed, 1e-9):,.0f}/s)")
+
+
+class _star:
+    """Picklable omotac: poziva funkciju s (first, last)"""
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, bounds):
+        return self.function(*bounds)
+
+
+def _secondary_indexes(cur) -> list:
+    """Indeksi ucitanih tablica koji ne podrzavaju PK/UNIQUE ogranicenja"""
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = 'employee_management'
+          AND t.relname = ANY(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """, (LOADED_TABLES,))
+    return cur.fetchall()
+
+
+def _default_dsn() -> str:
+    from app.config import get_settings
+    settings = get_settings()
+    return (f"host={settings.database_host} port={settings.database_port} "
+            f"dbname={settings.database_name} user={settings.database_user} "
+            f"password={settings.database_password}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sinteticki skup podataka (COPY)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--logins-per-user", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365, help="raspon povijesti u danima")
+    parser.add_argument("--until", default=datetime.now().strftime("%Y-%m-%d"),
+                        help="kraj raspona (za ponovljive podatke zadati fiksni datum)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=50000,
+                        help="redaka po odsjecku (mijenja podatke - dio determinizma)")
+    parser.add_argument("--password", default="Bench123!")
+    parser.add_argument("--admin-password", default="Admin123!")
+    parser.add_argument("--dsn", default=None, help="libpq DSN (default: backend/.env)")
+    parser.add_argument("--reset", action="store_true", help="obrisi postojece podatke (obavezno)")
+    parser.add_argument("--drop-indexes", action="store_true",
+                        help="sekundarni indeksi se grade nakon punjenja (brze za velike skupove)")
+    parser.add_argument("--skip-rollups", action="store_true",
+                        help="bez refresh_audit_rollups() i build_audit_snapshots()")
+    args = parser.parse_args()
+
+    if not args.reset:
+        parser.error("generator zamjenjuje sve korisnike, zadatke i povijest - pokrenite s --reset")
+    if args.users < 2:
+        parser.error("--users mora biti barem 2")
+    args.dsn = args.dsn or _default_dsn()
+
+    total_started = time.perf_counter()
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("SET search_path TO employee_management")
+
+    cur.execute("SELECT name, role_id FROM roles WHERE name IN ('ADMIN', 'MANAGER', 'EMPLOYEE')")
+    role_ids = dict(cur.fetchall())
+    cur.execute("SELECT permission_id FROM permissions ORDER BY permission_id")
+    permission_ids = [row[0] for row in cur.fetchall()]
+    if len(role_ids) != 3:
+        sys.exit("Nedostaju sistemske uloge ADMIN/MANAGER/EMPLOYEE - pokrenite 02_seed_data.sql")
+
+    print(f"Brisanje postojecih podataka ({', '.join(RESET_TABLES)})")
+    cur.execute(f"TRUNCATE {', '.join(RESET_TABLES)} RESTART IDENTITY CASCADE")
+    for table in LOADED_TABLES:
+        cur.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+
+    dropped = []
+    if args.drop_indexes:
+        dropped = _secondary_indexes(cur)
+        for name, _ in dropped:
+            cur.execute(f"DROP INDEX {name}")
+        print(f"Obrisano sekundarnih indeksa: {len(dropped)}")
+
+    plan = Plan(args, role_ids, permission_ids)
+    print(f"Plan: {args.users:,} korisnika ({len(plan.manager_ids):,} managera), "
+          f"{args.tasks:,} zadataka, {plan.logins:,} prijava, seed {args.seed}")
+
+    try:
+        with multiprocessing.get_context("fork").Pool(max(1, args.jobs), _init_worker, (plan,)) as pool:
+            # manager_id pokazuje na manji user_id, assigned_by na admina - odsjecci
+            # do zadnjeg managera redom, zaposlenici nakon toga paralelno
+            user_chunks = _chunks(1, args.users + 1, args.chunk_rows)
+            referenced = [chunk for chunk in user_chunks if chunk[0] < 2 + len(plan.manager_ids)]
+            _run_phase(pool, "korisnici (manageri)", _load_users, referenced, serial=True)
+            _run_phase(pool, "korisnici", _load_users, user_chunks[len(referenced):])
+            _run_phase(pool, "zadaci", _load_tasks, _chunks(1, args.tasks + 1, args.chunk_rows))
+            _run_phase(pool, "prijave", _load_logins, _chunks(0, plan.logins, args.chunk_rows))
+    finally:
+        for table in LOADED_TABLES:
+            cur.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+
+    for table, column in [("users", "user_id"), ("user_roles", "user_role_id"),
+                          ("user_permissions", "user_permission_id"), ("tasks", "task_id"),
+                          ("task_assignees", "task_assignee_id"), ("audit_log", "audit_log_id"),
+                          ("login_events", "login_event_id")]:
+        cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                    f"COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, FALSE)")
+
+    if dropped:
+        started = time.perf_counter()
+        cur.execute("SET maintenance_work_mem TO '512MB'")
+        for _, definition in dropped:
+            cur.execute(definition)
+        print(f"Indeksi izgradjeni u {time.perf_counter() - started:.1f} s")
+
+    started = time.perf_counter()
+    cur.execute("CALL rebuild_user_hierarchy()")
+    print(f"Hijerarhija managera u {time.perf_counter() - started:.1f} s")
+
+    started = time.perf_counter()
+    cur.execute(f"ANALYZE {', '.join(LOADED_TABLES)}, user_hierarchy")
+    print(f"ANALYZE u {time.perf_counter() - started:.1f} s")
+
+    if not args.skip_rollups:
+        started = time.perf_counter()
+        cur.execute("CALL refresh_audit_rollups()")
+        cur.execute("CALL build_audit_snapshots()")
+        print(f"Rollupi i audit snapshoti u {time.perf_counter() - started:.1f} s")
+
+    conn.close()
+    print(f"Gotovo u {time.perf_counter() - total_started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
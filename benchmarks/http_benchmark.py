@@ -0,0 +1,500 @@
+"""
+BENCHMARK: HTTP opterecenje cijele aplikacije s usporedbom s baselineom
+
+Pokrece FastAPI aplikaciju (uvicorn podproces) nad lokalnom bazom napunjenom
+generatorom (generate_dataset.py) i vrti skriptirana opterecenja s fiksnim
+brojem istovremenih klijenata (--concurrency). Svaki klijent ima vlastitu
+keep-alive konekciju i ponavlja scenarij do isteka --duration sekundi.
+
+Scenariji (--workloads):
+- login_burst:  POST /api/auth/login s razlicitim zaposlenicima (bcrypt)
+- dashboard:    /api/auth/me, /api/tasks/my/statistics, /api/tasks/my
+- task_list:    /api/tasks filtrirano po izvrsitelju / autoru i statusu
+                (stranice liste u sucelju) + detalj zadatka
+- bulk_assign:  PUT /api/tasks/{id}/assign s 3-5 clanova tima managera
+- audit_browse: /api/audit/logs kroz 3 stranice (X-Next-Cursor),
+                povijest entiteta i /api/audit/recent-activity
+
+Za svaki endpoint (metoda + predlozak rute) ispisuje p50/p95/p99 latenciju,
+propusnost i broj gresaka. Uz --baseline usporeduje p95 i propusnost po
+endpointu i zavrsava s izlaznim kodom 1 ako je regresija veca od
+--threshold (ili ima gresaka). --update-baseline zapisuje rezultat kao
+novi baseline - baseline je vezan uz racunalo i velicinu skupa podataka
+pa ga treba snimiti na istom stroju na kojem se usporeduje.
+
+bulk_assign mijenja podatke (dodjele, audit log), pa uzastopna pokretanja
+nad istom bazom nisu usporediva - --generate prije mjerenja ponovno puni
+bazu generatorom (--reset, isti --seed i --until) i daje isti pocetni skup.
+
+Lozinke odgovaraju generatoru: admin = --admin-password, ostali = --password.
+
+Pokretanje (iz backend/ direktorija, koristi .env):
+    python ../benchmarks/http_benchmark.py --generate --update-baseline
+    python ../benchmarks/http_benchmark.py --generate --concurrency 8 --duration 20
+    python ../benchmarks/http_benchmark.py --base-url http://localhost:8000 --workloads dashboard
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+import psycopg2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate_dataset.py")
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "http.json")
+
+WORKLOADS = ["login_burst", "dashboard", "task_list", "bulk_assign", "audit_browse"]
+PERCENTILES = (50, 95, 99)
+# endpointi s manje uzoraka se ne usporeduju (p95 nije stabilan)
+MIN_COMPARED_SAMPLES = 20
+
+
+# ============== PODACI ZA SCENARIJE ==============
+
+def _default_dsn() -> str:
+    from app.config import get_settings
+    settings = get_settings()
+    return (f"host={settings.database_host} port={settings.database_port} "
+            f"dbname={settings.database_name} user={settings.database_user} "
+            f"password={settings.database_password}")
+
+
+class Fixtures:
+    """Uzorak korisnika, managera s timovima i zadataka iz baze"""
+
+    def __init__(self, dsn: str, sample: int, seed: int):
+        conn = psycopg2.connect(dsn)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET search_path TO employee_management, public")
+                cur.execute("SELECT setseed(%s)", (((seed % 1000) / 1000.0),))
+                cur.execute("""
+                    SELECT user_id, username FROM users
+                    WHERE is_active AND username LIKE 'user\\_%%'
+                    ORDER BY random() LIMIT %s
+                """, (sample,))
+                self.employees = cur.fetchall()
+                cur.execute("""
+                    SELECT m.user_id, m.username, array_agg(u.user_id ORDER BY u.user_id)
+                    FROM users m
+                    JOIN users u ON u.manager_id = m.user_id AND u.is_active
+                    WHERE m.is_active AND m.username LIKE 'manager\\_%%'
+                    GROUP BY m.user_id, m.username
+                    HAVING count(*) >= 5
+                    ORDER BY random() LIMIT %s
+                """, (max(1, sample // 10),))
+                self.managers = cur.fetchall()
+                manager_ids = [row[0] for row in self.managers]
+                cur.execute("""
+                    SELECT created_by, array_agg(task_id) FROM (
+                        SELECT created_by, task_id,
+                               row_number() OVER (PARTITION BY created_by ORDER BY task_id) AS n
+                        FROM tasks WHERE created_by = ANY(%s)
+                    ) t WHERE n <= 50
+                    GROUP BY created_by
+                """, (manager_ids,))
+                self.manager_tasks = dict(cur.fetchall())
+                cur.execute("SELECT task_id FROM tasks ORDER BY random() LIMIT %s", (sample,))
+                self.task_ids = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT count(*) FROM users")
+                users = cur.fetchone()[0]
+                cur.execute("SELECT count(*) FROM tasks")
+                tasks = cur.fetchone()[0]
+                # audit_log se ne biljezi - raste sa svakim pokretanjem (bulk_assign, prijave)
+                self.dataset = {"users": users, "tasks": tasks}
+        finally:
+            conn.close()
+        self.managers = [row for row in self.managers if self.manager_tasks.get(row[0])]
+        if not self.employees or not self.managers or not self.task_ids:
+            raise SystemExit("Baza nema generirane podatke - pokreni generate_dataset.py")
+
+
+# ============== HTTP KLIJENT ==============
+
+class Client:
+    """Jedna keep-alive konekcija; biljezi (endpoint, status, ms) za svaki zahtjev"""
+
+    def __init__(self, base_url: str, samples: list):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.samples = samples
+        self.conn = None
+
+    def request(self, endpoint: str, method: str, path: str, body=None,
+                token: str = None, form: bool = False):
+        headers = {"Accept": "application/json"}
+        if token:
+            headers["Authorization"] = "Bearer " + token
+        payload = None
+        if body is not None:
+            if form:
+                payload = urllib.parse.urlencode(body)
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            else:
+                payload = json.dumps(body)
+                headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.close()
+            response, data, status = None, b"", 0
+        self.samples.append((endpoint, status, (time.perf_counter() - start) * 1000))
+        return response, data
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def _login(client: Client, username: str, password: str) -> str:
+    _, data = client.request("POST /api/auth/login", "POST", "/api/auth/login",
+                             {"username": username, "password": password}, form=True)
+    try:
+        return json.loads(data)["access_token"]
+    except (ValueError, KeyError):
+        raise SystemExit(f"Prijava korisnika {username} nije uspjela: {data[:200]!r}")
+
+
+# ============== SCENARIJI ==============
+
+class Session:
+    """Stanje jednog virtualnog korisnika (tokeni se dobivaju prije mjerenja)"""
+
+    def __init__(self, index: int, fixtures: Fixtures, tokens: dict, seed: int):
+        self.rng = random.Random(f"{seed}:{index}")
+        self.fixtures = fixtures
+        self.tokens = tokens
+        self.employee = fixtures.employees[index % len(fixtures.employees)]
+        self.manager = fixtures.managers[index % len(fixtures.managers)]
+
+
+def login_burst(client: Client, session: Session, args) -> None:
+    _, username = session.rng.choice(session.fixtures.employees)
+    client.request("POST /api/auth/login", "POST", "/api/auth/login",
+                   {"username": username, "password": args.password}, form=True)
+
+
+def dashboard(client: Client, session: Session, args) -> None:
+    token = session.tokens[session.employee[1]]
+    client.request("GET /api/auth/me", "GET", "/api/auth/me", token=token)
+    client.request("GET /api/tasks/my/statistics", "GET", "/api/tasks/my/statistics", token=token)
+    client.request("GET /api/tasks/my", "GET", "/api/tasks/my", token=token)
+
+
+def task_list(client: Client, session: Session, args) -> None:
+    token = session.tokens["admin"]
+    rng = session.rng
+    user_id, _ = rng.choice(session.fixtures.employees)
+    client.request("GET /api/tasks?assigned_to", "GET", f"/api/tasks?assigned_to={user_id}", token=token)
+    manager_id = rng.choice(session.fixtures.managers)[0]
+    status = rng.choice(["NEW", "IN_PROGRESS", "COMPLETED"])
+    client.request("GET /api/tasks?created_by&status", "GET",
+                   f"/api/tasks?created_by={manager_id}&status={status}", token=token)
+    task_id = rng.choice(session.fixtures.task_ids)
+    client.request("GET /api/tasks/{task_id}", "GET", f"/api/tasks/{task_id}", token=token)
+
+
+def bulk_assign(client: Client, session: Session, args) -> None:
+    manager_id, username, team = session.manager
+    rng = session.rng
+    task_id = rng.choice(session.fixtures.manager_tasks[manager_id])
+    assignees = rng.sample(team, min(len(team), rng.randint(3, 5)))
+    client.request("PUT /api/tasks/{task_id}/assign", "PUT", f"/api/tasks/{task_id}/assign",
+                   {"assignee_ids": assignees}, token=session.tokens[username])
+
+
+def audit_browse(client: Client, session: Session, args) -> None:
+    token = session.tokens["admin"]
+    path = "/api/audit/logs?limit=50"
+    for _ in range(3):
+        response, _ = client.request("GET /api/audit/logs", "GET", path, token=token)
+        cursor = response.getheader("X-Next-Cursor") if response is not None else None
+        if not cursor:
+            break
+        path = "/api/audit/logs?limit=50&cursor=" + urllib.parse.quote(cursor)
+    task_id = session.rng.choice(session.fixtures.task_ids)
+    client.request("GET /api/audit/logs/entity/{entity_name}/{entity_id}", "GET",
+                   f"/api/audit/logs/entity/tasks/{task_id}", token=token)
+    client.request("GET /api/audit/recent-activity", "GET",
+                   "/api/audit/recent-activity?limit=20", token=token)
+
+
+SCENARIOS = {
+    "login_burst": login_burst,
+    "dashboard": dashboard,
+    "task_list": task_list,
+    "bulk_assign": bulk_assign,
+    "audit_browse": audit_browse,
+}
+
+
+# ============== IZVRSAVANJE ==============
+
+def _prepare_tokens(base_url: str, fixtures: Fixtures, args) -> dict:
+    client = Client(base_url, [])
+    tokens = {"admin": _login(client, "admin", args.admin_password)}
+    for _, username in fixtures.employees[:args.concurrency]:
+        tokens[username] = _login(client, username, args.password)
+    for _, username, _ in fixtures.managers[:args.concurrency]:
+        tokens[username] = _login(client, username, args.password)
+    client.close()
+    return tokens
+
+
+def run_workload(name: str, base_url: str, fixtures: Fixtures, tokens: dict, args) -> dict:
+    scenario = SCENARIOS[name]
+    samples_per_client = [[] for _ in range(args.concurrency)]
+
+    def worker(index: int, deadline: float, samples: list) -> None:
+        client = Client(base_url, samples)
+        session = Session(index, fixtures, tokens, args.seed)
+        try:
+            while time.perf_counter() < deadline:
+                scenario(client, session, args)
+        finally:
+            client.close()
+
+    # zagrijavanje (konekcije, planovi upita, cache) se ne mjeri
+    if args.warmup > 0:
+        warmup_deadline = time.perf_counter() + args.warmup
+        threads = [threading.Thread(target=worker, args=(i, warmup_deadline, []))
+                   for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=worker, args=(i, deadline, samples_per_client[i]))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for client_samples in samples_per_client for sample in client_samples]
+    return {"duration_seconds": round(elapsed, 3), "endpoints": summarize(samples, elapsed)}
+
+
+def _percentile(sorted_values: list, percentile: float) -> float:
+    # nearest-rank
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    by_endpoint = {}
+    for endpoint, status, ms in samples:
+        by_endpoint.setdefault(endpoint, []).append((status, ms))
+    result = {}
+    for endpoint, entries in sorted(by_endpoint.items()):
+        latencies = sorted(ms for _, ms in entries)
+        errors = sum(1 for status, _ in entries if not 200 <= status < 400)
+        stats = {"requests": len(entries), "errors": errors,
+                 "throughput_rps": round(len(entries) / elapsed, 2)}
+        for percentile in PERCENTILES:
+            stats[f"p{percentile}_ms"] = round(_percentile(latencies, percentile), 2)
+        result[endpoint] = stats
+    return result
+
+
+# ============== USPOREDBA S BASELINEOM ==============
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Lista regresija (tekst); prazna lista znaci da je sve unutar praga"""
+    regressions = []
+    for workload, current in results["workloads"].items():
+        for endpoint, stats in current["endpoints"].items():
+            if stats["errors"]:
+                regressions.append(f"{workload} {endpoint}: {stats['errors']} gresaka od {stats['requests']}")
+            known = baseline.get("workloads", {}).get(workload, {}).get("endpoints", {}).get(endpoint)
+            if known is None or min(stats["requests"], known["requests"]) < MIN_COMPARED_SAMPLES:
+                continue
+            if stats["p95_ms"] > known["p95_ms"] * (1 + threshold):
+                regressions.append(f"{workload} {endpoint}: p95 {known['p95_ms']:.2f} -> "
+                                   f"{stats['p95_ms']:.2f} ms (+{(stats['p95_ms'] / known['p95_ms'] - 1) * 100:.0f} %)")
+            if stats["throughput_rps"] < known["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{workload} {endpoint}: propusnost {known['throughput_rps']:.1f} -> "
+                                   f"{stats['throughput_rps']:.1f} req/s")
+    return regressions
+
+
+def print_report(results: dict, baseline: dict) -> None:
+    print(f"{'endpoint':<58} {'zahtjeva':>8} {'gresaka':>7} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p95 base':>9}")
+    for workload, current in results["workloads"].items():
+        print(f"[{workload}] {current['duration_seconds']:.1f} s")
+        for endpoint, stats in current["endpoints"].items():
+            known = baseline.get("workloads", {}).get(workload, {}).get("endpoints", {}).get(endpoint)
+            base = f"{known['p95_ms']:9.2f}" if known else f"{'-':>9}"
+            print(f"  {endpoint:<56} {stats['requests']:8d} {stats['errors']:7d} "
+                  f"{stats['throughput_rps']:8.1f} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} "
+                  f"{stats['p99_ms']:8.2f} {base}")
+
+
+# ============== SERVER ==============
+
+def _wait_for_health(base_url: str, process, timeout: float, log_name: str) -> None:
+    parsed = urllib.parse.urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"Server je zavrsio s kodom {process.returncode}, log: {log_name}")
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+            conn.close()
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server na {base_url} nije spreman nakon {timeout:.0f} s")
+
+
+def start_server(port: int, workers: int, log_file):
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+               "--no-access-log"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def generate_dataset(args) -> None:
+    command = [sys.executable, GENERATOR, "--reset", "--users", str(args.users),
+               "--tasks", str(args.tasks), "--seed", str(args.seed), "--until", args.until,
+               "--password", args.password, "--admin-password", args.admin_password]
+    if args.dsn:
+        command += ["--dsn", args.dsn]
+    print("Punjenje baze: " + " ".join(command[2:]))
+    subprocess.run(command, cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP benchmark s usporedbom s baselineom")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help="zarezom odvojeni scenariji: " + ", ".join(WORKLOADS))
+    parser.add_argument("--concurrency", type=int, default=8, help="istovremenih klijenata")
+    parser.add_argument("--duration", type=float, default=20, help="sekundi mjerenja po scenariju")
+    parser.add_argument("--warmup", type=float, default=3, help="sekundi zagrijavanja po scenariju")
+    parser.add_argument("--base-url", default=None, help="koristi vec pokrenut server umjesto uvicorna")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn --workers")
+    parser.add_argument("--dsn", default=None, help="libpq DSN za uzorak podataka (default: backend/.env)")
+    parser.add_argument("--sample", type=int, default=200, help="velicina uzorka korisnika i zadataka")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--generate", action="store_true",
+                        help="prije mjerenja napuni bazu generatorom (brise postojece podatke)")
+    parser.add_argument("--users", type=int, default=2000, help="uz --generate")
+    parser.add_argument("--tasks", type=int, default=40000, help="uz --generate")
+    parser.add_argument("--until", default="2026-01-01", help="uz --generate")
+    parser.add_argument("--password", default="Bench123!")
+    parser.add_argument("--admin-password", default="Admin123!")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="zapisi rezultat kao baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="dopustena regresija p95 i propusnosti (0.25 = 25 %%)")
+    parser.add_argument("--output", default=None, help="zapisi rezultat u JSON datoteku")
+    args = parser.parse_args()
+
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = [name for name in workloads if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"nepoznati scenariji: {', '.join(unknown)}")
+
+    if args.generate:
+        generate_dataset(args)
+    fixtures = Fixtures(args.dsn or _default_dsn(), args.sample, args.seed)
+    print(f"Skup podataka: {fixtures.dataset}")
+
+    process = None
+    log_file = tempfile.NamedTemporaryFile(prefix="http_benchmark_", suffix=".log", delete=False)
+    base_url = args.base_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = start_server(args.port, args.server_workers, log_file)
+    try:
+        _wait_for_health(base_url, process, 60, log_file.name)
+        tokens = _prepare_tokens(base_url, fixtures, args)
+        results = {
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                        "cpus": os.cpu_count()},
+            "dataset": fixtures.dataset,
+            "config": {"concurrency": args.concurrency, "duration": args.duration,
+                       "server_workers": args.server_workers},
+            "workloads": {},
+        }
+        for name in workloads:
+            print(f"Scenarij {name}: {args.concurrency} klijenata, {args.duration:.0f} s ...")
+            results["workloads"][name] = run_workload(name, base_url, fixtures, tokens, args)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        log_file.close()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Baseline zapisan: {args.baseline}")
+        os.unlink(log_file.name)
+        return
+
+    if baseline:
+        if baseline.get("config") != results["config"]:
+            print(f"Upozorenje: konfiguracija baselinea {baseline.get('config')} se razlikuje")
+        if baseline.get("dataset") != results["dataset"]:
+            print(f"Upozorenje: baseline je snimljen nad skupom {baseline.get('dataset')}")
+    else:
+        print(f"Nema baselinea ({args.baseline}) - samo provjera gresaka")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nREGRESIJE (prag {args.threshold * 100:.0f} %), log servera: {log_file.name}")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    os.unlink(log_file.name)
+    print("\nOK - bez regresija")
+
+
+if __name__ == "__main__":
+    main()
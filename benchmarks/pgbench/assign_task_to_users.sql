@@ -0,0 +1,12 @@
+-- pgbench: CALL assign_task_to_users() s tri aktivna izvrsitelja (trigger
+-- sinkronizacije i audit); ROLLBACK cuva stanje
+\set id random(1, :tasks)
+\set u1 random(1, :users)
+\set u2 random(1, :users)
+\set u3 random(1, :users)
+SELECT COALESCE((SELECT user_id FROM users WHERE user_id >= :u1 AND is_active ORDER BY user_id LIMIT 1), 1) AS a,
+       COALESCE((SELECT user_id FROM users WHERE user_id >= :u2 AND is_active ORDER BY user_id LIMIT 1), 1) AS b,
+       COALESCE((SELECT user_id FROM users WHERE user_id >= :u3 AND is_active ORDER BY user_id LIMIT 1), 1) AS c \gset
+BEGIN;
+CALL assign_task_to_users(:id, ARRAY[:a, :b, :c]::int[], 1);
+ROLLBACK;
@@ -0,0 +1,9 @@
+-- pgbench: audit triggeri (statement-level, transition tablice) na UPDATE
+-- tasks i users; ROLLBACK cuva stanje i velicinu audit_log
+\set id random(1, :tasks)
+\set uid random(1, :users)
+BEGIN;
+UPDATE tasks SET priority = CASE priority WHEN 'LOW' THEN 'MEDIUM' ELSE 'LOW' END::task_priority
+WHERE task_id = :id;
+UPDATE users SET first_name = first_name || '.' WHERE user_id = :uid;
+ROLLBACK;
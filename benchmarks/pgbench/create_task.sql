@@ -0,0 +1,9 @@
+-- pgbench: CALL create_task() s audit triggerom (kreator i izvrsitelj su prvi
+-- aktivni korisnici od nasumicnog ID-a); ROLLBACK cuva velicinu skupa
+\set u1 random(1, :users)
+\set u2 random(1, :users)
+SELECT COALESCE((SELECT user_id FROM users WHERE user_id >= :u1 AND is_active ORDER BY user_id LIMIT 1), 1) AS creator,
+       COALESCE((SELECT user_id FROM users WHERE user_id >= :u2 AND is_active ORDER BY user_id LIMIT 1), 1) AS assignee \gset
+BEGIN;
+CALL create_task('pgbench zadatak', 'Zadatak iz pgbench skripte', 'MEDIUM', CURRENT_DATE + 7, :creator, :assignee, NULL);
+ROLLBACK;
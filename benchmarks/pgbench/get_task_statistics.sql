@@ -0,0 +1,3 @@
+-- pgbench: get_task_statistics() - statistika zadataka korisnika (/api/tasks/my/statistics)
+\set uid random(1, :users)
+SELECT * FROM get_task_statistics(:uid);
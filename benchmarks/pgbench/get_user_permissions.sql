@@ -0,0 +1,3 @@
+-- pgbench: get_user_permissions() - sve permisije korisnika (uloge + direktne)
+\set uid random(1, :users)
+SELECT * FROM get_user_permissions(:uid);
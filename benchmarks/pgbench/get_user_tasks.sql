@@ -0,0 +1,3 @@
+-- pgbench: get_user_tasks() - zadaci korisnika ukljucujuci kreirane (/api/tasks/my)
+\set uid random(1, :users)
+SELECT * FROM get_user_tasks(:uid, NULL, TRUE);
@@ -0,0 +1,10 @@
+-- pgbench: CALL update_task_status() kao admin nad otvorenim zadatkom
+-- (prvi nezavrseni zadatak od nasumicnog ID-a); ROLLBACK cuva stanje
+\set id random(1, :tasks)
+SELECT COALESCE(
+    (SELECT task_id FROM tasks WHERE task_id >= :id AND status NOT IN ('COMPLETED', 'CANCELLED')
+     ORDER BY task_id LIMIT 1),
+    (SELECT min(task_id) FROM tasks WHERE status NOT IN ('COMPLETED', 'CANCELLED'))) AS task_id \gset
+BEGIN;
+CALL update_task_status(:task_id, 'ON_HOLD', 1);
+ROLLBACK;
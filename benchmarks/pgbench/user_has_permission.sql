@@ -0,0 +1,4 @@
+-- pgbench: user_has_permission() za nasumicnog korisnika
+-- (provjera koju radi require_permission za svaki zahtjev)
+\set uid random(1, :users)
+SELECT user_has_permission(:uid, 'TASK_READ_ALL');
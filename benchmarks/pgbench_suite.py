@@ -0,0 +1,389 @@
+"""
+BENCHMARK: pgbench suite za funkcije, procedure i audit triggere
+
+Za svaku velicinu skupa podataka (--scales korisnici:zadaci) puni bazu
+generatorom (generate_dataset.py --reset) i za svaku skriptu iz
+benchmarks/pgbench/ pokrece pgbench s fiksnim brojem klijenata:
+
+- user_has_permission, get_user_permissions, get_user_tasks,
+  get_task_statistics (citanja)
+- create_task, update_task_status, assign_task_to_users, audit_triggers
+  (pisanja u transakciji s ROLLBACK - stanje i velicina skupa se ne mijenjaju,
+  mjeri se procedura + triggeri bez commita)
+
+Rezultat (results.json u --output-dir): TPS, broj transakcija i gresaka te
+prosjek, stddev i p50/p95/p99 latencije (iz pgbench loga transakcija) po
+skripti i velicini. Uz svaku skriptu se sprema EXPLAIN (ANALYZE, BUFFERS,
+FORMAT JSON) u plans/<velicina>/<skripta>.json: plan poziva funkcije i
+DML naredbi koje okidaju triggere, a ako je auto_explain dostupan i
+planovi svih naredbi unutar funkcija/procedura (log_nested_statements).
+
+Skripte pretpostavljaju generirani skup (ID-jevi korisnika i zadataka
+1..max bez rupa); --no-generate mjeri postojecu bazu kao jednu velicinu.
+
+Pokretanje (iz backend/ direktorija, koristi .env):
+    python ../benchmarks/pgbench_suite.py --scales 1000:20000,10000:200000
+    python ../benchmarks/pgbench_suite.py --no-generate --scripts get_user_tasks --clients 4
+    python ../benchmarks/pgbench_suite.py --pgbench /usr/lib/postgresql/16/bin/pgbench
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import psycopg2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_DIR = os.path.join(BENCH_DIR, "pgbench")
+GENERATOR = os.path.join(BENCH_DIR, "generate_dataset.py")
+BACKEND_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "backend"))
+
+SCRIPTS = [
+    "user_has_permission", "get_user_permissions", "get_user_tasks", "get_task_statistics",
+    "create_task", "update_task_status", "assign_task_to_users", "audit_triggers",
+]
+
+# Naredbe za EXPLAIN po skripti; %(uid)s, %(task)s, %(open_task)s i
+# %(assignees)s se popunjavaju tipicnim vrijednostima iz baze.
+# Procedure se ne mogu EXPLAIN-ati - njihove naredbe vidi samo auto_explain,
+# a ovdje se planira glavna DML naredba procedure (s triggerima).
+EXPLAIN_STATEMENTS = {
+    "user_has_permission": ["SELECT user_has_permission(%(uid)s, 'TASK_READ_ALL')"],
+    "get_user_permissions": ["SELECT * FROM get_user_permissions(%(uid)s)"],
+    "get_user_tasks": ["SELECT * FROM get_user_tasks(%(uid)s, NULL, TRUE)"],
+    "get_task_statistics": ["SELECT * FROM get_task_statistics(%(uid)s)"],
+    "create_task": [
+        "CALL create_task('pgbench zadatak', 'Zadatak iz pgbench skripte', 'MEDIUM', "
+        "CURRENT_DATE + 7, %(uid)s, %(uid)s, NULL)",
+        "INSERT INTO tasks (title, description, priority, due_date, created_by, assigned_to, status) "
+        "VALUES ('pgbench zadatak', 'Zadatak iz pgbench skripte', 'MEDIUM', CURRENT_DATE + 7, "
+        "%(uid)s, %(uid)s, 'NEW')",
+    ],
+    "update_task_status": [
+        "CALL update_task_status(%(open_task)s, 'ON_HOLD', 1)",
+        "UPDATE tasks SET status = 'ON_HOLD', updated_at = CURRENT_TIMESTAMP "
+        "WHERE task_id = %(open_task)s",
+    ],
+    "assign_task_to_users": [
+        "CALL assign_task_to_users(%(task)s, %(assignees)s, 1)",
+        "INSERT INTO task_assignees (task_id, user_id, assigned_by) "
+        "SELECT %(task)s, unnest(%(assignees)s), 1 ON CONFLICT (task_id, user_id) DO NOTHING",
+    ],
+    "audit_triggers": [
+        "UPDATE tasks SET priority = CASE priority WHEN 'LOW' THEN 'MEDIUM' ELSE 'LOW' END::task_priority "
+        "WHERE task_id = %(task)s",
+        "UPDATE users SET first_name = first_name || '.' WHERE user_id = %(uid)s",
+    ],
+}
+
+AUTO_EXPLAIN_SETTINGS = [
+    ("auto_explain.log_min_duration", "0"),
+    ("auto_explain.log_analyze", "on"),
+    ("auto_explain.log_buffers", "on"),
+    ("auto_explain.log_nested_statements", "on"),
+    ("auto_explain.log_format", "json"),
+    ("auto_explain.log_level", "notice"),
+]
+
+
+def _default_dsn() -> str:
+    from app.config import get_settings
+    settings = get_settings()
+    return (f"host={settings.database_host} port={settings.database_port} "
+            f"dbname={settings.database_name} user={settings.database_user} "
+            f"password={settings.database_password}")
+
+
+def _connect(dsn: str):
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        cur.execute("SET search_path TO employee_management, public")
+    conn.commit()
+    return conn
+
+
+# ============== VELICINA I PARAMETRI ==============
+
+def dataset_info(dsn: str) -> dict:
+    """Velicine tablica i tipicni parametri za EXPLAIN"""
+    conn = _connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*), max(user_id) FROM users")
+            users, max_user = cur.fetchone()
+            cur.execute("SELECT count(*), max(task_id) FROM tasks")
+            tasks, max_task = cur.fetchone()
+            cur.execute("SELECT count(*) FROM audit_log")
+            audit = cur.fetchone()[0]
+            # korisnik s medijalnim brojem dodijeljenih zadataka
+            cur.execute("""
+                SELECT assigned_to FROM (
+                    SELECT assigned_to, count(*) AS n FROM tasks
+                    WHERE assigned_to IS NOT NULL GROUP BY assigned_to
+                ) t ORDER BY n, assigned_to OFFSET (SELECT count(DISTINCT assigned_to) / 2 FROM tasks)
+                LIMIT 1
+            """)
+            row = cur.fetchone()
+            uid = row[0] if row else 1
+            cur.execute("""
+                SELECT task_id FROM tasks WHERE status NOT IN ('COMPLETED', 'CANCELLED')
+                ORDER BY task_id LIMIT 1 OFFSET (SELECT count(*) / 2 FROM tasks
+                                                 WHERE status NOT IN ('COMPLETED', 'CANCELLED'))
+            """)
+            row = cur.fetchone()
+            open_task = row[0] if row else 1
+            cur.execute("SELECT user_id FROM users WHERE is_active ORDER BY user_id DESC LIMIT 3")
+            assignees = [r[0] for r in cur.fetchall()]
+    finally:
+        conn.close()
+    return {
+        "users": users, "tasks": tasks, "audit_log": audit,
+        "max_user_id": max_user or 1, "max_task_id": max_task or 1,
+        "params": {"uid": uid, "task": (max_task or 2) // 2, "open_task": open_task,
+                   "assignees": assignees or [1]},
+    }
+
+
+def generate(users: int, tasks: int, args) -> None:
+    command = [sys.executable, GENERATOR, "--reset", "--users", str(users), "--tasks", str(tasks),
+               "--seed", str(args.seed), "--until", args.until, "--jobs", str(args.jobs)]
+    if args.dsn:
+        command += ["--dsn", args.dsn]
+    print("Punjenje baze: " + " ".join(command[2:]))
+    subprocess.run(command, cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+# ============== PGBENCH ==============
+
+_TPS = re.compile(r"^tps = ([\d.]+) \(without initial connection time\)", re.M)
+_PROCESSED = re.compile(r"^number of transactions actually processed: (\d+)", re.M)
+_FAILED = re.compile(r"^number of failed transactions: (\d+)", re.M)
+_LAT_AVG = re.compile(r"^latency average = ([\d.]+) ms", re.M)
+
+
+def _percentile(sorted_values: list, percentile: float) -> float:
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _log_latencies(log_dir: str) -> list:
+    """Latencije u ms iz pgbench -l logova (3. stupac, us; 'failed'/'skipped' se preskacu)"""
+    latencies = []
+    for path in glob.glob(os.path.join(log_dir, "pgbench_log*")):
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3 and fields[2].isdigit():
+                    latencies.append(int(fields[2]) / 1000)
+    latencies.sort()
+    return latencies
+
+
+def run_pgbench(script: str, info: dict, dsn: str, args) -> dict:
+    env = dict(os.environ)
+    env["PGOPTIONS"] = "-c search_path=employee_management,public -c client_min_messages=warning"
+    with tempfile.TemporaryDirectory(prefix="pgbench_") as log_dir:
+        command = [args.pgbench, "-n", "-f", os.path.join(SCRIPT_DIR, script + ".sql"),
+                   "-c", str(args.clients), "-j", str(args.threads or args.clients),
+                   "-T", str(args.duration), "-M", args.protocol,
+                   "-D", f"users={info['max_user_id']}", "-D", f"tasks={info['max_task_id']}",
+                   "-l", "--log-prefix", os.path.join(log_dir, "pgbench_log"), dsn]
+        process = subprocess.run(command, env=env, capture_output=True, text=True)
+        output = process.stdout + process.stderr
+        latencies = _log_latencies(log_dir)
+
+    def number(pattern, cast=float):
+        match = pattern.search(output)
+        return cast(match.group(1)) if match else None
+
+    result = {
+        "tps": number(_TPS),
+        "transactions": number(_PROCESSED, int),
+        "failed": number(_FAILED, int),
+        "latency_avg_ms": number(_LAT_AVG),
+        "latency_stddev_ms": round(statistics.pstdev(latencies), 3) if latencies else None,
+        "exit_code": process.returncode,
+    }
+    for percentile in (50, 95, 99):
+        result[f"latency_p{percentile}_ms"] = (
+            round(_percentile(latencies, percentile), 3) if latencies else None)
+    if process.returncode != 0:
+        errors = [line for line in output.splitlines() if "ERROR" in line or "error" in line]
+        result["error"] = errors[0] if errors else f"pgbench izlazni kod {process.returncode}"
+    return result
+
+
+# ============== PLANOVI ==============
+
+def _enable_auto_explain(cur) -> bool:
+    try:
+        cur.execute("LOAD 'auto_explain'")
+    except psycopg2.Error:
+        cur.connection.rollback()
+        cur.execute("SET search_path TO employee_management, public")
+        return False
+    for name, value in AUTO_EXPLAIN_SETTINGS:
+        cur.execute(f"SET {name} = '{value}'")
+    return True
+
+
+def _auto_explain_plans(notices: list) -> list:
+    plans = []
+    for notice in notices:
+        start = notice.find("{")
+        if "duration:" not in notice or start < 0:
+            continue
+        try:
+            plans.append(json.loads(notice[start:]))
+        except ValueError:
+            pass
+    return plans
+
+
+def capture_plans(script: str, info: dict, dsn: str) -> dict:
+    """EXPLAIN (ANALYZE, BUFFERS) naredbi skripte; sve u transakciji s ROLLBACK"""
+    conn = _connect(dsn)
+    conn.autocommit = False
+    result = {"params": info["params"], "statements": []}
+    try:
+        with conn.cursor() as cur:
+            auto_explain = _enable_auto_explain(cur)
+            result["auto_explain"] = auto_explain
+            for statement in EXPLAIN_STATEMENTS[script]:
+                entry = {"statement": cur.mogrify(statement, info["params"]).decode()}
+                is_call = statement.lstrip().upper().startswith("CALL")
+                if is_call and not auto_explain:
+                    continue
+                del conn.notices[:]
+                cur.execute("SAVEPOINT plan")
+                try:
+                    if is_call:
+                        cur.execute(statement, info["params"])
+                    else:
+                        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, info["params"])
+                        # pravila (RULE) nad tablicom daju dodatne planove
+                        entry["plan"] = [plan for row in cur.fetchall() for plan in row[0]]
+                    if auto_explain:
+                        entry["nested_plans"] = _auto_explain_plans(conn.notices)
+                except psycopg2.Error as e:
+                    entry["error"] = str(e).strip()
+                cur.execute("ROLLBACK TO SAVEPOINT plan")
+                result["statements"].append(entry)
+    finally:
+        conn.rollback()
+        conn.close()
+    return result
+
+
+def _plan_summary(plans: dict) -> dict:
+    """Vrijeme izvodjenja, shared buffers i vrijeme triggera EXPLAIN naredbi (za results.json)"""
+    summary = {"execution_ms": 0.0, "shared_buffers": 0, "triggers_ms": 0.0}
+    explained = [plan for entry in plans["statements"] for plan in entry.get("plan", [])]
+    if not explained:
+        return {}
+    for top in explained:
+        summary["execution_ms"] += top.get("Execution Time", 0)
+        summary["shared_buffers"] += top["Plan"].get("Shared Hit Blocks", 0) + top["Plan"].get("Shared Read Blocks", 0)
+        summary["triggers_ms"] += sum(trigger.get("Time", 0) for trigger in top.get("Triggers", []))
+    summary["execution_ms"] = round(summary["execution_ms"], 3)
+    summary["triggers_ms"] = round(summary["triggers_ms"], 3)
+    return summary
+
+
+# ============== GLAVNI PROGRAM ==============
+
+def parse_scales(value: str) -> list:
+    scales = []
+    for item in value.split(","):
+        users, _, tasks = item.strip().partition(":")
+        scales.append((int(users), int(tasks)))
+    return scales
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="pgbench suite za funkcije, procedure i triggere")
+    parser.add_argument("--scales", default="1000:20000,10000:200000",
+                        help="zarezom odvojene velicine korisnici:zadaci")
+    parser.add_argument("--no-generate", action="store_true", help="mjeri postojecu bazu")
+    parser.add_argument("--scripts", default=",".join(SCRIPTS),
+                        help="zarezom odvojene skripte: " + ", ".join(SCRIPTS))
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=None, help="pgbench -j (default: --clients)")
+    parser.add_argument("--duration", type=int, default=15, help="sekundi po skripti")
+    parser.add_argument("--protocol", default="prepared", choices=["simple", "extended", "prepared"])
+    parser.add_argument("--pgbench", default=shutil.which("pgbench") or "pgbench")
+    parser.add_argument("--dsn", default=None, help="libpq DSN (default: backend/.env)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--until", default="2026-01-01", help="za generator")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="za generator")
+    parser.add_argument("--output-dir", default=None,
+                        help="default: benchmarks/results/pgbench_<vrijeme>")
+    args = parser.parse_args()
+
+    scripts = [name.strip() for name in args.scripts.split(",") if name.strip()]
+    unknown = [name for name in scripts if name not in EXPLAIN_STATEMENTS]
+    if unknown:
+        parser.error(f"nepoznate skripte: {', '.join(unknown)}")
+    if shutil.which(args.pgbench) is None and not os.path.exists(args.pgbench):
+        parser.error(f"pgbench nije pronaden ({args.pgbench}) - koristi --pgbench")
+
+    dsn = args.dsn or _default_dsn()
+    output_dir = args.output_dir or os.path.join(
+        BENCH_DIR, "results", "pgbench_" + datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(output_dir, exist_ok=True)
+
+    scales = [None] if args.no_generate else parse_scales(args.scales)
+    results = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {"clients": args.clients, "duration": args.duration, "protocol": args.protocol},
+        "scales": [],
+    }
+    for scale in scales:
+        if scale is not None:
+            generate(scale[0], scale[1], args)
+        info = dataset_info(dsn)
+        label = f"{info['users']}u_{info['tasks']}t"
+        print(f"\nVelicina {label} (audit_log {info['audit_log']})")
+        print(f"  {'skripta':<22} {'TPS':>10} {'avg ms':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'gresaka':>7} {'plan ms':>8} {'buffers':>8}")
+        scale_result = {"label": label, "dataset": {k: info[k] for k in ("users", "tasks", "audit_log")},
+                        "scripts": {}}
+        os.makedirs(os.path.join(output_dir, "plans", label), exist_ok=True)
+        for script in scripts:
+            bench = run_pgbench(script, info, dsn, args)
+            plans = capture_plans(script, info, dsn)
+            with open(os.path.join(output_dir, "plans", label, script + ".json"), "w") as f:
+                json.dump(plans, f, indent=2)
+            bench["plan"] = _plan_summary(plans)
+            scale_result["scripts"][script] = bench
+
+            def fmt(value, width, digits=2):
+                return f"{value:{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+            print(f"  {script:<22} {fmt(bench['tps'], 10, 1)} {fmt(bench['latency_avg_ms'], 8)} "
+                  f"{fmt(bench['latency_p50_ms'], 8)} {fmt(bench['latency_p95_ms'], 8)} "
+                  f"{fmt(bench['latency_p99_ms'], 8)} {bench['failed'] or 0:7d} "
+                  f"{fmt(bench['plan'].get('execution_ms'), 8)} {bench['plan'].get('shared_buffers', 0):8d}")
+            if "error" in bench:
+                print(f"    pgbench: {bench['error']}")
+        results["scales"].append(scale_result)
+
+    with open(os.path.join(output_dir, "results.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRezultati: {os.path.join(output_dir, 'results.json')}")
+    if any("error" in bench for scale in results["scales"] for bench in scale["scripts"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+-- ============================================================================
+-- BENCHMARK: Latencija activity feedova (/audit/recent-activity, /audit/user-activity)
+-- ============================================================================
+-- Izvodi iste upite kao endpointi, s nasumicnim keyset kursorima kroz
+-- cijeli vremenski raspon, i ispisuje p50/p95/p99 po upitu te plan
+-- jednog izvodjenja (ocekuje se Index Only Scan nad pokrivajucim indeksima).
+--
+-- Cilj: p99 < 10 ms po stranici (limit 50) na audit_log s 10M redaka.
+-- Podaci: benchmarks/generate_dataset.py ili vlastiti bulk INSERT, zatim
+-- VACUUM ANALYZE (index-only scan treba azurnu visibility mapu).
+--
+-- Pokretanje:
+--   psql -U postgres -d employee_db -f benchmarks/sql/activity_feeds.sql
+--   psql ... -v iterations=2000 -v page=100 -f benchmarks/sql/activity_feeds.sql
+-- ============================================================================
+
+\set QUIET on
+\if :{?iterations}
+\else
+    \set iterations 500
+\endif
+\if :{?page}
+\else
+    \set page 50
+\endif
+
+SET search_path TO employee_management;
+SET client_min_messages TO WARNING;
+
+CREATE TEMP TABLE bench_timings (
+    query_name TEXT,
+    duration_ms NUMERIC
+);
+
+-- Nasumicni kursor unutar raspona audit_log i mjerenje svakog upita
+CREATE FUNCTION pg_temp.run_feed_bench(p_iterations INTEGER, p_page INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    v_min TIMESTAMP;
+    v_max TIMESTAMP;
+    v_cursor TIMESTAMP;
+    v_user INTEGER;
+    v_start TIMESTAMPTZ;
+    i INTEGER;
+BEGIN
+    SELECT MIN(changed_at), MAX(changed_at) INTO v_min, v_max FROM audit_log;
+    
+    FOR i IN 1..p_iterations LOOP
+        v_cursor := v_min + (v_max - v_min) * random();
+        v_user := (SELECT user_id FROM users ORDER BY random() LIMIT 1);
+        
+        -- recent-activity, prva stranica
+        v_start := clock_timestamp();
+        PERFORM * FROM (
+            (SELECT 'audit' AS source, audit_log_id AS activity_id, changed_at AS occurred_at,
+                    changed_by, entity_name, entity_id, action::TEXT
+             FROM audit_log
+             ORDER BY changed_at DESC, audit_log_id DESC LIMIT p_page)
+            UNION ALL
+            (SELECT 'login', login_event_id, login_time, user_id, username_attempted, NULL, success::TEXT
+             FROM login_events
+             ORDER BY login_time DESC, login_event_id DESC LIMIT p_page)
+        ) feed ORDER BY occurred_at DESC, source DESC, activity_id DESC LIMIT p_page;
+        INSERT INTO bench_timings VALUES ('recent-activity first page',
+            EXTRACT(EPOCH FROM clock_timestamp() - v_start) * 1000);
+        
+        -- recent-activity, duboka stranica (kursor)
+        v_start := clock_timestamp();
+        PERFORM * FROM (
+            (SELECT 'audit' AS source, audit_log_id AS activity_id, changed_at AS occurred_at,
+                    changed_by, entity_name, entity_id, action::TEXT
+             FROM audit_log
+             WHERE (changed_at, audit_log_id) < (v_cursor, 2147483647)
+             ORDER BY changed_at DESC, audit_log_id DESC LIMIT p_page)
+            UNION ALL
+            (SELECT 'login', login_event_id, login_time, user_id, username_attempted, NULL, success::TEXT
+             FROM login_events
+             WHERE login_time <= v_cursor
+             ORDER BY login_time DESC, login_event_id DESC LIMIT p_page)
+        ) feed ORDER BY occurred_at DESC, source DESC, activity_id DESC LIMIT p_page;
+        INSERT INTO bench_timings VALUES ('recent-activity deep page',
+            EXTRACT(EPOCH FROM clock_timestamp() - v_start) * 1000);
+        
+        -- user-activity, duboka stranica (kursor)
+        v_start := clock_timestamp();
+        PERFORM * FROM (
+            (SELECT audit_log_id, changed_at, changed_by, entity_name, entity_id, action
+             FROM audit_log
+             WHERE changed_by = v_user AND (changed_at, audit_log_id) < (v_cursor, 2147483647)
+             ORDER BY changed_at DESC, audit_log_id DESC LIMIT p_page)
+            UNION
+            (SELECT audit_log_id, changed_at, changed_by, entity_name, entity_id, action
+             FROM audit_log
+             WHERE entity_name = 'users' AND entity_id = v_user
+             AND (changed_at, audit_log_id) < (v_cursor, 2147483647)
+             ORDER BY changed_at DESC, audit_log_id DESC LIMIT p_page)
+        ) activity ORDER BY changed_at DESC, audit_log_id DESC LIMIT p_page;
+        INSERT INTO bench_timings VALUES ('user-activity deep page',
+            EXTRACT(EPOCH FROM clock_timestamp() - v_start) * 1000);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT pg_temp.run_feed_bench(:iterations, :page) \gset
+
+\set QUIET off
+\echo ''
+\echo '=== Latencija feedova (ms) ==='
+SELECT 
+    query_name,
+    COUNT(*) AS runs,
+    ROUND(PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY duration_ms)::NUMERIC, 3) AS p50,
+    ROUND(PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY duration_ms)::NUMERIC, 3) AS p95,
+    ROUND(PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY duration_ms)::NUMERIC, 3) AS p99,
+    ROUND(MAX(duration_ms), 3) AS max
+FROM bench_timings
+GROUP BY query_name
+ORDER BY query_name;
+
+SELECT (SELECT COUNT(*) FROM audit_log) AS audit_log_rows,
+       (SELECT COUNT(*) FROM login_events) AS login_events_rows;
+
+\echo ''
+\echo '=== Plan: recent-activity (duboka stranica) ==='
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF, TIMING OFF)
+SELECT * FROM (
+    (SELECT 'audit' AS source, audit_log_id AS activity_id, changed_at AS occurred_at,
+            changed_by, entity_name, entity_id, action::TEXT
+     FROM audit_log
+     WHERE (changed_at, audit_log_id) < ((SELECT MIN(changed_at) + (MAX(changed_at) - MIN(changed_at)) / 2 FROM audit_log), 2147483647)
+     ORDER BY changed_at DESC, audit_log_id DESC LIMIT :page)
+    UNION ALL
+    (SELECT 'login', login_event_id, login_time, user_id, username_attempted, NULL, success::TEXT
+     FROM login_events
+     ORDER BY login_time DESC, login_event_id DESC LIMIT :page)
+) feed ORDER BY occurred_at DESC, source DESC, activity_id DESC LIMIT :page;
@@ -0,0 +1,123 @@
+-- ============================================================================
+-- BENCHMARK: Velicina i ingest audit zapisa - 'full' vs 'diff' payload
+-- ============================================================================
+-- 1. Postojeci zapisi: velicina payloada UPDATE zapisa (users, tasks) po
+--    formatu i velicina audit_log (heap, TOAST, indeksi). Pokrenuti prije i
+--    nakon pretvorbe (migracija 001 s -v convert=1, zatim VACUUM FULL
+--    audit_log) za usporedbu zauzeca.
+-- 2. Novi zapisi: za svaki format (employee_management.audit_format) radi
+--    bulk UPDATE koji mijenja samo status, pa samo prioritet, i mjeri
+--    trajanje, WAL volumen i velicinu old_value/new_value novih zapisa.
+--    Svaki format ima svoje, jednako svjeze taskove i naredbe se izvode
+--    naizmjence (full, diff, full, diff), pa diff ne nasljedjuje HOT
+--    lance i full-page slike koje je ostavio full prolaz.
+--
+-- Pokretanje (na instaliranoj bazi):
+--   psql -U postgres -d employee_db -f benchmarks/sql/audit_payload_format.sql
+--   psql ... -v rows=50000 -f benchmarks/sql/audit_payload_format.sql
+--
+-- Sve se izvodi u transakciji koja se na kraju ponistava (ROLLBACK).
+-- ============================================================================
+
+\set QUIET on
+\if :{?rows}
+\else
+    \set rows 10000
+\endif
+
+SET search_path TO employee_management;
+SET client_min_messages TO WARNING;
+
+\set QUIET off
+\echo ''
+\echo '=== Postojeci UPDATE zapisi (users, tasks) po formatu ==='
+SELECT
+    payload_format,
+    COUNT(*) AS audit_rows,
+    ROUND(AVG(pg_column_size(old_value) + pg_column_size(new_value)), 1) AS bytes_row,
+    pg_size_pretty(SUM(pg_column_size(old_value) + pg_column_size(new_value))) AS payload_total
+FROM audit_log
+WHERE action = 'UPDATE' AND entity_name IN ('users', 'tasks')
+GROUP BY payload_format
+ORDER BY payload_format;
+
+\echo '=== Velicina audit_log ==='
+SELECT
+    pg_size_pretty(pg_relation_size(c.oid)) AS heap,
+    pg_size_pretty(COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0)) AS toast,
+    pg_size_pretty(pg_indexes_size(c.oid)) AS indexes,
+    pg_size_pretty(pg_total_relation_size(c.oid)) AS total
+FROM pg_class c
+WHERE c.oid = 'audit_log'::regclass;
+\set QUIET on
+
+BEGIN;
+
+CREATE TEMP TABLE bench_results (
+    audit_format TEXT,
+    operation TEXT,
+    audit_rows BIGINT,
+    payload_bytes BIGINT,
+    duration_ms NUMERIC,
+    wal_bytes NUMERIC
+) ON COMMIT DROP;
+
+-- Izvrsava jednu naredbu u zadanom formatu i biljezi metrike
+CREATE FUNCTION pg_temp.bench(p_format TEXT, p_operation TEXT, p_sql TEXT)
+RETURNS VOID AS $$
+DECLARE
+    v_start TIMESTAMPTZ;
+    v_lsn pg_lsn;
+    v_audit_before BIGINT;
+BEGIN
+    PERFORM set_config('employee_management.audit_format', p_format, TRUE);
+    SELECT COALESCE(MAX(audit_log_id), 0) INTO v_audit_before FROM audit_log;
+    v_lsn := pg_current_wal_insert_lsn();
+    v_start := clock_timestamp();
+    
+    EXECUTE p_sql;
+    
+    INSERT INTO bench_results (audit_format, operation, audit_rows, payload_bytes, duration_ms, wal_bytes)
+    SELECT p_format, p_operation, COUNT(*),
+        SUM(pg_column_size(old_value) + pg_column_size(new_value)),
+        ROUND(EXTRACT(EPOCH FROM clock_timestamp() - v_start)::NUMERIC * 1000, 2),
+        pg_wal_lsn_diff(pg_current_wal_insert_lsn(), v_lsn)
+    FROM audit_log WHERE audit_log_id > v_audit_before;
+END;
+$$ LANGUAGE plpgsql;
+
+\o /dev/null
+INSERT INTO tasks (title, description, priority, created_by)
+SELECT 'bench task ' || g, 'benchmark ' || f, 'MEDIUM', (SELECT MIN(user_id) FROM users)
+FROM unnest(ARRAY['full', 'diff']) f, generate_series(1, :rows) g;
+
+SELECT pg_temp.bench('full', '1 UPDATE status',
+    'UPDATE tasks SET status = ''IN_PROGRESS'' WHERE description = ''benchmark full''');
+SELECT pg_temp.bench('diff', '1 UPDATE status',
+    'UPDATE tasks SET status = ''IN_PROGRESS'' WHERE description = ''benchmark diff''');
+SELECT pg_temp.bench('full', '2 UPDATE priority',
+    'UPDATE tasks SET priority = ''HIGH'' WHERE description = ''benchmark full''');
+SELECT pg_temp.bench('diff', '2 UPDATE priority',
+    'UPDATE tasks SET priority = ''HIGH'' WHERE description = ''benchmark diff''');
+\o
+
+\set QUIET off
+\echo ''
+\echo '=== Audit payload: full vs diff (tasks) ==='
+SELECT 
+    f.operation,
+    f.audit_rows,
+    ROUND(f.payload_bytes::NUMERIC / NULLIF(f.audit_rows, 0), 1) AS bytes_row_full,
+    ROUND(d.payload_bytes::NUMERIC / NULLIF(d.audit_rows, 0), 1) AS bytes_row_diff,
+    ROUND(d.payload_bytes::NUMERIC / NULLIF(f.payload_bytes, 0), 2) AS size_ratio,
+    f.duration_ms AS ms_full,
+    d.duration_ms AS ms_diff,
+    pg_size_pretty(f.wal_bytes) AS wal_full,
+    pg_size_pretty(d.wal_bytes) AS wal_diff,
+    ROUND(d.wal_bytes / NULLIF(f.wal_bytes, 0), 2) AS wal_ratio
+FROM bench_results f
+JOIN bench_results d ON d.operation = f.operation AND d.audit_format = 'diff'
+WHERE f.audit_format = 'full'
+ORDER BY f.operation;
+
+ROLLBACK;
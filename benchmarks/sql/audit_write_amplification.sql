@@ -0,0 +1,128 @@
+-- ============================================================================
+-- BENCHMARK: Write amplification audit triggera na bulk operacijama
+-- ============================================================================
+-- Mjeri trajanje, WAL volumen i broj audit zapisa za bulk INSERT/UPDATE/DELETE
+-- nad tasks tablicom, jednom s iskljucenim i jednom s ukljucenim audit
+-- triggerima. Omjer (audit / bez audita) je write amplification audita.
+--
+-- Pokretanje (na instaliranoj bazi):
+--   psql -U postgres -d employee_db -f benchmarks/sql/audit_write_amplification.sql
+--   psql ... -v rows=50000 -f benchmarks/sql/audit_write_amplification.sql
+--
+-- Za usporedbu row-level i statement-level triggera pokreni skriptu nad
+-- bazom instaliranom iz obje verzije 03_functions_procedures.sql.
+-- Sve se izvodi u transakciji koja se na kraju ponistava (ROLLBACK).
+-- ============================================================================
+
+\set QUIET on
+\if :{?rows}
+\else
+    \set rows 10000
+\endif
+
+SET search_path TO employee_management;
+SET client_min_messages TO WARNING;
+
+BEGIN;
+
+CREATE TEMP TABLE bench_results (
+    run_order SERIAL,
+    audit_enabled BOOLEAN,
+    operation TEXT,
+    affected_rows BIGINT,
+    audit_rows BIGINT,
+    duration_ms NUMERIC,
+    wal_bytes NUMERIC
+) ON COMMIT DROP;
+
+-- Izvrsava jednu naredbu i biljezi trajanje, WAL i broj novih audit zapisa
+CREATE FUNCTION pg_temp.bench(p_audit BOOLEAN, p_operation TEXT, p_sql TEXT)
+RETURNS VOID AS $$
+DECLARE
+    v_start TIMESTAMPTZ;
+    v_lsn pg_lsn;
+    v_audit_before BIGINT;
+    v_rows BIGINT;
+BEGIN
+    SELECT COALESCE(MAX(audit_log_id), 0) INTO v_audit_before FROM audit_log;
+    v_lsn := pg_current_wal_insert_lsn();
+    v_start := clock_timestamp();
+    
+    EXECUTE p_sql;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    
+    INSERT INTO bench_results (audit_enabled, operation, affected_rows, audit_rows, duration_ms, wal_bytes)
+    SELECT p_audit, p_operation, v_rows,
+        (SELECT COUNT(*) FROM audit_log WHERE audit_log_id > v_audit_before),
+        ROUND(EXTRACT(EPOCH FROM clock_timestamp() - v_start)::NUMERIC * 1000, 2),
+        pg_wal_lsn_diff(pg_current_wal_insert_lsn(), v_lsn);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Jedan krug: bulk INSERT, dva bulk UPDATE-a i bulk DELETE
+CREATE FUNCTION pg_temp.bench_round(p_audit BOOLEAN, p_rows INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_temp.bench(p_audit, '1 INSERT', FORMAT(
+        'INSERT INTO tasks (title, description, priority, created_by)
+         SELECT ''bench task '' || g, ''benchmark'', ''MEDIUM'',
+                (SELECT MIN(user_id) FROM users)
+         FROM generate_series(1, %s) g', p_rows));
+    PERFORM pg_temp.bench(p_audit, '2 UPDATE status', 
+        'UPDATE tasks SET status = ''IN_PROGRESS'' WHERE description = ''benchmark''');
+    PERFORM pg_temp.bench(p_audit, '3 UPDATE priority', 
+        'UPDATE tasks SET priority = ''HIGH'' WHERE description = ''benchmark''');
+    PERFORM pg_temp.bench(p_audit, '4 DELETE', 
+        'DELETE FROM tasks WHERE description = ''benchmark''');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bez audita (samo audit triggeri su iskljuceni, ostali rade normalno)
+DO $$
+DECLARE
+    v_trigger RECORD;
+BEGIN
+    FOR v_trigger IN
+        SELECT tgname FROM pg_trigger
+        WHERE tgrelid = 'tasks'::regclass AND tgname LIKE 'trg_audit_tasks%'
+    LOOP
+        EXECUTE FORMAT('ALTER TABLE tasks DISABLE TRIGGER %I', v_trigger.tgname);
+    END LOOP;
+END $$;
+
+\o /dev/null
+SELECT pg_temp.bench_round(FALSE, :rows);
+
+ALTER TABLE tasks ENABLE TRIGGER ALL;
+
+SELECT pg_temp.bench_round(TRUE, :rows);
+\o
+
+\set QUIET off
+\echo ''
+\echo '=== Audit write amplification (tasks) ==='
+SELECT 
+    a.operation,
+    a.affected_rows,
+    a.audit_rows,
+    b.duration_ms AS ms_no_audit,
+    a.duration_ms AS ms_audit,
+    ROUND(a.duration_ms / NULLIF(b.duration_ms, 0), 2) AS time_ratio,
+    pg_size_pretty(b.wal_bytes) AS wal_no_audit,
+    pg_size_pretty(a.wal_bytes) AS wal_audit,
+    ROUND(a.wal_bytes / NULLIF(b.wal_bytes, 0), 2) AS wal_ratio
+FROM bench_results a
+JOIN bench_results b ON b.operation = a.operation AND NOT b.audit_enabled
+WHERE a.audit_enabled
+ORDER BY a.operation;
+
+\echo ''
+\echo '=== Audit triggeri nad tasks ==='
+SELECT 
+    tgname AS trigger_name,
+    CASE WHEN tgtype & 1 = 1 THEN 'ROW' ELSE 'STATEMENT' END AS level
+FROM pg_trigger
+WHERE tgrelid = 'tasks'::regclass AND tgname LIKE 'trg_audit_tasks%'
+ORDER BY tgname;
+
+ROLLBACK;
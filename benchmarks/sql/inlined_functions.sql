@@ -0,0 +1,203 @@
+-- ============================================================================
+-- BENCHMARK: plpgsql vs inlineane SQL funkcije (get_user_tasks,
+-- get_task_statistics, get_user_permissions)
+-- ============================================================================
+-- Za svaki upit iz routera (/tasks/my s ?overdue i ?limit,
+-- /tasks/my/statistics, /roles/users/{id}/permissions s LIMIT 1) usporeduje
+-- plpgsql i LANGUAGE sql verziju funkcije; verzija koje nema u shemi se
+-- kreira u pg_temp. Svaki upit ide kroz EXECUTE s literalima pa se planira
+-- kao upit iz psycopg2. Ispisuje p50/p95/p99 po upitu i verziji te planove
+-- jednog izvodjenja: plpgsql je Function Scan koji vraca sve retke, SQL
+-- verzija je Index Scan s WHERE/LIMIT u planu.
+--
+-- Ocekivano: get_user_tasks je u SQL verziji brza s LIMIT/WHERE (to vise sto
+-- korisnik ima vise zadataka). get_task_statistics i get_user_permissions
+-- nemaju sto inlineati (agregat, UNION + ORDER BY), a SQL verzija se planira
+-- pri svakom pozivu dok plpgsql cuva plan u sesiji - zato ostaju plpgsql.
+--
+-- Podaci: benchmarks/generate_dataset.py (npr. --users 2000 --tasks 40000).
+--
+-- Pokretanje:
+--   psql -U postgres -d employee_db -f benchmarks/sql/inlined_functions.sql
+--   psql ... -v iterations=2000 -f benchmarks/sql/inlined_functions.sql
+-- ============================================================================
+
+\set QUIET on
+\if :{?iterations}
+\else
+    \set iterations 500
+\endif
+
+SET search_path TO employee_management;
+SET client_min_messages TO WARNING;
+
+CREATE TEMP TABLE bench_timings (
+    query_name TEXT,
+    version TEXT,
+    duration_ms NUMERIC
+);
+
+-- Prijasnja plpgsql verzija get_user_tasks (neprozirna planeru)
+CREATE FUNCTION pg_temp.get_user_tasks_plpgsql(
+    p_user_id INTEGER,
+    p_status task_status DEFAULT NULL,
+    p_include_created BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE(
+    task_id INTEGER, title VARCHAR(200), description TEXT, status task_status,
+    priority task_priority, due_date DATE, is_overdue BOOLEAN,
+    creator_id INTEGER, creator_name TEXT, assignee_id INTEGER, assignee_name TEXT,
+    created_at TIMESTAMP, updated_at TIMESTAMP, completed_at TIMESTAMP
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        t.task_id, t.title, t.description, t.status, t.priority, t.due_date,
+        (t.due_date < CURRENT_DATE AND t.status NOT IN ('COMPLETED', 'CANCELLED')),
+        t.created_by,
+        (SELECT first_name || ' ' || last_name FROM users WHERE user_id = t.created_by),
+        t.assigned_to,
+        (SELECT first_name || ' ' || last_name FROM users WHERE user_id = t.assigned_to),
+        t.created_at, t.updated_at, t.completed_at
+    FROM tasks t
+    WHERE (t.assigned_to = p_user_id OR (p_include_created AND t.created_by = p_user_id))
+    AND (p_status IS NULL OR t.status = p_status)
+    ORDER BY
+        CASE t.priority
+            WHEN 'URGENT' THEN 1
+            WHEN 'HIGH' THEN 2
+            WHEN 'MEDIUM' THEN 3
+            WHEN 'LOW' THEN 4
+        END,
+        t.due_date NULLS LAST;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE FUNCTION pg_temp.get_task_statistics_sql(p_user_id INTEGER)
+RETURNS TABLE(
+    total_tasks BIGINT, completed_tasks BIGINT, in_progress_tasks BIGINT,
+    overdue_tasks BIGINT, completion_rate NUMERIC(5,2)
+) AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE t.status = 'COMPLETED'),
+        COUNT(*) FILTER (WHERE t.status = 'IN_PROGRESS'),
+        COUNT(*) FILTER (WHERE t.due_date < CURRENT_DATE AND t.status NOT IN ('COMPLETED', 'CANCELLED')),
+        CASE
+            WHEN COUNT(*) > 0
+            THEN ROUND((COUNT(*) FILTER (WHERE t.status = 'COMPLETED')::NUMERIC / COUNT(*)) * 100, 2)
+            ELSE 0
+        END::NUMERIC(5,2)
+    FROM tasks t
+    WHERE t.assigned_to = p_user_id;
+$$ LANGUAGE sql STABLE;
+
+CREATE FUNCTION pg_temp.get_user_permissions_sql(p_user_id INTEGER)
+RETURNS TABLE(
+    permission_code VARCHAR(50), permission_name VARCHAR(100),
+    category VARCHAR(50), source VARCHAR(20)
+) AS $$
+    SELECT DISTINCT p.code::VARCHAR(50), p.name::VARCHAR(100), p.category::VARCHAR(50), 'ROLE'::VARCHAR(20)
+    FROM user_roles ur
+    JOIN role_permissions rp ON ur.role_id = rp.role_id
+    JOIN permissions p ON rp.permission_id = p.permission_id
+    WHERE ur.user_id = p_user_id
+    AND NOT EXISTS (
+        SELECT 1 FROM user_permissions up
+        WHERE up.user_id = p_user_id AND up.permission_id = p.permission_id AND up.granted = FALSE
+    )
+    UNION
+    SELECT DISTINCT p.code::VARCHAR(50), p.name::VARCHAR(100), p.category::VARCHAR(50), 'DIRECT'::VARCHAR(20)
+    FROM user_permissions up
+    JOIN permissions p ON up.permission_id = p.permission_id
+    WHERE up.user_id = p_user_id AND up.granted = TRUE
+    ORDER BY 3, 1;
+$$ LANGUAGE sql STABLE;
+
+-- Upiti routera; %1$s je funkcija, %2$s korisnik
+CREATE TEMP TABLE bench_queries (query_name TEXT, query_sql TEXT, plpgsql_fn TEXT, sql_fn TEXT);
+INSERT INTO bench_queries VALUES
+    ('/tasks/my', 'SELECT * FROM %1$s(%2$s, NULL, FALSE)',
+        'pg_temp.get_user_tasks_plpgsql', 'get_user_tasks'),
+    ('/tasks/my?limit=5', 'SELECT * FROM %1$s(%2$s, NULL, FALSE) LIMIT 5',
+        'pg_temp.get_user_tasks_plpgsql', 'get_user_tasks'),
+    ('/tasks/my?overdue&limit=20', 'SELECT * FROM %1$s(%2$s, NULL, FALSE) WHERE is_overdue LIMIT 20',
+        'pg_temp.get_user_tasks_plpgsql', 'get_user_tasks'),
+    ('/tasks/my/statistics', 'SELECT * FROM %1$s(%2$s)',
+        'get_task_statistics', 'pg_temp.get_task_statistics_sql'),
+    ('/roles/users/{id}/permissions', 'SELECT * FROM %1$s(%2$s) LIMIT 1',
+        'get_user_permissions', 'pg_temp.get_user_permissions_sql');
+
+CREATE FUNCTION pg_temp.run_inline_bench(p_iterations INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    v_users INTEGER[];
+    v_user INTEGER;
+    v_query RECORD;
+    v_version TEXT;
+    v_start TIMESTAMPTZ;
+    i INTEGER;
+BEGIN
+    -- korisnici s najvise zadataka (najveca razlika izmedju verzija)
+    SELECT array_agg(assigned_to) INTO v_users FROM (
+        SELECT assigned_to FROM tasks WHERE assigned_to IS NOT NULL
+        GROUP BY assigned_to ORDER BY COUNT(*) DESC LIMIT 200
+    ) top;
+
+    FOR i IN 1..p_iterations LOOP
+        v_user := v_users[1 + floor(random() * cardinality(v_users))::INTEGER];
+        FOR v_query IN SELECT * FROM bench_queries LOOP
+            -- naizmjenicno, da zagrijavanje cachea ne ide u korist jedne verzije
+            FOREACH v_version IN ARRAY CASE WHEN i % 2 = 0
+                THEN ARRAY['plpgsql', 'sql'] ELSE ARRAY['sql', 'plpgsql'] END
+            LOOP
+                v_start := clock_timestamp();
+                EXECUTE FORMAT('SELECT COUNT(*) FROM (' || v_query.query_sql || ') q',
+                    CASE v_version WHEN 'sql' THEN v_query.sql_fn ELSE v_query.plpgsql_fn END,
+                    v_user);
+                INSERT INTO bench_timings VALUES (v_query.query_name, v_version,
+                    EXTRACT(EPOCH FROM clock_timestamp() - v_start) * 1000);
+            END LOOP;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT pg_temp.run_inline_bench(:iterations) \gset
+
+\set QUIET off
+\echo ''
+\echo '=== Latencija po upitu routera (ms) ==='
+SELECT
+    query_name,
+    version,
+    COUNT(*) AS runs,
+    ROUND(PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY duration_ms)::NUMERIC, 3) AS p50,
+    ROUND(PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY duration_ms)::NUMERIC, 3) AS p95,
+    ROUND(PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY duration_ms)::NUMERIC, 3) AS p99
+FROM bench_timings
+GROUP BY query_name, version
+ORDER BY query_name, version;
+
+\echo ''
+\echo '=== Ubrzanje SQL verzije (omjer p50 plpgsql / sql) ==='
+SELECT
+    query_name,
+    ROUND(PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY duration_ms) FILTER (WHERE version = 'plpgsql')::NUMERIC
+        / NULLIF(PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY duration_ms) FILTER (WHERE version = 'sql'), 0)::NUMERIC, 2) AS speedup
+FROM bench_timings
+GROUP BY query_name
+ORDER BY query_name;
+
+SELECT assigned_to AS plan_user FROM tasks WHERE assigned_to IS NOT NULL
+GROUP BY assigned_to ORDER BY COUNT(*) DESC LIMIT 1 \gset
+
+\echo ''
+\echo '=== Plan: /tasks/my?overdue&limit=20, plpgsql ==='
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF, TIMING OFF)
+SELECT * FROM pg_temp.get_user_tasks_plpgsql(:plan_user, NULL, FALSE) WHERE is_overdue LIMIT 20;
+
+\echo ''
+\echo '=== Plan: /tasks/my?overdue&limit=20, SQL (inlineana) ==='
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF, TIMING OFF)
+SELECT * FROM get_user_tasks(:plan_user, NULL, FALSE) WHERE is_overdue LIMIT 20;
@@ -0,0 +1,124 @@
+"""
+BENCHMARK: Trosak tracing spanova (app/tracing.py)
+
+Mjeri:
+- span() bez aktivnog tracea (neuzorkovani zahtjevi - vruci put)
+- span() i record_span() unutar uzorkovanog tracea
+- serijalizaciju batcha u OTLP JSON (flush u datoteku)
+- uz --http: GET /api/tasks kroz cijelu aplikaciju s tracing_sample_rate=0
+  i s tracing_sample_rate=1, naizmjenicno u rundama (treba bazu i .env)
+
+Cilj: neuzorkovani span < 0.5 us, uzorkovani zahtjev < 5 % sporiji.
+
+Pokretanje (iz backend/ direktorija):
+    python ../benchmarks/tracing_overhead.py
+    python ../benchmarks/tracing_overhead.py --http --requests 300 --rounds 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+
+from app import tracing  # noqa: E402
+
+
+def _per_call_ns(fn, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def bench_spans(iterations: int) -> None:
+    def empty():
+        pass
+
+    def unsampled():
+        with tracing.span("bench"):
+            pass
+
+    def sampled():
+        with tracing.span("bench", attribute=1):
+            pass
+
+    def recorded():
+        tracing.record_span("db.query", time.time_ns(), tracing.SPAN_KIND_CLIENT, **{"db.rows": 1})
+
+    baseline = _per_call_ns(empty, iterations)
+    print(f"prazan poziv                 {baseline:8.0f} ns")
+    print(f"span() bez tracea            {_per_call_ns(unsampled, iterations) - baseline:8.0f} ns")
+
+    root = tracing.Span(os.urandom(16).hex(), None, "bench-root", tracing.SPAN_KIND_SERVER)
+    token = tracing._current.set(root)
+    try:
+        print(f"span() u traceu              {_per_call_ns(sampled, iterations) - baseline:8.0f} ns")
+        print(f"record_span() u traceu       {_per_call_ns(recorded, iterations) - baseline:8.0f} ns")
+    finally:
+        tracing._current.reset(token)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracing.settings.tracing_file = os.path.join(directory, "spans.jsonl")
+        tracing.settings.tracing_endpoint = ""
+        queued = len(tracing._finished)
+        start = time.perf_counter_ns()
+        sent = tracing.flush()
+        elapsed = time.perf_counter_ns() - start
+        print(f"izvoz u OTLP JSON            {elapsed / max(sent, 1):8.0f} ns/span ({sent} od {queued})")
+
+
+def bench_http(requests: int, rounds: int) -> None:
+    import contextlib
+    import io
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    with contextlib.redirect_stdout(io.StringIO()):
+        login = client.post("/api/auth/login", data={"username": "admin", "password": "Admin123!"})
+    headers = {"Authorization": "Bearer " + login.json()["access_token"]}
+
+    def run(sample_rate: float) -> float:
+        tracing.settings.tracing_sample_rate = sample_rate
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get("/api/tasks", headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+        tracing.flush()
+        return statistics.median(timings)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracing.settings.tracing_file = os.path.join(directory, "spans.jsonl")
+        for _ in range(50):
+            client.get("/api/tasks", headers=headers)
+        # naizmjenicne runde smanjuju utjecaj zagrijavanja i suma
+        medians = {0.0: [], 1.0: []}
+        for _ in range(rounds):
+            for sample_rate in medians:
+                medians[sample_rate].append(run(sample_rate))
+        off, on = min(medians[0.0]), min(medians[1.0])
+        print(f"GET /api/tasks, sample_rate=0  p50 {off:6.2f} ms")
+        print(f"GET /api/tasks, sample_rate=1  p50 {on:6.2f} ms")
+        print(f"trosak uzorkovanog zahtjeva    {(on - off) / off * 100:+6.1f} %")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trosak tracing spanova")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--http", action="store_true", help="mjeri i cijeli HTTP zahtjev (treba bazu)")
+    parser.add_argument("--requests", type=int, default=200, help="zahtjeva po rundi")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    bench_spans(args.iterations)
+    if args.http:
+        bench_http(args.requests, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
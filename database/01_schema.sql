@@ -230,6 +230,8 @@ CREATE TABLE login_events (
     user_agent TEXT,
     success BOOLEAN NOT NULL,
     failure_reason VARCHAR(100),
+    attempt_count INTEGER NOT NULL DEFAULT 1,
+    first_attempt_at TIMESTAMP,
     
     
     CONSTRAINT fk_login_events_user FOREIGN KEY (user_id) 
@@ -237,6 +239,9 @@ CREATE TABLE login_events (
     CONSTRAINT chk_login_events_failure CHECK (
         (success = TRUE AND failure_reason IS NULL) OR
         (success = FALSE)
+    ),
+    CONSTRAINT chk_login_events_attempts CHECK (
+        attempt_count = 1 OR (attempt_count > 1 AND success = FALSE)
     )
 );
 
@@ -248,7 +253,9 @@ COMMENT ON COLUMN login_events.login_time IS 'Vrijeme pokusaja prijave';
 COMMENT ON COLUMN login_events.ip_address IS 'IP adresa klijenta';
 COMMENT ON COLUMN login_events.user_agent IS 'Informacije o pregledniku/klijentu';
 COMMENT ON COLUMN login_events.success IS 'Uspjesnost prijave (TRUE/FALSE)';
-COMMENT ON COLUMN login_events.failure_reason IS 'Razlog neuspjeha (INVALID_CREDENTIALS, ACCOUNT_INACTIVE, ACCOUNT_LOCKED)';
+COMMENT ON COLUMN login_events.failure_reason IS 'Razlog neuspjeha (INVALID_CREDENTIALS, ACCOUNT_INACTIVE, ACCOUNT_LOCKED, THROTTLED)';
+COMMENT ON COLUMN login_events.attempt_count IS 'Broj pokusaja u retku (>1 za zbirne zapise tijekom throttlinga)';
+COMMENT ON COLUMN login_events.first_attempt_at IS 'Prvi pokusaj zbirnog zapisa (login_time je zadnji)';
 
 
 CREATE TABLE audit_log (
@@ -261,6 +268,7 @@ CREATE TABLE audit_log (
     old_value JSONB,
     new_value JSONB,
     ip_address INET,
+    payload_format VARCHAR(10) NOT NULL DEFAULT 'full',
     
  
     CONSTRAINT fk_audit_log_changed_by FOREIGN KEY (changed_by) 
@@ -270,7 +278,8 @@ CREATE TABLE audit_log (
         (action = 'INSERT' AND old_value IS NULL AND new_value IS NOT NULL) OR
         (action = 'UPDATE' AND old_value IS NOT NULL AND new_value IS NOT NULL) OR
         (action = 'DELETE' AND old_value IS NOT NULL AND new_value IS NULL)
-    )
+    ),
+    CONSTRAINT chk_audit_log_payload_format CHECK (payload_format IN ('full', 'diff'))
 );
 
 COMMENT ON TABLE audit_log IS 'Evidencija svih promjena nad osjetljivim podacima';
@@ -283,6 +292,7 @@ COMMENT ON COLUMN audit_log.changed_at IS 'Vrijeme promjene';
 COMMENT ON COLUMN audit_log.old_value IS 'Prethodno stanje (JSONB)';
 COMMENT ON COLUMN audit_log.new_value IS 'Novo stanje (JSONB)';
 COMMENT ON COLUMN audit_log.ip_address IS 'IP adresa korisnika';
+COMMENT ON COLUMN audit_log.payload_format IS 'full = cijeli snapshot, diff = samo promijenjeni kljucevi + kljuc entiteta (UPDATE)';
 
 
 -- Tablica za M:N vezu između tasks i users 
@@ -339,6 +349,156 @@ COMMENT ON COLUMN user_permissions.assigned_by IS 'ID admina koji je dodijelio';
 COMMENT ON COLUMN user_permissions.notes IS 'Opcijski komentar';
 
 
+-- AGREGATNE TABLICE (ROLLUPS) ZA AUDIT STATISTIKU
+-- Pune se inkrementalno procedurom refresh_audit_rollups() do watermarka;
+-- statistike citaju rollupe + mali "live" rep iznad watermarka
+CREATE TABLE audit_log_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    entity_name VARCHAR(50) NOT NULL,
+    action audit_action NOT NULL,
+    change_count BIGINT NOT NULL DEFAULT 0,
+    
+    CONSTRAINT pk_audit_log_hourly PRIMARY KEY (bucket_hour, entity_name, action)
+);
+
+COMMENT ON TABLE audit_log_hourly IS 'Broj audit zapisa po satu, entitetu i akciji';
+COMMENT ON COLUMN audit_log_hourly.bucket_hour IS 'Pocetak sata (date_trunc hour nad changed_at)';
+COMMENT ON COLUMN audit_log_hourly.change_count IS 'Broj promjena u tom satu';
+
+
+CREATE TABLE login_events_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    successful_logins BIGINT NOT NULL DEFAULT 0,
+    failed_logins BIGINT NOT NULL DEFAULT 0,
+    unique_users INTEGER NOT NULL DEFAULT 0,
+    last_login TIMESTAMP,
+    
+    CONSTRAINT pk_login_events_hourly PRIMARY KEY (bucket_hour)
+);
+
+COMMENT ON TABLE login_events_hourly IS 'Broj uspjesnih/neuspjelih prijava i jedinstvenih korisnika po satu';
+COMMENT ON COLUMN login_events_hourly.failed_logins IS 'Zbroj attempt_count neuspjelih prijava (zbirni zapisi broje sve pokusaje)';
+COMMENT ON COLUMN login_events_hourly.unique_users IS 'Broj razlicitih korisnika s uspjesnom prijavom u tom satu';
+COMMENT ON COLUMN login_events_hourly.last_login IS 'Vrijeme zadnjeg pokusaja prijave u tom satu';
+
+
+-- Prijave po izvornoj podmrezi: /24 za IPv4, /64 za IPv6.
+-- Sire podmreze (/16, /48) dobivaju se grupiranjem ovih redaka.
+CREATE TABLE login_subnets_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    subnet CIDR NOT NULL,
+    successful_logins BIGINT NOT NULL DEFAULT 0,
+    failed_logins BIGINT NOT NULL DEFAULT 0,
+    
+    CONSTRAINT pk_login_subnets_hourly PRIMARY KEY (bucket_hour, subnet)
+);
+
+COMMENT ON TABLE login_subnets_hourly IS 'Broj uspjesnih/neuspjelih prijava po satu i izvornoj podmrezi (/24, IPv6 /64)';
+COMMENT ON COLUMN login_subnets_hourly.failed_logins IS 'Zbroj attempt_count neuspjelih prijava iz podmreze';
+
+
+-- Jedinstveni korisnici nisu aditivni preko sati, pa se za raspone
+-- broji DISTINCT nad ovom (malom) tablicom umjesto nad login_events
+CREATE TABLE login_users_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    user_id INTEGER NOT NULL,
+    
+    CONSTRAINT pk_login_users_hourly PRIMARY KEY (bucket_hour, user_id)
+);
+
+COMMENT ON TABLE login_users_hourly IS 'Korisnici s barem jednom uspjesnom prijavom po satu';
+
+
+CREATE TABLE rollup_watermarks (
+    rollup_name VARCHAR(50) PRIMARY KEY,
+    last_bucket TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE rollup_watermarks IS 'Dokle su rollup tablice popunjene';
+COMMENT ON COLUMN rollup_watermarks.last_bucket IS 'Svi sati prije ovog trenutka su agregirani (NULL = jos nista)';
+
+
+-- TABLICA: retention_jobs
+-- Pozadinski poslovi brisanja starih audit/login podataka u batch-evima
+CREATE TABLE retention_jobs (
+    job_id SERIAL PRIMARY KEY,
+    target VARCHAR(20) NOT NULL,
+    cutoff TIMESTAMP NOT NULL,
+    batch_size INTEGER NOT NULL DEFAULT 5000,
+    sleep_ms INTEGER NOT NULL DEFAULT 100,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    rows_estimated BIGINT,
+    rows_deleted BIGINT NOT NULL DEFAULT 0,
+    batches_done INTEGER NOT NULL DEFAULT 0,
+    requested_by INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    error_message TEXT,
+    
+    CONSTRAINT fk_retention_jobs_requested_by FOREIGN KEY (requested_by) 
+        REFERENCES users(user_id) ON DELETE SET NULL,
+    CONSTRAINT chk_retention_jobs_target CHECK (target IN ('audit_log', 'login_events')),
+    CONSTRAINT chk_retention_jobs_status CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')),
+    CONSTRAINT chk_retention_jobs_batch CHECK (batch_size > 0 AND sleep_ms >= 0)
+);
+
+COMMENT ON TABLE retention_jobs IS 'Poslovi brisanja starih audit/login podataka - napredak za nastavak nakon restarta';
+COMMENT ON COLUMN retention_jobs.target IS 'Tablica iz koje se brise (audit_log, login_events)';
+COMMENT ON COLUMN retention_jobs.cutoff IS 'Brisu se zapisi starijih od ovog trenutka';
+COMMENT ON COLUMN retention_jobs.sleep_ms IS 'Pauza izmedju batch-eva (throttling)';
+COMMENT ON COLUMN retention_jobs.rows_estimated IS 'Broj zapisa za brisanje pri pokretanju posla';
+COMMENT ON COLUMN retention_jobs.rows_deleted IS 'Broj do sada obrisanih zapisa';
+
+
+-- TABLICA: audit_snapshots
+-- Sazeto stanje entiteta nakon svakih N promjena; "as-of" rekonstrukcija
+-- cita jedan snapshot + ogranicen rep promjena iz audit_log
+CREATE TABLE audit_snapshots (
+    entity_name VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    snapshot_at TIMESTAMP NOT NULL,
+    audit_log_id INTEGER NOT NULL,
+    state JSONB,
+    changes_since_previous INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    
+    CONSTRAINT pk_audit_snapshots PRIMARY KEY (entity_name, entity_id, snapshot_at, audit_log_id)
+);
+
+COMMENT ON TABLE audit_snapshots IS 'Periodicki snapshoti stanja entiteta iz audit_log (svakih N promjena)';
+COMMENT ON COLUMN audit_snapshots.snapshot_at IS 'changed_at zadnje promjene ukljucene u snapshot';
+COMMENT ON COLUMN audit_snapshots.audit_log_id IS 'ID zadnje promjene ukljucene u snapshot';
+COMMENT ON COLUMN audit_snapshots.state IS 'Stanje entiteta nakon te promjene (NULL = obrisan)';
+COMMENT ON COLUMN audit_snapshots.changes_since_previous IS 'Broj promjena od prethodnog snapshota';
+
+
+-- TABLICA: user_hierarchy
+-- Closure tablica hijerarhije managera: svaki par (nadredjeni, podredjeni)
+-- na bilo kojoj udaljenosti, ukljucujuci korisnika samog (depth 0).
+-- Odrzavaju je triggeri nad users.manager_id; provjere "je li X u mojoj
+-- organizaciji" i cirkularnih referenci su lookup po primarnom kljucu
+CREATE TABLE user_hierarchy (
+    ancestor_id INTEGER NOT NULL,
+    descendant_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    
+    CONSTRAINT pk_user_hierarchy PRIMARY KEY (ancestor_id, descendant_id),
+    CONSTRAINT fk_user_hierarchy_ancestor FOREIGN KEY (ancestor_id) 
+        REFERENCES users(user_id) ON DELETE CASCADE,
+    CONSTRAINT fk_user_hierarchy_descendant FOREIGN KEY (descendant_id) 
+        REFERENCES users(user_id) ON DELETE CASCADE,
+    CONSTRAINT chk_user_hierarchy_depth CHECK (depth >= 0)
+);
+
+COMMENT ON TABLE user_hierarchy IS 'Closure tablica hijerarhije managera (svi nadredjeni/podredjeni parovi)';
+COMMENT ON COLUMN user_hierarchy.ancestor_id IS 'Nadredjeni korisnik (manager na bilo kojoj razini)';
+COMMENT ON COLUMN user_hierarchy.descendant_id IS 'Podredjeni korisnik';
+COMMENT ON COLUMN user_hierarchy.depth IS 'Broj razina izmedju njih (0 = isti korisnik, 1 = direktni podredjeni)';
+
+
 -- INDEKSI
 CREATE INDEX idx_users_username ON users(username);
 CREATE INDEX idx_users_email ON users(email);
@@ -357,10 +517,11 @@ CREATE INDEX idx_permissions_category ON permissions(category);
 
 CREATE INDEX idx_tasks_status ON tasks(status);
 CREATE INDEX idx_tasks_priority ON tasks(priority);
-CREATE INDEX idx_tasks_assigned_to ON tasks(assigned_to) WHERE assigned_to IS NOT NULL;
+CREATE INDEX idx_tasks_assigned_to ON tasks(assigned_to, priority DESC, due_date) WHERE assigned_to IS NOT NULL;
 CREATE INDEX idx_tasks_created_by ON tasks(created_by);
 CREATE INDEX idx_tasks_due_date ON tasks(due_date) WHERE due_date IS NOT NULL;
 CREATE INDEX idx_tasks_active ON tasks(status) WHERE status NOT IN ('COMPLETED', 'CANCELLED');
+CREATE INDEX idx_tasks_created ON tasks(created_at DESC, task_id DESC);
 
 
 CREATE INDEX idx_user_roles_user ON user_roles(user_id);
@@ -371,16 +532,39 @@ CREATE INDEX idx_role_permissions_role ON role_permissions(role_id);
 CREATE INDEX idx_role_permissions_permission ON role_permissions(permission_id);
 
 
-CREATE INDEX idx_login_events_user ON login_events(user_id) WHERE user_id IS NOT NULL;
-CREATE INDEX idx_login_events_time ON login_events(login_time DESC);
-CREATE INDEX idx_login_events_success ON login_events(success);
-CREATE INDEX idx_login_events_ip ON login_events(ip_address);
-
-
-CREATE INDEX idx_audit_log_entity ON audit_log(entity_name, entity_id);
-CREATE INDEX idx_audit_log_changed_by ON audit_log(changed_by) WHERE changed_by IS NOT NULL;
-CREATE INDEX idx_audit_log_time ON audit_log(changed_at DESC);
-CREATE INDEX idx_audit_log_action ON audit_log(action);
+-- Kompozitni indeksi zavrsavaju s (vrijeme DESC, id DESC) kako bi keyset
+-- paginacija (ORDER BY vrijeme DESC, id DESC + usporedba retka) citala
+-- samo jednu stranicu indeksa, bez obzira na dubinu.
+-- INCLUDE stupci pokrivaju activity feedove (/audit/recent-activity,
+-- /audit/user-activity) pa se oni citaju index-only scanom, bez heapa
+CREATE INDEX idx_login_events_user ON login_events(user_id, login_time DESC, login_event_id DESC) WHERE user_id IS NOT NULL;
+CREATE INDEX idx_login_events_time ON login_events(login_time DESC, login_event_id DESC)
+    INCLUDE (user_id, username_attempted, success, ip_address, failure_reason);
+CREATE INDEX idx_login_events_success ON login_events(success, login_time DESC, login_event_id DESC);
+-- GiST (inet_ops) pokriva i tocnu adresu i upite po podmrezi (<<=, >>=)
+CREATE INDEX idx_login_events_ip ON login_events USING GIST (ip_address inet_ops);
+
+
+CREATE INDEX idx_audit_log_entity ON audit_log(entity_name, entity_id, changed_at DESC, audit_log_id DESC)
+    INCLUDE (action, changed_by);
+CREATE INDEX idx_audit_log_entity_time ON audit_log(entity_name, changed_at DESC, audit_log_id DESC);
+CREATE INDEX idx_audit_log_changed_by ON audit_log(changed_by, changed_at DESC, audit_log_id DESC)
+    INCLUDE (entity_name, entity_id, action) WHERE changed_by IS NOT NULL;
+CREATE INDEX idx_audit_log_time ON audit_log(changed_at DESC, audit_log_id DESC)
+    INCLUDE (entity_name, entity_id, action, changed_by);
+CREATE INDEX idx_audit_log_action ON audit_log(action, changed_at DESC, audit_log_id DESC);
+
+-- Upiti nad JSON payloadom (/audit/logs?new_contains=..., ?field=...)
+-- jsonb_path_ops GIN pokriva containment (@>), a izrazni indeksi
+-- najcesce trazene kljuceve; NULL vrijednosti se ne indeksiraju
+CREATE INDEX idx_audit_log_new_value ON audit_log USING GIN (new_value jsonb_path_ops);
+CREATE INDEX idx_audit_log_old_value ON audit_log USING GIN (old_value jsonb_path_ops);
+CREATE INDEX idx_audit_log_new_status ON audit_log((new_value->>'status'))
+    WHERE new_value->>'status' IS NOT NULL;
+CREATE INDEX idx_audit_log_new_assigned_to ON audit_log((new_value->>'assigned_to'))
+    WHERE new_value->>'assigned_to' IS NOT NULL;
+CREATE INDEX idx_audit_log_new_is_active ON audit_log((new_value->>'is_active'))
+    WHERE new_value->>'is_active' IS NOT NULL;
 
 
 -- Indeksi za task_assignees
@@ -392,6 +576,11 @@ CREATE INDEX idx_user_permissions_user ON user_permissions(user_id);
 CREATE INDEX idx_user_permissions_permission ON user_permissions(permission_id);
 CREATE INDEX idx_user_permissions_granted ON user_permissions(granted);
 
+-- Indeksi za user_hierarchy: podstablo po razinama (/users/{id}/org,
+-- keyset po (depth, descendant_id)) i lanac nadredjenih korisnika
+CREATE INDEX idx_user_hierarchy_subtree ON user_hierarchy(ancestor_id, depth, descendant_id);
+CREATE INDEX idx_user_hierarchy_ancestors ON user_hierarchy(descendant_id, depth);
+
 
 -- POGLEDI (VIEWS)
 CREATE VIEW v_users_with_roles AS
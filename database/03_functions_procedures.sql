@@ -214,6 +214,27 @@ $$ LANGUAGE plpgsql STABLE;
 COMMENT ON FUNCTION is_manager_of(INTEGER, INTEGER) IS 'Provjerava da li je prvi korisnik manager drugog korisnika';
 
 
+-- Funkcija za provjeru da li je korisnik u organizaciji managera (na bilo kojoj razini)
+CREATE OR REPLACE FUNCTION is_in_org(
+    p_manager_id INTEGER,
+    p_employee_id INTEGER
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    -- Jedan lookup po primarnom kljucu closure tablice, neovisno o dubini
+    RETURN EXISTS(
+        SELECT 1
+        FROM user_hierarchy
+        WHERE ancestor_id = p_manager_id
+        AND descendant_id = p_employee_id
+        AND depth > 0
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION is_in_org(INTEGER, INTEGER) IS 'Provjerava da li je drugi korisnik u organizaciji (podstablu) prvog';
+
+
 -- Funkcija za dohvacanje clanova tima
 CREATE OR REPLACE FUNCTION get_team_members(p_manager_id INTEGER)
 RETURNS TABLE(
@@ -273,8 +294,9 @@ RETURNS TABLE(
     updated_at TIMESTAMP,
     completed_at TIMESTAMP
 ) AS $$
-BEGIN
-    RETURN QUERY
+    -- LANGUAGE sql (bez BEGIN/RETURN QUERY) da je planer inlinea u pozivajuci
+    -- upit: WHERE/LIMIT iz routera dolaze do indeksa umjesto filtriranja
+    -- gotovog rezultata funkcije
     SELECT 
         t.task_id,
         t.title,
@@ -293,16 +315,10 @@ BEGIN
     FROM tasks t
     WHERE (t.assigned_to = p_user_id OR (p_include_created AND t.created_by = p_user_id))
     AND (p_status IS NULL OR t.status = p_status)
-    ORDER BY 
-        CASE t.priority 
-            WHEN 'URGENT' THEN 1 
-            WHEN 'HIGH' THEN 2 
-            WHEN 'MEDIUM' THEN 3 
-            WHEN 'LOW' THEN 4 
-        END,
-        t.due_date NULLS LAST;
-END;
-$$ LANGUAGE plpgsql STABLE;
+    -- task_priority je enum LOW < MEDIUM < HIGH < URGENT pa priority DESC daje
+    -- URGENT, HIGH, MEDIUM, LOW - poredak koji vraca idx_tasks_assigned_to
+    ORDER BY t.priority DESC, t.due_date NULLS LAST;
+$$ LANGUAGE sql STABLE;
 
 COMMENT ON FUNCTION get_user_tasks(INTEGER, task_status, BOOLEAN) IS 'Vraca zadatke dodijeljene korisniku sa opcijama filtriranja';
 
@@ -730,66 +746,134 @@ $$;
 
 COMMENT ON PROCEDURE revoke_role IS 'Uklanja ulogu od korisnika';
 
+-- Format audit payloada za UPDATE zapise (users, tasks)
+-- Postavka employee_management.audit_format:
+--   'full' (default) - old_value/new_value su cijeli snapshoti
+--   'diff'           - samo promijenjeni kljucevi + kljuc entiteta
+-- Primjer: ALTER DATABASE employee_db SET employee_management.audit_format = 'diff';
+--
+-- Triggeri predaju i nepromijenjene kljuceve (p_unchanged), izracunate
+-- usporedbom stupaca old/new retka; diff je p_old/p_new bez tih kljuceva.
+-- Bez prolaza kroz jsonb_each po retku diff je gotovo jednako jeftin kao full.
+DROP FUNCTION IF EXISTS audit_update_payload(JSONB, JSONB, TEXT, INTEGER);
+CREATE OR REPLACE FUNCTION audit_update_payload(
+    p_old JSONB,
+    p_new JSONB,
+    p_unchanged TEXT[],
+    p_key_name TEXT,
+    p_key_value INTEGER
+)
+RETURNS TABLE(old_value JSONB, new_value JSONB, payload_format VARCHAR(10)) AS $$
+    SELECT p_old, p_new, 'full'::VARCHAR(10)
+    WHERE COALESCE(current_setting('employee_management.audit_format', TRUE), '') <> 'diff'
+    
+    UNION ALL
+    
+    SELECT 
+        (p_old - p_unchanged) || jsonb_build_object(p_key_name, p_key_value),
+        (p_new - p_unchanged) || jsonb_build_object(p_key_name, p_key_value),
+        'diff'::VARCHAR(10)
+    WHERE COALESCE(current_setting('employee_management.audit_format', TRUE), '') = 'diff';
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION audit_update_payload(JSONB, JSONB, TEXT[], TEXT, INTEGER) IS 'old/new payload UPDATE audit zapisa - full ili diff prema employee_management.audit_format';
+
+
+-- Audit triggeri su na razini naredbe (FOR EACH STATEMENT) s prijelaznim
+-- tablicama: jedna naredba nad N redaka radi jedan INSERT ... SELECT u
+-- audit_log umjesto N poziva funkcije i N INSERT-a.
+-- PostgreSQL ne dopusta prijelazne tablice na triggeru s vise dogadjaja,
+-- pa svaka tablica ima zasebne INSERT/UPDATE/DELETE triggere koji dijele
+-- istu funkciju (grananje po TG_OP). Prijelazne tablice su uvijek
+-- old_rows (stari redci) i new_rows (novi redci).
+
 -- Trigger funkcija za audit log korisnika
 CREATE OR REPLACE FUNCTION audit_users_changes()
 RETURNS TRIGGER AS $$
 BEGIN
     IF TG_OP = 'INSERT' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, new_value)
-        VALUES ('users', NEW.user_id, 'INSERT', NULL,  -- NULL jer korisnik tek nastaje
+        SELECT 'users', n.user_id, 'INSERT', NULL,  -- NULL jer korisnik tek nastaje
             jsonb_build_object(
-                'username', NEW.username,
-                'email', NEW.email,
-                'first_name', NEW.first_name,
-                'last_name', NEW.last_name,
-                'is_active', NEW.is_active
+                'username', n.username,
+                'email', n.email,
+                'first_name', n.first_name,
+                'last_name', n.last_name,
+                'is_active', n.is_active
             )
-        );
-        RETURN NEW;
+        FROM new_rows n
+        ORDER BY n.user_id;
     ELSIF TG_OP = 'UPDATE' THEN
-        -- Samo loguj ako je doslo do stvarne promjene
-        IF OLD.* IS DISTINCT FROM NEW.* THEN
-            INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value)
-            VALUES ('users', NEW.user_id, 'UPDATE', NULL,  -- NULL jer ne znamo tko je napravio promjenu
+        -- Samo loguj redove kod kojih je doslo do stvarne promjene
+        INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value, payload_format)
+        SELECT 'users', c.user_id, 'UPDATE', NULL,  -- NULL jer ne znamo tko je napravio promjenu
+            p.old_value, p.new_value, p.payload_format
+        FROM (
+            SELECT n.user_id,
                 jsonb_build_object(
-                    'username', OLD.username,
-                    'email', OLD.email,
-                    'first_name', OLD.first_name,
-                    'last_name', OLD.last_name,
-                    'is_active', OLD.is_active
-                ),
+                    'username', o.username,
+                    'email', o.email,
+                    'first_name', o.first_name,
+                    'last_name', o.last_name,
+                    'is_active', o.is_active
+                ) AS old_json,
                 jsonb_build_object(
-                    'username', NEW.username,
-                    'email', NEW.email,
-                    'first_name', NEW.first_name,
-                    'last_name', NEW.last_name,
-                    'is_active', NEW.is_active
-                )
-            );
-        END IF;
-        RETURN NEW;
+                    'username', n.username,
+                    'email', n.email,
+                    'first_name', n.first_name,
+                    'last_name', n.last_name,
+                    'is_active', n.is_active
+                ) AS new_json,
+                array_remove(ARRAY[
+                    CASE WHEN o.username IS NOT DISTINCT FROM n.username THEN 'username' END,
+                    CASE WHEN o.email IS NOT DISTINCT FROM n.email THEN 'email' END,
+                    CASE WHEN o.first_name IS NOT DISTINCT FROM n.first_name THEN 'first_name' END,
+                    CASE WHEN o.last_name IS NOT DISTINCT FROM n.last_name THEN 'last_name' END,
+                    CASE WHEN o.is_active IS NOT DISTINCT FROM n.is_active THEN 'is_active' END
+                ], NULL) AS unchanged
+            FROM old_rows o
+            JOIN new_rows n ON n.user_id = o.user_id
+            WHERE o IS DISTINCT FROM n
+        ) c
+        CROSS JOIN LATERAL audit_update_payload(c.old_json, c.new_json, c.unchanged, 'user_id', c.user_id) p
+        ORDER BY c.user_id;
     ELSIF TG_OP = 'DELETE' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value)
-        VALUES ('users', OLD.user_id, 'DELETE', NULL,  -- NULL jer korisnik se brise
+        SELECT 'users', o.user_id, 'DELETE', NULL,  -- NULL jer korisnik se brise
             jsonb_build_object(
-                'username', OLD.username,
-                'email', OLD.email,
-                'first_name', OLD.first_name,
-                'last_name', OLD.last_name,
-                'is_active', OLD.is_active
+                'username', o.username,
+                'email', o.email,
+                'first_name', o.first_name,
+                'last_name', o.last_name,
+                'is_active', o.is_active
             )
-        );
-        RETURN OLD;
+        FROM old_rows o
+        ORDER BY o.user_id;
     END IF;
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger za users tabelu
+-- Triggeri za users tabelu
 DROP TRIGGER IF EXISTS trg_audit_users ON users;
-CREATE TRIGGER trg_audit_users
-    AFTER INSERT OR UPDATE OR DELETE ON users
-    FOR EACH ROW EXECUTE FUNCTION audit_users_changes();
+DROP TRIGGER IF EXISTS trg_audit_users_insert ON users;
+DROP TRIGGER IF EXISTS trg_audit_users_update ON users;
+DROP TRIGGER IF EXISTS trg_audit_users_delete ON users;
+
+CREATE TRIGGER trg_audit_users_insert
+    AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_users_changes();
+
+CREATE TRIGGER trg_audit_users_update
+    AFTER UPDATE ON users
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_users_changes();
+
+CREATE TRIGGER trg_audit_users_delete
+    AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_users_changes();
 
 COMMENT ON FUNCTION audit_users_changes() IS 'Trigger funkcija koja automatski loguje promjene na users tabeli';
 
@@ -800,106 +884,137 @@ RETURNS TRIGGER AS $$
 BEGIN
     IF TG_OP = 'INSERT' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, new_value)
-        VALUES ('tasks', NEW.task_id, 'INSERT', NEW.created_by,
+        SELECT 'tasks', n.task_id, 'INSERT', n.created_by,
             jsonb_build_object(
-                'title', NEW.title,
-                'status', NEW.status,
-                'priority', NEW.priority,
-                'assigned_to', NEW.assigned_to
+                'title', n.title,
+                'status', n.status,
+                'priority', n.priority,
+                'assigned_to', n.assigned_to
             )
-        );
-        RETURN NEW;
+        FROM new_rows n
+        ORDER BY n.task_id;
     ELSIF TG_OP = 'UPDATE' THEN
-        IF OLD.* IS DISTINCT FROM NEW.* THEN
-            INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value)
-            VALUES ('tasks', NEW.task_id, 'UPDATE', NEW.created_by,
+        INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value, payload_format)
+        SELECT 'tasks', c.task_id, 'UPDATE', c.created_by,
+            p.old_value, p.new_value, p.payload_format
+        FROM (
+            SELECT n.task_id, n.created_by,
                 jsonb_build_object(
-                    'title', OLD.title,
-                    'status', OLD.status,
-                    'priority', OLD.priority,
-                    'assigned_to', OLD.assigned_to
-                ),
+                    'title', o.title,
+                    'status', o.status,
+                    'priority', o.priority,
+                    'assigned_to', o.assigned_to
+                ) AS old_json,
                 jsonb_build_object(
-                    'title', NEW.title,
-                    'status', NEW.status,
-                    'priority', NEW.priority,
-                    'assigned_to', NEW.assigned_to
-                )
-            );
-        END IF;
-        RETURN NEW;
+                    'title', n.title,
+                    'status', n.status,
+                    'priority', n.priority,
+                    'assigned_to', n.assigned_to
+                ) AS new_json,
+                array_remove(ARRAY[
+                    CASE WHEN o.title IS NOT DISTINCT FROM n.title THEN 'title' END,
+                    CASE WHEN o.status IS NOT DISTINCT FROM n.status THEN 'status' END,
+                    CASE WHEN o.priority IS NOT DISTINCT FROM n.priority THEN 'priority' END,
+                    CASE WHEN o.assigned_to IS NOT DISTINCT FROM n.assigned_to THEN 'assigned_to' END
+                ], NULL) AS unchanged
+            FROM old_rows o
+            JOIN new_rows n ON n.task_id = o.task_id
+            WHERE o IS DISTINCT FROM n
+        ) c
+        CROSS JOIN LATERAL audit_update_payload(c.old_json, c.new_json, c.unchanged, 'task_id', c.task_id) p
+        ORDER BY c.task_id;
     ELSIF TG_OP = 'DELETE' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value)
-        VALUES ('tasks', OLD.task_id, 'DELETE', OLD.created_by,
+        SELECT 'tasks', o.task_id, 'DELETE', o.created_by,
             jsonb_build_object(
-                'title', OLD.title,
-                'status', OLD.status,
-                'priority', OLD.priority,
-                'assigned_to', OLD.assigned_to
+                'title', o.title,
+                'status', o.status,
+                'priority', o.priority,
+                'assigned_to', o.assigned_to
             )
-        );
-        RETURN OLD;
+        FROM old_rows o
+        ORDER BY o.task_id;
     END IF;
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger za tasks tabelu
+-- Triggeri za tasks tabelu
 DROP TRIGGER IF EXISTS trg_audit_tasks ON tasks;
-CREATE TRIGGER trg_audit_tasks
-    AFTER INSERT OR UPDATE OR DELETE ON tasks
-    FOR EACH ROW EXECUTE FUNCTION audit_tasks_changes();
+DROP TRIGGER IF EXISTS trg_audit_tasks_insert ON tasks;
+DROP TRIGGER IF EXISTS trg_audit_tasks_update ON tasks;
+DROP TRIGGER IF EXISTS trg_audit_tasks_delete ON tasks;
+
+CREATE TRIGGER trg_audit_tasks_insert
+    AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_tasks_changes();
+
+CREATE TRIGGER trg_audit_tasks_update
+    AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_tasks_changes();
+
+CREATE TRIGGER trg_audit_tasks_delete
+    AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_tasks_changes();
 
 COMMENT ON FUNCTION audit_tasks_changes() IS 'Trigger funkcija koja automatski loguje promjene na tasks tabeli';
 
 
 -- Trigger funkcija za audit log user_roles
+-- Nazivi uloge i korisnika dohvacaju se jednim JOIN-om za sve redove
 CREATE OR REPLACE FUNCTION audit_user_roles_changes()
 RETURNS TRIGGER AS $$
-DECLARE
-    v_role_name VARCHAR(50);
-    v_username VARCHAR(50);
 BEGIN
     IF TG_OP = 'INSERT' THEN
-        SELECT name INTO v_role_name FROM roles WHERE role_id = NEW.role_id;
-        SELECT username INTO v_username FROM users WHERE user_id = NEW.user_id;
-        
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, new_value)
-        VALUES ('user_roles', NEW.user_role_id, 'INSERT', NULL,  -- NULL za sigurnost
+        SELECT 'user_roles', n.user_role_id, 'INSERT', NULL,  -- NULL za sigurnost
             jsonb_build_object(
-                'user_id', NEW.user_id,
-                'username', v_username,
-                'role_id', NEW.role_id,
-                'role_name', v_role_name,
-                'assigned_by', NEW.assigned_by
+                'user_id', n.user_id,
+                'username', u.username,
+                'role_id', n.role_id,
+                'role_name', r.name,
+                'assigned_by', n.assigned_by
             )
-        );
-        RETURN NEW;
+        FROM new_rows n
+        LEFT JOIN roles r ON r.role_id = n.role_id
+        LEFT JOIN users u ON u.user_id = n.user_id
+        ORDER BY n.user_role_id;
     ELSIF TG_OP = 'DELETE' THEN
-        SELECT name INTO v_role_name FROM roles WHERE role_id = OLD.role_id;
-        SELECT username INTO v_username FROM users WHERE user_id = OLD.user_id;
-        
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value)
-        VALUES ('user_roles', OLD.user_role_id, 'DELETE', NULL,  -- NULL za sigurnost
+        SELECT 'user_roles', o.user_role_id, 'DELETE', NULL,  -- NULL za sigurnost
             jsonb_build_object(
-                'user_id', OLD.user_id,
-                'username', v_username,
-                'role_id', OLD.role_id,
-                'role_name', v_role_name,
-                'assigned_by', OLD.assigned_by
+                'user_id', o.user_id,
+                'username', u.username,
+                'role_id', o.role_id,
+                'role_name', r.name,
+                'assigned_by', o.assigned_by
             )
-        );
-        RETURN OLD;
+        FROM old_rows o
+        LEFT JOIN roles r ON r.role_id = o.role_id
+        LEFT JOIN users u ON u.user_id = o.user_id
+        ORDER BY o.user_role_id;
     END IF;
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger za user_roles tabelu
+-- Triggeri za user_roles tabelu
 DROP TRIGGER IF EXISTS trg_audit_user_roles ON user_roles;
-CREATE TRIGGER trg_audit_user_roles
-    AFTER INSERT OR DELETE ON user_roles
-    FOR EACH ROW EXECUTE FUNCTION audit_user_roles_changes();
+DROP TRIGGER IF EXISTS trg_audit_user_roles_insert ON user_roles;
+DROP TRIGGER IF EXISTS trg_audit_user_roles_delete ON user_roles;
+
+CREATE TRIGGER trg_audit_user_roles_insert
+    AFTER INSERT ON user_roles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_user_roles_changes();
+
+CREATE TRIGGER trg_audit_user_roles_delete
+    AFTER DELETE ON user_roles
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION audit_user_roles_changes();
 
 COMMENT ON FUNCTION audit_user_roles_changes() IS 'Trigger funkcija koja automatski loguje promjene na user_roles tabeli';
 
@@ -936,8 +1051,6 @@ COMMENT ON FUNCTION update_updated_at_column() IS 'Automatski postavlja updated_
 CREATE OR REPLACE FUNCTION validate_manager_hierarchy()
 RETURNS TRIGGER AS $$
 DECLARE
-    v_current_manager_id INTEGER;
-    v_depth INTEGER := 0;
     v_max_depth INTEGER := 10;
 BEGIN
     -- Preskoci ako nema managera
@@ -950,20 +1063,16 @@ BEGIN
         RAISE EXCEPTION 'Korisnik ne moze biti sam sebi manager';
     END IF;
     
-    -- Provjeri cirkularnu referencu
-    v_current_manager_id := NEW.manager_id;
-    WHILE v_current_manager_id IS NOT NULL AND v_depth < v_max_depth LOOP
-        IF v_current_manager_id = NEW.user_id THEN
-            RAISE EXCEPTION 'Cirkularna referenca u hijerarhiji managera nije dozvoljena';
-        END IF;
-        
-        SELECT manager_id INTO v_current_manager_id
-        FROM users WHERE user_id = v_current_manager_id;
-        
-        v_depth := v_depth + 1;
-    END LOOP;
+    -- Provjeri cirkularnu referencu: novi manager ne smije biti u podstablu korisnika
+    IF EXISTS (
+        SELECT 1 FROM user_hierarchy
+        WHERE ancestor_id = NEW.user_id AND descendant_id = NEW.manager_id
+    ) THEN
+        RAISE EXCEPTION 'Cirkularna referenca u hijerarhiji managera nije dozvoljena';
+    END IF;
     
-    IF v_depth >= v_max_depth THEN
+    -- Lanac od novog managera do vrha (manager + svi njegovi nadredjeni)
+    IF (SELECT MAX(depth) + 1 FROM user_hierarchy WHERE descendant_id = NEW.manager_id) >= v_max_depth THEN
         RAISE EXCEPTION 'Maksimalna dubina hijerarhije managera premasena';
     END IF;
     
@@ -979,6 +1088,96 @@ CREATE TRIGGER trg_validate_manager_hierarchy
 COMMENT ON FUNCTION validate_manager_hierarchy() IS 'Validira hijerarhiju managera i sprecava cirkularne reference';
 
 
+-- Odrzavanje closure tablice user_hierarchy
+CREATE OR REPLACE FUNCTION maintain_user_hierarchy()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        -- Novi korisnik: sam sebi (depth 0) + svi nadredjeni njegovog managera
+        INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)
+        SELECT NEW.user_id, NEW.user_id, 0
+        UNION ALL
+        SELECT ancestor_id, NEW.user_id, depth + 1
+        FROM user_hierarchy
+        WHERE descendant_id = NEW.manager_id;
+        RETURN NULL;
+    END IF;
+    
+    IF NEW.manager_id IS NOT DISTINCT FROM OLD.manager_id THEN
+        RETURN NULL;
+    END IF;
+    
+    -- Odspoji podstablo korisnika od dosadasnjih nadredjenih
+    DELETE FROM user_hierarchy h
+    USING user_hierarchy sub, user_hierarchy sup
+    WHERE sub.ancestor_id = NEW.user_id
+    AND h.descendant_id = sub.descendant_id
+    AND sup.descendant_id = NEW.user_id
+    AND sup.ancestor_id <> NEW.user_id
+    AND h.ancestor_id = sup.ancestor_id;
+    
+    IF NEW.manager_id IS NOT NULL THEN
+        -- Visestruki UPDATE u jednoj naredbi moze zaobici BEFORE provjeru
+        IF EXISTS (
+            SELECT 1 FROM user_hierarchy
+            WHERE ancestor_id = NEW.user_id AND descendant_id = NEW.manager_id
+        ) THEN
+            RAISE EXCEPTION 'Cirkularna referenca u hijerarhiji managera nije dozvoljena';
+        END IF;
+        
+        -- Prikljuci podstablo ispod novog managera i svih njegovih nadredjenih
+        INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)
+        SELECT sup.ancestor_id, sub.descendant_id, sup.depth + sub.depth + 1
+        FROM user_hierarchy sup
+        JOIN user_hierarchy sub ON sub.ancestor_id = NEW.user_id
+        WHERE sup.descendant_id = NEW.manager_id;
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Brisanje korisnika: njegove retke brise ON DELETE CASCADE, a podredjenima
+-- FK postavlja manager_id = NULL sto okida UPDATE trigger
+DROP TRIGGER IF EXISTS trg_user_hierarchy_insert ON users;
+CREATE TRIGGER trg_user_hierarchy_insert
+    AFTER INSERT ON users
+    FOR EACH ROW EXECUTE FUNCTION maintain_user_hierarchy();
+
+DROP TRIGGER IF EXISTS trg_user_hierarchy_update ON users;
+CREATE TRIGGER trg_user_hierarchy_update
+    AFTER UPDATE OF manager_id ON users
+    FOR EACH ROW EXECUTE FUNCTION maintain_user_hierarchy();
+
+COMMENT ON FUNCTION maintain_user_hierarchy() IS 'Odrzava closure tablicu user_hierarchy pri dodavanju korisnika i promjeni managera';
+
+
+-- Ponovna izgradnja closure tablice iz users.manager_id
+-- (nakon ucitavanja podataka bez triggera: seed, COPY, session_replication_role)
+CREATE OR REPLACE PROCEDURE rebuild_user_hierarchy()
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM user_hierarchy;
+    
+    INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE tree AS (
+        SELECT user_id AS ancestor_id, user_id AS descendant_id, 0 AS depth
+        FROM users
+        UNION ALL
+        SELECT t.ancestor_id, u.user_id, t.depth + 1
+        FROM tree t
+        JOIN users u ON u.manager_id = t.descendant_id
+    )
+    SELECT ancestor_id, descendant_id, depth FROM tree;
+END;
+$$;
+
+COMMENT ON PROCEDURE rebuild_user_hierarchy IS 'Iznova puni user_hierarchy iz users.manager_id';
+
+CALL rebuild_user_hierarchy();
+
+
 
 CREATE OR REPLACE FUNCTION log_login_attempt(
     p_username VARCHAR(50),
@@ -1007,6 +1206,123 @@ $$ LANGUAGE plpgsql;
 COMMENT ON FUNCTION log_login_attempt IS 'Loguje pokusaj prijave u sustav';
 
 
+-- Zbirni zapis neuspjelih prijava tijekom throttlinga (brute-force zastita):
+-- jedan redak s brojem pokusaja i vremenom prvog/zadnjeg umjesto retka po pokusaju
+CREATE OR REPLACE FUNCTION log_failed_login_batch(
+    p_username VARCHAR(50),
+    p_ip_address INET,
+    p_user_agent TEXT,
+    p_attempt_count INTEGER,
+    p_first_attempt_at TIMESTAMP,
+    p_last_attempt_at TIMESTAMP,
+    p_failure_reason VARCHAR(50) DEFAULT 'THROTTLED'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_user_id INTEGER;
+    v_login_event_id INTEGER;
+BEGIN
+    SELECT user_id INTO v_user_id FROM users WHERE username = p_username;
+    
+    INSERT INTO login_events (user_id, username_attempted, login_time, ip_address, user_agent, 
+                              success, failure_reason, attempt_count, first_attempt_at)
+    VALUES (v_user_id, p_username, p_last_attempt_at, p_ip_address, p_user_agent, 
+            FALSE, p_failure_reason, p_attempt_count, p_first_attempt_at)
+    RETURNING login_event_id INTO v_login_event_id;
+    
+    -- Zapis je datiran unatrag (vrijeme zadnjeg pokusaja); ako pada ispod
+    -- watermarka rollupa, watermark se vraca na njegov sat pa ga sljedeci
+    -- refresh_audit_rollups() ponovno agregira
+    UPDATE rollup_watermarks
+    SET last_bucket = date_trunc('hour', p_last_attempt_at), updated_at = CURRENT_TIMESTAMP
+    WHERE rollup_name = 'login_events' AND last_bucket > p_last_attempt_at;
+    
+    RETURN v_login_event_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION log_failed_login_batch IS 'Zbirno loguje neuspjele pokusaje prijave tijekom throttlinga';
+
+
+-- Izvorna podmreza IP adrese: p_prefix za IPv4 (npr. 24, 16),
+-- odgovarajuca IPv6 podmreza je 2 * p_prefix + 16 (24 -> /64, 16 -> /48)
+CREATE OR REPLACE FUNCTION login_subnet(
+    p_ip INET,
+    p_prefix INTEGER
+)
+RETURNS CIDR AS $$
+    SELECT network(set_masklen(p_ip, 
+        CASE family(p_ip) WHEN 4 THEN p_prefix ELSE 2 * p_prefix + 16 END));
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+COMMENT ON FUNCTION login_subnet IS 'Podmreza IP adrese za login analitiku (IPv4 /p_prefix, IPv6 /(2*p_prefix+16))';
+
+
+-- Uskladjuje rollup tablice nakon brisanja zapisa starijih od p_cutoff:
+-- sati prije granice se brisu, a sat u kojem je granica racuna se ponovno
+CREATE OR REPLACE PROCEDURE prune_audit_rollups(
+    p_target VARCHAR,
+    p_cutoff TIMESTAMP
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_bucket_end TIMESTAMP := date_trunc('hour', p_cutoff) + INTERVAL '1 hour';
+    v_watermark TIMESTAMP;
+BEGIN
+    SELECT last_bucket INTO v_watermark
+    FROM rollup_watermarks WHERE rollup_name = p_target;
+    
+    IF p_target = 'audit_log' THEN
+        DELETE FROM audit_log_hourly WHERE bucket_hour <= date_trunc('hour', p_cutoff);
+        
+        IF v_bucket_end <= v_watermark THEN
+            INSERT INTO audit_log_hourly (bucket_hour, entity_name, action, change_count)
+            SELECT date_trunc('hour', changed_at), entity_name, action, COUNT(*)
+            FROM audit_log
+            WHERE changed_at >= p_cutoff AND changed_at < v_bucket_end
+            GROUP BY 1, 2, 3;
+        END IF;
+    ELSIF p_target = 'login_events' THEN
+        DELETE FROM login_events_hourly WHERE bucket_hour <= date_trunc('hour', p_cutoff);
+        DELETE FROM login_users_hourly WHERE bucket_hour <= date_trunc('hour', p_cutoff);
+        DELETE FROM login_subnets_hourly WHERE bucket_hour <= date_trunc('hour', p_cutoff);
+        
+        IF v_bucket_end <= v_watermark THEN
+            INSERT INTO login_events_hourly (bucket_hour, successful_logins, failed_logins, unique_users, last_login)
+            SELECT 
+                date_trunc('hour', login_time),
+                COUNT(*) FILTER (WHERE success = TRUE),
+                COALESCE(SUM(attempt_count) FILTER (WHERE success = FALSE), 0),
+                COUNT(DISTINCT user_id) FILTER (WHERE success = TRUE),
+                MAX(login_time)
+            FROM login_events
+            WHERE login_time >= p_cutoff AND login_time < v_bucket_end
+            GROUP BY 1;
+            
+            INSERT INTO login_users_hourly (bucket_hour, user_id)
+            SELECT DISTINCT date_trunc('hour', login_time), user_id
+            FROM login_events
+            WHERE login_time >= p_cutoff AND login_time < v_bucket_end
+            AND success = TRUE AND user_id IS NOT NULL;
+            
+            INSERT INTO login_subnets_hourly (bucket_hour, subnet, successful_logins, failed_logins)
+            SELECT 
+                date_trunc('hour', login_time),
+                login_subnet(ip_address, 24),
+                COUNT(*) FILTER (WHERE success = TRUE),
+                COALESCE(SUM(attempt_count) FILTER (WHERE success = FALSE), 0)
+            FROM login_events
+            WHERE login_time >= p_cutoff AND login_time < v_bucket_end
+            GROUP BY 1, 2;
+        END IF;
+    END IF;
+END;
+$$;
+
+COMMENT ON PROCEDURE prune_audit_rollups IS 'Uskladjuje rollup tablice nakon brisanja starih audit/login zapisa';
+
+
 CREATE OR REPLACE PROCEDURE cleanup_old_audit_logs(
     p_days_to_keep INTEGER DEFAULT 365
 )
@@ -1014,12 +1330,16 @@ LANGUAGE plpgsql
 AS $$
 DECLARE
     v_deleted_count INTEGER;
+    v_cutoff TIMESTAMP := CURRENT_TIMESTAMP - (p_days_to_keep || ' days')::INTERVAL;
 BEGIN
     DELETE FROM audit_log 
-    WHERE changed_at < CURRENT_TIMESTAMP - (p_days_to_keep || ' days')::INTERVAL;
+    WHERE changed_at < v_cutoff;
     
     GET DIAGNOSTICS v_deleted_count = ROW_COUNT;
     
+    -- Rollupi prate obrisane zapise
+    CALL prune_audit_rollups('audit_log', v_cutoff);
+    
     RAISE NOTICE 'Obrisano % audit zapisa starijih od % dana', v_deleted_count, p_days_to_keep;
 END;
 $$;
@@ -1036,12 +1356,16 @@ LANGUAGE plpgsql
 AS $$
 DECLARE
     v_deleted_count INTEGER;
+    v_cutoff TIMESTAMP := CURRENT_TIMESTAMP - (p_days_to_keep || ' days')::INTERVAL;
 BEGIN
     DELETE FROM login_events 
-    WHERE login_time < CURRENT_TIMESTAMP - (p_days_to_keep || ' days')::INTERVAL;
+    WHERE login_time < v_cutoff;
     
     GET DIAGNOSTICS v_deleted_count = ROW_COUNT;
     
+    -- Rollupi prate obrisane zapise
+    CALL prune_audit_rollups('login_events', v_cutoff);
+    
     RAISE NOTICE 'Obrisano % login eventa starijih od % dana', v_deleted_count, p_days_to_keep;
 END;
 $$;
@@ -1049,6 +1373,656 @@ $$;
 COMMENT ON PROCEDURE cleanup_old_login_events IS 'Brise login evente starije od zadanog broja dana';
 
 
+-- Kreira posao brisanja starih zapisa; izvodi ga run_retention_job()
+CREATE OR REPLACE FUNCTION create_retention_job(
+    p_target VARCHAR,
+    p_days_to_keep INTEGER,
+    p_batch_size INTEGER DEFAULT 5000,
+    p_sleep_ms INTEGER DEFAULT 100,
+    p_requested_by INTEGER DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_job_id INTEGER;
+BEGIN
+    INSERT INTO retention_jobs (target, cutoff, batch_size, sleep_ms, requested_by)
+    VALUES (
+        p_target,
+        CURRENT_TIMESTAMP - (p_days_to_keep || ' days')::INTERVAL,
+        p_batch_size,
+        p_sleep_ms,
+        p_requested_by
+    )
+    RETURNING job_id INTO v_job_id;
+    
+    RETURN v_job_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION create_retention_job IS 'Kreira posao brisanja audit/login zapisa starijih od zadanog broja dana';
+
+
+-- Izvodi posao brisanja u batch-evima s COMMIT-om izmedju njih
+-- Mora se pozvati izvan transakcije (CALL u autocommit konekciji).
+-- Napredak se zapisuje nakon svakog batch-a, pa se prekinuti posao
+-- nastavlja ponovnim pozivom. Advisory lock sprjecava da isti posao
+-- istovremeno izvode dvije konekcije.
+CREATE OR REPLACE PROCEDURE run_retention_job(
+    p_job_id INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_job retention_jobs%ROWTYPE;
+    v_deleted INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_lock(hashtext('retention_jobs'), p_job_id) THEN
+        RAISE NOTICE 'Posao % vec izvodi druga konekcija', p_job_id;
+        RETURN;
+    END IF;
+    
+    SELECT * INTO v_job FROM retention_jobs WHERE job_id = p_job_id;
+    
+    IF NOT FOUND OR v_job.status NOT IN ('PENDING', 'RUNNING') THEN
+        PERFORM pg_advisory_unlock(hashtext('retention_jobs'), p_job_id);
+        RETURN;
+    END IF;
+    
+    IF v_job.rows_estimated IS NULL THEN
+        IF v_job.target = 'audit_log' THEN
+            SELECT COUNT(*) INTO v_job.rows_estimated FROM audit_log WHERE changed_at < v_job.cutoff;
+        ELSE
+            SELECT COUNT(*) INTO v_job.rows_estimated FROM login_events WHERE login_time < v_job.cutoff;
+        END IF;
+    END IF;
+    
+    UPDATE retention_jobs
+    SET status = 'RUNNING',
+        started_at = COALESCE(started_at, clock_timestamp()),
+        rows_estimated = v_job.rows_estimated,
+        error_message = NULL,
+        updated_at = clock_timestamp()
+    WHERE job_id = p_job_id;
+    COMMIT;
+    
+    LOOP
+        IF v_job.target = 'audit_log' THEN
+            DELETE FROM audit_log
+            WHERE audit_log_id IN (
+                SELECT audit_log_id FROM audit_log
+                WHERE changed_at < v_job.cutoff
+                ORDER BY changed_at
+                LIMIT v_job.batch_size
+            );
+        ELSE
+            DELETE FROM login_events
+            WHERE login_event_id IN (
+                SELECT login_event_id FROM login_events
+                WHERE login_time < v_job.cutoff
+                ORDER BY login_time
+                LIMIT v_job.batch_size
+            );
+        END IF;
+        
+        GET DIAGNOSTICS v_deleted = ROW_COUNT;
+        
+        UPDATE retention_jobs
+        SET rows_deleted = rows_deleted + v_deleted,
+            batches_done = batches_done + 1,
+            updated_at = clock_timestamp()
+        WHERE job_id = p_job_id;
+        COMMIT;
+        
+        EXIT WHEN v_deleted < v_job.batch_size;
+        
+        -- Throttling: daje prostora ostalim upitima i autovacuumu
+        PERFORM pg_sleep(v_job.sleep_ms / 1000.0);
+    END LOOP;
+    
+    CALL prune_audit_rollups(v_job.target, v_job.cutoff);
+    
+    UPDATE retention_jobs
+    SET status = 'COMPLETED',
+        finished_at = clock_timestamp(),
+        updated_at = clock_timestamp()
+    WHERE job_id = p_job_id;
+    COMMIT;
+    
+    PERFORM pg_advisory_unlock(hashtext('retention_jobs'), p_job_id);
+END;
+$$;
+
+COMMENT ON PROCEDURE run_retention_job IS 'Brise stare audit/login zapise u batch-evima s COMMIT-om i pauzom - nastavlja se nakon prekida';
+
+
+-- Procedura za inkrementalno punjenje audit/login rollup tablica
+-- Agregira samo zatvorene sate izmedju watermarka i pocetka sata u kojem
+-- je (CURRENT_TIMESTAMP - p_grace), pa je svaki poziv jeftin bez obzira
+-- na velicinu audit_log/login_events. Rezerva p_grace pokriva zapise koji
+-- se commitaju kasnije od svog vremena (duge transakcije, zbirni zapisi
+-- throttlinga); stariji zapisi iz log_failed_login_batch() sami vracaju watermark.
+DROP PROCEDURE IF EXISTS refresh_audit_rollups();
+CREATE OR REPLACE PROCEDURE refresh_audit_rollups(
+    p_grace INTERVAL DEFAULT '10 minutes'
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_until TIMESTAMP := date_trunc('hour', CURRENT_TIMESTAMP - p_grace);
+    v_from TIMESTAMP;
+BEGIN
+    INSERT INTO rollup_watermarks (rollup_name, last_bucket)
+    VALUES ('audit_log', NULL), ('login_events', NULL)
+    ON CONFLICT (rollup_name) DO NOTHING;
+    
+    -- audit_log (FOR UPDATE serijalizira paralelne pozive)
+    SELECT last_bucket INTO v_from
+    FROM rollup_watermarks WHERE rollup_name = 'audit_log'
+    FOR UPDATE;
+    
+    IF v_from IS NULL THEN
+        SELECT date_trunc('hour', MIN(changed_at)) INTO v_from FROM audit_log;
+    END IF;
+    
+    IF v_from IS NOT NULL AND v_from < v_until THEN
+        DELETE FROM audit_log_hourly
+        WHERE bucket_hour >= v_from AND bucket_hour < v_until;
+        
+        INSERT INTO audit_log_hourly (bucket_hour, entity_name, action, change_count)
+        SELECT date_trunc('hour', changed_at), entity_name, action, COUNT(*)
+        FROM audit_log
+        WHERE changed_at >= v_from AND changed_at < v_until
+        GROUP BY 1, 2, 3;
+    END IF;
+    
+    UPDATE rollup_watermarks
+    SET last_bucket = v_until, updated_at = CURRENT_TIMESTAMP
+    WHERE rollup_name = 'audit_log';
+    
+    -- login_events
+    SELECT last_bucket INTO v_from
+    FROM rollup_watermarks WHERE rollup_name = 'login_events'
+    FOR UPDATE;
+    
+    IF v_from IS NULL THEN
+        SELECT date_trunc('hour', MIN(login_time)) INTO v_from FROM login_events;
+    END IF;
+    
+    IF v_from IS NOT NULL AND v_from < v_until THEN
+        DELETE FROM login_events_hourly
+        WHERE bucket_hour >= v_from AND bucket_hour < v_until;
+        DELETE FROM login_users_hourly
+        WHERE bucket_hour >= v_from AND bucket_hour < v_until;
+        DELETE FROM login_subnets_hourly
+        WHERE bucket_hour >= v_from AND bucket_hour < v_until;
+        
+        INSERT INTO login_events_hourly (bucket_hour, successful_logins, failed_logins, unique_users, last_login)
+        SELECT 
+            date_trunc('hour', login_time),
+            COUNT(*) FILTER (WHERE success = TRUE),
+            COALESCE(SUM(attempt_count) FILTER (WHERE success = FALSE), 0),
+            COUNT(DISTINCT user_id) FILTER (WHERE success = TRUE),
+            MAX(login_time)
+        FROM login_events
+        WHERE login_time >= v_from AND login_time < v_until
+        GROUP BY 1;
+        
+        INSERT INTO login_users_hourly (bucket_hour, user_id)
+        SELECT DISTINCT date_trunc('hour', login_time), user_id
+        FROM login_events
+        WHERE login_time >= v_from AND login_time < v_until
+        AND success = TRUE AND user_id IS NOT NULL;
+        
+        INSERT INTO login_subnets_hourly (bucket_hour, subnet, successful_logins, failed_logins)
+        SELECT 
+            date_trunc('hour', login_time),
+            login_subnet(ip_address, 24),
+            COUNT(*) FILTER (WHERE success = TRUE),
+            COALESCE(SUM(attempt_count) FILTER (WHERE success = FALSE), 0)
+        FROM login_events
+        WHERE login_time >= v_from AND login_time < v_until
+        GROUP BY 1, 2;
+    END IF;
+    
+    UPDATE rollup_watermarks
+    SET last_bucket = v_until, updated_at = CURRENT_TIMESTAMP
+    WHERE rollup_name = 'login_events';
+END;
+$$;
+
+COMMENT ON PROCEDURE refresh_audit_rollups IS 'Inkrementalno puni audit_log_hourly, login_events_hourly, login_users_hourly i login_subnets_hourly do zatvorenih sati starijih od p_grace';
+
+
+-- Broj audit zapisa po entitetu i akciji u rasponu [p_from, p_to)
+-- Puni sati ispod watermarka citaju se iz audit_log_hourly, a rubovi
+-- raspona (djelomicni sati) i sve iznad watermarka iz audit_log
+CREATE OR REPLACE FUNCTION get_audit_counts(
+    p_from TIMESTAMP DEFAULT '-infinity',
+    p_to TIMESTAMP DEFAULT 'infinity'
+)
+RETURNS TABLE(
+    entity_name VARCHAR(50),
+    action audit_action,
+    count BIGINT
+) AS $$
+    WITH bounds AS (
+        SELECT 
+            r.rollup_start,
+            GREATEST(r.rollup_start, LEAST(date_trunc('hour', p_to), r.watermark)) AS rollup_end
+        FROM (
+            SELECT 
+                CASE WHEN date_trunc('hour', p_from) = p_from THEN p_from
+                     ELSE date_trunc('hour', p_from) + INTERVAL '1 hour'
+                END AS rollup_start,
+                COALESCE(
+                    (SELECT last_bucket FROM rollup_watermarks WHERE rollup_name = 'audit_log'),
+                    '-infinity'::TIMESTAMP
+                ) AS watermark
+        ) r
+    ),
+    parts AS (
+        SELECT h.entity_name, h.action, h.change_count AS cnt
+        FROM audit_log_hourly h, bounds b
+        WHERE h.bucket_hour >= b.rollup_start AND h.bucket_hour < b.rollup_end
+        
+        UNION ALL
+        
+        SELECT a.entity_name, a.action, 1
+        FROM audit_log a, bounds b
+        WHERE a.changed_at >= p_from AND a.changed_at < p_to
+        AND (a.changed_at < b.rollup_start OR a.changed_at >= b.rollup_end)
+    )
+    SELECT entity_name, action, SUM(cnt)::BIGINT
+    FROM parts
+    GROUP BY entity_name, action
+    ORDER BY entity_name, action;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_audit_counts(TIMESTAMP, TIMESTAMP) IS 'Broj audit zapisa po entitetu/akciji u rasponu - rollupi + live rep';
+
+
+-- Statistika prijava u rasponu [p_from, p_to), ista podjela kao get_audit_counts
+CREATE OR REPLACE FUNCTION get_login_counts(
+    p_from TIMESTAMP DEFAULT '-infinity',
+    p_to TIMESTAMP DEFAULT 'infinity'
+)
+RETURNS TABLE(
+    successful_logins BIGINT,
+    failed_logins BIGINT,
+    unique_users BIGINT,
+    last_login TIMESTAMP
+) AS $$
+    WITH bounds AS (
+        SELECT 
+            r.rollup_start,
+            GREATEST(r.rollup_start, LEAST(date_trunc('hour', p_to), r.watermark)) AS rollup_end
+        FROM (
+            SELECT 
+                CASE WHEN date_trunc('hour', p_from) = p_from THEN p_from
+                     ELSE date_trunc('hour', p_from) + INTERVAL '1 hour'
+                END AS rollup_start,
+                COALESCE(
+                    (SELECT last_bucket FROM rollup_watermarks WHERE rollup_name = 'login_events'),
+                    '-infinity'::TIMESTAMP
+                ) AS watermark
+        ) r
+    ),
+    live AS (
+        SELECT le.*
+        FROM login_events le, bounds b
+        WHERE le.login_time >= p_from AND le.login_time < p_to
+        AND (le.login_time < b.rollup_start OR le.login_time >= b.rollup_end)
+    ),
+    rolled AS (
+        SELECT h.*
+        FROM login_events_hourly h, bounds b
+        WHERE h.bucket_hour >= b.rollup_start AND h.bucket_hour < b.rollup_end
+    )
+    SELECT 
+        (SELECT COALESCE(SUM(successful_logins), 0) FROM rolled)
+            + (SELECT COUNT(*) FROM live WHERE success = TRUE),
+        (SELECT COALESCE(SUM(failed_logins), 0) FROM rolled)
+            + (SELECT COALESCE(SUM(attempt_count), 0) FROM live WHERE success = FALSE),
+        (SELECT COUNT(DISTINCT user_id) FROM (
+            SELECT lu.user_id
+            FROM login_users_hourly lu, bounds b
+            WHERE lu.bucket_hour >= b.rollup_start AND lu.bucket_hour < b.rollup_end
+            UNION
+            SELECT user_id FROM live WHERE success = TRUE AND user_id IS NOT NULL
+        ) u),
+        GREATEST(
+            (SELECT MAX(last_login) FROM rolled),
+            (SELECT MAX(login_time) FROM live)
+        );
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_login_counts(TIMESTAMP, TIMESTAMP) IS 'Statistika prijava u rasponu - rollupi + live rep';
+
+
+-- Prijave po izvornoj podmrezi (/24 ili /16) u rasponu [p_from, p_to).
+-- Puni sati dolaze iz login_subnets_hourly, rubovi iz login_events.
+-- Za p_within uzi od /24 (IPv6 /64) rollup ne pomaze pa se sve cita
+-- iz login_events preko GiST indeksa.
+CREATE OR REPLACE FUNCTION get_login_subnet_counts(
+    p_prefix INTEGER DEFAULT 24,
+    p_from TIMESTAMP DEFAULT '-infinity',
+    p_to TIMESTAMP DEFAULT 'infinity',
+    p_within CIDR DEFAULT NULL
+)
+RETURNS TABLE(
+    subnet CIDR,
+    successful_logins BIGINT,
+    failed_logins BIGINT
+) AS $$
+    WITH bounds AS (
+        SELECT 
+            r.rollup_start,
+            CASE WHEN p_within IS NOT NULL AND masklen(p_within) > 
+                      CASE family(p_within) WHEN 4 THEN 24 ELSE 64 END
+                 THEN r.rollup_start
+                 ELSE GREATEST(r.rollup_start, LEAST(date_trunc('hour', p_to), r.watermark))
+            END AS rollup_end
+        FROM (
+            SELECT 
+                CASE WHEN date_trunc('hour', p_from) = p_from THEN p_from
+                     ELSE date_trunc('hour', p_from) + INTERVAL '1 hour'
+                END AS rollup_start,
+                COALESCE(
+                    (SELECT last_bucket FROM rollup_watermarks WHERE rollup_name = 'login_events'),
+                    '-infinity'::TIMESTAMP
+                ) AS watermark
+        ) r
+    )
+    SELECT login_subnet(x.subnet, p_prefix), SUM(x.successful)::BIGINT, SUM(x.failed)::BIGINT
+    FROM (
+        SELECT h.subnet, h.successful_logins AS successful, h.failed_logins AS failed
+        FROM login_subnets_hourly h, bounds b
+        WHERE h.bucket_hour >= b.rollup_start AND h.bucket_hour < b.rollup_end
+        AND (p_within IS NULL OR h.subnet <<= p_within)
+        
+        UNION ALL
+        
+        SELECT le.ip_address,
+               CASE WHEN le.success THEN 1 ELSE 0 END,
+               CASE WHEN le.success THEN 0 ELSE le.attempt_count END
+        FROM login_events le, bounds b
+        WHERE le.login_time >= p_from AND le.login_time < p_to
+        AND (le.login_time < b.rollup_start OR le.login_time >= b.rollup_end)
+        AND (p_within IS NULL OR le.ip_address <<= p_within)
+    ) x
+    GROUP BY 1;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_login_subnet_counts IS 'Prijave po podmrezi u rasponu - rollupi + live rep';
+
+
+-- Primjenjuje jednu audit promjenu na stanje entiteta (korak rekonstrukcije)
+-- INSERT i 'full' UPDATE nose cijelo stanje, 'diff' UPDATE se spaja na
+-- prethodno stanje (bez kljuca entiteta), DELETE brise stanje
+CREATE OR REPLACE FUNCTION audit_apply_change(
+    p_state JSONB,
+    p_action audit_action,
+    p_new_value JSONB,
+    p_payload_format VARCHAR,
+    p_entity_name VARCHAR
+)
+RETURNS JSONB AS $$
+    SELECT CASE 
+        WHEN p_action = 'DELETE' THEN NULL
+        WHEN p_action = 'UPDATE' AND p_payload_format = 'diff' THEN
+            COALESCE(p_state, '{}'::JSONB) || (p_new_value - COALESCE(
+                CASE p_entity_name WHEN 'users' THEN 'user_id' WHEN 'tasks' THEN 'task_id' END, ''))
+        ELSE p_new_value
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+COMMENT ON FUNCTION audit_apply_change IS 'Primjenjuje audit promjenu na stanje entiteta';
+
+
+-- Agregat koji slaze stanje entiteta iz niza promjena
+-- Koristi se s ORDER BY changed_at, audit_log_id
+DROP AGGREGATE IF EXISTS audit_fold(audit_action, JSONB, VARCHAR, VARCHAR);
+CREATE AGGREGATE audit_fold(audit_action, JSONB, VARCHAR, VARCHAR) (
+    SFUNC = audit_apply_change,
+    STYPE = JSONB
+);
+
+COMMENT ON AGGREGATE audit_fold(audit_action, JSONB, VARCHAR, VARCHAR) IS 'Stanje entiteta iz uredjenog niza audit promjena';
+
+
+-- Gradi snapshote za jedan batch entiteta (korak build_audit_snapshots).
+-- Za svaki entitet polazi od zadnjeg sidra prije p_until - snapshota ili
+-- zapisa s cijelim stanjem (INSERT, DELETE, 'full' UPDATE) - pa su svi
+-- zapisi nakon sidra diff zapisi. Snapshot se sprema nakon svakih p_every
+-- diff promjena od sidra. Entitet bez sidra (pocetak povijesti obrisan ili
+-- arhiviran) se preskace: njegovo stanje se ne moze tocno rekonstruirati.
+CREATE OR REPLACE FUNCTION build_audit_snapshot_batch(
+    p_entity_names VARCHAR[],
+    p_entity_ids INTEGER[],
+    p_until TIMESTAMP,
+    p_every INTEGER
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_created INTEGER;
+BEGIN
+    INSERT INTO audit_snapshots (entity_name, entity_id, snapshot_at, audit_log_id, state, changes_since_previous)
+    WITH seeds AS (
+        SELECT b.entity_name, b.entity_id,
+               COALESCE(f.changed_at, s.snapshot_at) AS seed_at,
+               COALESCE(f.audit_log_id, s.audit_log_id) AS seed_id,
+               CASE WHEN f.audit_log_id IS NOT NULL
+                    THEN audit_apply_change(NULL, f.action, f.new_value, f.payload_format, b.entity_name)
+                    ELSE s.state
+               END AS seed_state
+        FROM unnest(p_entity_names, p_entity_ids) AS b(entity_name, entity_id)
+        LEFT JOIN LATERAL (
+            SELECT sn.snapshot_at, sn.audit_log_id, sn.state
+            FROM audit_snapshots sn
+            WHERE sn.entity_name = b.entity_name AND sn.entity_id = b.entity_id
+            AND sn.snapshot_at < p_until
+            ORDER BY sn.snapshot_at DESC, sn.audit_log_id DESC
+            LIMIT 1
+        ) s ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT a.changed_at, a.audit_log_id, a.action, a.new_value, a.payload_format
+            FROM audit_log a
+            WHERE a.entity_name = b.entity_name AND a.entity_id = b.entity_id
+            AND a.changed_at < p_until
+            AND (a.changed_at, a.audit_log_id) > (COALESCE(s.snapshot_at, '-infinity'), COALESCE(s.audit_log_id, 0))
+            AND (a.action <> 'UPDATE' OR a.payload_format = 'full')
+            ORDER BY a.changed_at DESC, a.audit_log_id DESC
+            LIMIT 1
+        ) f ON TRUE
+    ),
+    changes AS (
+        SELECT entity_name, entity_id, seed_at AS changed_at, seed_id AS audit_log_id,
+               (CASE WHEN seed_state IS NULL THEN 'DELETE' ELSE 'INSERT' END)::audit_action AS action,
+               seed_state AS new_value, 'full'::VARCHAR AS payload_format
+        FROM seeds
+        WHERE seed_id IS NOT NULL
+        
+        UNION ALL
+        
+        SELECT a.entity_name, a.entity_id, a.changed_at, a.audit_log_id, a.action, a.new_value, a.payload_format
+        FROM seeds sd
+        JOIN audit_log a ON a.entity_name = sd.entity_name AND a.entity_id = sd.entity_id
+        WHERE sd.seed_id IS NOT NULL
+        AND a.changed_at < p_until
+        AND (a.changed_at, a.audit_log_id) > (sd.seed_at, sd.seed_id)
+    ),
+    folded AS (
+        SELECT c.entity_name, c.entity_id, c.changed_at, c.audit_log_id,
+               audit_fold(c.action, c.new_value, c.payload_format, c.entity_name) OVER w AS state,
+               ROW_NUMBER() OVER w - 1 AS since_anchor
+        FROM changes c
+        WINDOW w AS (PARTITION BY c.entity_name, c.entity_id ORDER BY c.changed_at, c.audit_log_id)
+    )
+    SELECT entity_name, entity_id, changed_at, audit_log_id, state, p_every
+    FROM folded
+    WHERE since_anchor > 0 AND since_anchor % p_every = 0
+    ON CONFLICT ON CONSTRAINT pk_audit_snapshots DO NOTHING;
+    
+    GET DIAGNOSTICS v_created = ROW_COUNT;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION build_audit_snapshot_batch IS 'Snapshoti za batch entiteta - od zadnjeg sidra, svakih N diff promjena';
+
+
+-- Gradi snapshote za entitete promijenjene od zadnjeg pokretanja.
+-- Snapshoti su samo ubrzanje - as-of rekonstrukcija je ispravna i bez
+-- njih. Zapisi s cijelim stanjem su sami sidro, pa povijest u full
+-- formatu ne treba snapshote; prvo pokretanje polazi od zadnjeg takvog
+-- zapisa entiteta umjesto od pocetka povijesti.
+--
+-- Obraduju se samo zapisi stariji od (pocetak - p_grace): transakcija
+-- koja commita nakon pokretanja s changed_at ispod te granice bila bi
+-- propustena, pa p_grace mora biti dulji od najdulje transakcije koja
+-- mijenja auditirane tablice.
+--
+-- Entiteti se obraduju u batch-evima s COMMIT-om izmedju (kao
+-- run_retention_job), pa se mora pozvati izvan transakcije. Prekinuto
+-- pokretanje nastavlja se od zadnjeg snapshota svakog entiteta.
+DROP PROCEDURE IF EXISTS build_audit_snapshots(INTEGER);
+CREATE OR REPLACE PROCEDURE build_audit_snapshots(
+    p_every INTEGER DEFAULT 50,
+    p_grace INTERVAL DEFAULT '5 minutes',
+    p_batch_size INTEGER DEFAULT 1000
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_until TIMESTAMP := clock_timestamp() - p_grace;
+    v_since TIMESTAMP;
+    v_entity RECORD;
+    v_names VARCHAR[] := '{}';
+    v_ids INTEGER[] := '{}';
+BEGIN
+    IF NOT pg_try_advisory_lock(hashtext('audit_snapshots')) THEN
+        RAISE NOTICE 'Snapshote vec gradi druga konekcija';
+        RETURN;
+    END IF;
+    
+    INSERT INTO rollup_watermarks (rollup_name, last_bucket)
+    VALUES ('audit_snapshots', NULL)
+    ON CONFLICT (rollup_name) DO NOTHING;
+    
+    SELECT last_bucket INTO v_since
+    FROM rollup_watermarks WHERE rollup_name = 'audit_snapshots';
+    COMMIT;
+    
+    FOR v_entity IN
+        SELECT DISTINCT entity_name, entity_id
+        FROM audit_log
+        WHERE (v_since IS NULL OR changed_at >= v_since) AND changed_at < v_until
+    LOOP
+        v_names := v_names || v_entity.entity_name;
+        v_ids := v_ids || v_entity.entity_id;
+        
+        IF cardinality(v_ids) >= p_batch_size THEN
+            PERFORM build_audit_snapshot_batch(v_names, v_ids, v_until, p_every);
+            COMMIT;
+            v_names := '{}';
+            v_ids := '{}';
+        END IF;
+    END LOOP;
+    
+    IF cardinality(v_ids) > 0 THEN
+        PERFORM build_audit_snapshot_batch(v_names, v_ids, v_until, p_every);
+    END IF;
+    
+    UPDATE rollup_watermarks
+    SET last_bucket = v_until, updated_at = CURRENT_TIMESTAMP
+    WHERE rollup_name = 'audit_snapshots';
+    COMMIT;
+    
+    PERFORM pg_advisory_unlock(hashtext('audit_snapshots'));
+END;
+$$;
+
+COMMENT ON PROCEDURE build_audit_snapshots IS 'Gradi snapshote stanja entiteta svakih N diff promjena od sidra, u batch-evima';
+
+
+-- Stanje entiteta u trenutku p_as_of: zadnje sidro prije tog trenutka
+-- (snapshot ili zapis s cijelim stanjem) + diff promjene nakon njega
+-- (najvise N-1 uz redovito pokretanje build_audit_snapshots). Granica
+-- je usporedba retka sa skalarnim vrijednostima kljuca snapshota, pa je
+-- index uvjet nad idx_audit_log_entity i rep se ne cita od pocetka povijesti.
+CREATE OR REPLACE FUNCTION get_entity_state_as_of(
+    p_entity_name VARCHAR,
+    p_entity_id INTEGER,
+    p_as_of TIMESTAMP
+)
+RETURNS TABLE(
+    state JSONB,
+    last_audit_log_id INTEGER,
+    last_changed_at TIMESTAMP,
+    snapshot_audit_log_id INTEGER,
+    replayed_changes INTEGER
+) AS $$
+    WITH snap AS (
+        SELECT s.snapshot_at, s.audit_log_id, s.state
+        FROM audit_snapshots s
+        WHERE s.entity_name = p_entity_name AND s.entity_id = p_entity_id
+        AND s.snapshot_at <= p_as_of
+        ORDER BY s.snapshot_at DESC, s.audit_log_id DESC
+        LIMIT 1
+    ),
+    anchor AS (
+        SELECT a.changed_at, a.audit_log_id, a.action, a.new_value, a.payload_format
+        FROM audit_log a
+        WHERE a.entity_name = p_entity_name AND a.entity_id = p_entity_id
+        AND a.changed_at <= p_as_of
+        AND (a.changed_at, a.audit_log_id) > (
+            COALESCE((SELECT snap.snapshot_at FROM snap), '-infinity'),
+            COALESCE((SELECT snap.audit_log_id FROM snap), 0)
+        )
+        AND (a.action <> 'UPDATE' OR a.payload_format = 'full')
+        ORDER BY a.changed_at DESC, a.audit_log_id DESC
+        LIMIT 1
+    ),
+    changes AS (
+        SELECT snap.snapshot_at AS changed_at, snap.audit_log_id,
+               (CASE WHEN snap.state IS NULL THEN 'DELETE' ELSE 'INSERT' END)::audit_action AS action,
+               snap.state AS new_value, 'full'::VARCHAR AS payload_format, FALSE AS replayed
+        FROM snap
+        WHERE NOT EXISTS (SELECT 1 FROM anchor)
+        
+        UNION ALL
+        
+        SELECT anchor.changed_at, anchor.audit_log_id, anchor.action, anchor.new_value,
+               anchor.payload_format, FALSE
+        FROM anchor
+        
+        UNION ALL
+        
+        SELECT a.changed_at, a.audit_log_id, a.action, a.new_value, a.payload_format, TRUE
+        FROM audit_log a
+        WHERE a.entity_name = p_entity_name AND a.entity_id = p_entity_id
+        AND a.changed_at <= p_as_of
+        AND (a.changed_at, a.audit_log_id) > (
+            COALESCE((SELECT anchor.changed_at FROM anchor), (SELECT snap.snapshot_at FROM snap), '-infinity'),
+            COALESCE((SELECT anchor.audit_log_id FROM anchor), (SELECT snap.audit_log_id FROM snap), 0)
+        )
+    )
+    SELECT 
+        audit_fold(c.action, c.new_value, c.payload_format, p_entity_name ORDER BY c.changed_at, c.audit_log_id),
+        (ARRAY_AGG(c.audit_log_id ORDER BY c.changed_at DESC, c.audit_log_id DESC))[1],
+        MAX(c.changed_at),
+        (SELECT snap.audit_log_id FROM snap WHERE NOT EXISTS (SELECT 1 FROM anchor)),
+        (COUNT(*) FILTER (WHERE c.replayed))::INTEGER
+    FROM changes c;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_entity_state_as_of IS 'Stanje entiteta u zadanom trenutku - sidro (snapshot ili cijelo stanje) + rep diff promjena';
+
+
+-- Inicijalno punjenje rollupa iz postojecih podataka
+CALL refresh_audit_rollups();
+
+
 -- Procedura za dodjelu zadatka višestrukim korisnicima
 CREATE OR REPLACE PROCEDURE assign_task_to_users(
     p_task_id INTEGER,
@@ -1238,54 +2212,73 @@ $$;
 COMMENT ON PROCEDURE remove_user_permission IS 'Uklanja direktnu permisiju korisnika (vraca na default iz uloge)';
 
 
--- Trigger za audit log user_permissions
+-- Trigger za audit log user_permissions (statement-level, vidi audit_users_changes)
 CREATE OR REPLACE FUNCTION trg_audit_user_permissions()
 RETURNS TRIGGER AS $$
 BEGIN
     IF TG_OP = 'INSERT' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value)
-        VALUES ('user_permissions', NEW.user_permission_id, 'INSERT', NEW.assigned_by, NULL,
+        SELECT 'user_permissions', n.user_permission_id, 'INSERT', n.assigned_by, NULL,
             jsonb_build_object(
-                'user_id', NEW.user_id,
-                'permission_id', NEW.permission_id,
-                'granted', NEW.granted,
-                'notes', NEW.notes
-            ));
-        RETURN NEW;
+                'user_id', n.user_id,
+                'permission_id', n.permission_id,
+                'granted', n.granted,
+                'notes', n.notes
+            )
+        FROM new_rows n
+        ORDER BY n.user_permission_id;
     ELSIF TG_OP = 'UPDATE' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value)
-        VALUES ('user_permissions', NEW.user_permission_id, 'UPDATE', NEW.assigned_by,
+        SELECT 'user_permissions', n.user_permission_id, 'UPDATE', n.assigned_by,
             jsonb_build_object(
-                'user_id', OLD.user_id,
-                'permission_id', OLD.permission_id,
-                'granted', OLD.granted,
-                'notes', OLD.notes
+                'user_id', o.user_id,
+                'permission_id', o.permission_id,
+                'granted', o.granted,
+                'notes', o.notes
             ),
             jsonb_build_object(
-                'user_id', NEW.user_id,
-                'permission_id', NEW.permission_id,
-                'granted', NEW.granted,
-                'notes', NEW.notes
-            ));
-        RETURN NEW;
+                'user_id', n.user_id,
+                'permission_id', n.permission_id,
+                'granted', n.granted,
+                'notes', n.notes
+            )
+        FROM old_rows o
+        JOIN new_rows n ON n.user_permission_id = o.user_permission_id
+        ORDER BY n.user_permission_id;
     ELSIF TG_OP = 'DELETE' THEN
         INSERT INTO audit_log (entity_name, entity_id, action, changed_by, old_value, new_value)
-        VALUES ('user_permissions', OLD.user_permission_id, 'DELETE', NULL,
+        SELECT 'user_permissions', o.user_permission_id, 'DELETE', NULL,
             jsonb_build_object(
-                'user_id', OLD.user_id,
-                'permission_id', OLD.permission_id,
-                'granted', OLD.granted,
-                'notes', OLD.notes
-            ), NULL);
-        RETURN OLD;
+                'user_id', o.user_id,
+                'permission_id', o.permission_id,
+                'granted', o.granted,
+                'notes', o.notes
+            ), NULL
+        FROM old_rows o
+        ORDER BY o.user_permission_id;
     END IF;
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 DROP TRIGGER IF EXISTS trg_user_permissions_audit ON user_permissions;
-CREATE TRIGGER trg_user_permissions_audit
-    AFTER INSERT OR UPDATE OR DELETE ON user_permissions
-    FOR EACH ROW EXECUTE FUNCTION trg_audit_user_permissions();
+DROP TRIGGER IF EXISTS trg_user_permissions_audit_insert ON user_permissions;
+DROP TRIGGER IF EXISTS trg_user_permissions_audit_update ON user_permissions;
+DROP TRIGGER IF EXISTS trg_user_permissions_audit_delete ON user_permissions;
+
+CREATE TRIGGER trg_user_permissions_audit_insert
+    AFTER INSERT ON user_permissions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_audit_user_permissions();
+
+CREATE TRIGGER trg_user_permissions_audit_update
+    AFTER UPDATE ON user_permissions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_audit_user_permissions();
+
+CREATE TRIGGER trg_user_permissions_audit_delete
+    AFTER DELETE ON user_permissions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_audit_user_permissions();
 
 COMMENT ON FUNCTION trg_audit_user_permissions() IS 'Audit trail za promjene direktnih korisnickih permisija';
@@ -0,0 +1,137 @@
+-- ============================================================================
+-- MIGRACIJA 001: Diff audit payloadi
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije vec imaju payload_format stupac).
+--
+-- 1. Dodaje audit_log.payload_format (postojeci zapisi ostaju 'full')
+-- 2. Opcionalno (-v enable_diff=1) ukljucuje diff format za NOVE zapise
+--    (employee_management.audit_format = 'diff')
+-- 3. Opcionalno (-v convert=1) pretvara postojece UPDATE zapise za users i
+--    tasks u diff format, u batch-evima entiteta s COMMIT-om
+--
+-- Bez convert=1 postojeci zapisi se ne prepisuju. Pretvorba zadrzava sidra
+-- rekonstrukcije: INSERT zapise, prvi UPDATE entiteta (bez INSERT-a, npr.
+-- nakon brisanja starih zapisa) i svaki UPDATE ciji old_value ne odgovara
+-- stanju nakon prethodnog zapisa ostaju 'full'. Ostali UPDATE zapisi
+-- zadrzavaju samo promijenjene kljuceve + kljuc entiteta, kao i diff
+-- zapisi triggera; rekonstruirano stanje (full_view, as-of) je isto.
+-- Cijeli entitet se pretvara u jednom batch-u, pa je prekinutu pretvorbu
+-- sigurno ponovno pokrenuti.
+--
+-- Pokretanje (convert=1 izvan transakcije, zbog COMMIT-a izmedju batch-eva):
+--   psql -U postgres -d employee_db -f database/migrations/001_audit_diff_payloads.sql
+--   psql -U postgres -d employee_db -v enable_diff=1 -f database/migrations/001_audit_diff_payloads.sql
+--   psql -U postgres -d employee_db -v enable_diff=1 -v convert=1 -f database/migrations/001_audit_diff_payloads.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: nove trigger funkcije audit_users_changes/audit_tasks_changes.
+--
+-- Povratak na full format (vrijedi za nove konekcije; vec upisani diff
+-- zapisi ostaju citljivi kroz full_view rekonstrukciju):
+--   ALTER DATABASE employee_db RESET employee_management.audit_format;
+--
+-- Nakon pretvorbe: VACUUM ANALYZE audit_log oslobadja prostor za nove
+-- zapise (datoteka se smanjuje tek s VACUUM FULL, uz ekskluzivni lock), a
+-- snapshote pretvorene povijesti gradi eksplicitni korak iz migracije 009.
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+ALTER TABLE audit_log 
+    ADD COLUMN IF NOT EXISTS payload_format VARCHAR(10) NOT NULL DEFAULT 'full';
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint 
+        WHERE conname = 'chk_audit_log_payload_format'
+    ) THEN
+        ALTER TABLE audit_log ADD CONSTRAINT chk_audit_log_payload_format 
+            CHECK (payload_format IN ('full', 'diff'));
+    END IF;
+END $$;
+
+COMMENT ON COLUMN audit_log.payload_format IS 'full = cijeli snapshot, diff = samo promijenjeni kljucevi + kljuc entiteta (UPDATE)';
+
+
+-- Novi zapisi u diff formatu (vrijedi za nove konekcije), samo na zahtjev
+\if :{?enable_diff}
+DO $$
+BEGIN
+    EXECUTE FORMAT('ALTER DATABASE %I SET employee_management.audit_format = %L', 
+                   current_database(), 'diff');
+END $$;
+\endif
+
+
+-- Pretvorba postojecih UPDATE zapisa, samo na zahtjev
+\if :{?convert}
+DO $$
+DECLARE
+    v_batch_size CONSTANT INTEGER := 1000;     -- entiteta po batch-u
+    v_entity TEXT;
+    v_last_id INTEGER;
+    v_max_id INTEGER;
+    v_converted BIGINT := 0;
+    v_rows INTEGER;
+BEGIN
+    FOREACH v_entity IN ARRAY ARRAY['users', 'tasks'] LOOP
+        v_last_id := 0;
+        SELECT COALESCE(MAX(entity_id), 0) INTO v_max_id 
+        FROM audit_log WHERE entity_name = v_entity;
+        
+        WHILE v_last_id < v_max_id LOOP
+            UPDATE audit_log a
+            SET old_value = d.old_diff,
+                new_value = d.new_diff,
+                payload_format = 'diff'
+            FROM (
+                SELECT 
+                    c.audit_log_id,
+                    COALESCE((
+                        SELECT jsonb_object_agg(e.key, e.value)
+                        FROM jsonb_each(c.old_value) e
+                        WHERE c.new_value -> e.key IS DISTINCT FROM e.value
+                    ), '{}'::JSONB) || c.entity_key AS old_diff,
+                    COALESCE((
+                        SELECT jsonb_object_agg(e.key, e.value)
+                        FROM jsonb_each(c.new_value) e
+                        WHERE c.old_value -> e.key IS DISTINCT FROM e.value
+                    ), '{}'::JSONB) || c.entity_key AS new_diff
+                FROM (
+                    SELECT 
+                        l.audit_log_id, l.action, l.payload_format, l.old_value, l.new_value,
+                        jsonb_build_object(
+                            CASE l.entity_name WHEN 'users' THEN 'user_id' ELSE 'task_id' END,
+                            l.entity_id
+                        ) AS entity_key,
+                        LAG(l.action) OVER w AS prev_action,
+                        LAG(l.payload_format) OVER w AS prev_format,
+                        LAG(l.new_value) OVER w AS prev_new_value
+                    FROM audit_log l
+                    WHERE l.entity_name = v_entity
+                    AND l.entity_id > v_last_id 
+                    AND l.entity_id <= v_last_id + v_batch_size
+                    WINDOW w AS (PARTITION BY l.entity_id ORDER BY l.changed_at, l.audit_log_id)
+                ) c
+                WHERE c.action = 'UPDATE'
+                AND c.payload_format = 'full'
+                -- prethodni zapis nosi cijelo stanje i old_value se na njega nastavlja
+                AND (c.prev_action <> 'UPDATE' OR c.prev_format = 'full')
+                AND c.old_value = c.prev_new_value
+                -- uklonjeni kljucevi se ne mogu izraziti diffom
+                AND c.old_value - ARRAY(SELECT jsonb_object_keys(c.new_value)) = '{}'::JSONB
+            ) d
+            WHERE a.audit_log_id = d.audit_log_id;
+            
+            GET DIAGNOSTICS v_rows = ROW_COUNT;
+            v_converted := v_converted + v_rows;
+            v_last_id := v_last_id + v_batch_size;
+            COMMIT;
+        END LOOP;
+    END LOOP;
+    
+    RAISE NOTICE 'Pretvoreno % UPDATE audit zapisa u diff format', v_converted;
+END $$;
+\endif
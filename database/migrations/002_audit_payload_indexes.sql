@@ -0,0 +1,30 @@
+-- ============================================================================
+-- MIGRACIJA 002: Indeksi nad audit payloadom
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije indekse dobivaju iz 01_schema.sql).
+--
+-- GIN (jsonb_path_ops) indeksi nad old_value/new_value i izrazni indeksi
+-- za kljuceve status, assigned_to i is_active. Indeksi se grade
+-- CONCURRENTLY pa audit_log ostaje dostupan za pisanje.
+--
+-- Pokretanje (izvan transakcije, CREATE INDEX CONCURRENTLY):
+--   psql -U postgres -d employee_db -f database/migrations/002_audit_payload_indexes.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_new_value
+    ON audit_log USING GIN (new_value jsonb_path_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_old_value
+    ON audit_log USING GIN (old_value jsonb_path_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_new_status
+    ON audit_log((new_value->>'status')) WHERE new_value->>'status' IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_new_assigned_to
+    ON audit_log((new_value->>'assigned_to')) WHERE new_value->>'assigned_to' IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_new_is_active
+    ON audit_log((new_value->>'is_active')) WHERE new_value->>'is_active' IS NOT NULL;
+
+ANALYZE audit_log;
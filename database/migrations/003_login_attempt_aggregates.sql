@@ -0,0 +1,36 @@
+-- ============================================================================
+-- MIGRACIJA 003: Zbirni zapisi neuspjelih prijava
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije stupce dobivaju iz 01_schema.sql).
+--
+-- login_events dobiva attempt_count i first_attempt_at: tijekom throttlinga
+-- (brute-force zastita) neuspjeli pokusaji zapisuju se kao jedan zbirni redak.
+-- Postojeci zapisi dobivaju attempt_count = 1.
+--
+-- Pokretanje:
+--   psql -U postgres -d employee_db -f database/migrations/003_login_attempt_aggregates.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: log_failed_login_batch, rollupi broje SUM(attempt_count).
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+ALTER TABLE login_events 
+    ADD COLUMN IF NOT EXISTS attempt_count INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS first_attempt_at TIMESTAMP;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint 
+        WHERE conname = 'chk_login_events_attempts'
+    ) THEN
+        ALTER TABLE login_events ADD CONSTRAINT chk_login_events_attempts 
+            CHECK (attempt_count = 1 OR (attempt_count > 1 AND success = FALSE));
+    END IF;
+END $$;
+
+COMMENT ON COLUMN login_events.attempt_count IS 'Broj pokusaja u retku (>1 za zbirne zapise tijekom throttlinga)';
+COMMENT ON COLUMN login_events.first_attempt_at IS 'Prvi pokusaj zbirnog zapisa (login_time je zadnji)';
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- MIGRACIJA 004: Login analitika po podmrezama
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije sve dobivaju iz 01_schema.sql).
+--
+-- 1. idx_login_events_ip: B-tree zamijenjen GiST (inet_ops) indeksom,
+--    koji pokriva i upite po podmrezi (ip_address <<= '10.0.0.0/8')
+-- 2. Rollup tablica login_subnets_hourly
+--
+-- Pokretanje (izvan transakcije, CREATE INDEX CONCURRENTLY):
+--   psql -U postgres -d employee_db -f database/migrations/004_login_subnet_analytics.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: login_subnets_hourly popunjava migracija 007. Samo ako je
+-- 007 vec ranije primijenjena (baza vec ima rollup_watermarks), nakon
+-- ponovnog ucitavanja 03 popuni rollup:
+--   UPDATE employee_management.rollup_watermarks SET last_bucket = NULL
+--   WHERE rollup_name = 'login_events';
+--   CALL employee_management.refresh_audit_rollups();
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_login_events_ip_gist
+    ON login_events USING GIST (ip_address inet_ops);
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_ip;
+ALTER INDEX idx_login_events_ip_gist RENAME TO idx_login_events_ip;
+
+CREATE TABLE IF NOT EXISTS login_subnets_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    subnet CIDR NOT NULL,
+    successful_logins BIGINT NOT NULL DEFAULT 0,
+    failed_logins BIGINT NOT NULL DEFAULT 0,
+    
+    CONSTRAINT pk_login_subnets_hourly PRIMARY KEY (bucket_hour, subnet)
+);
+
+COMMENT ON TABLE login_subnets_hourly IS 'Broj uspjesnih/neuspjelih prijava po satu i izvornoj podmrezi (/24, IPv6 /64)';
+COMMENT ON COLUMN login_subnets_hourly.failed_logins IS 'Zbroj attempt_count neuspjelih prijava iz podmreze';
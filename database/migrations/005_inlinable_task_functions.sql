@@ -0,0 +1,29 @@
+-- ============================================================================
+-- MIGRACIJA 005: Indeks za inlineane funkcije zadataka
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije indeks dobivaju iz 01_schema.sql).
+--
+-- get_user_tasks je prepisana u LANGUAGE sql pa je planer inlinea u
+-- pozivajuci upit (WHERE/LIMIT iz /tasks/my dolaze do indeksa) i sortira po
+-- priority DESC, due_date NULLS LAST. idx_tasks_assigned_to zato prelazi na
+-- (assigned_to, priority DESC, due_date) i daje taj poredak bez sortiranja.
+-- Novi indeks se gradi pod privremenim imenom i zatim preimenuje, tako da
+-- tasks ni u jednom trenutku nije bez indeksa po assigned_to.
+--
+-- Pokretanje (izvan transakcije, CREATE INDEX CONCURRENTLY):
+--   psql -U postgres -d employee_db -f database/migrations/005_inlinable_task_functions.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: nova definicija get_user_tasks.
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_assigned_to_new;
+CREATE INDEX CONCURRENTLY idx_tasks_assigned_to_new
+    ON tasks(assigned_to, priority DESC, due_date) WHERE assigned_to IS NOT NULL;
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_assigned_to;
+ALTER INDEX idx_tasks_assigned_to_new RENAME TO idx_tasks_assigned_to;
+
+ANALYZE tasks;
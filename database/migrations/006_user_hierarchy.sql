@@ -0,0 +1,37 @@
+-- ============================================================================
+-- MIGRACIJA 006: Closure tablica hijerarhije managera
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije tablicu dobivaju iz 01_schema.sql).
+--
+-- user_hierarchy sadrzi sve parove (nadredjeni, podredjeni, dubina) iz
+-- users.manager_id. Koriste je validate_manager_hierarchy (cirkularne
+-- reference bez setnje lancem), is_in_org() i /api/users/{id}/org.
+--
+-- Pokretanje:
+--   psql -U postgres -d employee_db -f database/migrations/006_user_hierarchy.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: triggeri, is_in_org, rebuild_user_hierarchy (poziva se na
+-- kraju 03 i puni tablicu iz postojece hijerarhije).
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE TABLE IF NOT EXISTS user_hierarchy (
+    ancestor_id INTEGER NOT NULL,
+    descendant_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    
+    CONSTRAINT pk_user_hierarchy PRIMARY KEY (ancestor_id, descendant_id),
+    CONSTRAINT fk_user_hierarchy_ancestor FOREIGN KEY (ancestor_id) 
+        REFERENCES users(user_id) ON DELETE CASCADE,
+    CONSTRAINT fk_user_hierarchy_descendant FOREIGN KEY (descendant_id) 
+        REFERENCES users(user_id) ON DELETE CASCADE,
+    CONSTRAINT chk_user_hierarchy_depth CHECK (depth >= 0)
+);
+
+COMMENT ON TABLE user_hierarchy IS 'Closure tablica hijerarhije managera (svi nadredjeni/podredjeni parovi)';
+
+CREATE INDEX IF NOT EXISTS idx_user_hierarchy_subtree ON user_hierarchy(ancestor_id, depth, descendant_id);
+CREATE INDEX IF NOT EXISTS idx_user_hierarchy_ancestors ON user_hierarchy(descendant_id, depth);
@@ -0,0 +1,131 @@
+-- ============================================================================
+-- MIGRACIJA 007: Rollup tablice audit/login statistike
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije tablice dobivaju iz 01_schema.sql).
+--
+-- 1. audit_log_hourly, login_events_hourly, login_users_hourly i
+--    rollup_watermarks (login_subnets_hourly dodaje migracija 004)
+-- 2. Popunjava rollupe iz postojecih audit_log i login_events zapisa do
+--    zadnjeg zatvorenog sata (isti izracun kao refresh_audit_rollups) i
+--    postavlja watermarke; dalje ih inkrementalno puni refresh_audit_rollups
+--
+-- Ponovno pokretanje ne radi nista - rollupi se pune samo ako watermark
+-- jos ne postoji.
+--
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: funkcije statistike i log_failed_login_batch citaju
+-- rollup_watermarks.
+--
+-- Pokretanje:
+--   psql -U postgres -d employee_db -f database/migrations/007_audit_rollups.sql
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE TABLE IF NOT EXISTS audit_log_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    entity_name VARCHAR(50) NOT NULL,
+    action audit_action NOT NULL,
+    change_count BIGINT NOT NULL DEFAULT 0,
+
+    CONSTRAINT pk_audit_log_hourly PRIMARY KEY (bucket_hour, entity_name, action)
+);
+
+COMMENT ON TABLE audit_log_hourly IS 'Broj audit zapisa po satu, entitetu i akciji';
+COMMENT ON COLUMN audit_log_hourly.bucket_hour IS 'Pocetak sata (date_trunc hour nad changed_at)';
+COMMENT ON COLUMN audit_log_hourly.change_count IS 'Broj promjena u tom satu';
+
+CREATE TABLE IF NOT EXISTS login_events_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    successful_logins BIGINT NOT NULL DEFAULT 0,
+    failed_logins BIGINT NOT NULL DEFAULT 0,
+    unique_users INTEGER NOT NULL DEFAULT 0,
+    last_login TIMESTAMP,
+
+    CONSTRAINT pk_login_events_hourly PRIMARY KEY (bucket_hour)
+);
+
+COMMENT ON TABLE login_events_hourly IS 'Broj uspjesnih/neuspjelih prijava i jedinstvenih korisnika po satu';
+COMMENT ON COLUMN login_events_hourly.failed_logins IS 'Zbroj attempt_count neuspjelih prijava (zbirni zapisi broje sve pokusaje)';
+COMMENT ON COLUMN login_events_hourly.unique_users IS 'Broj razlicitih korisnika s uspjesnom prijavom u tom satu';
+COMMENT ON COLUMN login_events_hourly.last_login IS 'Vrijeme zadnjeg pokusaja prijave u tom satu';
+
+CREATE TABLE IF NOT EXISTS login_users_hourly (
+    bucket_hour TIMESTAMP NOT NULL,
+    user_id INTEGER NOT NULL,
+
+    CONSTRAINT pk_login_users_hourly PRIMARY KEY (bucket_hour, user_id)
+);
+
+COMMENT ON TABLE login_users_hourly IS 'Korisnici s barem jednom uspjesnom prijavom po satu';
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    rollup_name VARCHAR(50) PRIMARY KEY,
+    last_bucket TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE rollup_watermarks IS 'Dokle su rollup tablice popunjene';
+COMMENT ON COLUMN rollup_watermarks.last_bucket IS 'Svi sati prije ovog trenutka su agregirani (NULL = jos nista)';
+
+
+-- Pocetno punjenje do zadnjeg zatvorenog sata (kao refresh_audit_rollups
+-- s p_grace = 10 minuta); podmreza je login_subnet(ip_address, 24)
+DO $$
+DECLARE
+    v_until TIMESTAMP := date_trunc('hour', CURRENT_TIMESTAMP - INTERVAL '10 minutes');
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM rollup_watermarks WHERE rollup_name = 'audit_log') THEN
+        DELETE FROM audit_log_hourly WHERE bucket_hour < v_until;
+
+        INSERT INTO audit_log_hourly (bucket_hour, entity_name, action, change_count)
+        SELECT date_trunc('hour', changed_at), entity_name, action, COUNT(*)
+        FROM audit_log
+        WHERE changed_at < v_until
+        GROUP BY 1, 2, 3;
+
+        INSERT INTO rollup_watermarks (rollup_name, last_bucket) VALUES ('audit_log', v_until);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM rollup_watermarks WHERE rollup_name = 'login_events') THEN
+        DELETE FROM login_events_hourly WHERE bucket_hour < v_until;
+        DELETE FROM login_users_hourly WHERE bucket_hour < v_until;
+        DELETE FROM login_subnets_hourly WHERE bucket_hour < v_until;
+
+        INSERT INTO login_events_hourly (bucket_hour, successful_logins, failed_logins, unique_users, last_login)
+        SELECT
+            date_trunc('hour', login_time),
+            COUNT(*) FILTER (WHERE success = TRUE),
+            COALESCE(SUM(attempt_count) FILTER (WHERE success = FALSE), 0),
+            COUNT(DISTINCT user_id) FILTER (WHERE success = TRUE),
+            MAX(login_time)
+        FROM login_events
+        WHERE login_time < v_until
+        GROUP BY 1;
+
+        INSERT INTO login_users_hourly (bucket_hour, user_id)
+        SELECT DISTINCT date_trunc('hour', login_time), user_id
+        FROM login_events
+        WHERE login_time < v_until
+        AND success = TRUE AND user_id IS NOT NULL;
+
+        INSERT INTO login_subnets_hourly (bucket_hour, subnet, successful_logins, failed_logins)
+        SELECT
+            date_trunc('hour', login_time),
+            network(set_masklen(ip_address, CASE family(ip_address) WHEN 4 THEN 24 ELSE 64 END)),
+            COUNT(*) FILTER (WHERE success = TRUE),
+            COALESCE(SUM(attempt_count) FILTER (WHERE success = FALSE), 0)
+        FROM login_events
+        WHERE login_time < v_until
+        GROUP BY 1, 2;
+
+        INSERT INTO rollup_watermarks (rollup_name, last_bucket) VALUES ('login_events', v_until);
+    END IF;
+END $$;
+
+ANALYZE audit_log_hourly;
+ANALYZE login_events_hourly;
+ANALYZE login_users_hourly;
+ANALYZE login_subnets_hourly;
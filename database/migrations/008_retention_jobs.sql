@@ -0,0 +1,49 @@
+-- ============================================================================
+-- MIGRACIJA 008: Poslovi brisanja starih audit/login podataka
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije tablicu dobivaju iz 01_schema.sql).
+--
+-- retention_jobs cuva napredak pozadinskog brisanja u batch-evima
+-- (run_retention_job), pa se prekinuti posao nastavlja nakon restarta
+-- (retention.resume_jobs) i prati kroz /api/audit/cleanup/jobs.
+--
+-- Pokretanje:
+--   psql -U postgres -d employee_db -f database/migrations/008_retention_jobs.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: create_retention_job, run_retention_job.
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE TABLE IF NOT EXISTS retention_jobs (
+    job_id SERIAL PRIMARY KEY,
+    target VARCHAR(20) NOT NULL,
+    cutoff TIMESTAMP NOT NULL,
+    batch_size INTEGER NOT NULL DEFAULT 5000,
+    sleep_ms INTEGER NOT NULL DEFAULT 100,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    rows_estimated BIGINT,
+    rows_deleted BIGINT NOT NULL DEFAULT 0,
+    batches_done INTEGER NOT NULL DEFAULT 0,
+    requested_by INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    error_message TEXT,
+
+    CONSTRAINT fk_retention_jobs_requested_by FOREIGN KEY (requested_by)
+        REFERENCES users(user_id) ON DELETE SET NULL,
+    CONSTRAINT chk_retention_jobs_target CHECK (target IN ('audit_log', 'login_events')),
+    CONSTRAINT chk_retention_jobs_status CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')),
+    CONSTRAINT chk_retention_jobs_batch CHECK (batch_size > 0 AND sleep_ms >= 0)
+);
+
+COMMENT ON TABLE retention_jobs IS 'Poslovi brisanja starih audit/login podataka - napredak za nastavak nakon restarta';
+COMMENT ON COLUMN retention_jobs.target IS 'Tablica iz koje se brise (audit_log, login_events)';
+COMMENT ON COLUMN retention_jobs.cutoff IS 'Brisu se zapisi starijih od ovog trenutka';
+COMMENT ON COLUMN retention_jobs.sleep_ms IS 'Pauza izmedju batch-eva (throttling)';
+COMMENT ON COLUMN retention_jobs.rows_estimated IS 'Broj zapisa za brisanje pri pokretanju posla';
+COMMENT ON COLUMN retention_jobs.rows_deleted IS 'Broj do sada obrisanih zapisa';
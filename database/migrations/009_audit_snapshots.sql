@@ -0,0 +1,55 @@
+-- ============================================================================
+-- MIGRACIJA 009: Snapshoti stanja entiteta za as-of rekonstrukciju
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije tablicu dobivaju iz 01_schema.sql).
+--
+-- audit_snapshots cuva stanje entiteta nakon svakih N diff promjena
+-- (build_audit_snapshots); get_entity_state_as_of i full_view povijesti
+-- entiteta polaze od zadnjeg snapshota umjesto od pocetka povijesti.
+--
+-- Watermark snapshota postavlja se na trenutak migracije, pa pozadinska
+-- petlja (_rollup_loop) obradjuje samo entitete promijenjene nakon nje i
+-- ne krece sama u prolaz kroz cijeli audit_log. Snapshoti su samo
+-- ubrzanje - as-of je ispravan i bez njih.
+--
+-- Pokretanje (nakon 007 - koristi rollup_watermarks):
+--   psql -U postgres -d employee_db -f database/migrations/009_audit_snapshots.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- Ova migracija: build_audit_snapshots, get_entity_state_as_of.
+--
+-- Prvo punjenje postojece povijesti je zaseban, eksplicitan korak nakon
+-- ponovnog ucitavanja 03 - treba samo ako audit_log vec ima diff zapise
+-- (001 s enable_diff=1 ili convert=1); povijest u full formatu je sama
+-- sebi sidro. Procedura radi
+-- COMMIT po batch-u entiteta, pa se poziva izvan transakcije:
+--   SET search_path TO employee_management;
+--   UPDATE rollup_watermarks SET last_bucket = NULL
+--   WHERE rollup_name = 'audit_snapshots';
+--   CALL build_audit_snapshots();
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE TABLE IF NOT EXISTS audit_snapshots (
+    entity_name VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    snapshot_at TIMESTAMP NOT NULL,
+    audit_log_id INTEGER NOT NULL,
+    state JSONB,
+    changes_since_previous INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT pk_audit_snapshots PRIMARY KEY (entity_name, entity_id, snapshot_at, audit_log_id)
+);
+
+COMMENT ON TABLE audit_snapshots IS 'Periodicki snapshoti stanja entiteta iz audit_log (svakih N promjena)';
+COMMENT ON COLUMN audit_snapshots.snapshot_at IS 'changed_at zadnje promjene ukljucene u snapshot';
+COMMENT ON COLUMN audit_snapshots.audit_log_id IS 'ID zadnje promjene ukljucene u snapshot';
+COMMENT ON COLUMN audit_snapshots.state IS 'Stanje entiteta nakon te promjene (NULL = obrisan)';
+COMMENT ON COLUMN audit_snapshots.changes_since_previous IS 'Broj promjena od prethodnog snapshota';
+
+INSERT INTO rollup_watermarks (rollup_name, last_bucket)
+VALUES ('audit_snapshots', CURRENT_TIMESTAMP)
+ON CONFLICT (rollup_name) DO NOTHING;
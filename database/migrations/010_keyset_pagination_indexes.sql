@@ -0,0 +1,80 @@
+-- ============================================================================
+-- MIGRACIJA 010: Indeksi za keyset paginaciju audit i login zapisa
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije indekse dobivaju iz 01_schema.sql).
+--
+-- Kursori /audit/logs, /audit/logins i activity feedova usporedjuju redak
+-- (vrijeme, id) < (...) uz ORDER BY vrijeme DESC, id DESC. Stari indeksi
+-- po jednom stupcu (ili bez vremena) za to rade seq scan ili sortiranje,
+-- pa se zamjenjuju kompozitnima koji zavrsavaju s (vrijeme DESC, id DESC),
+-- s INCLUDE stupcima za index-only scan feedova. Dodaje se i
+-- idx_audit_log_entity_time (filtar po entitetu bez entity_id).
+--
+-- Svaki indeks se gradi pod privremenim imenom i zatim preimenuje, tako da
+-- tablica ni u jednom trenutku nije bez indeksa. Ponovno pokretanje samo
+-- ponovno gradi iste indekse.
+--
+-- Pokretanje (izvan transakcije, CREATE INDEX CONCURRENTLY):
+--   psql -U postgres -d employee_db -f database/migrations/010_keyset_pagination_indexes.sql
+-- Index-only scan treba azurnu visibility mapu - nakon migracije
+-- VACUUM ANALYZE audit_log i login_events ako autovacuum jos nije prosao.
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+-- login_events
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_user_new;
+CREATE INDEX CONCURRENTLY idx_login_events_user_new
+    ON login_events(user_id, login_time DESC, login_event_id DESC) WHERE user_id IS NOT NULL;
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_user;
+ALTER INDEX idx_login_events_user_new RENAME TO idx_login_events_user;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_time_new;
+CREATE INDEX CONCURRENTLY idx_login_events_time_new
+    ON login_events(login_time DESC, login_event_id DESC)
+    INCLUDE (user_id, username_attempted, success, ip_address, failure_reason);
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_time;
+ALTER INDEX idx_login_events_time_new RENAME TO idx_login_events_time;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_success_new;
+CREATE INDEX CONCURRENTLY idx_login_events_success_new
+    ON login_events(success, login_time DESC, login_event_id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS idx_login_events_success;
+ALTER INDEX idx_login_events_success_new RENAME TO idx_login_events_success;
+
+-- audit_log
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_entity_new;
+CREATE INDEX CONCURRENTLY idx_audit_log_entity_new
+    ON audit_log(entity_name, entity_id, changed_at DESC, audit_log_id DESC)
+    INCLUDE (action, changed_by);
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_entity;
+ALTER INDEX idx_audit_log_entity_new RENAME TO idx_audit_log_entity;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_entity_time
+    ON audit_log(entity_name, changed_at DESC, audit_log_id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_changed_by_new;
+CREATE INDEX CONCURRENTLY idx_audit_log_changed_by_new
+    ON audit_log(changed_by, changed_at DESC, audit_log_id DESC)
+    INCLUDE (entity_name, entity_id, action) WHERE changed_by IS NOT NULL;
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_changed_by;
+ALTER INDEX idx_audit_log_changed_by_new RENAME TO idx_audit_log_changed_by;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_time_new;
+CREATE INDEX CONCURRENTLY idx_audit_log_time_new
+    ON audit_log(changed_at DESC, audit_log_id DESC)
+    INCLUDE (entity_name, entity_id, action, changed_by);
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_time;
+ALTER INDEX idx_audit_log_time_new RENAME TO idx_audit_log_time;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_action_new;
+CREATE INDEX CONCURRENTLY idx_audit_log_action_new
+    ON audit_log(action, changed_at DESC, audit_log_id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS idx_audit_log_action;
+ALTER INDEX idx_audit_log_action_new RENAME TO idx_audit_log_action;
+
+ANALYZE login_events;
+ANALYZE audit_log;
@@ -0,0 +1,25 @@
+-- ============================================================================
+-- MIGRACIJA 011: Indeks za keyset paginaciju zadataka tima
+-- ============================================================================
+-- Za postojece instalacije (nove instalacije indeks dobivaju iz 01_schema.sql).
+--
+-- /tasks/team vraca zadatke podstabla managera poredane po
+-- (created_at DESC, task_id DESC). Bez indeksa tog poretka svaka stranica
+-- sortira sve zadatke organizacije (za vrhovnog managera cijelu tablicu
+-- tasks) i kursor primjenjuje tek kao filtar. idx_tasks_created daje taj
+-- poredak, pa stranica cita samo zadatke do LIMIT-a. Ponovno pokretanje
+-- ne radi nista.
+--
+-- Pokretanje (izvan transakcije, CREATE INDEX CONCURRENTLY):
+--   psql -U postgres -d employee_db -f database/migrations/011_team_tasks_index.sql
+-- Redoslijed: sve migracije 001-011 redom, zatim JEDNOM ponovno ucitaj
+-- database/03_functions_procedures.sql - ne ranije, jer njene funkcije
+-- koriste tablice iz 006-009 (vidi README.md, "Migracije postojece baze").
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_created
+    ON tasks(created_at DESC, task_id DESC);
+
+ANALYZE tasks;
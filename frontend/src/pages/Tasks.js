@@ -20,12 +20,17 @@ const Tasks = () => {
   // Automatski postavi 'my' ako korisnik nema TASK_READ_ALL permisiju
   const canReadAll = hasPermission('TASK_READ_ALL');
   const canCreate = hasPermission('TASK_CREATE');
-  const [viewMode, setViewMode] = useState(canReadAll ? 'all' : 'my'); // 'all', 'my', or 'created'
+  const canReadTeam = hasPermission('TASK_READ_TEAM');
+  const [viewMode, setViewMode] = useState(canReadAll ? 'all' : 'my'); // 'all', 'my', 'team' or 'created'
   
   // Filteri
   const [statusFilter, setStatusFilter] = useState('');
   const [priorityFilter, setPriorityFilter] = useState('');
 
+  // Keyset paginacija za 'team' pogled (X-Next-Cursor header)
+  const [teamCursor, setTeamCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
   // Delete confirmation modal
   const [showDeleteModal, setShowDeleteModal] = useState(false);
   const [taskToDelete, setTaskToDelete] = useState(null);
@@ -53,15 +58,27 @@ const Tasks = () => {
     }
   }, [showModal]);
 
+  const getTeamParams = () => {
+    const params = {};
+    if (statusFilter) params.status = statusFilter;
+    if (priorityFilter) params.priority = priorityFilter;
+    return params;
+  };
+
   const loadTasks = async () => {
     setLoading(true);
     setError('');
+    setTeamCursor(null);
     try {
       let response;
       
       if (viewMode === 'my') {
         // Učitaj samo zadatke dodijeljene meni
         response = await tasksAPI.getMyTasks();
+      } else if (viewMode === 'team') {
+        // Zadaci cijelog tima (svi podredjeni) jednim zahtjevom, prva stranica
+        response = await tasksAPI.getTeam(getTeamParams());
+        setTeamCursor(response.headers['x-next-cursor'] || null);
       } else if (viewMode === 'created') {
         // Učitaj zadatke koje sam ja kreirao (filtriraj na frontendu)
         const allTasks = await tasksAPI.getAll({});
@@ -90,6 +107,22 @@ const Tasks = () => {
     }
   };
 
+  const loadMoreTeamTasks = async () => {
+    if (!teamCursor) return;
+    setLoadingMore(true);
+    setError('');
+    try {
+      const response = await tasksAPI.getTeam({ ...getTeamParams(), cursor: teamCursor });
+      setTasks(prev => [...prev, ...response.data]);
+      setTeamCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      setError('Greška pri učitavanju zadataka');
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadUsers = async () => {
     // Samo ucitaj korisnike ako ima permisiju (za dropdown dodjele zadataka)
     if (!hasPermission('USER_READ_ALL')) {
@@ -303,22 +336,32 @@ const Tasks = () => {
       <div className="page-header">
         <h1>Zadaci</h1>
         <div style={{display: 'flex', gap: '10px', flexWrap: 'wrap'}}>
-          {/* Gumbi za prebacivanje pogleda - prikazuje se ako ima TASK_READ_ALL */}
-          {canReadAll && (
+          {/* Gumbi za prebacivanje pogleda - prikazuje se ako ima TASK_READ_ALL ili TASK_READ_TEAM */}
+          {(canReadAll || canReadTeam) && (
             <>
-              <button 
-                className={`btn ${viewMode === 'all' ? 'btn-primary' : 'btn-secondary'}`}
-                onClick={() => setViewMode('all')}
-              >
-                Svi zadaci
-              </button>
+              {canReadAll && (
+                <button 
+                  className={`btn ${viewMode === 'all' ? 'btn-primary' : 'btn-secondary'}`}
+                  onClick={() => setViewMode('all')}
+                >
+                  Svi zadaci
+                </button>
+              )}
               <button 
                 className={`btn ${viewMode === 'my' ? 'btn-primary' : 'btn-secondary'}`}
                 onClick={() => setViewMode('my')}
               >
                 Moji zadaci
               </button>
-              {canCreate && (
+              {canReadTeam && (
+                <button 
+                  className={`btn ${viewMode === 'team' ? 'btn-primary' : 'btn-secondary'}`}
+                  onClick={() => setViewMode('team')}
+                >
+                  Zadaci tima
+                </button>
+              )}
+              {canReadAll && canCreate && (
                 <button 
                   className={`btn ${viewMode === 'created' ? 'btn-primary' : 'btn-secondary'}`}
                   onClick={() => setViewMode('created')}
@@ -463,6 +506,20 @@ const Tasks = () => {
             ))}
           </tbody>
         </table>
+
+        {/* Sljedeca stranica zadataka tima */}
+        {viewMode === 'team' && teamCursor && (
+          <div className="load-more">
+            <span>Prikazano {tasks.length} zadataka - postoji još zadataka tima.</span>
+            <button
+              className="btn btn-secondary"
+              onClick={loadMoreTeamTasks}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Učitavanje...' : 'Učitaj još'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Modal za kreiranje/uređivanje */}
@@ -91,6 +91,12 @@ export const usersAPI = {
   getTeam: (userId) => 
     api.get(`/users/${userId}/team`),
   
+  getOrg: (userId, maxDepth = null, cursor = null) => 
+    api.get(`/users/${userId}/org`, { params: { max_depth: maxDepth, cursor } }),
+  
+  getTeamStatistics: (userId, params = {}) => 
+    api.get(`/users/${userId}/team/statistics`, { params }),
+  
   getSubordinates: (managerId) => 
     api.get(`/users/${managerId}/subordinates`),
   
@@ -141,6 +147,9 @@ export const tasksAPI = {
   
   getOverdue: () => 
     api.get('/tasks/my?overdue=true'),
+  
+  getTeam: (params = {}) => 
+    api.get('/tasks/team', { params }),
 };
 
 // ==================== ROLES API ====================
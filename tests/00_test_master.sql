@@ -66,6 +66,12 @@ CREATE TEMP TABLE test_results (
 \echo '========================================================================='
 \i tests/07_test_views_indexes.sql
 
+\echo ''
+\echo '========================================================================='
+\echo '  9. TESTOVI PLANOVA UPITA - Index Usage & Row Estimates'
+\echo '========================================================================='
+\i tests/09_test_query_plans.sql
+
 \echo ''
 \echo '========================================================================='
 \echo '  TEST SUMMARY - Ukupni rezultati testiranja'
@@ -319,4 +319,93 @@ EXCEPTION
         RAISE NOTICE ' FAIL: get_task_statistics() - %', SQLERRM;
 END $$;
 
+\echo '--- Test 4.16: is_in_org() - admin je nadredjen Marku preko Ivana'
+DO $$
+DECLARE
+    admin_id INTEGER;
+    ivan_id INTEGER;
+    marko_id INTEGER;
+    maja_id INTEGER;
+BEGIN
+    SELECT user_id INTO admin_id FROM users WHERE username = 'admin';
+    SELECT user_id INTO ivan_id FROM users WHERE username = 'ivan_manager';
+    SELECT user_id INTO marko_id FROM users WHERE username = 'marko_dev';
+    SELECT user_id INTO maja_id FROM users WHERE username = 'maja_design';
+    
+    IF is_in_org(admin_id, marko_id) = TRUE
+       AND is_in_org(ivan_id, marko_id) = TRUE
+       AND is_in_org(ivan_id, maja_id) = FALSE
+       AND is_in_org(marko_id, ivan_id) = FALSE
+       AND is_in_org(ivan_id, ivan_id) = FALSE THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('FUNCTIONS', 'is_in_org', 'PASS', 
+                'Organizacija prepoznata na svim razinama, tudji timovi iskljuceni');
+        RAISE NOTICE ' PASS: is_in_org() ispravno prepoznaje organizaciju';
+    ELSE
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('FUNCTIONS', 'is_in_org', 'FAIL', 
+                'Pogresan odnos u user_hierarchy');
+        RAISE NOTICE ' FAIL: is_in_org() ne radi ispravno';
+    END IF;
+EXCEPTION
+    WHEN OTHERS THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('FUNCTIONS', 'is_in_org', 'FAIL', SQLERRM);
+        RAISE NOTICE ' FAIL: is_in_org() - %', SQLERRM;
+END $$;
+
+\echo '--- Test 4.17: build_audit_snapshot_batch() + get_entity_state_as_of() - diff lanac'
+DO $$
+DECLARE
+    v_task_id INTEGER;
+    v_snapshots INTEGER;
+    v_state RECORD;
+    v_expected JSONB;
+    i INTEGER;
+BEGIN
+    PERFORM set_config('employee_management.audit_format', 'diff', TRUE);
+    
+    INSERT INTO tasks (title, description, status, priority, created_by)
+    VALUES ('Snapshot test 0', 'Test snapshota', 'NEW', 'LOW', 1)
+    RETURNING task_id INTO v_task_id;
+    
+    FOR i IN 1..12 LOOP
+        UPDATE tasks SET title = 'Snapshot test ' || i WHERE task_id = v_task_id;
+    END LOOP;
+    
+    v_snapshots := build_audit_snapshot_batch(ARRAY['tasks']::VARCHAR[], ARRAY[v_task_id],
+                                              clock_timestamp()::TIMESTAMP, 5);
+    
+    SELECT * INTO v_state FROM get_entity_state_as_of('tasks', v_task_id, clock_timestamp()::TIMESTAMP);
+    
+    SELECT audit_fold(action, new_value, payload_format, 'tasks' ORDER BY changed_at, audit_log_id)
+    INTO v_expected
+    FROM audit_log WHERE entity_name = 'tasks' AND entity_id = v_task_id;
+    
+    IF v_snapshots = 2 AND v_state.snapshot_audit_log_id IS NOT NULL
+       AND v_state.replayed_changes = 2 AND v_state.state = v_expected
+       AND v_state.state->>'title' = 'Snapshot test 12' THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('FUNCTIONS', 'audit snapshots as-of', 'PASS', 
+                'Snapshot svakih 5 diff promjena, stanje jednako punom foldu');
+        RAISE NOTICE ' PASS: snapshot + rep promjena daje ispravno stanje';
+    ELSE
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('FUNCTIONS', 'audit snapshots as-of', 'FAIL', 
+                'Snapshota: ' || v_snapshots || ', replay: ' || COALESCE(v_state.replayed_changes, -1));
+        RAISE NOTICE ' FAIL: audit snapshots - % snapshota, replay %', v_snapshots, v_state.replayed_changes;
+    END IF;
+    
+    -- Cleanup
+    DELETE FROM audit_snapshots WHERE entity_name = 'tasks' AND entity_id = v_task_id;
+    DELETE FROM task_assignees WHERE task_id = v_task_id;
+    DELETE FROM tasks WHERE task_id = v_task_id;
+    DELETE FROM audit_log WHERE entity_name = 'tasks' AND entity_id = v_task_id;
+EXCEPTION
+    WHEN OTHERS THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('FUNCTIONS', 'audit snapshots as-of', 'FAIL', SQLERRM);
+        RAISE NOTICE ' FAIL: audit snapshots - %', SQLERRM;
+END $$;
+
 \echo ''
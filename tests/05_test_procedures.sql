@@ -450,4 +450,50 @@ EXCEPTION
         RAISE NOTICE ' FAIL: revoke_role() - %', SQLERRM;
 END $$;
 
+\echo '--- Test 5.11: refresh_audit_rollups() - zbirni zapis datiran ispod watermarka'
+DO $$
+DECLARE
+    v_at TIMESTAMP := date_trunc('hour', CURRENT_TIMESTAMP) - INTERVAL '3 hours' + INTERVAL '5 minutes';
+    v_event_id INTEGER;
+    v_rolled BIGINT;
+    v_raw BIGINT;
+BEGIN
+    CALL refresh_audit_rollups();
+    
+    -- Zbirni zapis stize nakon refresha, datiran u sat koji je vec agregiran
+    v_event_id := log_failed_login_batch('rollup_late_user', '203.0.113.7'::INET, 'test',
+                                         7, v_at - INTERVAL '1 minute', v_at);
+    CALL refresh_audit_rollups();
+    
+    SELECT COALESCE(SUM(failed_logins), 0) INTO v_rolled
+    FROM login_events_hourly WHERE bucket_hour = date_trunc('hour', v_at);
+    SELECT COALESCE(SUM(attempt_count), 0) INTO v_raw
+    FROM login_events
+    WHERE success = FALSE AND login_time >= date_trunc('hour', v_at)
+    AND login_time < date_trunc('hour', v_at) + INTERVAL '1 hour';
+    
+    IF v_rolled = v_raw AND v_raw >= 7 THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('PROCEDURES', 'refresh_audit_rollups late batch', 'PASS', 
+                'Zakasnjeli zbirni zapis ukljucen u rollup');
+        RAISE NOTICE ' PASS: refresh_audit_rollups() ukljucio zakasnjeli zapis';
+    ELSE
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('PROCEDURES', 'refresh_audit_rollups late batch', 'FAIL', 
+                'Rollup: ' || v_rolled || ', login_events: ' || v_raw);
+        RAISE NOTICE ' FAIL: refresh_audit_rollups() - rollup % / login_events %', v_rolled, v_raw;
+    END IF;
+    
+    -- Cleanup: brisanje zapisa i ponovna agregacija njegovog sata
+    DELETE FROM login_events WHERE login_event_id = v_event_id;
+    UPDATE rollup_watermarks SET last_bucket = date_trunc('hour', v_at)
+    WHERE rollup_name = 'login_events' AND last_bucket > v_at;
+    CALL refresh_audit_rollups();
+EXCEPTION
+    WHEN OTHERS THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('PROCEDURES', 'refresh_audit_rollups late batch', 'FAIL', SQLERRM);
+        RAISE NOTICE ' FAIL: refresh_audit_rollups() - %', SQLERRM;
+END $$;
+
 \echo ''
@@ -474,4 +474,75 @@ EXCEPTION
         RAISE NOTICE ' FAIL: Audit trigger user_roles DELETE - %', SQLERRM;
 END $$;
 
+\echo '--- Test 6.11: Trigger maintain_user_hierarchy - premjestanje podstabla'
+DO $$
+DECLARE
+    top_id INTEGER;
+    mid_id INTEGER;
+    leaf_id INTEGER;
+    other_id INTEGER;
+    mismatches INTEGER;
+    leaf_depth INTEGER;
+BEGIN
+    -- Lanac top <- mid <- leaf i zaseban korisnik other
+    INSERT INTO users (username, email, password_hash, first_name, last_name)
+    VALUES ('hierarchy_top', 'hierarchy_top@test.com', 'hash', 'Hierarchy', 'Top')
+    RETURNING user_id INTO top_id;
+    INSERT INTO users (username, email, password_hash, first_name, last_name, manager_id)
+    VALUES ('hierarchy_mid', 'hierarchy_mid@test.com', 'hash', 'Hierarchy', 'Mid', top_id)
+    RETURNING user_id INTO mid_id;
+    INSERT INTO users (username, email, password_hash, first_name, last_name, manager_id)
+    VALUES ('hierarchy_leaf', 'hierarchy_leaf@test.com', 'hash', 'Hierarchy', 'Leaf', mid_id)
+    RETURNING user_id INTO leaf_id;
+    INSERT INTO users (username, email, password_hash, first_name, last_name)
+    VALUES ('hierarchy_other', 'hierarchy_other@test.com', 'hash', 'Hierarchy', 'Other')
+    RETURNING user_id INTO other_id;
+    
+    -- Premjesti mid (s leaf) pod other pa other pod top
+    UPDATE users SET manager_id = other_id WHERE user_id = mid_id;
+    UPDATE users SET manager_id = top_id WHERE user_id = other_id;
+    
+    -- Closure tablica mora odgovarati hijerarhiji izracunatoj iz manager_id
+    WITH RECURSIVE tree AS (
+        SELECT user_id AS ancestor_id, user_id AS descendant_id, 0 AS depth
+        FROM users WHERE user_id IN (top_id, mid_id, leaf_id, other_id)
+        UNION ALL
+        SELECT t.ancestor_id, u.user_id, t.depth + 1
+        FROM tree t JOIN users u ON u.manager_id = t.descendant_id
+    )
+    SELECT COUNT(*) INTO mismatches FROM (
+        (SELECT * FROM tree
+         EXCEPT SELECT * FROM user_hierarchy)
+        UNION ALL
+        (SELECT * FROM user_hierarchy
+         WHERE ancestor_id IN (top_id, mid_id, leaf_id, other_id)
+         EXCEPT SELECT * FROM tree)
+    ) diff;
+    
+    SELECT depth INTO leaf_depth FROM user_hierarchy
+    WHERE ancestor_id = top_id AND descendant_id = leaf_id;
+    
+    IF mismatches = 0 AND leaf_depth = 3 THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('TRIGGERS', 'maintain_user_hierarchy move', 'PASS', 
+                'user_hierarchy azurna nakon premjestanja podstabla');
+        RAISE NOTICE ' PASS: Closure tablica ispravno prati premjestanje podstabla';
+    ELSE
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('TRIGGERS', 'maintain_user_hierarchy move', 'FAIL', 
+                FORMAT('Neslaganja: %s, dubina leaf ispod top: %s', mismatches, leaf_depth));
+        RAISE NOTICE ' FAIL: Closure tablica ne prati premjestanje podstabla';
+    END IF;
+    
+    -- Cleanup (audit_log prvo)
+    UPDATE audit_log SET changed_by = NULL WHERE changed_by IN (top_id, mid_id, leaf_id, other_id);
+    DELETE FROM audit_log WHERE entity_name = 'users' AND entity_id IN (top_id, mid_id, leaf_id, other_id);
+    DELETE FROM users WHERE user_id IN (leaf_id, mid_id, other_id, top_id);
+EXCEPTION
+    WHEN OTHERS THEN
+        INSERT INTO test_results (test_category, test_name, test_status, test_message)
+        VALUES ('TRIGGERS', 'maintain_user_hierarchy move', 'FAIL', SQLERRM);
+        RAISE NOTICE ' FAIL: maintain_user_hierarchy - %', SQLERRM;
+END $$;
+
 \echo ''
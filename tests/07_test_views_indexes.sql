@@ -269,7 +269,8 @@ DECLARE
         'idx_tasks_assigned_to',
         'idx_tasks_created_by',
         'idx_tasks_due_date',
-        'idx_tasks_active'
+        'idx_tasks_active',
+        'idx_tasks_created'
     ];
     idx_name TEXT;
     missing_indexes TEXT := '';
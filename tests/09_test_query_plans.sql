@@ -0,0 +1,379 @@
+-- ============================================================================
+-- TEST 9: Query plans
+-- ============================================================================
+-- Regresijski testovi planova za vruce upite routera (filtri zadataka,
+-- moji zadaci, audit filtri, provjere permisija). Za svaki upit se
+-- izvodi EXPLAIN (ANALYZE, FORMAT JSON) i provjerava struktura plana:
+-- - nema sekvencijalnog skeniranja tablica tasks / audit_log
+-- - koristi se ocekivani indeks
+-- - procjena broja redaka je unutar zadanog faktora od stvarnog broja
+--
+-- Ako baza ima manje od 20000 zadataka, unutar transakcije se puni
+-- skalirani sinteticki skup (3000 korisnika, 60000 zadataka, 120000
+-- audit zapisa) i radi ANALYZE; na kraju ROLLBACK vraca bazu (i
+-- statistike) u pocetno stanje. Nad vecim bazama (generate_dataset.py)
+-- testovi rade nad postojecim podacima.
+-- ============================================================================
+
+SET search_path TO employee_management;
+
+\echo '--- Test 9.0: Priprema skaliranog skupa podataka'
+
+-- Rezultat ako priprema ne uspije (transakcija ne dode do \gset)
+\set plan_results '[{"test_name": "plan suite setup", "test_status": "FAIL", "test_message": "Priprema podataka ili provjere planova nije uspjela"}]'
+
+SELECT COUNT(*) < 20000 AS plan_needs_data,
+       COALESCE(MAX(task_id), 0) AS plan_task_base
+FROM tasks \gset
+SELECT COALESCE(MAX(user_id), 0) AS plan_user_base FROM users \gset
+
+BEGIN;
+
+\if :plan_needs_data
+-- Triggeri (audit, sinkronizacija dodjela) nisu dio testa - iskljuceni pri punjenju
+SET LOCAL session_replication_role = replica;
+
+-- 300 managera i 2700 zaposlenika
+INSERT INTO users (user_id, username, email, password_hash, first_name, last_name, manager_id, is_active)
+SELECT :plan_user_base + i,
+       'plan_user_' || i,
+       'plan_user_' || i || '@plan.test',
+       'x',
+       'Plan',
+       'Korisnik' || i,
+       CASE WHEN i <= 300 THEN NULL ELSE :plan_user_base + 1 + (i % 300) END,
+       i % 50 <> 0
+FROM generate_series(1, 3000) AS i;
+
+INSERT INTO user_roles (user_id, role_id)
+SELECT :plan_user_base + i,
+       (SELECT role_id FROM roles WHERE name = CASE WHEN i <= 300 THEN 'MANAGER' ELSE 'EMPLOYEE' END)
+FROM generate_series(1, 3000) AS i;
+
+-- dvije direktne permisije po korisniku
+INSERT INTO user_permissions (user_id, permission_id, granted)
+SELECT :plan_user_base + i,
+       (SELECT permission_id FROM permissions ORDER BY permission_id OFFSET ((i + k) % 5) LIMIT 1),
+       i % 6 <> 0
+FROM generate_series(1, 3000) AS i
+CROSS JOIN generate_series(0, 1) AS k;
+
+-- 60000 zadataka: kreiraju manageri, dodijeljeni zaposlenicima (~22 po zaposleniku)
+INSERT INTO tasks (task_id, title, description, status, priority, due_date, created_by, assigned_to,
+                   created_at, updated_at, completed_at)
+SELECT :plan_task_base + i,
+       'Plan zadatak ' || i,
+       'Sinteticki zadatak za test planova',
+       s.status,
+       (ARRAY['LOW', 'MEDIUM', 'HIGH', 'URGENT'])[1 + i % 4]::task_priority,
+       CASE WHEN i % 20 = 0 THEN NULL ELSE (c.created_at)::date + (i % 60) END,
+       :plan_user_base + 1 + (i % 300),
+       :plan_user_base + 301 + ((i * 7919) % 2700),
+       c.created_at,
+       c.created_at,
+       CASE WHEN s.status = 'COMPLETED' THEN c.created_at + INTERVAL '2 days' END
+FROM generate_series(1, 60000) AS i
+CROSS JOIN LATERAL (SELECT (ARRAY['NEW', 'IN_PROGRESS', 'IN_PROGRESS', 'COMPLETED', 'COMPLETED',
+                                  'COMPLETED', 'COMPLETED', 'ON_HOLD', 'CANCELLED', 'NEW'])[1 + i % 10]::task_status
+                    AS status) s
+CROSS JOIN LATERAL (SELECT CURRENT_TIMESTAMP - ((i % 365) || ' days')::interval AS created_at) c;
+
+INSERT INTO task_assignees (task_id, user_id, assigned_by)
+SELECT task_id, assigned_to, created_by
+FROM tasks
+WHERE task_id > :plan_task_base;
+
+-- 120000 audit zapisa kroz zadnjih godinu dana (2/3 tasks, 1/3 users)
+INSERT INTO audit_log (entity_name, entity_id, action, changed_by, changed_at, old_value, new_value)
+SELECT CASE WHEN i % 3 = 0 THEN 'users' ELSE 'tasks' END,
+       CASE WHEN i % 3 = 0 THEN :plan_user_base + 1 + (i % 3000) ELSE :plan_task_base + 1 + (i % 60000) END,
+       CASE WHEN i <= 60000 THEN 'INSERT' ELSE 'UPDATE' END::audit_action,
+       :plan_user_base + 1 + (i % 300),
+       CURRENT_TIMESTAMP - ((i * 263) % 525600 || ' minutes')::interval,
+       CASE WHEN i > 60000 THEN jsonb_build_object('status', 'NEW') END,
+       CASE WHEN i % 3 = 0 THEN jsonb_build_object('is_active', (i % 50 <> 0)::text)
+            ELSE jsonb_build_object('status', (ARRAY['IN_PROGRESS', 'COMPLETED', 'ON_HOLD', 'CANCELLED'])[1 + i % 4],
+                                    'assigned_to', :plan_user_base + 301 + (i % 2700)) END
+FROM generate_series(1, 120000) AS i;
+
+SET LOCAL session_replication_role = origin;
+
+-- Closure tablica se inace odrzava triggerom na users
+CALL rebuild_user_hierarchy();
+\endif
+
+ANALYZE users;
+ANALYZE user_roles;
+ANALYZE user_permissions;
+ANALYZE tasks;
+ANALYZE task_assignees;
+ANALYZE audit_log;
+ANALYZE user_hierarchy;
+
+-- Tipicne vrijednosti parametara (medijan po broju redaka)
+SELECT assigned_to AS plan_assignee FROM (
+    SELECT assigned_to, COUNT(*) AS n FROM tasks WHERE assigned_to IS NOT NULL GROUP BY assigned_to
+) t ORDER BY n, assigned_to OFFSET (SELECT COUNT(DISTINCT assigned_to) / 2 FROM tasks) LIMIT 1 \gset
+SELECT created_by AS plan_creator FROM (
+    SELECT created_by, COUNT(*) AS n FROM tasks GROUP BY created_by
+) t ORDER BY n, created_by OFFSET (SELECT COUNT(DISTINCT created_by) / 2 FROM tasks) LIMIT 1 \gset
+SELECT task_id AS plan_task FROM tasks ORDER BY task_id OFFSET (SELECT COUNT(*) / 2 FROM tasks) LIMIT 1 \gset
+SELECT changed_by AS plan_changed_by FROM audit_log WHERE changed_by IS NOT NULL
+ORDER BY audit_log_id DESC LIMIT 1 \gset
+SELECT user_id AS plan_perm_user FROM user_permissions ORDER BY user_id DESC LIMIT 1 \gset
+-- Vrh hijerarhije: manager s najvecim podstablom (/tasks/team za cijelu organizaciju)
+SELECT ancestor_id AS plan_org_root FROM user_hierarchy
+GROUP BY ancestor_id ORDER BY COUNT(*) DESC, ancestor_id LIMIT 1 \gset
+
+CREATE TEMP TABLE plan_checks (
+    check_id SERIAL PRIMARY KEY,
+    test_name TEXT,
+    test_status TEXT,
+    test_message TEXT
+) ON COMMIT DROP;
+
+CREATE TEMP TABLE plan_nodes (node JSONB) ON COMMIT DROP;
+
+-- Provjera plana: p_indexes - barem jedan od indeksa mora biti u planu,
+-- p_no_seqscan - tablice koje se ne smiju sekvencijalno skenirati,
+-- p_rows_factor - dopusteni omjer procjene i stvarnog broja redaka na
+-- cvoru s ocekivanim indeksom (NULL = bez provjere, npr. upiti s LIMIT),
+-- p_index_cond - regex kojem mora odgovarati Index Cond svakog cvora s
+-- ocekivanim indeksom (npr. keyset granica mora biti index uvjet, a ne Filter).
+-- Tablice manje od 10 stranica se ignoriraju (Seq Scan je tada ispravan
+-- plan); ako su sve tablice ocekivanih indeksa takve, test je SKIP.
+CREATE FUNCTION pg_temp.check_plan(
+    p_name TEXT,
+    p_query TEXT,
+    p_indexes TEXT[],
+    p_no_seqscan TEXT[] DEFAULT ARRAY['tasks', 'audit_log'],
+    p_rows_factor NUMERIC DEFAULT NULL,
+    p_index_cond TEXT DEFAULT NULL
+) RETURNS VOID AS $$
+DECLARE
+    v_plan JSONB;
+    v_seqscans TEXT[];
+    v_indexes TEXT[];
+    v_estimated NUMERIC;
+    v_actual NUMERIC;
+    v_ratio NUMERIC;
+    v_unbounded TEXT[];
+    v_problems TEXT[] := ARRAY[]::TEXT[];
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_class c ON c.oid = i.indrelid
+        WHERE ic.relname = ANY(p_indexes) AND c.relpages >= 10
+    ) THEN
+        INSERT INTO plan_checks (test_name, test_status, test_message)
+        VALUES (p_name, 'SKIP', 'Tablica premala za provjeru plana (< 10 stranica)');
+        RAISE NOTICE ' SKIP: % - tablica premala', p_name;
+        RETURN;
+    END IF;
+
+    EXECUTE 'EXPLAIN (ANALYZE, FORMAT JSON) ' || p_query INTO v_plan;
+
+    TRUNCATE plan_nodes;
+    INSERT INTO plan_nodes
+    WITH RECURSIVE nodes(node) AS (
+        SELECT v_plan -> 0 -> 'Plan'
+        UNION ALL
+        SELECT child FROM nodes, jsonb_array_elements(nodes.node -> 'Plans') AS child
+    )
+    SELECT node FROM nodes;
+
+    SELECT array_agg(DISTINCT node ->> 'Relation Name') INTO v_seqscans
+    FROM plan_nodes
+    WHERE node ->> 'Node Type' IN ('Seq Scan', 'Parallel Seq Scan')
+    AND node ->> 'Relation Name' = ANY(p_no_seqscan)
+    AND (SELECT relpages FROM pg_class WHERE oid = (node ->> 'Relation Name')::regclass) >= 10;
+
+    SELECT array_agg(DISTINCT node ->> 'Index Name') INTO v_indexes
+    FROM plan_nodes
+    WHERE node ? 'Index Name';
+
+    IF v_seqscans IS NOT NULL THEN
+        v_problems := v_problems || FORMAT('Seq Scan na %s', array_to_string(v_seqscans, ', '));
+    END IF;
+    IF NOT COALESCE(v_indexes && p_indexes, FALSE) THEN
+        v_problems := v_problems || FORMAT('ocekivan indeks %s, koristeni: %s',
+            array_to_string(p_indexes, ' ili '), COALESCE(array_to_string(v_indexes, ', '), 'nijedan'));
+    END IF;
+
+    IF p_index_cond IS NOT NULL THEN
+        SELECT array_agg(COALESCE(node ->> 'Index Cond', 'bez Index Cond')) INTO v_unbounded
+        FROM plan_nodes
+        WHERE node ->> 'Index Name' = ANY(p_indexes)
+        AND COALESCE(node ->> 'Index Cond', '') !~ p_index_cond;
+        IF v_unbounded IS NOT NULL THEN
+            v_problems := v_problems || FORMAT('Index Cond ne odgovara %s: %s',
+                p_index_cond, array_to_string(v_unbounded, '; '));
+        END IF;
+    END IF;
+
+    IF p_rows_factor IS NOT NULL THEN
+        SELECT (node ->> 'Plan Rows')::NUMERIC, (node ->> 'Actual Rows')::NUMERIC
+        INTO v_estimated, v_actual
+        FROM plan_nodes
+        WHERE node ->> 'Index Name' = ANY(p_indexes)
+        LIMIT 1;
+        IF v_estimated IS NOT NULL THEN
+            v_ratio := GREATEST(v_estimated, 1) / GREATEST(v_actual, 1);
+            IF v_ratio > p_rows_factor OR v_ratio < 1 / p_rows_factor THEN
+                v_problems := v_problems || FORMAT('procjena %s redaka, stvarno %s (faktor %s)',
+                    v_estimated, v_actual, p_rows_factor);
+            END IF;
+        END IF;
+    END IF;
+
+    IF cardinality(v_problems) = 0 THEN
+        INSERT INTO plan_checks (test_name, test_status, test_message)
+        VALUES (p_name, 'PASS', FORMAT('Indeksi: %s%s', array_to_string(v_indexes, ', '),
+            CASE WHEN v_estimated IS NOT NULL
+                 THEN FORMAT(' (procjena %s / stvarno %s redaka)', v_estimated, v_actual) ELSE '' END));
+        RAISE NOTICE ' PASS: % - %', p_name, array_to_string(v_indexes, ', ');
+    ELSE
+        INSERT INTO plan_checks (test_name, test_status, test_message)
+        VALUES (p_name, 'FAIL', array_to_string(v_problems, '; '));
+        RAISE NOTICE ' FAIL: % - %', p_name, array_to_string(v_problems, '; ');
+    END IF;
+EXCEPTION
+    WHEN OTHERS THEN
+        INSERT INTO plan_checks (test_name, test_status, test_message)
+        VALUES (p_name, 'FAIL', SQLERRM);
+        RAISE NOTICE ' FAIL: % - %', p_name, SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+\echo '--- Test 9.1: GET /tasks?assigned_to - v_tasks_details po izvrsitelju'
+SELECT pg_temp.check_plan('tasks filter assigned_to',
+    FORMAT('SELECT * FROM v_tasks_details WHERE 1=1 AND assignee_id = %s
+            ORDER BY priority DESC, due_date NULLS LAST', :plan_assignee),
+    ARRAY['idx_tasks_assigned_to'], p_rows_factor => 5);
+
+\echo '--- Test 9.2: GET /tasks?created_by&status - v_tasks_details po autoru i statusu'
+SELECT pg_temp.check_plan('tasks filter created_by + status',
+    FORMAT('SELECT * FROM v_tasks_details WHERE 1=1 AND status = %L AND creator_id = %s
+            ORDER BY priority DESC, due_date NULLS LAST', 'IN_PROGRESS', :plan_creator),
+    ARRAY['idx_tasks_created_by']);
+
+\echo '--- Test 9.3: GET /tasks/{id} - detalj zadatka'
+SELECT pg_temp.check_plan('tasks detail by id',
+    FORMAT('SELECT * FROM v_tasks_details WHERE task_id = %s', :plan_task),
+    ARRAY['tasks_pkey'], p_rows_factor => 2);
+
+\echo '--- Test 9.4: GET /tasks/my?overdue&limit - inlineana get_user_tasks()'
+-- SQL funkcija se inlinea: u planu je tasks s indeksom, a ne Function Scan
+SELECT pg_temp.check_plan('my tasks (get_user_tasks, overdue + limit)',
+    FORMAT('SELECT * FROM get_user_tasks(%s, NULL, FALSE) WHERE is_overdue LIMIT 20', :plan_assignee),
+    ARRAY['idx_tasks_assigned_to']);
+
+\echo '--- Test 9.5: GET /tasks/my/statistics - upit iz get_task_statistics()'
+-- plpgsql funkcija je u EXPLAIN-u poziva samo Function Scan, pa se planira
+-- njen stvarni RETURN QUERY iz pg_proc (ne kopija), s argumentom kao
+-- literalom - isto kao custom plan koji plpgsql radi za poziv
+SELECT substring(prosrc FROM 'RETURN QUERY(.*?);\s*END') AS plan_statistics_query
+FROM pg_proc WHERE oid = 'get_task_statistics(INTEGER)'::regprocedure \gset
+SELECT pg_temp.check_plan('my task statistics (get_task_statistics)',
+    replace(:'plan_statistics_query', 'p_user_id', :'plan_assignee'),
+    ARRAY['idx_tasks_assigned_to'], p_rows_factor => 5);
+
+\echo '--- Test 9.6: GET /audit/logs - najnovija stranica'
+SELECT pg_temp.check_plan('audit logs latest page',
+    'SELECT * FROM audit_log WHERE 1=1 ORDER BY changed_at DESC, audit_log_id DESC LIMIT 100',
+    ARRAY['idx_audit_log_time']);
+
+\echo '--- Test 9.7: GET /audit/logs?entity_name&entity_id - povijest entiteta'
+SELECT pg_temp.check_plan('audit logs by entity',
+    FORMAT('SELECT * FROM audit_log WHERE 1=1 AND entity_name = %L AND entity_id = %s
+            ORDER BY changed_at DESC, audit_log_id DESC LIMIT 100', 'tasks', :plan_task),
+    ARRAY['idx_audit_log_entity'], p_rows_factor => 10);
+
+\echo '--- Test 9.8: GET /audit/logs?entity_name&cursor - sljedeca stranica po entitetu'
+SELECT pg_temp.check_plan('audit logs by entity name, keyset page',
+    FORMAT('SELECT * FROM audit_log WHERE 1=1 AND entity_name = %L
+            AND (changed_at, audit_log_id) < (CURRENT_TIMESTAMP - INTERVAL %L, 2147483647)
+            ORDER BY changed_at DESC, audit_log_id DESC LIMIT 100', 'users', '30 days'),
+    ARRAY['idx_audit_log_entity_time']);
+
+\echo '--- Test 9.9: GET /audit/logs?changed_by - promjene korisnika'
+SELECT pg_temp.check_plan('audit logs by changed_by',
+    FORMAT('SELECT * FROM audit_log WHERE 1=1 AND changed_by = %s
+            ORDER BY changed_at DESC, audit_log_id DESC LIMIT 100', :plan_changed_by),
+    ARRAY['idx_audit_log_changed_by']);
+
+\echo '--- Test 9.10: GET /audit/logs?field=assigned_to&field_new - izrazni indeks'
+SELECT pg_temp.check_plan('audit logs by new assigned_to',
+    FORMAT($q$SELECT * FROM audit_log WHERE 1=1 AND new_value->>'assigned_to' = %L
+              ORDER BY changed_at DESC, audit_log_id DESC LIMIT 100$q$, :plan_assignee),
+    ARRAY['idx_audit_log_new_assigned_to', 'idx_audit_log_new_value']);
+
+\echo '--- Test 9.11: require_permission - direktna permisija korisnika'
+SELECT pg_temp.check_plan('permission check direct grant',
+    FORMAT($q$SELECT up.granted FROM user_permissions up
+              JOIN permissions p ON up.permission_id = p.permission_id
+              WHERE up.user_id = %s AND p.code = %L$q$, :plan_perm_user, 'TASK_READ_ALL'),
+    ARRAY['idx_user_permissions_user', 'uk_user_permissions'],
+    ARRAY['tasks', 'audit_log', 'user_permissions']);
+
+\echo '--- Test 9.12: require_permission - permisija kroz uloge'
+SELECT pg_temp.check_plan('permission check via roles',
+    FORMAT($q$SELECT EXISTS (SELECT 1 FROM user_roles ur
+              JOIN role_permissions rp ON ur.role_id = rp.role_id
+              WHERE ur.user_id = %s
+              AND rp.permission_id = (SELECT permission_id FROM permissions WHERE code = %L))$q$,
+           :plan_assignee, 'TASK_READ_ALL'),
+    ARRAY['idx_user_roles_user', 'uk_user_roles'],
+    ARRAY['tasks', 'audit_log', 'user_roles']);
+
+\echo '--- Test 9.13: GET /tasks/team - zadaci podstabla managera'
+-- Isti upit kao routers/tasks.py get_team_tasks (grane poredane i ogranicene)
+\set plan_team_tasks 'SELECT * FROM v_tasks_details WHERE task_id IN ((SELECT t.task_id FROM tasks t JOIN user_hierarchy h ON h.descendant_id = t.assigned_to WHERE h.ancestor_id = %1$s AND h.depth > 0 ORDER BY t.created_at DESC, t.task_id DESC LIMIT 100) UNION (SELECT t.task_id FROM tasks t WHERE EXISTS (SELECT 1 FROM task_assignees ta JOIN user_hierarchy h ON h.descendant_id = ta.user_id WHERE ta.task_id = t.task_id AND h.ancestor_id = %1$s AND h.depth > 0) ORDER BY t.created_at DESC, t.task_id DESC LIMIT 100)) ORDER BY created_at DESC, task_id DESC LIMIT 100'
+SELECT pg_temp.check_plan('team tasks via hierarchy',
+    FORMAT(:'plan_team_tasks', :plan_creator),
+    ARRAY['idx_user_hierarchy_subtree', 'pk_user_hierarchy']);
+
+\echo '--- Test 9.14: GET /users/{id}/team/statistics - GROUPING SETS nad podstablom'
+SELECT pg_temp.check_plan('team statistics via hierarchy',
+    FORMAT($q$WITH team AS (
+                  SELECT descendant_id AS user_id, depth FROM user_hierarchy
+                  WHERE ancestor_id = %1$s AND depth > 0),
+              member_tasks AS (
+                  SELECT t.assigned_to AS user_id, t.task_id, t.status, t.due_date FROM tasks t
+                  WHERE t.assigned_to IN (SELECT user_id FROM team)
+                  UNION
+                  SELECT ta.user_id, t.task_id, t.status, t.due_date FROM task_assignees ta
+                  JOIN tasks t ON t.task_id = ta.task_id
+                  WHERE ta.user_id IN (SELECT user_id FROM team))
+              SELECT m.user_id, COUNT(DISTINCT mt.task_id),
+                     COUNT(DISTINCT mt.task_id) FILTER (WHERE mt.status = 'COMPLETED')
+              FROM team m LEFT JOIN member_tasks mt ON mt.user_id = m.user_id
+              GROUP BY GROUPING SETS ((m.user_id, m.depth), ())$q$, :plan_creator),
+    ARRAY['idx_user_hierarchy_subtree']);
+
+\echo '--- Test 9.15: GET /audit/entity/{name}/{id}/as-of - sidro i rep ograniceni kljucem snapshota'
+-- Inlineana SQL funkcija: granica (changed_at, audit_log_id) > kljuc
+-- snapshota mora biti Index Cond na idx_audit_log_entity (i za trazenje
+-- sidra i za rep), inace se cita cijela povijest entiteta
+SELECT pg_temp.check_plan('entity state as-of bounded by snapshot',
+    FORMAT('SELECT * FROM get_entity_state_as_of(%L, %s, CURRENT_TIMESTAMP::TIMESTAMP)', 'tasks', :plan_task),
+    ARRAY['idx_audit_log_entity'], p_index_cond => 'audit_log_id');
+
+\echo '--- Test 9.16: GET /tasks/team - vrh hijerarhije (cijela organizacija)'
+-- Podstablo pokriva gotovo sve zadatke: stranica mora citati
+-- idx_tasks_created redom do LIMIT-a, a ne sortirati cijelu tablicu
+SELECT pg_temp.check_plan('team tasks for org root',
+    FORMAT(:'plan_team_tasks', :plan_org_root),
+    ARRAY['idx_tasks_created']);
+
+SELECT COALESCE(json_agg(json_build_object(
+           'test_name', test_name, 'test_status', test_status, 'test_message', test_message)
+           ORDER BY check_id), '[]') AS plan_results
+FROM plan_checks \gset
+
+ROLLBACK;
+
+INSERT INTO test_results (test_category, test_name, test_status, test_message)
+SELECT 'PLANS', r.test_name, r.test_status, r.test_message
+FROM json_to_recordset(:'plan_results'::json) AS r(test_name TEXT, test_status TEXT, test_message TEXT);
@@ -0,0 +1,157 @@
+"""
+Testovi citanja arhive audit loga (backend/app/audit_archive.py), cachea
+otvorenih segmenata i rekonstrukcije stanja iz arhive u
+/audit/entity/{name}/{id}/as-of
+
+Pokretanje (iz backend/ direktorija zbog .env, baza nije potrebna):
+    python -m unittest discover -s ../tests -p "test_*.py"
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app import audit_archive as archive  # noqa: E402
+from app.routers import audit as audit_router  # noqa: E402
+
+
+BASE = datetime(2024, 3, 1, 12, 0, 0)
+# Zona sesije baze - namjerno razlicita od zone procesa API-ja
+SESSION_TZ = timezone(timedelta(hours=-7))
+
+
+def audit_row(audit_log_id, changed_at, action, new_value, payload_format="full"):
+    return {
+        "audit_log_id": audit_log_id,
+        "entity_name": "tasks",
+        "entity_id": 7,
+        "action": action,
+        "old_value": None,
+        "new_value": new_value,
+        "changed_by": 1,
+        "changed_at": changed_at,
+        "ip_address": None,
+        "payload_format": payload_format,
+    }
+
+
+class FakeCursor:
+    """
+    Cursor bez baze: tablica nema zapisa do ts, funkcija nije nasla stanje.
+    ::timestamptz::timestamp pretvara u SESSION_TZ, kao PostgreSQL.
+    """
+
+    def __init__(self):
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        query, params = self.executed[-1]
+        if "::timestamptz::timestamp" in query:
+            return {"ts": params[0].astimezone(SESSION_TZ).replace(tzinfo=None)}
+        if "get_entity_state_as_of" in query:
+            return {"state": None, "last_audit_log_id": None, "last_changed_at": None,
+                    "snapshot_audit_log_id": None, "replayed_changes": 0}
+        return None
+
+    def fetchall(self):
+        return []
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cur = FakeCursor()
+
+    def cursor(self):
+        return self.cur
+
+
+class ArchivedStateAsOfTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        patcher = mock.patch.object(archive.settings, "audit_archive_dir", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        archive._segments.clear()
+        self.addCleanup(archive._segments.clear)
+
+        rows = [
+            audit_row(1, BASE, "INSERT", {"task_id": 7, "title": "A", "status": "NEW"}),
+            audit_row(2, BASE + timedelta(hours=1), "UPDATE", {"status": "IN_PROGRESS"}, "diff"),
+        ]
+        meta = archive._write_segment("segment_000001", rows, 1000)
+        archive._write_manifest({**archive._empty_manifest(), "segments": [meta]})
+
+    def test_as_of_with_offset_timestamp_reads_archive(self):
+        conn = FakeConnection()
+        ts = (BASE + timedelta(minutes=30)).replace(tzinfo=SESSION_TZ).astimezone(
+            timezone(timedelta(hours=5)))
+
+        result = asyncio.run(audit_router.get_entity_state_as_of(
+            "tasks", 7, ts, current_user={"user_id": 1}, conn=conn))
+
+        self.assertTrue(result.exists)
+        self.assertEqual(result.last_audit_log_id, 1)
+        self.assertEqual(result.state["status"], "NEW")
+        self.assertEqual(result.as_of, BASE + timedelta(minutes=30))
+        # Funkcija i arhiva dobivaju isto vrijeme koje je pretvorila baza
+        self.assertIn("::timestamptz::timestamp", conn.cur.executed[0][0])
+        self.assertEqual(conn.cur.executed[1][1][2], BASE + timedelta(minutes=30))
+        self.assertTrue(all(
+            not isinstance(p, datetime) or p.tzinfo is None
+            for _, params in conn.cur.executed[1:] for p in (params or ())
+        ))
+
+
+class SegmentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for name, value in (("audit_archive_dir", self.dir), ("audit_archive_open_segments", 2)):
+            patcher = mock.patch.object(archive.settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        archive._segments.clear()
+        self.addCleanup(archive._segments.clear)
+        self.metas = [
+            archive._write_segment(f"segment_{i:06d}", [
+                audit_row(i, BASE + timedelta(hours=i), "INSERT", {"task_id": 7})
+            ], 1000)
+            for i in range(1, 4)
+        ]
+
+    def test_open_segments_bounded_lru(self):
+        first, second, third = self.metas
+        archive._segment(first)
+        archive._segment(second)
+        archive._segment(first)
+        archive._segment(third)
+        self.assertEqual(list(archive._segments), [first["name"], third["name"]])
+
+    def test_missing_sidecar_is_error(self):
+        os.remove(os.path.join(self.dir, self.metas[0]["name"] + ".entity.idx"))
+        with self.assertRaises(ValueError):
+            archive._segment(self.metas[0])
+        self.assertFalse(os.path.exists(os.path.join(self.dir, self.metas[0]["name"] + ".entity.idx")))
+
+
+if __name__ == "__main__":
+    unittest.main()
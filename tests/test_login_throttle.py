@@ -0,0 +1,108 @@
+"""
+Testovi brute-force zastite prijava (backend/app/login_throttle.py)
+
+Pokretanje (iz backend/ direktorija zbog .env, baza nije potrebna):
+    python -m unittest discover -s ../tests -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app import login_throttle as lt  # noqa: E402
+
+
+WINDOW = 60
+IP_THRESHOLD = 20
+USERNAME_THRESHOLD = 10
+
+
+class FakeClock:
+    """Zamjena za time.monotonic - vrijeme pomice test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class LoginThrottleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(lt.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.throttle = lt.LoginThrottle(WINDOW, IP_THRESHOLD, USERNAME_THRESHOLD, 1000)
+
+    def attempt(self, ip: str, username: str, password_ok: bool) -> int:
+        """Isti tok kao /auth/login: 429, 401 ili 200"""
+        if self.throttle.is_throttled(ip, username):
+            self.throttle.record_throttled(ip, username, "test")
+            return 429
+        if not password_ok:
+            self.throttle.record_failure(ip, username)
+            return 401
+        self.throttle.reset_username(username)
+        return 200
+
+    def lock_username(self, username: str, ips) -> None:
+        for i in range(USERNAME_THRESHOLD):
+            self.assertEqual(self.attempt(ips[i % len(ips)], username, False), 401)
+
+    def test_throttled_attempts_do_not_count(self):
+        self.lock_username("ana", ["10.0.0.1"])
+        for _ in range(50):
+            self.assertEqual(self.attempt("10.0.0.1", "ana", False), 429)
+
+        snapshot = self.throttle.snapshot()
+        self.assertEqual(snapshot["usernames"][0]["failures"], USERNAME_THRESHOLD)
+        self.assertEqual(snapshot["ips"][0]["failures"], USERNAME_THRESHOLD)
+        self.assertEqual(snapshot["pending_attempts"], 50)
+
+    def test_username_throttle_falls_back_to_bcrypt_for_clean_ip(self):
+        self.lock_username("ana", ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(self.attempt("10.0.0.1", "ana", True), 429)
+        self.assertEqual(self.attempt("192.168.1.5", "ana", True), 200)
+
+    def test_clean_ip_with_wrong_password_is_throttled_after_one_failure(self):
+        self.lock_username("ana", ["10.0.0.1"])
+        self.assertEqual(self.attempt("10.0.0.9", "ana", False), 401)
+        self.assertEqual(self.attempt("10.0.0.9", "ana", False), 429)
+
+    def test_ip_threshold_applies_to_any_username(self):
+        for i in range(IP_THRESHOLD):
+            self.assertEqual(self.attempt("10.0.0.1", "user%d" % i, False), 401)
+        self.assertEqual(self.attempt("10.0.0.1", "ana", True), 429)
+
+    def test_correct_login_succeeds_after_window_despite_ongoing_attack(self):
+        attackers = ["10.0.0.%d" % i for i in range(1, 6)]
+        self.lock_username("ana", attackers)
+
+        # Vlasnik racuna je i sam jednom pogrijesio lozinku
+        self.assertEqual(self.attempt("192.168.1.5", "ana", False), 401)
+
+        # Napadac salje pokusaje svake sekunde; u prvom prozoru svi su odbijeni
+        for _ in range(WINDOW):
+            self.clock.now += 1
+            for ip in attackers:
+                self.assertEqual(self.attempt(ip, "ana", False), 429)
+        self.assertEqual(self.attempt("192.168.1.5", "ana", True), 429)
+
+        victim_codes = []
+        for second in range(WINDOW + 1):
+            self.clock.now += 1
+            for ip in attackers:
+                self.attempt(ip, "ana", False)
+            if second % 10 == 0:
+                victim_codes.append(self.attempt("192.168.1.5", "ana", True))
+
+        self.assertEqual(victim_codes[-1], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
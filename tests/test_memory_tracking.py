@@ -0,0 +1,72 @@
+"""
+Testovi pracenja memorije po zahtjevu (backend/app/memory_tracking.py)
+
+Pokretanje (iz backend/ direktorija zbog .env, baza nije potrebna):
+    python -m unittest discover -s ../tests -p "test_*.py"
+"""
+
+import os
+import sys
+import tracemalloc
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app import memory_tracking, metrics  # noqa: E402
+
+
+def histogram_count(route: str) -> int:
+    _, histograms = metrics._local_totals()
+    data = histograms.get(metrics._key("http_request_peak_memory_bytes", {"route": route}))
+    return sum(data[:-1]) if data else 0
+
+
+class PeakMemoryAttributionTest(unittest.TestCase):
+
+    def setUp(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self.addCleanup(tracemalloc.stop)
+        patcher = mock.patch.object(memory_tracking.settings, "memory_tracking_snapshot_rate", 0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        memory_tracking._routes.clear()
+        self.addCleanup(memory_tracking._routes.clear)
+
+    def measure(self, route: str, concurrent: bool) -> None:
+        metrics.request_started()
+        token = memory_tracking.begin()
+        self.assertIsNotNone(token)
+        if concurrent:
+            metrics.request_started()       # drugi zahtjev na istom event loopu
+        data = bytearray(4 * 1024 * 1024)
+        del data
+        if concurrent:
+            metrics.request_finished()
+        memory_tracking.finish(token, route)
+        metrics.request_finished()
+
+    def route_stats(self, route: str) -> dict:
+        return next(r for r in memory_tracking.report()["routes"] if r["route"] == route)
+
+    def test_isolated_measurement_counts_towards_route_peak(self):
+        self.measure("/test/isolated", concurrent=False)
+        stats = self.route_stats("/test/isolated")
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["concurrent_requests"], 0)
+        self.assertGreaterEqual(stats["peak_bytes_max"], 4 * 1024 * 1024)
+        self.assertEqual(histogram_count("/test/isolated"), 1)
+
+    def test_overlapped_measurement_counted_separately(self):
+        self.measure("/test/overlapped", concurrent=True)
+        stats = self.route_stats("/test/overlapped")
+        self.assertEqual(stats["requests"], 0)
+        self.assertEqual(stats["peak_bytes_max"], 0)
+        self.assertEqual(stats["concurrent_requests"], 1)
+        self.assertEqual(stats["concurrent_overlap_max"], 1)
+        self.assertEqual(histogram_count("/test/overlapped"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
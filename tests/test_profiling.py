@@ -0,0 +1,175 @@
+"""
+Testovi profiliranja zahtjeva (backend/app/profiling.py, middleware u main.py)
+
+Pokretanje (iz backend/ direktorija zbog .env, baza nije potrebna):
+    python -m unittest discover -s ../tests -p "test_*.py"
+"""
+
+import asyncio
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+from app import main, profiling  # noqa: E402
+
+
+TOKEN = "test-token"
+
+
+def spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profiled_request_work() -> None:
+    spin(0.1)
+
+
+def other_request_work() -> None:
+    spin(0.2)
+
+
+def stream_body_work() -> None:
+    spin(0.05)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/profiled")
+    async def profiled():
+        profiled_request_work()
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    @app.get("/other")
+    async def other():
+        other_request_work()
+        return {"ok": True}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for _ in range(3):
+                stream_body_work()
+                yield b"line\n"
+        return StreamingResponse(body(), media_type="text/plain")
+
+    # Isti redoslijed kao main.app: metrike su vanjski middleware
+    app.middleware("http")(main.profile_request)
+    app.middleware("http")(main.collect_metrics)
+    return app
+
+
+async def call(app, path: str, headers: dict = None) -> dict:
+    """ASGI poziv bez HTTP klijenta - vraca status, headere i tijelo"""
+    messages = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("test", 80),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    await app(scope, receive, send)
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    return {
+        "status": start["status"],
+        "headers": {k.decode(): v.decode() for k, v in start["headers"]},
+        "body": b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body"),
+    }
+
+
+def profile_headers(mode: str) -> dict:
+    return {profiling.PROFILE_HEADER: TOKEN, profiling.PROFILE_FORMAT_HEADER: mode}
+
+
+class RequestProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for name, value in (("profiling_dir", self.dir), ("profiling_token", TOKEN),
+                            ("profiling_sample_interval_ms", 1)):
+            patcher = mock.patch.object(profiling.settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.app = build_app()
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.dir, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_sample_profile_excludes_concurrent_requests(self):
+        async def scenario():
+            profiled = asyncio.ensure_future(call(self.app, "/profiled", profile_headers("sample")))
+            await asyncio.sleep(0.15)
+            await call(self.app, "/other")
+            return await profiled
+
+        response = asyncio.run(scenario())
+        name = response["headers"][profiling.PROFILE_ID_HEADER.lower()]
+        content = self.read(name)
+        self.assertIn("profiled_request_work", content)
+        self.assertNotIn("other_request_work", content)
+
+    def test_cprofile_skipped_while_other_request_in_flight(self):
+        async def scenario():
+            slow = asyncio.ensure_future(call(self.app, "/slow"))
+            await asyncio.sleep(0.05)
+            profiled = await call(self.app, "/other", profile_headers("cprofile"))
+            await slow
+            return profiled
+
+        response = asyncio.run(scenario())
+        self.assertNotIn(profiling.PROFILE_ID_HEADER.lower(), response["headers"])
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_cprofile_name_counts_overlapping_requests(self):
+        async def scenario():
+            profiled = asyncio.ensure_future(call(self.app, "/profiled", profile_headers("cprofile")))
+            await asyncio.sleep(0.15)
+            await call(self.app, "/other")
+            return await profiled
+
+        response = asyncio.run(scenario())
+        self.assertIn("_c1.pstats", response["headers"][profiling.PROFILE_ID_HEADER.lower()])
+
+    def test_streaming_response_profiled_until_body_end(self):
+        response = asyncio.run(call(self.app, "/stream", profile_headers("cprofile")))
+        self.assertEqual(response["body"], b"line\n" * 3)
+        name = response["headers"][profiling.PROFILE_ID_HEADER.lower()]
+        self.assertIn("_stream", name)
+        functions = {func[2] for func in pstats.Stats(os.path.join(self.dir, name)).stats}
+        self.assertIn("stream_body_work", functions)
+
+
+if __name__ == "__main__":
+    unittest.main()